@@ -99,5 +99,20 @@ def dev(
     )
 
 
+@app.command()
+def importtime(
+    module: str = "open_webui.main",
+    budget: Optional[float] = None,
+    top: int = 25,
+):
+    from open_webui.utils.importtime import IMPORT_TIME_BUDGET, profile_imports
+
+    budget = IMPORT_TIME_BUDGET if budget is None else budget
+    report = profile_imports(module)
+    typer.echo(report.format(budget, top))
+    if report.exceeds(budget):
+        raise typer.Exit(code=1)
+
+
 if __name__ == "__main__":
     app()
@@ -761,6 +761,33 @@ AZURE_STORAGE_ENDPOINT = os.environ.get("AZURE_STORAGE_ENDPOINT", None)
 AZURE_STORAGE_CONTAINER_NAME = os.environ.get("AZURE_STORAGE_CONTAINER_NAME", None)
 AZURE_STORAGE_KEY = os.environ.get("AZURE_STORAGE_KEY", None)
 
+# Part size for multipart / resumable / block uploads to S3, GCS and Azure.
+# Files larger than this are uploaded in parts of this size.
+try:
+    STORAGE_UPLOAD_CHUNK_SIZE = max(
+        int(os.environ.get("STORAGE_UPLOAD_CHUNK_SIZE") or 8 * 1024 * 1024),
+        5 * 1024 * 1024,
+    )
+except ValueError:
+    STORAGE_UPLOAD_CHUNK_SIZE = 8 * 1024 * 1024
+
+# Local copies of S3/GCS/Azure objects kept in UPLOAD_DIR, in bytes; the least
+# recently used copies are removed above this size. 0 keeps everything.
+try:
+    STORAGE_CACHE_MAX_SIZE = int(
+        os.environ.get("STORAGE_CACHE_MAX_SIZE") or 10 * 1024 * 1024 * 1024
+    )
+except ValueError:
+    STORAGE_CACHE_MAX_SIZE = 10 * 1024 * 1024 * 1024
+
+# Seconds a local copy is served without checking the remote object's etag
+try:
+    STORAGE_CACHE_VALIDATE_INTERVAL = int(
+        os.environ.get("STORAGE_CACHE_VALIDATE_INTERVAL") or 300
+    )
+except ValueError:
+    STORAGE_CACHE_VALIDATE_INTERVAL = 300
+
 ####################################
 # File Upload DIR
 ####################################
@@ -1351,6 +1378,21 @@ JSON格式：{ "title": "你的简洁标题" }
 {{MESSAGES:END:2}}
 </chat_history>"""
 
+
+# Titles of several chats in one request, used by the background task queue
+DEFAULT_BATCH_TITLE_GENERATION_PROMPT_TEMPLATE = """### 任务：
+为下面每一段聊天历史分别生成一个简洁的、带有表情符号的3-5个字的标题，概括该段聊天的内容。
+### 指南：
+- 标题应清晰地表示对话的主题或主要内容。
+- 使用表情符号来增强对主题的理解，但避免使用引号或特殊格式。
+- 使用聊天的主要语言编写标题；如果是多语言的情况，则默认使用英语。
+- 优先考虑准确性而非过度创意；保持清晰简洁。
+- 每段聊天历史相互独立，不要混合它们的内容。
+### 输出：
+JSON格式，键为每段聊天历史的 id：{ "titles": { "1": "第一段的标题", "2": "第二段的标题" } }
+### 聊天历史：
+{{CHATS}}"""
+
 TAGS_GENERATION_PROMPT_TEMPLATE = PersistentConfig(
     "TAGS_GENERATION_PROMPT_TEMPLATE",
     "task.tags.prompt_template",
@@ -1699,10 +1741,9 @@ VECTOR_DB = os.environ.get("VECTOR_DB", "chroma")
 CHROMA_DATA_PATH = f"{DATA_DIR}/vector_db"
 
 if VECTOR_DB == "chroma":
-    import chromadb
-
-    CHROMA_TENANT = os.environ.get("CHROMA_TENANT", chromadb.DEFAULT_TENANT)
-    CHROMA_DATABASE = os.environ.get("CHROMA_DATABASE", chromadb.DEFAULT_DATABASE)
+    # chromadb.DEFAULT_TENANT and DEFAULT_DATABASE, without importing chromadb
+    CHROMA_TENANT = os.environ.get("CHROMA_TENANT", "default_tenant")
+    CHROMA_DATABASE = os.environ.get("CHROMA_DATABASE", "default_database")
     CHROMA_HTTP_HOST = os.environ.get("CHROMA_HTTP_HOST", "")
     CHROMA_HTTP_PORT = int(os.environ.get("CHROMA_HTTP_PORT", "8000"))
     CHROMA_CLIENT_AUTH_PROVIDER = os.environ.get("CHROMA_CLIENT_AUTH_PROVIDER", "")
@@ -64,6 +64,7 @@ class ERROR_MESSAGES(str, Enum):
     FILE_NOT_SUPPORTED = "您尝试上传的文件格式不受支持，请上传支持的格式后重试。"
 
     NOT_FOUND = "未找到您要查找的内容 :/"
+    INVALID_CURSOR = "分页游标无效，请从第一页重新加载。"
     USER_NOT_FOUND = "未找到您要查找的用户 :/"
     API_KEY_NOT_FOUND = "API密钥缺失，请提供有效的API密钥以访问此功能。"
     API_KEY_NOT_ALLOWED = "环境中未启用API密钥的使用。"
@@ -106,6 +107,7 @@ class ERROR_MESSAGES(str, Enum):
         "检测到重复内容，请提供唯一内容以继续。"
     )
     FILE_NOT_PROCESSED = "此文件的提取内容不可用，请确保文件已处理后再继续。"
+    MODELS_LOADING = "嵌入和重排序模型正在加载，请稍后重试。"
 
 
 class TASKS(str, Enum):
@@ -53,13 +53,15 @@ if USE_CUDA.lower() == "true":
 else:
     DEVICE_TYPE = "cpu"
 
-try:
-    import torch
+# MPS only exists on macOS, skip importing torch at startup elsewhere
+if sys.platform == "darwin":
+    try:
+        import torch
 
-    if torch.backends.mps.is_available() and torch.backends.mps.is_built():
-        DEVICE_TYPE = "mps"
-except Exception:
-    pass
+        if torch.backends.mps.is_available() and torch.backends.mps.is_built():
+            DEVICE_TYPE = "mps"
+    except Exception:
+        pass
 
 ####################################
 # LOGGING
@@ -317,6 +319,24 @@ ENABLE_REALTIME_CHAT_SAVE = (
     os.environ.get("ENABLE_REALTIME_CHAT_SAVE", "False").lower() == "true"
 )
 
+# Seconds between full-content snapshots while a response streams; the events
+# in between only carry deltas. 0 sends the full content with every event.
+CHAT_STREAM_SNAPSHOT_INTERVAL = os.environ.get("CHAT_STREAM_SNAPSHOT_INTERVAL", "5")
+
+try:
+    CHAT_STREAM_SNAPSHOT_INTERVAL = float(CHAT_STREAM_SNAPSHOT_INTERVAL)
+except Exception:
+    CHAT_STREAM_SNAPSHOT_INTERVAL = 5.0
+
+# Seconds during which streamed chunks are collected into one socket event or
+# one write to the client. 0 sends every chunk on its own.
+CHAT_STREAM_BATCH_WINDOW = os.environ.get("CHAT_STREAM_BATCH_WINDOW", "0.05")
+
+try:
+    CHAT_STREAM_BATCH_WINDOW = float(CHAT_STREAM_BATCH_WINDOW)
+except Exception:
+    CHAT_STREAM_BATCH_WINDOW = 0.05
+
 ####################################
 # REDIS
 ####################################
@@ -325,6 +345,367 @@ REDIS_URL = os.environ.get("REDIS_URL", "")
 REDIS_SENTINEL_HOSTS = os.environ.get("REDIS_SENTINEL_HOSTS", "")
 REDIS_SENTINEL_PORT = os.environ.get("REDIS_SENTINEL_PORT", "26379")
 
+####################################
+# USER CACHE
+####################################
+
+# Seconds an authenticated user is served from memory before being reloaded
+USER_CACHE_TTL = os.environ.get("USER_CACHE_TTL", "10")
+try:
+    USER_CACHE_TTL = int(USER_CACHE_TTL)
+except ValueError:
+    USER_CACHE_TTL = 10
+
+USER_CACHE_MAX_SIZE = os.environ.get("USER_CACHE_MAX_SIZE", "10000")
+try:
+    USER_CACHE_MAX_SIZE = int(USER_CACHE_MAX_SIZE)
+except ValueError:
+    USER_CACHE_MAX_SIZE = 10000
+
+# Seconds between batched writes of users' last_active_at timestamps
+USER_LAST_ACTIVE_FLUSH_INTERVAL = os.environ.get(
+    "USER_LAST_ACTIVE_FLUSH_INTERVAL", "60"
+)
+try:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = int(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+except ValueError:
+    USER_LAST_ACTIVE_FLUSH_INTERVAL = 60
+
+####################################
+# PLUGIN CACHE
+####################################
+
+# Load every active Tool and Function at startup instead of on first use
+ENABLE_PLUGIN_WARMUP = os.environ.get("ENABLE_PLUGIN_WARMUP", "False").lower() == "true"
+
+####################################
+# COMPLETION CACHE
+####################################
+
+# Serve repeated deterministic (temperature 0) chat completions from a cache
+ENABLE_COMPLETION_CACHE = (
+    os.environ.get("ENABLE_COMPLETION_CACHE", "False").lower() == "true"
+)
+
+# Comma-separated model ids to cache; empty caches every model
+COMPLETION_CACHE_MODELS = [
+    model_id.strip()
+    for model_id in os.environ.get("COMPLETION_CACHE_MODELS", "").split(",")
+    if model_id.strip()
+]
+
+# Shared tier behind the in-memory LRU: "redis", "database" or "memory" (none).
+# Defaults to Redis when REDIS_URL is set.
+COMPLETION_CACHE_STORE = os.environ.get("COMPLETION_CACHE_STORE", "").lower()
+
+try:
+    COMPLETION_CACHE_TTL = int(os.environ.get("COMPLETION_CACHE_TTL") or 3600)
+except ValueError:
+    COMPLETION_CACHE_TTL = 3600
+
+# Entries kept in memory per worker
+try:
+    COMPLETION_CACHE_MAX_SIZE = int(os.environ.get("COMPLETION_CACHE_MAX_SIZE") or 1000)
+except ValueError:
+    COMPLETION_CACHE_MAX_SIZE = 1000
+
+# Responses larger than this many bytes are not cached
+try:
+    COMPLETION_CACHE_MAX_ENTRY_SIZE = int(
+        os.environ.get("COMPLETION_CACHE_MAX_ENTRY_SIZE") or 256 * 1024
+    )
+except ValueError:
+    COMPLETION_CACHE_MAX_ENTRY_SIZE = 256 * 1024
+
+####################################
+# PIPELINES
+####################################
+
+# Seconds RAGFlow assistant lookups (kb_ids) and app sessions are cached for
+# pipeline filters; updates made through this instance invalidate immediately
+try:
+    RAGFLOW_ASSISTANT_CACHE_TTL = int(
+        os.environ.get("RAGFLOW_ASSISTANT_CACHE_TTL") or 60
+    )
+except ValueError:
+    RAGFLOW_ASSISTANT_CACHE_TTL = 60
+
+####################################
+# CODE INTERPRETER (JUPYTER KERNEL POOL)
+####################################
+
+# Kernels started ahead of time per Jupyter server; 0 disables pre-warming
+try:
+    JUPYTER_KERNEL_POOL_SIZE = max(
+        int(os.environ.get("JUPYTER_KERNEL_POOL_SIZE") or 1), 0
+    )
+except ValueError:
+    JUPYTER_KERNEL_POOL_SIZE = 1
+
+# Maximum kernels open at the same time per Jupyter server
+try:
+    JUPYTER_KERNEL_POOL_MAX_KERNELS = max(
+        int(os.environ.get("JUPYTER_KERNEL_POOL_MAX_KERNELS") or 10), 1
+    )
+except ValueError:
+    JUPYTER_KERNEL_POOL_MAX_KERNELS = 10
+
+# Seconds a chat's kernel is kept after its last execution
+try:
+    JUPYTER_KERNEL_IDLE_TIMEOUT = int(
+        os.environ.get("JUPYTER_KERNEL_IDLE_TIMEOUT") or 600
+    )
+except ValueError:
+    JUPYTER_KERNEL_IDLE_TIMEOUT = 600
+
+####################################
+# RAG INFERENCE SIDECAR
+####################################
+
+# Run local embedding and reranking models in one process shared by all workers
+ENABLE_RAG_INFERENCE_SIDECAR = (
+    os.environ.get("ENABLE_RAG_INFERENCE_SIDECAR", "False").lower() == "true"
+)
+
+RAG_INFERENCE_SIDECAR_SOCKET = os.environ.get(
+    "RAG_INFERENCE_SIDECAR_SOCKET", f"{DATA_DIR}/cache/inference.sock"
+)
+
+# Inputs from concurrent requests encoded together in one model call at most
+try:
+    RAG_INFERENCE_SIDECAR_MAX_BATCH_SIZE = max(
+        int(os.environ.get("RAG_INFERENCE_SIDECAR_MAX_BATCH_SIZE") or 64), 1
+    )
+except ValueError:
+    RAG_INFERENCE_SIDECAR_MAX_BATCH_SIZE = 64
+
+# Seconds a request waits for others to share its batch
+RAG_INFERENCE_SIDECAR_BATCH_WAIT = os.environ.get(
+    "RAG_INFERENCE_SIDECAR_BATCH_WAIT", "0.005"
+)
+try:
+    RAG_INFERENCE_SIDECAR_BATCH_WAIT = float(RAG_INFERENCE_SIDECAR_BATCH_WAIT)
+except ValueError:
+    RAG_INFERENCE_SIDECAR_BATCH_WAIT = 0.005
+
+# Seconds to wait for a response, including loading the model on first use
+RAG_INFERENCE_SIDECAR_TIMEOUT = os.environ.get("RAG_INFERENCE_SIDECAR_TIMEOUT", "300")
+try:
+    RAG_INFERENCE_SIDECAR_TIMEOUT = float(RAG_INFERENCE_SIDECAR_TIMEOUT)
+except ValueError:
+    RAG_INFERENCE_SIDECAR_TIMEOUT = 300.0
+
+####################################
+# RAG LOCAL MODEL ENGINE
+####################################
+
+# "torch" runs local embedding and reranking models with sentence-transformers,
+# "onnx" exports them to ONNX and runs them with ONNX Runtime
+RAG_LOCAL_MODEL_ENGINE = os.environ.get("RAG_LOCAL_MODEL_ENGINE", "torch").lower()
+
+# Quantize ONNX model weights to int8
+RAG_ONNX_QUANTIZE = os.environ.get("RAG_ONNX_QUANTIZE", "True").lower() == "true"
+
+# Threads used within one ONNX Runtime call; 0 uses one per physical core
+try:
+    RAG_ONNX_INTRA_OP_THREADS = max(
+        int(os.environ.get("RAG_ONNX_INTRA_OP_THREADS") or 0), 0
+    )
+except ValueError:
+    RAG_ONNX_INTRA_OP_THREADS = 0
+
+# Threads running independent graph nodes in parallel
+try:
+    RAG_ONNX_INTER_OP_THREADS = max(
+        int(os.environ.get("RAG_ONNX_INTER_OP_THREADS") or 1), 1
+    )
+except ValueError:
+    RAG_ONNX_INTER_OP_THREADS = 1
+
+####################################
+# RAG COLBERT INDEX
+####################################
+
+# Use ColBERT token embeddings stored at ingestion as a first-stage retriever
+# in hybrid search, next to BM25 and vector search
+ENABLE_RAG_COLBERT_RETRIEVER = (
+    os.environ.get("ENABLE_RAG_COLBERT_RETRIEVER", "False").lower() == "true"
+)
+
+# Collections with fewer tokens are scored exhaustively instead of through
+# the centroid prefilter
+try:
+    RAG_COLBERT_MIN_CENTROID_TOKENS = int(
+        os.environ.get("RAG_COLBERT_MIN_CENTROID_TOKENS") or 65536
+    )
+except ValueError:
+    RAG_COLBERT_MIN_CENTROID_TOKENS = 65536
+
+try:
+    RAG_COLBERT_MAX_CENTROIDS = min(
+        max(int(os.environ.get("RAG_COLBERT_MAX_CENTROIDS") or 1024), 1), 65536
+    )
+except ValueError:
+    RAG_COLBERT_MAX_CENTROIDS = 1024
+
+# Nearest centroids probed per query token
+try:
+    RAG_COLBERT_NPROBE = max(int(os.environ.get("RAG_COLBERT_NPROBE") or 4), 1)
+except ValueError:
+    RAG_COLBERT_NPROBE = 4
+
+# Documents passed from the centroid prefilter to exact MaxSim scoring
+try:
+    RAG_COLBERT_CANDIDATES = max(
+        int(os.environ.get("RAG_COLBERT_CANDIDATES") or 256), 1
+    )
+except ValueError:
+    RAG_COLBERT_CANDIDATES = 256
+
+####################################
+# ANALYTICS INGESTION
+####################################
+
+# Page views and login records are buffered in memory and written in batches
+ANALYTICS_FLUSH_INTERVAL = os.environ.get("ANALYTICS_FLUSH_INTERVAL", "5")
+try:
+    ANALYTICS_FLUSH_INTERVAL = float(ANALYTICS_FLUSH_INTERVAL)
+except ValueError:
+    ANALYTICS_FLUSH_INTERVAL = 5.0
+
+ANALYTICS_BATCH_SIZE = os.environ.get("ANALYTICS_BATCH_SIZE", "500")
+try:
+    ANALYTICS_BATCH_SIZE = int(ANALYTICS_BATCH_SIZE)
+except ValueError:
+    ANALYTICS_BATCH_SIZE = 500
+
+# Records beyond this many pending entries are dropped and counted
+ANALYTICS_BUFFER_MAX_SIZE = os.environ.get("ANALYTICS_BUFFER_MAX_SIZE", "10000")
+try:
+    ANALYTICS_BUFFER_MAX_SIZE = int(ANALYTICS_BUFFER_MAX_SIZE)
+except ValueError:
+    ANALYTICS_BUFFER_MAX_SIZE = 10000
+
+####################################
+# BACKGROUND TASKS
+####################################
+
+# Title and tag generation run after the answer, in a queue below chat
+# traffic: at most this many at once, and per task model
+try:
+    BACKGROUND_TASK_CONCURRENCY = max(
+        int(os.environ.get("BACKGROUND_TASK_CONCURRENCY") or 4), 1
+    )
+except ValueError:
+    BACKGROUND_TASK_CONCURRENCY = 4
+
+try:
+    BACKGROUND_TASK_MODEL_CONCURRENCY = max(
+        int(os.environ.get("BACKGROUND_TASK_MODEL_CONCURRENCY") or 2), 1
+    )
+except ValueError:
+    BACKGROUND_TASK_MODEL_CONCURRENCY = 2
+
+# Seconds a task may wait in the queue before it is dropped; titles then fall
+# back to the first message
+try:
+    BACKGROUND_TASK_DEADLINE = float(os.environ.get("BACKGROUND_TASK_DEADLINE") or 120)
+except ValueError:
+    BACKGROUND_TASK_DEADLINE = 120.0
+
+# Queued titles generated with one prompt for the same user and task model;
+# 1 disables batching, which needs the default title prompt template
+try:
+    BACKGROUND_TASK_TITLE_BATCH_SIZE = max(
+        int(os.environ.get("BACKGROUND_TASK_TITLE_BATCH_SIZE") or 1), 1
+    )
+except ValueError:
+    BACKGROUND_TASK_TITLE_BATCH_SIZE = 1
+
+####################################
+# ADMISSION CONTROL
+####################################
+
+# Rate limits and an adaptive concurrency limit in front of chat completions
+ENABLE_ADMISSION_CONTROL = (
+    os.environ.get("ENABLE_ADMISSION_CONTROL", "False").lower() == "true"
+)
+
+# Chat completions per minute a user may start, with bursts of up to
+# ADMISSION_USER_BURST; 0 disables the limit. Shared through Redis when
+# REDIS_URL is set
+try:
+    ADMISSION_USER_RATE_LIMIT = float(os.environ.get("ADMISSION_USER_RATE_LIMIT") or 60)
+except ValueError:
+    ADMISSION_USER_RATE_LIMIT = 60.0
+
+try:
+    ADMISSION_USER_BURST = max(int(os.environ.get("ADMISSION_USER_BURST") or 20), 1)
+except ValueError:
+    ADMISSION_USER_BURST = 20
+
+# Chat completions per minute for each model across all users; 0 disables
+try:
+    ADMISSION_MODEL_RATE_LIMIT = float(
+        os.environ.get("ADMISSION_MODEL_RATE_LIMIT") or 0
+    )
+except ValueError:
+    ADMISSION_MODEL_RATE_LIMIT = 0.0
+
+try:
+    ADMISSION_MODEL_BURST = max(int(os.environ.get("ADMISSION_MODEL_BURST") or 100), 1)
+except ValueError:
+    ADMISSION_MODEL_BURST = 100
+
+# Chat completions in flight per worker. The limit starts at the initial value
+# and moves between the bounds: it shrinks when upstream latency rises above
+# ADMISSION_LATENCY_TOLERANCE times its usual value or upstream reports
+# overload, and grows back slowly otherwise
+try:
+    ADMISSION_MIN_CONCURRENCY = max(
+        int(os.environ.get("ADMISSION_MIN_CONCURRENCY") or 4), 1
+    )
+except ValueError:
+    ADMISSION_MIN_CONCURRENCY = 4
+
+try:
+    ADMISSION_MAX_CONCURRENCY = max(
+        int(os.environ.get("ADMISSION_MAX_CONCURRENCY") or 256),
+        ADMISSION_MIN_CONCURRENCY,
+    )
+except ValueError:
+    ADMISSION_MAX_CONCURRENCY = max(256, ADMISSION_MIN_CONCURRENCY)
+
+try:
+    ADMISSION_INITIAL_CONCURRENCY = int(
+        os.environ.get("ADMISSION_INITIAL_CONCURRENCY") or 32
+    )
+except ValueError:
+    ADMISSION_INITIAL_CONCURRENCY = 32
+ADMISSION_INITIAL_CONCURRENCY = min(
+    max(ADMISSION_INITIAL_CONCURRENCY, ADMISSION_MIN_CONCURRENCY),
+    ADMISSION_MAX_CONCURRENCY,
+)
+
+try:
+    ADMISSION_LATENCY_TOLERANCE = max(
+        float(os.environ.get("ADMISSION_LATENCY_TOLERANCE") or 2.0), 1.0
+    )
+except ValueError:
+    ADMISSION_LATENCY_TOLERANCE = 2.0
+
+# Requests over the limit wait in a queue of at most this many, for at most
+# ADMISSION_MAX_WAIT seconds, before being rejected with 429
+try:
+    ADMISSION_MAX_QUEUE = int(os.environ.get("ADMISSION_MAX_QUEUE") or 256)
+except ValueError:
+    ADMISSION_MAX_QUEUE = 256
+
+try:
+    ADMISSION_MAX_WAIT = float(os.environ.get("ADMISSION_MAX_WAIT") or 10)
+except ValueError:
+    ADMISSION_MAX_WAIT = 10.0
+
 ####################################
 # UVICORN WORKERS
 ####################################
@@ -398,6 +779,20 @@ WEBSOCKET_SENTINEL_HOSTS = os.environ.get("WEBSOCKET_SENTINEL_HOSTS", "")
 
 WEBSOCKET_SENTINEL_PORT = os.environ.get("WEBSOCKET_SENTINEL_PORT", "26379")
 
+try:
+    WEBSOCKET_PRESENCE_HEARTBEAT_TTL = int(
+        os.environ.get("WEBSOCKET_PRESENCE_HEARTBEAT_TTL", "30")
+    )
+except ValueError:
+    WEBSOCKET_PRESENCE_HEARTBEAT_TTL = 30
+
+try:
+    WEBSOCKET_USER_LIST_DEBOUNCE = float(
+        os.environ.get("WEBSOCKET_USER_LIST_DEBOUNCE", "1")
+    )
+except ValueError:
+    WEBSOCKET_USER_LIST_DEBOUNCE = 1.0
+
 AIOHTTP_CLIENT_TIMEOUT = os.environ.get("AIOHTTP_CLIENT_TIMEOUT", "")
 
 if AIOHTTP_CLIENT_TIMEOUT == "":
@@ -436,6 +831,63 @@ else:
     except Exception:
         AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA = 10
 
+# Seconds between background refreshes of tool server OpenAPI specs; 0 disables
+try:
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL = int(
+        os.environ.get("TOOL_SERVER_SPEC_REFRESH_INTERVAL") or 300
+    )
+except ValueError:
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL = 300
+
+# Maximum pooled connections to a single tool server
+try:
+    TOOL_SERVER_MAX_CONNECTIONS = int(
+        os.environ.get("TOOL_SERVER_MAX_CONNECTIONS") or 20
+    )
+except ValueError:
+    TOOL_SERVER_MAX_CONNECTIONS = 20
+
+# Maximum number of tool calls executed at the same time within one chat
+try:
+    TOOL_CALL_CONCURRENCY = max(int(os.environ.get("TOOL_CALL_CONCURRENCY") or 4), 1)
+except ValueError:
+    TOOL_CALL_CONCURRENCY = 4
+
+# Seconds a single tool call may run before it is abandoned; empty disables
+TOOL_CALL_TIMEOUT = os.environ.get("TOOL_CALL_TIMEOUT", "300")
+
+if TOOL_CALL_TIMEOUT == "":
+    TOOL_CALL_TIMEOUT = None
+else:
+    try:
+        TOOL_CALL_TIMEOUT = int(TOOL_CALL_TIMEOUT)
+    except Exception:
+        TOOL_CALL_TIMEOUT = 300
+
+# Maximum image generation requests in flight against one backend; further
+# requests wait in a queue so GPU backends are not overloaded
+try:
+    IMAGE_GENERATION_CONCURRENCY = max(
+        int(os.environ.get("IMAGE_GENERATION_CONCURRENCY") or 2), 1
+    )
+except ValueError:
+    IMAGE_GENERATION_CONCURRENCY = 2
+
+# Seconds a single image generation request may take; empty disables
+AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION = os.environ.get(
+    "AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION", "600"
+)
+
+if AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION == "":
+    AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION = None
+else:
+    try:
+        AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION = int(
+            AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION
+        )
+    except Exception:
+        AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION = 600
+
 ####################################
 # OFFLINE_MODE
 ####################################
@@ -466,6 +918,31 @@ AUDIT_EXCLUDED_PATHS = os.getenv("AUDIT_EXCLUDED_PATHS", "/chats,/chat,/folders"
 AUDIT_EXCLUDED_PATHS = [path.strip() for path in AUDIT_EXCLUDED_PATHS]
 AUDIT_EXCLUDED_PATHS = [path.lstrip("/") for path in AUDIT_EXCLUDED_PATHS]
 
+# Audit entries are queued and written by a background task; entries beyond
+# this many pending are dropped (and counted) rather than slowing requests
+try:
+    AUDIT_QUEUE_MAX_SIZE = int(os.environ.get("AUDIT_QUEUE_MAX_SIZE") or 10000)
+except ValueError:
+    AUDIT_QUEUE_MAX_SIZE = 10000
+
+try:
+    AUDIT_BATCH_SIZE = int(os.environ.get("AUDIT_BATCH_SIZE") or 100)
+except ValueError:
+    AUDIT_BATCH_SIZE = 100
+
+# Fraction (0-1) of audited requests whose bodies are captured
+try:
+    AUDIT_BODY_SAMPLE_RATE = float(os.environ.get("AUDIT_BODY_SAMPLE_RATE") or 1.0)
+except ValueError:
+    AUDIT_BODY_SAMPLE_RATE = 1.0
+
+# Comma separated list of audit sinks: file, otel
+AUDIT_LOG_SINKS = [
+    sink.strip().lower()
+    for sink in os.getenv("AUDIT_LOG_SINKS", "file").split(",")
+    if sink.strip()
+]
+
 ####################################
 # OPENTELEMETRY
 ####################################
@@ -481,6 +958,18 @@ OTEL_RESOURCE_ATTRIBUTES = os.environ.get(
 OTEL_TRACES_SAMPLER = os.environ.get(
     "OTEL_TRACES_SAMPLER", "parentbased_always_on"
 ).lower()
+ENABLE_OTEL_METRICS = os.environ.get("ENABLE_OTEL_METRICS", "False").lower() == "true"
+
+OTEL_METRICS_EXPORT_INTERVAL = os.environ.get("OTEL_METRICS_EXPORT_INTERVAL", "60000")
+try:
+    OTEL_METRICS_EXPORT_INTERVAL = int(OTEL_METRICS_EXPORT_INTERVAL)
+except ValueError:
+    OTEL_METRICS_EXPORT_INTERVAL = 60000
+
+# Serve OpenTelemetry metrics at /metrics in the Prometheus text format
+ENABLE_PROMETHEUS_METRICS = (
+    os.environ.get("ENABLE_PROMETHEUS_METRICS", "False").lower() == "true"
+)
 
 ####################################
 # TOOLS/FUNCTIONS PIP OPTIONS
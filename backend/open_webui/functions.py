@@ -1,7 +1,6 @@
 import logging
 import sys
 import inspect
-import json
 import asyncio
 
 from pydantic import BaseModel
@@ -31,6 +30,7 @@ from open_webui.models.models import Models
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.tools import get_tools
 from open_webui.utils.access_control import has_access
+from open_webui.utils.stream import ChunkStreamingResponse
 
 from open_webui.env import SRC_LOG_LEVELS, GLOBAL_LOG_LEVEL
 
@@ -61,8 +61,12 @@ def get_function_module_by_id(request: Request, pipe_id: str):
         function_module = request.app.state.FUNCTIONS[pipe_id]
 
     if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-        valves = Functions.get_function_valves_by_id(pipe_id)
-        function_module.valves = function_module.Valves(**(valves if valves else {}))
+        function_module.valves = request.app.state.FUNCTIONS.get_valves(
+            pipe_id,
+            lambda: function_module.Valves(
+                **(Functions.get_function_valves_by_id(pipe_id) or {})
+            ),
+        )
     return function_module
 
 
@@ -152,11 +156,12 @@ async def generate_function_chat_completion(
             return "".join([str(stream) async for stream in res])
 
     def process_line(form_data: dict, line):
+        # Dicts are passed on as parsed chunks and only encoded when sent
+        if isinstance(line, dict):
+            return line
         if isinstance(line, BaseModel):
             line = line.model_dump_json()
             line = f"data: {line}"
-        if isinstance(line, dict):
-            line = f"data: {json.dumps(line)}"
 
         try:
             line = line.decode("utf-8")
@@ -166,8 +171,7 @@ async def generate_function_chat_completion(
         if line.startswith("data:"):
             return f"{line}\n\n"
         else:
-            line = openai_chat_chunk_message_template(form_data["model"], line)
-            return f"data: {json.dumps(line)}\n\n"
+            return openai_chat_chunk_message_template(form_data["model"], line)
 
     def get_pipe_id(form_data: dict) -> str:
         pipe_id = form_data["model"]
@@ -276,17 +280,16 @@ async def generate_function_chat_completion(
                         yield data
                     return
                 if isinstance(res, dict):
-                    yield f"data: {json.dumps(res)}\n\n"
+                    yield res
                     return
 
             except Exception as e:
                 log.error(f"Error: {e}")
-                yield f"data: {json.dumps({'error': {'detail':str(e)}})}\n\n"
+                yield {"error": {"detail": str(e)}}
                 return
 
             if isinstance(res, str):
-                message = openai_chat_chunk_message_template(form_data["model"], res)
-                yield f"data: {json.dumps(message)}\n\n"
+                yield openai_chat_chunk_message_template(form_data["model"], res)
 
             if isinstance(res, Iterator):
                 for line in res:
@@ -301,10 +304,10 @@ async def generate_function_chat_completion(
                     form_data["model"], ""
                 )
                 finish_message["choices"][0]["finish_reason"] = "stop"
-                yield f"data: {json.dumps(finish_message)}\n\n"
+                yield finish_message
                 yield "data: [DONE]"
 
-        return StreamingResponse(stream_content(), media_type="text/event-stream")
+        return ChunkStreamingResponse(stream_content())
     else:
         try:
             res = await execute_pipe(pipe, params)
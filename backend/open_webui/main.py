@@ -47,11 +47,22 @@ from starlette.responses import Response, StreamingResponse
 
 
 from open_webui.utils import logger
-from open_webui.utils.audit import AuditLevel, AuditLoggingMiddleware
+from open_webui.utils.audit import (
+    AUDIT_LOG_WRITER,
+    AuditLevel,
+    AuditLoggingMiddleware,
+)
+from open_webui.utils.admission import (
+    ADMISSION,
+    AdmissionRejected,
+    get_request_priority,
+)
+from open_webui.utils.background_tasks import BACKGROUND_TASKS
 from open_webui.utils.logger import start_logger
 from open_webui.socket.main import (
     app as socket_app,
     periodic_usage_pool_cleanup,
+    periodic_presence_heartbeat,
 )
 from open_webui.routers import (
     audio,
@@ -361,6 +372,9 @@ from open_webui.env import (
     RESET_CONFIG_ON_START,
     OFFLINE_MODE,
     ENABLE_OTEL,
+    ENABLE_OTEL_METRICS,
+    ENABLE_PROMETHEUS_METRICS,
+    ENABLE_PLUGIN_WARMUP,
     EXTERNAL_PWA_MANIFEST_URL,
 )
 
@@ -385,9 +399,30 @@ from open_webui.utils.auth import (
     decode_token,
     get_admin_user,
     get_verified_user,
+    flush_user_last_active,
+    periodic_user_last_active_flush,
+)
+from open_webui.utils.user_cache import USER_CACHE
+from open_webui.utils.analytics import (
+    flush_analytics_buffers,
+    periodic_analytics_flush,
+)
+from open_webui.utils.tools import (
+    close_tool_server_clients,
+    periodic_tool_server_refresh,
+)
+from open_webui.utils.code_interpreter import close_kernel_pools
+from open_webui.retrieval.models.sidecar import SIDECAR as INFERENCE_SIDECAR
+from open_webui.utils.images.client import close_image_generation_clients
+from open_webui.utils.plugin import (
+    FUNCTION_MODULES,
+    TOOL_MODULES,
+    prune_plugin_cache,
+    warm_up_plugins,
 )
 from open_webui.utils.oauth import OAuthManager
 from open_webui.utils.security_headers import SecurityHeadersMiddleware
+from open_webui.constants import ERROR_MESSAGES
 
 from open_webui.tasks import (
     list_task_ids_by_chat_id,
@@ -458,8 +493,34 @@ async def lifespan(app: FastAPI):
         get_license_data(app, LICENSE_KEY)
 
     asyncio.create_task(periodic_usage_pool_cleanup())
+    asyncio.create_task(periodic_presence_heartbeat())
+
+    USER_CACHE.start_listener()
+    asyncio.create_task(periodic_user_last_active_flush())
+    asyncio.create_task(periodic_analytics_flush())
+    asyncio.create_task(periodic_tool_server_refresh(app))
+
+    TOOL_MODULES.start_listener()
+    FUNCTION_MODULES.start_listener()
+    await asyncio.to_thread(prune_plugin_cache)
+    if ENABLE_PLUGIN_WARMUP:
+        asyncio.create_task(asyncio.to_thread(warm_up_plugins))
+    app.state.LOAD_MODELS_TASK = asyncio.create_task(
+        asyncio.to_thread(load_models, app)
+    )
+    app.state.LOAD_MODELS_TASK.add_done_callback(log_load_models_failure)
     yield
 
+    flush_user_last_active()
+    flush_analytics_buffers()
+    await AUDIT_LOG_WRITER.stop()
+    await BACKGROUND_TASKS.stop()
+    await close_tool_server_clients()
+    await close_image_generation_clients()
+    await close_kernel_pools()
+    await asyncio.to_thread(INFERENCE_SIDECAR.stop)
+    await pipelines.close_pipelines_session()
+
 
 app = FastAPI(
     title="Open WebUI",
@@ -491,6 +552,11 @@ if ENABLE_OTEL:
 
     setup_opentelemetry(app=app, db_engine=engine)
 
+if (ENABLE_OTEL and ENABLE_OTEL_METRICS) or ENABLE_PROMETHEUS_METRICS:
+    from open_webui.utils.telemetry.metrics import setup_metrics
+
+    setup_metrics(app=app)
+
 
 ########################################
 #
@@ -616,8 +682,8 @@ app.state.AUTH_TRUSTED_NAME_HEADER = WEBUI_AUTH_TRUSTED_NAME_HEADER
 app.state.EXTERNAL_PWA_MANIFEST_URL = EXTERNAL_PWA_MANIFEST_URL
 
 app.state.USER_COUNT = None
-app.state.TOOLS = {}
-app.state.FUNCTIONS = {}
+app.state.TOOLS = TOOL_MODULES
+app.state.FUNCTIONS = FUNCTION_MODULES
 
 ########################################
 #
@@ -717,39 +783,59 @@ app.state.rf = None
 
 app.state.YOUTUBE_LOADER_TRANSLATION = None
 
+# Set once the local models are loaded. /health and the embedding and
+# retrieval endpoints answer 503 until then.
+app.state.MODELS_READY = False
+app.state.LOAD_MODELS_TASK = None
 
-try:
-    app.state.ef = get_ef(
+
+def set_embedding_function(app):
+    app.state.EMBEDDING_FUNCTION = get_embedding_function(
         app.state.config.RAG_EMBEDDING_ENGINE,
         app.state.config.RAG_EMBEDDING_MODEL,
-        RAG_EMBEDDING_MODEL_AUTO_UPDATE,
+        app.state.ef,
+        (
+            app.state.config.RAG_OPENAI_API_BASE_URL
+            if app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else app.state.config.RAG_OLLAMA_BASE_URL
+        ),
+        (
+            app.state.config.RAG_OPENAI_API_KEY
+            if app.state.config.RAG_EMBEDDING_ENGINE == "openai"
+            else app.state.config.RAG_OLLAMA_API_KEY
+        ),
+        app.state.config.RAG_EMBEDDING_BATCH_SIZE,
     )
 
-    app.state.rf = get_rf(
-        app.state.config.RAG_RERANKING_MODEL,
-        RAG_RERANKING_MODEL_AUTO_UPDATE,
-    )
-except Exception as e:
-    log.error(f"Error updating models: {e}")
-    pass
-
-
-app.state.EMBEDDING_FUNCTION = get_embedding_function(
-    app.state.config.RAG_EMBEDDING_ENGINE,
-    app.state.config.RAG_EMBEDDING_MODEL,
-    app.state.ef,
-    (
-        app.state.config.RAG_OPENAI_API_BASE_URL
-        if app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-        else app.state.config.RAG_OLLAMA_BASE_URL
-    ),
-    (
-        app.state.config.RAG_OPENAI_API_KEY
-        if app.state.config.RAG_EMBEDDING_ENGINE == "openai"
-        else app.state.config.RAG_OLLAMA_API_KEY
-    ),
-    app.state.config.RAG_EMBEDDING_BATCH_SIZE,
-)
+
+def load_models(app):
+    """
+    Loads the local embedding and reranking models. Runs in a thread from the
+    lifespan so that the server starts accepting requests (and answering
+    /health) without waiting for the model downloads.
+    """
+    try:
+        app.state.ef = get_ef(
+            app.state.config.RAG_EMBEDDING_ENGINE,
+            app.state.config.RAG_EMBEDDING_MODEL,
+            RAG_EMBEDDING_MODEL_AUTO_UPDATE,
+        )
+
+        app.state.rf = get_rf(
+            app.state.config.RAG_RERANKING_MODEL,
+            RAG_RERANKING_MODEL_AUTO_UPDATE,
+        )
+    except Exception as e:
+        log.error(f"Error updating models: {e}")
+        pass
+
+    set_embedding_function(app)
+    app.state.MODELS_READY = True
+
+
+def log_load_models_failure(task: asyncio.Task):
+    if not task.cancelled() and task.exception() is not None:
+        log.error("Error loading models", exc_info=task.exception())
 
 ########################################
 #
@@ -1190,6 +1276,17 @@ async def chat_completion(
     model_item = form_data.pop("model_item", {})
     tasks = form_data.pop("background_tasks", None)
 
+    try:
+        ticket = await ADMISSION.acquire(
+            user.id, form_data.get("model", ""), get_request_priority(request)
+        )
+    except AdmissionRejected as e:
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail=ERROR_MESSAGES.RATE_LIMIT_EXCEEDED,
+            headers=e.headers,
+        )
+
     # try:
     #     intent_classifier = IntentClassifier('')
     #     intent = intent_classifier.classify(form_data.get("messages", [])[-1].get("content", ""))
@@ -1247,8 +1344,12 @@ async def chat_completion(
 
         form_data, metadata, events = await process_chat_payload(request, form_data, user, metadata, model)
 
+    except asyncio.CancelledError:
+        ticket.release()
+        raise
     except Exception as e:
         log.debug(f"Error processing chat payload: {e}")
+        ticket.release()
         if metadata.get("chat_id") and metadata.get("message_id"):
             # Update the chat message with the error
             Chats.upsert_message_to_chat_by_id_and_message_id(
@@ -1259,16 +1360,26 @@ async def chat_completion(
                 },
             )
 
+        if isinstance(e, HTTPException):
+            raise e
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
         )
 
     try:
+        start = time.monotonic()
         response = await chat_completion_handler(request, form_data, user)
 
+        # Streaming responses keep their slot until the stream ends, and
+        # their time to first byte adapts the concurrency limit
+        response = ticket.hold(response, started_at=start)
         return await process_chat_response(request, response, form_data, user, metadata, model, events, tasks)
+    except asyncio.CancelledError:
+        ticket.release()
+        raise
     except Exception as e:
+        ticket.release(e)
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=str(e),
@@ -1575,6 +1686,11 @@ async def get_opensearch_xml():
 
 @app.get("/health")
 async def healthcheck():
+    if not app.state.MODELS_READY:
+        return JSONResponse(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            content={"status": False, "detail": "Loading models"},
+        )
     return {"status": True}
 
 
@@ -0,0 +1,67 @@
+"""Add colbert_embedding and colbert_centroid tables
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-19 14:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from open_webui.migrations.util import get_existing_tables
+
+
+revision = "a7b8c9d0e1f2"
+down_revision = "f6a7b8c9d0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "colbert_embedding" not in existing_tables:
+        op.create_table(
+            "colbert_embedding",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("collection_name", sa.String(), nullable=True),
+            sa.Column("model", sa.String(), nullable=True),
+            sa.Column("text_hash", sa.String(), nullable=True),
+            sa.Column("num_tokens", sa.Integer(), nullable=True),
+            sa.Column("data", sa.LargeBinary(), nullable=True),
+            sa.Column("codes", sa.LargeBinary(), nullable=True),
+            sa.Column("created_at", sa.BigInteger(), nullable=True),
+        )
+        op.create_index(
+            "idx_colbert_embedding_collection",
+            "colbert_embedding",
+            ["collection_name", "model"],
+        )
+        op.create_index(
+            "idx_colbert_embedding_text_hash", "colbert_embedding", ["text_hash"]
+        )
+
+    if "colbert_centroid" not in existing_tables:
+        op.create_table(
+            "colbert_centroid",
+            sa.Column("collection_name", sa.String(), primary_key=True),
+            sa.Column("model", sa.String(), primary_key=True),
+            sa.Column("num_centroids", sa.Integer(), nullable=True),
+            sa.Column("data", sa.LargeBinary(), nullable=True),
+            sa.Column("num_tokens", sa.BigInteger(), nullable=True),
+            sa.Column("updated_at", sa.BigInteger(), nullable=True),
+        )
+
+
+def downgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "colbert_centroid" in existing_tables:
+        op.drop_table("colbert_centroid")
+
+    if "colbert_embedding" in existing_tables:
+        op.drop_index("idx_colbert_embedding_text_hash", table_name="colbert_embedding")
+        op.drop_index(
+            "idx_colbert_embedding_collection", table_name="colbert_embedding"
+        )
+        op.drop_table("colbert_embedding")
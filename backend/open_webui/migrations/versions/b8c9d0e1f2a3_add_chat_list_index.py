@@ -0,0 +1,33 @@
+"""Add chat list index on user_id, archived, updated_at, id
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-19 16:00:00.000000
+
+"""
+
+from alembic import op
+from sqlalchemy import Inspector
+
+
+revision = "b8c9d0e1f2a3"
+down_revision = "a7b8c9d0e1f2"
+branch_labels = None
+depends_on = None
+
+INDEX_NAME = "idx_chat_user_id_archived_updated_at"
+
+
+def get_existing_indexes():
+    inspector = Inspector.from_engine(op.get_bind())
+    return {index["name"] for index in inspector.get_indexes("chat")}
+
+
+def upgrade():
+    if INDEX_NAME not in get_existing_indexes():
+        op.create_index(INDEX_NAME, "chat", ["user_id", "archived", "updated_at", "id"])
+
+
+def downgrade():
+    if INDEX_NAME in get_existing_indexes():
+        op.drop_index(INDEX_NAME, table_name="chat")
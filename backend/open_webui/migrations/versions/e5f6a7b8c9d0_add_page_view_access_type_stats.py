@@ -0,0 +1,50 @@
+"""Add page_view_access_type_stats rollup table
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-19 10:00:00.000000
+
+"""
+
+import time
+
+from alembic import op
+import sqlalchemy as sa
+from open_webui.migrations.util import get_existing_tables
+
+
+revision = "e5f6a7b8c9d0"
+down_revision = "d4e5f6a7b8c9"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "page_view_access_type_stats" in existing_tables:
+        return
+
+    op.create_table(
+        "page_view_access_type_stats",
+        sa.Column("access_type", sa.String(50), primary_key=True),
+        sa.Column("view_count", sa.Integer(), nullable=False, default=0),
+        sa.Column("updated_at", sa.BigInteger(), nullable=False),
+    )
+
+    # Backfill the rollup from the raw page views recorded so far
+    if "page_view" in existing_tables:
+        op.execute(
+            sa.text(
+                "INSERT INTO page_view_access_type_stats (access_type, view_count, updated_at) "
+                "SELECT access_type, COUNT(id), :updated_at FROM page_view "
+                "WHERE access_type IS NOT NULL GROUP BY access_type"
+            ).bindparams(updated_at=int(time.time()))
+        )
+
+
+def downgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "page_view_access_type_stats" in existing_tables:
+        op.drop_table("page_view_access_type_stats")
@@ -0,0 +1,44 @@
+"""Add completion_cache table
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-19 12:00:00.000000
+
+"""
+
+from alembic import op
+import sqlalchemy as sa
+from open_webui.migrations.util import get_existing_tables
+
+
+revision = "f6a7b8c9d0e1"
+down_revision = "e5f6a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "completion_cache" in existing_tables:
+        return
+
+    op.create_table(
+        "completion_cache",
+        sa.Column("id", sa.String(), primary_key=True),
+        sa.Column("model", sa.String(), nullable=True),
+        sa.Column("data", sa.Text(), nullable=True),
+        sa.Column("expires_at", sa.BigInteger(), nullable=True),
+        sa.Column("created_at", sa.BigInteger(), nullable=True),
+    )
+    op.create_index(
+        "idx_completion_cache_expires_at", "completion_cache", ["expires_at"]
+    )
+
+
+def downgrade():
+    existing_tables = set(get_existing_tables())
+
+    if "completion_cache" in existing_tables:
+        op.drop_index("idx_completion_cache_expires_at", table_name="completion_cache")
+        op.drop_table("completion_cache")
@@ -9,7 +9,7 @@ from open_webui.models.tags import TagModel, Tag, Tags
 from open_webui.env import SRC_LOG_LEVELS
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Boolean, Column, String, Text, JSON
+from sqlalchemy import BigInteger, Boolean, Column, Index, String, Text, JSON
 from sqlalchemy import or_, func, select, and_, text
 from sqlalchemy.sql import exists
 
@@ -39,6 +39,16 @@ class Chat(Base):
     meta = Column(JSON, server_default="{}")
     folder_id = Column(Text, nullable=True)
 
+    __table_args__ = (
+        Index(
+            "idx_chat_user_id_archived_updated_at",
+            "user_id",
+            "archived",
+            "updated_at",
+            "id",
+        ),
+    )
+
 
 class ChatModel(BaseModel):
     model_config = ConfigDict(from_attributes=True)
@@ -102,6 +112,18 @@ class ChatTitleIdResponse(BaseModel):
     title: str
     updated_at: int
     created_at: int
+    pinned: Optional[bool] = False
+    folder_id: Optional[str] = None
+    tags: list[str] = []
+
+
+def parse_chat_list_cursor(cursor: str) -> tuple[int, str]:
+    """
+    A chat list cursor is `{updated_at}:{id}` of the last chat of the previous
+    page. Raises ValueError if it is malformed.
+    """
+    updated_at, id = cursor.split(":", 1)
+    return int(updated_at), id
 
 
 class ChatTable:
@@ -185,22 +207,34 @@ class ChatTable:
     def update_chat_tags_by_id(
         self, id: str, tags: list[str], user
     ) -> Optional[ChatModel]:
-        chat = self.get_chat_by_id(id)
-        if chat is None:
-            return None
+        names = {}
+        for tag_name in tags:
+            if tag_name.lower() != "none":
+                names.setdefault(tag_name.replace(" ", "_").lower(), tag_name)
 
-        self.delete_all_tags_by_id_and_user_id(id, user.id)
+        with get_db() as db:
+            chat = db.get(Chat, id)
+            if chat is None:
+                return None
 
-        for tag in chat.meta.get("tags", []):
+            removed = [tag for tag in chat.meta.get("tags", []) if tag not in names]
+            chat.meta = {**chat.meta, "tags": list(names)}
+            db.commit()
+            db.refresh(chat)
+            chat = ChatModel.model_validate(chat)
+
+        existing = {
+            tag.id for tag in Tags.get_tags_by_ids_and_user_id(list(names), user.id)
+        }
+        for tag_id, tag_name in names.items():
+            if tag_id not in existing:
+                Tags.insert_new_tag(tag_name, user.id)
+
+        # Only tags the chat no longer has can have become unused
+        for tag in removed:
             if self.count_chats_by_tag_name_and_user_id(tag, user.id) == 0:
                 Tags.delete_tag_by_name_and_user_id(tag, user.id)
-
-        for tag_name in tags:
-            if tag_name.lower() == "none":
-                continue
-
-            self.add_chat_tag_by_id_and_user_id_and_tag_name(id, user.id, tag_name)
-        return self.get_chat_by_id(id)
+        return chat
 
     def get_chat_title_by_id(self, id: str) -> Optional[str]:
         chat = self.get_chat_by_id(id)
@@ -376,78 +410,98 @@ class ChatTable:
         except Exception:
             return False
 
+    def _query_chat_list(self, db):
+        """Only the columns chat lists show, without the chat itself."""
+        return db.query(
+            Chat.id,
+            Chat.title,
+            Chat.updated_at,
+            Chat.created_at,
+            Chat.pinned,
+            Chat.folder_id,
+            Chat.meta,
+        )
+
+    def _paginate_chat_list(
+        self,
+        query,
+        cursor: Optional[tuple[int, str]] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatTitleIdResponse]:
+        """
+        Most recently updated first. A page after `cursor` is an index range
+        scan however deep it is; `skip` is kept for clients that page by number
+        and is ignored when a cursor is given.
+        """
+        if cursor is not None:
+            updated_at, id = cursor
+            # The first condition bounds the index range, the second skips
+            # the chats of the previous page that share its last timestamp
+            query = query.filter(
+                Chat.updated_at <= updated_at,
+                or_(Chat.updated_at < updated_at, Chat.id < id),
+            )
+        elif skip:
+            query = query.offset(skip)
+
+        query = query.order_by(Chat.updated_at.desc(), Chat.id.desc())
+        if limit:
+            query = query.limit(limit)
+
+        return [
+            ChatTitleIdResponse(
+                id=chat.id,
+                title=chat.title,
+                updated_at=chat.updated_at,
+                created_at=chat.created_at,
+                pinned=chat.pinned,
+                folder_id=chat.folder_id,
+                tags=(chat.meta or {}).get("tags", []),
+            )
+            for chat in query.all()
+        ]
+
     def get_archived_chat_list_by_user_id(
-        self, user_id: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+        self,
+        user_id: str,
+        cursor: Optional[tuple[int, str]] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id, archived=True)
-                .order_by(Chat.updated_at.desc())
-                # .limit(limit).offset(skip)
-                .all()
-            )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            query = self._query_chat_list(db).filter_by(user_id=user_id, archived=True)
+            return self._paginate_chat_list(query, cursor, skip, limit)
 
     def get_chat_list_by_user_id(
         self,
         user_id: str,
         include_archived: bool = False,
-        skip: int = 0,
-        limit: int = 50,
-    ) -> list[ChatModel]:
+        cursor: Optional[tuple[int, str]] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = 50,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
+            query = self._query_chat_list(db).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
-
-            query = query.order_by(Chat.updated_at.desc())
-
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._paginate_chat_list(query, cursor, skip, limit)
 
     def get_chat_title_id_list_by_user_id(
         self,
         user_id: str,
         include_archived: bool = False,
+        cursor: Optional[tuple[int, str]] = None,
         skip: Optional[int] = None,
         limit: Optional[int] = None,
     ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id).filter_by(folder_id=None)
-            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
-
+            query = self._query_chat_list(db).filter_by(user_id=user_id)
             if not include_archived:
                 query = query.filter_by(archived=False)
-
-            query = query.order_by(Chat.updated_at.desc()).with_entities(
-                Chat.id, Chat.title, Chat.updated_at, Chat.created_at
-            )
-
-            if skip:
-                query = query.offset(skip)
-            if limit:
-                query = query.limit(limit)
-
-            all_chats = query.all()
-
-            # result has to be destrctured from sqlalchemy `row` and mapped to a dict since the `ChatModel`is not the returned dataclass.
-            return [
-                ChatTitleIdResponse.model_validate(
-                    {
-                        "id": chat[0],
-                        "title": chat[1],
-                        "updated_at": chat[2],
-                        "created_at": chat[3],
-                    }
-                )
-                for chat in all_chats
-            ]
+            query = query.filter_by(folder_id=None)
+            query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
+            return self._paginate_chat_list(query, cursor, skip, limit)
 
     def get_chat_list_by_chat_ids(
         self, chat_ids: list[str], skip: int = 0, limit: int = 50
@@ -510,14 +564,14 @@ class ChatTable:
             )
             return [ChatModel.model_validate(chat) for chat in all_chats]
 
-    def get_pinned_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
+    def get_pinned_chat_list_by_user_id(
+        self, user_id: str
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            all_chats = (
-                db.query(Chat)
-                .filter_by(user_id=user_id, pinned=True, archived=False)
-                .order_by(Chat.updated_at.desc())
+            query = self._query_chat_list(db).filter_by(
+                user_id=user_id, archived=False, pinned=True
             )
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._paginate_chat_list(query)
 
     def get_archived_chats_by_user_id(self, user_id: str) -> list[ChatModel]:
         with get_db() as db:
@@ -533,16 +587,19 @@ class ChatTable:
         user_id: str,
         search_text: str,
         include_archived: bool = False,
-        skip: int = 0,
+        cursor: Optional[tuple[int, str]] = None,
+        skip: Optional[int] = None,
         limit: int = 60,
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         """
-        Filters chats based on a search query using Python, allowing pagination using skip and limit.
+        Filters chats based on a search query using Python, allowing pagination using a cursor or skip and limit.
         """
         search_text = search_text.lower().strip()
 
         if not search_text:
-            return self.get_chat_list_by_user_id(user_id, include_archived, skip, limit)
+            return self.get_chat_list_by_user_id(
+                user_id, include_archived, cursor, skip, limit
+            )
 
         search_text_words = search_text.split(" ")
 
@@ -560,13 +617,11 @@ class ChatTable:
         search_text = " ".join(search_text_words)
 
         with get_db() as db:
-            query = db.query(Chat).filter(Chat.user_id == user_id)
+            query = self._query_chat_list(db).filter(Chat.user_id == user_id)
 
             if not include_archived:
                 query = query.filter(Chat.archived == False)
 
-            query = query.order_by(Chat.updated_at.desc())
-
             # Check if the database dialect is either 'sqlite' or 'postgresql'
             dialect_name = db.bind.dialect.name
             if dialect_name == "sqlite":
@@ -672,25 +727,20 @@ class ChatTable:
                 )
 
             # Perform pagination at the SQL level
-            all_chats = query.offset(skip).limit(limit).all()
+            all_chats = self._paginate_chat_list(query, cursor, skip, limit)
 
             log.info(f"The number of chats: {len(all_chats)}")
+            return all_chats
 
-            # Validate and return chats
-            return [ChatModel.model_validate(chat) for chat in all_chats]
-
-    def get_chats_by_folder_id_and_user_id(
+    def get_chat_list_by_folder_id_and_user_id(
         self, folder_id: str, user_id: str
-    ) -> list[ChatModel]:
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(folder_id=folder_id, user_id=user_id)
+            query = self._query_chat_list(db).filter_by(
+                folder_id=folder_id, user_id=user_id, archived=False
+            )
             query = query.filter(or_(Chat.pinned == False, Chat.pinned == None))
-            query = query.filter_by(archived=False)
-
-            query = query.order_by(Chat.updated_at.desc())
-
-            all_chats = query.all()
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return self._paginate_chat_list(query)
 
     def get_chats_by_folder_ids_and_user_id(
         self, folder_ids: list[str], user_id: str
@@ -729,10 +779,15 @@ class ChatTable:
             return [Tags.get_tag_by_name_and_user_id(tag, user_id) for tag in tags]
 
     def get_chat_list_by_user_id_and_tag_name(
-        self, user_id: str, tag_name: str, skip: int = 0, limit: int = 50
-    ) -> list[ChatModel]:
+        self,
+        user_id: str,
+        tag_name: str,
+        cursor: Optional[tuple[int, str]] = None,
+        skip: Optional[int] = None,
+        limit: Optional[int] = None,
+    ) -> list[ChatTitleIdResponse]:
         with get_db() as db:
-            query = db.query(Chat).filter_by(user_id=user_id)
+            query = self._query_chat_list(db).filter_by(user_id=user_id)
             tag_id = tag_name.replace(" ", "_").lower()
 
             log.info(f"DB dialect name: {db.bind.dialect.name}")
@@ -755,9 +810,9 @@ class ChatTable:
                     f"Unsupported dialect: {db.bind.dialect.name}"
                 )
 
-            all_chats = query.all()
+            all_chats = self._paginate_chat_list(query, cursor, skip, limit)
             log.debug(f"all_chats: {all_chats}")
-            return [ChatModel.model_validate(chat) for chat in all_chats]
+            return all_chats
 
     def add_chat_tag_by_id_and_user_id_and_tag_name(
         self, id: str, user_id: str, tag_name: str
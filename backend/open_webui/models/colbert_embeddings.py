@@ -0,0 +1,252 @@
+import logging
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from open_webui.env import SRC_LOG_LEVELS
+from pydantic import BaseModel, ConfigDict
+from sqlalchemy import BigInteger, Column, Index, Integer, LargeBinary, String, func
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+####################
+# ColBERT Embeddings DB Schema
+####################
+
+
+class ColBERTEmbedding(Base):
+    __tablename__ = "colbert_embedding"
+
+    id = Column(String, primary_key=True)  # id of the chunk in the vector DB
+    collection_name = Column(String)
+    model = Column(String)
+    text_hash = Column(String)  # hash of the model and the chunk text
+
+    num_tokens = Column(Integer)
+    data = Column(LargeBinary)  # float16 token embeddings, num_tokens x dim
+    codes = Column(LargeBinary, nullable=True)  # uint16 nearest centroid per token
+
+    created_at = Column(BigInteger)
+
+    __table_args__ = (
+        Index("idx_colbert_embedding_collection", "collection_name", "model"),
+        Index("idx_colbert_embedding_text_hash", "text_hash"),
+    )
+
+
+class ColBERTCentroid(Base):
+    __tablename__ = "colbert_centroid"
+
+    collection_name = Column(String, primary_key=True)
+    model = Column(String, primary_key=True)
+
+    num_centroids = Column(Integer)
+    data = Column(LargeBinary)  # float16 centroids, num_centroids x dim
+    num_tokens = Column(BigInteger)  # tokens in the collection when trained
+
+    updated_at = Column(BigInteger)
+
+
+class ColBERTEmbeddingModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    text_hash: str
+    num_tokens: int
+    data: bytes
+    codes: Optional[bytes] = None
+
+
+class ColBERTCodesModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    id: str
+    num_tokens: int
+    codes: Optional[bytes] = None
+
+
+class ColBERTCentroidModel(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+
+    num_centroids: int
+    data: bytes
+    num_tokens: int
+    updated_at: int
+
+
+class ColBERTCollectionStats(BaseModel):
+    count: int = 0
+    num_tokens: int = 0
+    updated_at: int = 0
+
+
+class ColBERTEmbeddingsTable:
+    def insert_embeddings(
+        self, collection_name: str, model: str, embeddings: list[ColBERTEmbeddingModel]
+    ):
+        now = int(time.time())
+        with get_db() as db:
+            for embedding in embeddings:
+                db.merge(
+                    ColBERTEmbedding(
+                        **embedding.model_dump(),
+                        collection_name=collection_name,
+                        model=model,
+                        created_at=now,
+                    )
+                )
+            db.commit()
+
+    def get_embeddings_by_ids(self, ids: list[str]) -> list[ColBERTEmbeddingModel]:
+        if not ids:
+            return []
+        with get_db() as db:
+            return [
+                ColBERTEmbeddingModel.model_validate(embedding)
+                for embedding in db.query(ColBERTEmbedding)
+                .filter(ColBERTEmbedding.id.in_(ids))
+                .all()
+            ]
+
+    def get_embeddings_by_text_hashes(
+        self, model: str, text_hashes: list[str]
+    ) -> list[ColBERTEmbeddingModel]:
+        if not text_hashes:
+            return []
+        with get_db() as db:
+            return [
+                ColBERTEmbeddingModel.model_validate(embedding)
+                for embedding in db.query(ColBERTEmbedding)
+                .filter(
+                    ColBERTEmbedding.model == model,
+                    ColBERTEmbedding.text_hash.in_(text_hashes),
+                )
+                .all()
+            ]
+
+    def get_embeddings_by_collection(
+        self, collection_name: str, model: str, limit: Optional[int] = None
+    ) -> list[ColBERTEmbeddingModel]:
+        with get_db() as db:
+            query = db.query(ColBERTEmbedding).filter(
+                ColBERTEmbedding.collection_name == collection_name,
+                ColBERTEmbedding.model == model,
+            )
+            if limit is not None:
+                query = query.order_by(func.random()).limit(limit)
+            return [
+                ColBERTEmbeddingModel.model_validate(embedding)
+                for embedding in query.all()
+            ]
+
+    def get_codes_by_collection(
+        self, collection_name: str, model: str
+    ) -> list[ColBERTCodesModel]:
+        with get_db() as db:
+            return [
+                ColBERTCodesModel.model_validate(embedding)
+                for embedding in db.query(
+                    ColBERTEmbedding.id,
+                    ColBERTEmbedding.num_tokens,
+                    ColBERTEmbedding.codes,
+                )
+                .filter(
+                    ColBERTEmbedding.collection_name == collection_name,
+                    ColBERTEmbedding.model == model,
+                )
+                .order_by(ColBERTEmbedding.id)
+                .all()
+            ]
+
+    def get_collection_stats(
+        self, collection_name: str, model: str
+    ) -> ColBERTCollectionStats:
+        with get_db() as db:
+            count, num_tokens, updated_at = (
+                db.query(
+                    func.count(ColBERTEmbedding.id),
+                    func.sum(ColBERTEmbedding.num_tokens),
+                    func.max(ColBERTEmbedding.created_at),
+                )
+                .filter(
+                    ColBERTEmbedding.collection_name == collection_name,
+                    ColBERTEmbedding.model == model,
+                )
+                .one()
+            )
+            return ColBERTCollectionStats(
+                count=count or 0,
+                num_tokens=num_tokens or 0,
+                updated_at=updated_at or 0,
+            )
+
+    def update_codes(self, codes_by_id: dict[str, bytes]):
+        with get_db() as db:
+            for id, codes in codes_by_id.items():
+                db.query(ColBERTEmbedding).filter_by(id=id).update({"codes": codes})
+            db.commit()
+
+    def get_centroids(
+        self, collection_name: str, model: str
+    ) -> Optional[ColBERTCentroidModel]:
+        with get_db() as db:
+            centroid = db.get(ColBERTCentroid, (collection_name, model))
+            return ColBERTCentroidModel.model_validate(centroid) if centroid else None
+
+    def upsert_centroids(
+        self,
+        collection_name: str,
+        model: str,
+        num_centroids: int,
+        data: bytes,
+        num_tokens: int,
+    ):
+        with get_db() as db:
+            db.merge(
+                ColBERTCentroid(
+                    collection_name=collection_name,
+                    model=model,
+                    num_centroids=num_centroids,
+                    data=data,
+                    num_tokens=num_tokens,
+                    updated_at=int(time.time()),
+                )
+            )
+            db.commit()
+
+    def delete_by_ids(self, ids: list[str]):
+        try:
+            with get_db() as db:
+                for start in range(0, len(ids), 500):
+                    db.query(ColBERTEmbedding).filter(
+                        ColBERTEmbedding.id.in_(ids[start : start + 500])
+                    ).delete(synchronize_session=False)
+                db.commit()
+        except Exception as e:
+            log.warning(f"Error deleting ColBERT embeddings: {e}")
+
+    def delete_all(self):
+        try:
+            with get_db() as db:
+                db.query(ColBERTEmbedding).delete()
+                db.query(ColBERTCentroid).delete()
+                db.commit()
+        except Exception as e:
+            log.warning(f"Error deleting all ColBERT embeddings: {e}")
+
+    def delete_by_collection_name(self, collection_name: str):
+        try:
+            with get_db() as db:
+                db.query(ColBERTEmbedding).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.query(ColBERTCentroid).filter_by(
+                    collection_name=collection_name
+                ).delete()
+                db.commit()
+        except Exception as e:
+            log.warning(f"Error deleting ColBERT embeddings of {collection_name}: {e}")
+
+
+ColBERTEmbeddings = ColBERTEmbeddingsTable()
@@ -0,0 +1,57 @@
+import time
+from typing import Optional
+
+from open_webui.internal.db import Base, get_db
+from sqlalchemy import BigInteger, Column, Index, String, Text
+
+####################
+# Completion Cache DB Schema
+####################
+
+
+class CompletionCacheEntry(Base):
+    __tablename__ = "completion_cache"
+
+    id = Column(String, primary_key=True)  # hash of the request
+    model = Column(String)
+    data = Column(Text)  # JSON of the cached completion
+    expires_at = Column(BigInteger)
+    created_at = Column(BigInteger)
+
+    __table_args__ = (Index("idx_completion_cache_expires_at", "expires_at"),)
+
+
+class CompletionCacheTable:
+    def get_entry_data_by_id(self, id: str) -> Optional[str]:
+        with get_db() as db:
+            entry = db.get(CompletionCacheEntry, id)
+            if entry is None or entry.expires_at < int(time.time()):
+                return None
+            return entry.data
+
+    def upsert_entry(self, id: str, model: str, data: str, ttl: int):
+        now = int(time.time())
+        with get_db() as db:
+            db.merge(
+                CompletionCacheEntry(
+                    id=id,
+                    model=model,
+                    data=data,
+                    expires_at=now + ttl,
+                    created_at=now,
+                )
+            )
+            db.commit()
+
+    def delete_expired_entries(self) -> int:
+        with get_db() as db:
+            count = (
+                db.query(CompletionCacheEntry)
+                .filter(CompletionCacheEntry.expires_at < int(time.time()))
+                .delete()
+            )
+            db.commit()
+            return count
+
+
+CompletionCacheEntries = CompletionCacheTable()
@@ -5,10 +5,11 @@ from typing import Optional
 
 from open_webui.internal.db import Base, get_db
 from open_webui.models.chats import Chats
+from open_webui.models.users import User
 
 from open_webui.env import SRC_LOG_LEVELS
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, Text, JSON, Boolean
+from sqlalchemy import BigInteger, Column, Text, JSON, Boolean, func, or_
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MODELS"])
@@ -152,6 +153,32 @@ class FeedbackTable:
                 .all()
             ]
 
+    def get_feedback_ratings(self) -> list[tuple[str, Optional[dict], int]]:
+        """
+        (id, data, created_at) of every feedback in creation order, without
+        the snapshot and meta columns.
+        """
+        with get_db() as db:
+            return [
+                (id, data, created_at)
+                for id, data, created_at in db.query(
+                    Feedback.id, Feedback.data, Feedback.created_at
+                )
+                .order_by(Feedback.created_at.asc(), Feedback.id.asc())
+                .all()
+            ]
+
+    def get_feedbacks_state(self) -> tuple[int, Optional[int]]:
+        """
+        Row count and latest update time, which change on every insert,
+        update and delete.
+        """
+        with get_db() as db:
+            count, updated_at = db.query(
+                func.count(Feedback.id), func.max(Feedback.updated_at)
+            ).one()
+            return count, updated_at
+
     def get_feedbacks_by_type(self, type: str) -> list[FeedbackModel]:
         with get_db() as db:
             return [
@@ -162,6 +189,53 @@ class FeedbackTable:
                 .all()
             ]
 
+    def get_feedbacks_page_by_type(
+        self,
+        type: str,
+        query: Optional[str] = None,
+        order_by: str = "created_at",
+        direction: str = "desc",
+        skip: int = 0,
+        limit: int = 20,
+    ) -> tuple[list[FeedbackModel], int]:
+        """
+        One page of feedbacks of the given type and the total number of
+        matches. `query` matches the user's name or email and the comment
+        or action in the feedback data.
+        """
+        with get_db() as db:
+            feedbacks = (
+                db.query(Feedback)
+                .outerjoin(User, User.id == Feedback.user_id)
+                .filter(Feedback.type == type)
+            )
+            if query:
+                pattern = f"%{query}%"
+                feedbacks = feedbacks.filter(
+                    or_(
+                        User.name.ilike(pattern),
+                        User.email.ilike(pattern),
+                        Feedback.data["comment"].as_string().ilike(pattern),
+                        Feedback.data["action"].as_string().ilike(pattern),
+                    )
+                )
+
+            total = feedbacks.count()
+
+            column = {
+                "user_name": User.name,
+                "user_email": User.email,
+            }.get(order_by, Feedback.created_at)
+            if direction == "asc":
+                feedbacks = feedbacks.order_by(column.asc(), Feedback.id.asc())
+            else:
+                feedbacks = feedbacks.order_by(column.desc(), Feedback.id.desc())
+
+            return [
+                FeedbackModel.model_validate(feedback)
+                for feedback in feedbacks.offset(skip).limit(limit).all()
+            ], total
+
     def get_feedbacks_by_user_id(self, user_id: str) -> list[FeedbackModel]:
         with get_db() as db:
             return [
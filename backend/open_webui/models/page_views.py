@@ -5,7 +5,19 @@ from datetime import datetime
 from open_webui.internal.db import Base, JSONField, get_db
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, Integer, DateTime, Index, func
+from sqlalchemy import (
+    BigInteger,
+    Column,
+    String,
+    Text,
+    Integer,
+    DateTime,
+    Index,
+    func,
+    insert,
+    update,
+)
+from sqlalchemy.exc import IntegrityError
 
 ####################
 # Page View DB Schema
@@ -53,6 +65,15 @@ class PageViewStats(Base):
     )
 
 
+class PageViewAccessTypeStats(Base):
+    __tablename__ = "page_view_access_type_stats"
+
+    access_type = Column(String(50), primary_key=True)
+    view_count = Column(Integer, default=0, nullable=False)
+
+    updated_at = Column(BigInteger, nullable=False)
+
+
 ####################
 # Pydantic Models
 ####################
@@ -99,53 +120,85 @@ class PageViewStatsResponse(BaseModel):
 ####################
 
 
+def _increment_counter(
+    db, table, key_column, key, increment: int, values: dict, insert_values: dict
+):
+    """UPDATE ... SET view_count = view_count + n，行不存在时插入；并发插入冲突时回退为更新"""
+    increment_stmt = (
+        update(table)
+        .where(key_column == key)
+        .values(view_count=table.view_count + increment, **values)
+    )
+    if db.execute(increment_stmt).rowcount:
+        return
+
+    try:
+        with db.begin_nested():
+            db.execute(
+                insert(table).values(
+                    **{key_column.key: key}, view_count=increment, **insert_values
+                )
+            )
+    except IntegrityError:
+        db.execute(increment_stmt)
+
+
 class PageViewsTable:
-    def record_page_view(
-        self,
-        url: str,
-        ip_address: str,
-        user_id: Optional[str] = None,
-        user_agent: Optional[str] = None,
-        referer: Optional[str] = None,
-        access_type: Optional[str] = None,
-    ) -> Optional[PageViewModel]:
-        """记录页面访问"""
+    def insert_page_views(self, views: List[dict]) -> int:
+        """批量写入页面访问记录，并按URL和访问类型聚合更新计数"""
+        if not views:
+            return 0
+
+        url_counts: Dict[str, List[int]] = {}
+        access_type_counts: Dict[str, List[int]] = {}
+        for view in views:
+            for key, counts in (
+                (view["url"], url_counts),
+                (view.get("access_type"), access_type_counts),
+            ):
+                if key is None:
+                    continue
+                count = counts.setdefault(key, [0, view["created_at"], 0])
+                count[0] += 1
+                count[1] = min(count[1], view["created_at"])
+                count[2] = max(count[2], view["created_at"])
+
         with get_db() as db:
+            # 多行INSERT
+            db.execute(insert(PageView), views)
+
             current_time = int(time.time())
-            
-            # 创建页面访问记录
-            page_view = PageView(
-                url=url,
-                user_id=user_id,
-                ip_address=ip_address,
-                user_agent=user_agent,
-                referer=referer,
-                access_type=access_type,
-                created_at=current_time
-            )
-            
-            db.add(page_view)
-            
-            # 更新或创建页面统计
-            stats = db.query(PageViewStats).filter_by(url=url).first()
-            if stats:
-                stats.view_count += 1
-                stats.last_view_at = current_time
-                stats.updated_at = current_time
-            else:
-                stats = PageViewStats(
-                    url=url,
-                    view_count=1,
-                    first_view_at=current_time,
-                    last_view_at=current_time,
-                    updated_at=current_time
+            # 按固定顺序更新计数行，避免多个节点并发刷新时死锁
+            for url, (count, first_view_at, last_view_at) in sorted(
+                url_counts.items()
+            ):
+                _increment_counter(
+                    db,
+                    PageViewStats,
+                    PageViewStats.url,
+                    url,
+                    count,
+                    {"last_view_at": last_view_at, "updated_at": current_time},
+                    {
+                        "first_view_at": first_view_at,
+                        "last_view_at": last_view_at,
+                        "updated_at": current_time,
+                    },
                 )
-                db.add(stats)
-            
+
+            for access_type, (count, _, _) in sorted(access_type_counts.items()):
+                _increment_counter(
+                    db,
+                    PageViewAccessTypeStats,
+                    PageViewAccessTypeStats.access_type,
+                    access_type,
+                    count,
+                    {"updated_at": current_time},
+                    {"updated_at": current_time},
+                )
+
             db.commit()
-            db.refresh(page_view)
-            
-            return PageViewModel.model_validate(page_view)
+            return len(views)
 
     def get_page_view_stats(self, url: str) -> Optional[PageViewStatsModel]:
         """获取特定页面的访问统计"""
@@ -281,12 +334,10 @@ class PageViewsTable:
     def get_access_type_statistics(self) -> Dict[str, int]:
         """获取各访问类型的统计"""
         with get_db() as db:
-            results = (
-                db.query(PageView.access_type, func.count(PageView.id))
-                .filter(PageView.access_type.isnot(None))
-                .group_by(PageView.access_type)
-                .all()
-            )
+            results = db.query(
+                PageViewAccessTypeStats.access_type,
+                PageViewAccessTypeStats.view_count,
+            ).all()
             return {access_type: count for access_type, count in results}
 
     def get_page_views_by_url_and_type(
@@ -4,7 +4,7 @@ from typing import Optional
 from open_webui.internal.db import Base, get_db
 
 from pydantic import BaseModel, ConfigDict
-from sqlalchemy import BigInteger, Column, String, Text, Index
+from sqlalchemy import BigInteger, Column, String, Text, Index, insert
 
 ####################
 # User Login DB Schema
@@ -82,6 +82,16 @@ class UserLoginsTable:
             
             return UserLoginModel.model_validate(login_record)
 
+    def insert_logins(self, logins: list[dict]) -> int:
+        """批量写入登录记录"""
+        if not logins:
+            return 0
+
+        with get_db() as db:
+            db.execute(insert(UserLogin), logins)
+            db.commit()
+            return len(logins)
+
     def get_logins_by_user_id(
         self, 
         user_id: str, 
@@ -3,22 +3,6 @@ import logging
 import ftfy
 import sys
 
-from langchain_community.document_loaders import (
-    AzureAIDocumentIntelligenceLoader,
-    BSHTMLLoader,
-    CSVLoader,
-    Docx2txtLoader,
-    OutlookMessageLoader,
-    PyPDFLoader,
-    TextLoader,
-    UnstructuredEPubLoader,
-    UnstructuredExcelLoader,
-    UnstructuredMarkdownLoader,
-    UnstructuredPowerPointLoader,
-    UnstructuredRSTLoader,
-    UnstructuredXMLLoader,
-    YoutubeLoader,
-)
 from langchain_core.documents import Document
 
 from open_webui.retrieval.loaders.mistral import MistralLoader
@@ -190,6 +174,22 @@ class Loader:
         )
 
     def _get_loader(self, filename: str, file_content_type: str, file_path: str):
+        # Imported on first use, each loader pulls in its parsing library
+        from langchain_community.document_loaders import (
+            AzureAIDocumentIntelligenceLoader,
+            BSHTMLLoader,
+            CSVLoader,
+            Docx2txtLoader,
+            OutlookMessageLoader,
+            PyPDFLoader,
+            TextLoader,
+            UnstructuredEPubLoader,
+            UnstructuredExcelLoader,
+            UnstructuredPowerPointLoader,
+            UnstructuredRSTLoader,
+            UnstructuredXMLLoader,
+        )
+
         file_ext = filename.split(".")[-1].lower()
 
         if self.engine == "tika" and self.kwargs.get("TIKA_SERVER_URL"):
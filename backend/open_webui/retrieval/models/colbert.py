@@ -6,6 +6,7 @@ from colbert.infra import ColBERTConfig
 from colbert.modeling.checkpoint import Checkpoint
 
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.retrieval.models.colbert_index import ColBERTIndex, maxsim
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["RAG"])
@@ -33,55 +34,37 @@ class ColBERT:
             name,
             colbert_config=ColBERTConfig(model_name=name),
         ).to(self.device)
-        pass
-
-    def calculate_similarity_scores(self, query_embeddings, document_embeddings):
-
-        query_embeddings = query_embeddings.to(self.device)
-        document_embeddings = document_embeddings.to(self.device)
-
-        # Validate dimensions to ensure compatibility
-        if query_embeddings.dim() != 3:
-            raise ValueError(
-                f"Expected query embeddings to have 3 dimensions, but got {query_embeddings.dim()}."
-            )
-        if document_embeddings.dim() != 3:
-            raise ValueError(
-                f"Expected document embeddings to have 3 dimensions, but got {document_embeddings.dim()}."
-            )
-        if query_embeddings.size(0) not in [1, document_embeddings.size(0)]:
-            raise ValueError(
-                "There should be either one query or queries equal to the number of documents."
-            )
-
-        # Transpose the query embeddings to align for matrix multiplication
-        transposed_query_embeddings = query_embeddings.permute(0, 2, 1)
-        # Compute similarity scores using batch matrix multiplication
-        computed_scores = torch.matmul(document_embeddings, transposed_query_embeddings)
-        # Apply max pooling to extract the highest semantic similarity across each document's sequence
-        maximum_scores = torch.max(computed_scores, dim=1).values
-
-        # Sum up the maximum scores across features to get the overall document relevance scores
-        final_scores = maximum_scores.sum(dim=1)
-
-        normalized_scores = torch.softmax(final_scores, dim=0)
+        self.index = ColBERTIndex(name, self.encode_documents)
+
+    def encode_documents(self, docs: list[str]) -> list[np.ndarray]:
+        with torch.no_grad():
+            embeddings, doclens = self.ckpt.docFromText(
+                docs, bsize=32, keep_dims="flatten"
+            )[:2]
+        return np.split(
+            embeddings.float().cpu().numpy(), np.cumsum(doclens)[:-1].astype(int)
+        )
 
-        return normalized_scores.detach().cpu().numpy().astype(np.float32)
+    def encode_query(self, query: str) -> np.ndarray:
+        with torch.no_grad():
+            return self.ckpt.queryFromText([query], bsize=32)[0].float().cpu().numpy()
 
     def predict(self, sentences):
 
         query = sentences[0][0]
         docs = [i[1] for i in sentences]
 
-        # Embedding the documents
-        embedded_docs = self.ckpt.docFromText(docs, bsize=32)[0]
-        # Embedding the queries
-        embedded_queries = self.ckpt.queryFromText([query], bsize=32)
-        embedded_query = embedded_queries[0]
-
-        # Calculate retrieval scores for the query against all documents
-        scores = self.calculate_similarity_scores(
-            embedded_query.unsqueeze(0), embedded_docs
+        # Documents indexed at ingestion are not encoded again
+        scores = maxsim(
+            self.encode_query(query), self.index.get_document_embeddings(docs)
         )
 
-        return scores
+        # Normalize over the candidates
+        scores = np.exp(scores - scores.max())
+        return (scores / scores.sum()).astype(np.float32)
+
+    def index_documents(self, collection_name: str, documents: list[tuple[str, str]]):
+        self.index.add_documents(collection_name, documents)
+
+    def search(self, collection_name: str, query: str, k: int):
+        return self.index.search(collection_name, self.encode_query(query), k)
@@ -0,0 +1,370 @@
+"""
+Late-interaction scoring over ColBERT token embeddings stored at ingestion.
+
+Each chunk's token embeddings are kept as float16 in the database, so
+reranking looks them up instead of encoding the candidates again. Large
+collections also get k-means centroids over their token embeddings with
+every token coded by its nearest centroid: a PLAID-style prefilter then
+scores documents by the centroids of their tokens and only the best
+candidates are scored exactly, which lets ColBERT serve as a first-stage
+retriever.
+"""
+
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from open_webui.env import (
+    RAG_COLBERT_CANDIDATES,
+    RAG_COLBERT_MAX_CENTROIDS,
+    RAG_COLBERT_MIN_CENTROID_TOKENS,
+    RAG_COLBERT_NPROBE,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.colbert_embeddings import (
+    ColBERTCodesModel,
+    ColBERTEmbeddingModel,
+    ColBERTEmbeddings,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+# Documents padded and scored together in one matrix product
+SCORE_BATCH_SIZE = 64
+
+# Token embeddings sampled to train the centroids of a collection
+CENTROID_SAMPLE_TOKENS = 32768
+KMEANS_ITERATIONS = 10
+
+# Documents read from the database at once when coding a collection
+CODE_PAGE_SIZE = 256
+
+# Collection prefilter indexes kept in memory per process
+INDEX_CACHE_SIZE = 16
+
+
+def get_text_hash(model: str, text: str) -> str:
+    return hashlib.sha256(f"{model}\n{text}".encode("utf-8")).hexdigest()
+
+
+def decode_embedding(data: bytes, num_tokens: int) -> np.ndarray:
+    return np.frombuffer(data, dtype=np.float16).reshape(num_tokens, -1)
+
+
+def maxsim(query: np.ndarray, documents: list[np.ndarray]) -> np.ndarray:
+    """
+    ColBERT score of each document: the best matching document token for
+    every query token, summed. Documents are padded into batches and scored
+    with one matrix product per batch.
+    """
+    query = np.asarray(query, dtype=np.float32)
+    scores = np.zeros(len(documents), dtype=np.float32)
+
+    for start in range(0, len(documents), SCORE_BATCH_SIZE):
+        batch = documents[start : start + SCORE_BATCH_SIZE]
+        lengths = np.array([len(document) for document in batch])
+        if not lengths.any():
+            continue
+
+        mask = np.arange(lengths.max())[None, :] < lengths[:, None]
+        padded = np.zeros((*mask.shape, query.shape[1]), dtype=np.float32)
+        padded[mask] = np.concatenate(batch)
+
+        similarity = padded @ query.T
+        similarity[~mask] = -np.inf
+        batch_scores = similarity.max(axis=1).sum(axis=1)
+        scores[start : start + len(batch)] = np.where(lengths > 0, batch_scores, 0)
+
+    return scores
+
+
+def assign_codes(embeddings: np.ndarray, centroids: np.ndarray) -> np.ndarray:
+    codes = np.empty(len(embeddings), dtype=np.uint16)
+    for start in range(0, len(embeddings), 8192):
+        chunk = np.asarray(embeddings[start : start + 8192], dtype=np.float32)
+        codes[start : start + len(chunk)] = (chunk @ centroids.T).argmax(axis=1)
+    return codes
+
+
+def kmeans(
+    sample: np.ndarray, k: int, iterations: int = KMEANS_ITERATIONS, seed: int = 0
+) -> np.ndarray:
+    """
+    Spherical k-means with k-means++ seeding; ColBERT token embeddings are
+    unit length.
+    """
+    sample = np.asarray(sample, dtype=np.float32)
+    rng = np.random.default_rng(seed)
+
+    centroids = np.empty((k, sample.shape[1]), dtype=np.float32)
+    centroids[0] = sample[rng.integers(len(sample))]
+    closest = sample @ centroids[0]
+    for idx in range(1, k):
+        distance = np.clip(1 - closest, 0, None)
+        total = distance.sum()
+        centroids[idx] = sample[
+            rng.choice(len(sample), p=distance / total if total > 0 else None)
+        ]
+        closest = np.maximum(closest, sample @ centroids[idx])
+
+    for _ in range(iterations):
+        codes = assign_codes(sample, centroids)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, codes, sample)
+        # Empty clusters keep their previous centroid
+        empty = np.bincount(codes, minlength=k) == 0
+        sums[empty] = centroids[empty]
+        centroids = sums / np.clip(
+            np.linalg.norm(sums, axis=1, keepdims=True), 1e-12, None
+        )
+    return centroids
+
+
+def get_num_centroids(num_tokens: int) -> int:
+    # PLAID uses a power of two near 16 * sqrt(number of embeddings)
+    return min(
+        2 ** int(math.log2(16 * math.sqrt(max(num_tokens, 1)))),
+        RAG_COLBERT_MAX_CENTROIDS,
+    )
+
+
+def delete_documents(vector_db, collection_name: str, filter: dict):
+    """
+    Delete the chunks matching `filter` from `vector_db` together with their
+    stored token embeddings, which are keyed by chunk id.
+    """
+    result = vector_db.query(collection_name=collection_name, filter=filter)
+    vector_db.delete(collection_name=collection_name, filter=filter)
+    if result and result.ids and result.ids[0]:
+        ColBERTEmbeddings.delete_by_ids(result.ids[0])
+
+
+class CollectionIndex:
+    """Centroid codes of the tokens of every document in one collection."""
+
+    def __init__(self, rows: list[ColBERTCodesModel], centroids: np.ndarray):
+        rows = [row for row in rows if row.codes]
+        self.ids = [row.id for row in rows]
+        self.lengths = np.array([row.num_tokens for row in rows], dtype=np.int64)
+        self.codes = (
+            np.concatenate([np.frombuffer(row.codes, dtype=np.uint16) for row in rows])
+            if rows
+            else np.empty(0, dtype=np.uint16)
+        )
+        self.documents = np.repeat(np.arange(len(rows)), self.lengths)
+        self.centroids = centroids
+
+    def candidates(self, query: np.ndarray, nprobe: int, limit: int) -> list[str]:
+        similarity = np.asarray(query, dtype=np.float32) @ self.centroids.T
+        nprobe = min(nprobe, len(self.centroids))
+
+        # Keep each query token's similarity to its nearest centroids only
+        rows = np.arange(len(similarity))[:, None]
+        nearest = np.argpartition(-similarity, nprobe - 1, axis=1)[:, :nprobe]
+        pruned = np.zeros_like(similarity)
+        pruned[rows, nearest] = np.clip(similarity[rows, nearest], 0, None)
+
+        # Approximate the score of every document with a token in a probed
+        # centroid from the centroids of those tokens
+        tokens = pruned.any(axis=0)[self.codes]
+        documents, starts = np.unique(self.documents[tokens], return_index=True)
+        if len(documents) == 0:
+            return []
+        scores = np.maximum.reduceat(pruned[:, self.codes[tokens]], starts, axis=1).sum(
+            axis=0
+        )
+
+        if len(documents) > limit:
+            documents = documents[np.argpartition(-scores, limit - 1)[:limit]]
+        return [self.ids[idx] for idx in documents]
+
+
+class ColBERTIndex:
+    """Stored token embeddings of one ColBERT model."""
+
+    def __init__(
+        self, model: str, encode_documents: Callable[[list[str]], list[np.ndarray]]
+    ):
+        self.model = model
+        self.encode_documents = encode_documents
+        self.indexes: OrderedDict[str, tuple[tuple, Optional[CollectionIndex]]] = (
+            OrderedDict()
+        )
+        self.lock = threading.Lock()
+
+    def get_centroids(self, collection_name: str) -> Optional[np.ndarray]:
+        centroids = ColBERTEmbeddings.get_centroids(collection_name, self.model)
+        if centroids is None:
+            return None
+        return decode_embedding(centroids.data, centroids.num_centroids).astype(
+            np.float32
+        )
+
+    def get_document_embeddings(self, texts: list[str]) -> list[np.ndarray]:
+        """Token embeddings of the texts, encoding only those not stored."""
+        hashes = [get_text_hash(self.model, text) for text in texts]
+
+        embeddings = {}
+        try:
+            for embedding in ColBERTEmbeddings.get_embeddings_by_text_hashes(
+                self.model, list(set(hashes))
+            ):
+                embeddings[embedding.text_hash] = decode_embedding(
+                    embedding.data, embedding.num_tokens
+                )
+        except Exception as e:
+            log.warning(f"Error reading stored ColBERT embeddings: {e}")
+
+        missing = {
+            text_hash: text
+            for text_hash, text in zip(hashes, texts)
+            if text_hash not in embeddings
+        }
+        if missing:
+            embeddings.update(
+                zip(missing, self.encode_documents(list(missing.values())))
+            )
+        return [embeddings[text_hash] for text_hash in hashes]
+
+    def add_documents(self, collection_name: str, documents: list[tuple[str, str]]):
+        """Encode and store `(id, text)` chunks of a collection."""
+        if not documents:
+            return
+
+        embeddings = self.encode_documents([text for _, text in documents])
+        centroids = self.get_centroids(collection_name)
+        ColBERTEmbeddings.insert_embeddings(
+            collection_name,
+            self.model,
+            [
+                ColBERTEmbeddingModel(
+                    id=id,
+                    text_hash=get_text_hash(self.model, text),
+                    num_tokens=len(embedding),
+                    data=embedding.astype(np.float16).tobytes(),
+                    codes=(
+                        assign_codes(embedding, centroids).tobytes()
+                        if centroids is not None
+                        else None
+                    ),
+                )
+                for (id, text), embedding in zip(documents, embeddings)
+            ],
+        )
+
+        stats = ColBERTEmbeddings.get_collection_stats(collection_name, self.model)
+        trained = ColBERTEmbeddings.get_centroids(collection_name, self.model)
+        # Retrain once the collection has doubled since the last training
+        if stats.num_tokens >= RAG_COLBERT_MIN_CENTROID_TOKENS and (
+            trained is None or stats.num_tokens >= 2 * trained.num_tokens
+        ):
+            self.train_centroids(collection_name, stats.count, stats.num_tokens)
+
+    def train_centroids(self, collection_name: str, count: int, num_tokens: int):
+        tokens_per_document = max(num_tokens / max(count, 1), 1)
+        sample = [
+            decode_embedding(embedding.data, embedding.num_tokens)
+            for embedding in ColBERTEmbeddings.get_embeddings_by_collection(
+                collection_name,
+                self.model,
+                limit=math.ceil(CENTROID_SAMPLE_TOKENS / tokens_per_document),
+            )
+        ]
+        sample = np.concatenate(sample)[:CENTROID_SAMPLE_TOKENS]
+        num_centroids = min(get_num_centroids(num_tokens), len(sample))
+
+        log.info(
+            f"Training {num_centroids} ColBERT centroids for {collection_name} "
+            f"({num_tokens} tokens)"
+        )
+        centroids = kmeans(sample, num_centroids)
+        ColBERTEmbeddings.upsert_centroids(
+            collection_name,
+            self.model,
+            num_centroids,
+            centroids.astype(np.float16).tobytes(),
+            num_tokens,
+        )
+
+        centroids = centroids.astype(np.float16).astype(np.float32)
+        ids = [
+            row.id
+            for row in ColBERTEmbeddings.get_codes_by_collection(
+                collection_name, self.model
+            )
+        ]
+        for start in range(0, len(ids), CODE_PAGE_SIZE):
+            ColBERTEmbeddings.update_codes(
+                {
+                    embedding.id: assign_codes(
+                        decode_embedding(embedding.data, embedding.num_tokens),
+                        centroids,
+                    ).tobytes()
+                    for embedding in ColBERTEmbeddings.get_embeddings_by_ids(
+                        ids[start : start + CODE_PAGE_SIZE]
+                    )
+                }
+            )
+
+    def get_collection_index(self, collection_name: str) -> Optional[CollectionIndex]:
+        centroids = ColBERTEmbeddings.get_centroids(collection_name, self.model)
+        if centroids is None:
+            return None
+
+        stats = ColBERTEmbeddings.get_collection_stats(collection_name, self.model)
+        version = (
+            stats.count,
+            stats.num_tokens,
+            stats.updated_at,
+            centroids.updated_at,
+        )
+        with self.lock:
+            cached = self.indexes.get(collection_name)
+            if cached is not None and cached[0] == version:
+                self.indexes.move_to_end(collection_name)
+                return cached[1]
+
+        index = CollectionIndex(
+            ColBERTEmbeddings.get_codes_by_collection(collection_name, self.model),
+            decode_embedding(centroids.data, centroids.num_centroids).astype(
+                np.float32
+            ),
+        )
+        with self.lock:
+            self.indexes[collection_name] = (version, index)
+            self.indexes.move_to_end(collection_name)
+            while len(self.indexes) > INDEX_CACHE_SIZE:
+                self.indexes.popitem(last=False)
+        return index
+
+    def search(
+        self, collection_name: str, query: np.ndarray, k: int
+    ) -> list[tuple[str, float]]:
+        """`(id, score)` of the best `k` chunks of a collection for a query."""
+        index = self.get_collection_index(collection_name)
+        if index is None:
+            # Small collections are scored exhaustively
+            embeddings = ColBERTEmbeddings.get_embeddings_by_collection(
+                collection_name, self.model
+            )
+        else:
+            embeddings = ColBERTEmbeddings.get_embeddings_by_ids(
+                index.candidates(query, RAG_COLBERT_NPROBE, RAG_COLBERT_CANDIDATES)
+            )
+
+        scores = maxsim(
+            query,
+            [
+                decode_embedding(embedding.data, embedding.num_tokens)
+                for embedding in embeddings
+            ],
+        )
+        return [
+            (embeddings[idx].id, float(scores[idx])) for idx in np.argsort(-scores)[:k]
+        ]
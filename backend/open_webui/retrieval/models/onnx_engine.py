@@ -0,0 +1,351 @@
+"""
+ONNX Runtime engine for local SentenceTransformer and CrossEncoder models.
+
+A model runs from the `onnx/model.onnx` its repository ships or from an
+export of its transformer, quantized to int8 with dynamic quantization; both
+are cached under DATA_DIR/cache/onnx. Inputs are tokenized with the fast
+tokenizer and sorted by length, so each batch is padded only to its own
+longest input.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Callable, Optional
+
+import numpy as np
+
+from open_webui.env import (
+    DATA_DIR,
+    RAG_ONNX_INTER_OP_THREADS,
+    RAG_ONNX_INTRA_OP_THREADS,
+    RAG_ONNX_QUANTIZE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+ONNX_CACHE_DIR = DATA_DIR / "cache" / "onnx"
+
+# Longest input in tokens when neither the model nor its tokenizer sets one
+DEFAULT_MAX_LENGTH = 512
+
+# SentenceTransformer pooling config keys, in the order the modes are concatenated
+POOLING_MODES = {
+    "cls": "pooling_mode_cls_token",
+    "max": "pooling_mode_max_tokens",
+    "mean": "pooling_mode_mean_tokens",
+    "mean_sqrt_len": "pooling_mode_mean_sqrt_len_tokens",
+    "lasttoken": "pooling_mode_lasttoken",
+}
+
+
+def read_json(path: Path) -> dict:
+    if not path.exists():
+        return {}
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
+
+
+def export_model(
+    model_path: str, kind: str, output: Path, trust_remote_code: bool = False
+):
+    import torch
+    from transformers import (
+        AutoModel,
+        AutoModelForSequenceClassification,
+        AutoTokenizer,
+    )
+
+    log.info(f"Exporting {model_path} to ONNX")
+    model_class = (
+        AutoModel if kind == "embedding" else AutoModelForSequenceClassification
+    )
+    model = model_class.from_pretrained(
+        model_path, trust_remote_code=trust_remote_code
+    ).eval()
+    tokenizer = AutoTokenizer.from_pretrained(
+        model_path, trust_remote_code=trust_remote_code
+    )
+
+    inputs = dict(tokenizer(["a", "b c"], padding=True, return_tensors="pt"))
+    output_name = "last_hidden_state" if kind == "embedding" else "logits"
+    dynamic_axes = {name: {0: "batch", 1: "sequence"} for name in inputs}
+    dynamic_axes[output_name] = (
+        {0: "batch", 1: "sequence"} if kind == "embedding" else {0: "batch"}
+    )
+
+    with torch.no_grad():
+        torch.onnx.export(
+            model,
+            (inputs,),
+            str(output),
+            input_names=list(inputs),
+            output_names=[output_name],
+            dynamic_axes=dynamic_axes,
+            opset_version=17,
+        )
+
+
+def quantize_model(source: Path, output: Path):
+    from onnxruntime.quantization import QuantType, quantize_dynamic
+
+    log.info(f"Quantizing {source} to int8")
+    quantize_dynamic(str(source), str(output), weight_type=QuantType.QInt8)
+
+
+def get_onnx_model_path(
+    model_path: str,
+    kind: str,
+    quantize: bool = RAG_ONNX_QUANTIZE,
+    trust_remote_code: bool = False,
+) -> Path:
+    """
+    Path of the ONNX file to run for a local model, exporting and quantizing
+    it on first use. Files are written under a temporary name and renamed so
+    workers starting together never load a partial file.
+    """
+    cache_dir = (
+        ONNX_CACHE_DIR
+        / hashlib.sha256(
+            f"{os.path.abspath(model_path)}:{kind}".encode("utf-8")
+        ).hexdigest()[:16]
+    )
+    cache_dir.mkdir(parents=True, exist_ok=True)
+
+    def build(path: Path, create: Callable[[Path], None]) -> Path:
+        if not path.exists():
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            try:
+                create(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if tmp_path.exists():
+                    tmp_path.unlink()
+        return path
+
+    source = next(
+        (
+            Path(model_path) / name
+            for name in ["onnx/model.onnx", "model.onnx"]
+            if (Path(model_path) / name).exists()
+        ),
+        None,
+    )
+    if source is None:
+        source = build(
+            cache_dir / "model.onnx",
+            lambda path: export_model(model_path, kind, path, trust_remote_code),
+        )
+
+    if not quantize:
+        return source
+    return build(
+        cache_dir / "model_int8.onnx", lambda path: quantize_model(source, path)
+    )
+
+
+def create_session(path: Path):
+    import onnxruntime as ort
+
+    options = ort.SessionOptions()
+    options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+    options.intra_op_num_threads = RAG_ONNX_INTRA_OP_THREADS
+    options.inter_op_num_threads = RAG_ONNX_INTER_OP_THREADS
+    options.execution_mode = (
+        ort.ExecutionMode.ORT_PARALLEL
+        if RAG_ONNX_INTER_OP_THREADS > 1
+        else ort.ExecutionMode.ORT_SEQUENTIAL
+    )
+    return ort.InferenceSession(str(path), options, providers=["CPUExecutionProvider"])
+
+
+def pool(
+    token_embeddings: np.ndarray, attention_mask: np.ndarray, mode: str
+) -> np.ndarray:
+    mask = attention_mask[..., None].astype(token_embeddings.dtype)
+    if mode == "cls":
+        return token_embeddings[:, 0]
+    elif mode == "max":
+        return np.where(mask > 0, token_embeddings, -1e9).max(axis=1)
+    elif mode == "lasttoken":
+        last = attention_mask.sum(axis=1) - 1
+        return token_embeddings[np.arange(len(token_embeddings)), last]
+
+    total = (token_embeddings * mask).sum(axis=1)
+    count = np.clip(mask.sum(axis=1), 1e-9, None)
+    if mode == "mean_sqrt_len":
+        return total / np.sqrt(count)
+    return total / count
+
+
+class OnnxModel:
+    kind = ""
+
+    def __init__(
+        self,
+        model_path: str,
+        quantize: bool = RAG_ONNX_QUANTIZE,
+        trust_remote_code: bool = False,
+        max_length: Optional[int] = None,
+    ):
+        from transformers import AutoTokenizer
+
+        self.tokenizer = AutoTokenizer.from_pretrained(
+            model_path, use_fast=True, trust_remote_code=trust_remote_code
+        )
+        self.session = create_session(
+            get_onnx_model_path(model_path, self.kind, quantize, trust_remote_code)
+        )
+        self.input_names = {i.name for i in self.session.get_inputs()}
+        self.max_length = max_length or min(
+            self.tokenizer.model_max_length, DEFAULT_MAX_LENGTH
+        )
+
+    def tokenize(self, *texts: list[str]) -> dict[str, np.ndarray]:
+        features = self.tokenizer(
+            *texts,
+            padding=True,
+            truncation=True,
+            max_length=self.max_length,
+            return_tensors="np",
+        )
+        return {name: value.astype(np.int64) for name, value in features.items()}
+
+    def infer(self, features: dict[str, np.ndarray]) -> np.ndarray:
+        return self.session.run(
+            None,
+            {
+                name: value
+                for name, value in features.items()
+                if name in self.input_names
+            },
+        )[0]
+
+    def run_batches(
+        self,
+        inputs: list,
+        lengths: list[int],
+        batch_size: int,
+        run: Callable[[list], np.ndarray],
+    ) -> np.ndarray:
+        # Longest inputs first, so batches hold inputs of similar length
+        order = np.argsort([-length for length in lengths], kind="stable")
+        results = [
+            run([inputs[idx] for idx in order[start : start + batch_size]])
+            for start in range(0, len(inputs), batch_size)
+        ]
+        sorted_output = np.concatenate(results)
+        output = np.empty_like(sorted_output)
+        output[order] = sorted_output
+        return output
+
+
+class OnnxEmbeddingModel(OnnxModel):
+    """Stands in for a SentenceTransformer with Pooling and Normalize modules."""
+
+    kind = "embedding"
+
+    def __init__(self, model_path: str, **kwargs):
+        path = Path(model_path)
+        self.pooling_modes = ["mean"]
+        self.normalize = False
+
+        for module in read_json(path / "modules.json") or []:
+            module_type = module.get("type", "")
+            if module_type.endswith("Transformer"):
+                continue
+            elif module_type.endswith("Pooling"):
+                config = read_json(path / module.get("path", "") / "config.json")
+                if config.get("include_prompt", True) is False:
+                    raise ValueError("Pooling without prompt tokens is not supported")
+                if config.get("pooling_mode_weightedmean_tokens"):
+                    raise ValueError("Weighted mean pooling is not supported")
+                self.pooling_modes = [
+                    mode for mode, key in POOLING_MODES.items() if config.get(key)
+                ]
+            elif module_type.endswith("Normalize"):
+                self.normalize = True
+            else:
+                raise ValueError(f"{module_type} modules are not supported")
+
+        kwargs.setdefault(
+            "max_length",
+            read_json(path / "sentence_bert_config.json").get("max_seq_length"),
+        )
+        super().__init__(model_path, **kwargs)
+
+    def embed(self, texts: list[str]) -> np.ndarray:
+        features = self.tokenize(texts)
+        output = self.infer(features)
+        if output.ndim == 2:
+            # The model is exported with its pooling
+            embeddings = output
+        else:
+            mask = features["attention_mask"]
+            embeddings = np.concatenate(
+                [pool(output, mask, mode) for mode in self.pooling_modes], axis=-1
+            )
+        return embeddings.astype(np.float32)
+
+    def encode(
+        self,
+        sentences,
+        prompt: Optional[str] = None,
+        batch_size: int = 32,
+        normalize_embeddings: bool = False,
+        **kwargs,
+    ) -> np.ndarray:
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        if prompt:
+            texts = [f"{prompt}{text}" for text in texts]
+        if not texts:
+            return np.empty((0,), dtype=np.float32)
+
+        embeddings = self.run_batches(
+            texts, [len(text) for text in texts], batch_size, self.embed
+        )
+        if self.normalize or normalize_embeddings:
+            norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+            embeddings = embeddings / np.clip(norms, 1e-12, None)
+        return embeddings[0] if isinstance(sentences, str) else embeddings
+
+
+class OnnxCrossEncoder(OnnxModel):
+    """Stands in for a CrossEncoder, with its default activation."""
+
+    kind = "cross_encoder"
+
+    def __init__(self, model_path: str, **kwargs):
+        super().__init__(model_path, **kwargs)
+
+        config = read_json(Path(model_path) / "config.json")
+        activation = config.get("sbert_ce_default_activation_function") or ""
+        # Transformers configs default to two labels
+        num_labels = len(config.get("id2label") or {}) or 2
+        self.sigmoid = activation.endswith("Sigmoid") or (
+            not activation and num_labels == 1
+        )
+
+    def score(self, pairs: list) -> np.ndarray:
+        features = self.tokenize(
+            [query for query, _ in pairs], [doc for _, doc in pairs]
+        )
+        logits = self.infer(features).astype(np.float32)
+        return logits[:, 0] if logits.shape[1] == 1 else logits
+
+    def predict(self, sentences, batch_size: int = 32, **kwargs) -> np.ndarray:
+        pairs = [list(pair) for pair in sentences]
+        if not pairs:
+            return np.empty((0,), dtype=np.float32)
+
+        scores = self.run_batches(
+            pairs,
+            [len(query) + len(doc) for query, doc in pairs],
+            batch_size,
+            self.score,
+        )
+        return 1 / (1 + np.exp(-scores)) if self.sigmoid else scores
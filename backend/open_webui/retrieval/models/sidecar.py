@@ -0,0 +1,548 @@
+"""
+Inference sidecar: one process that holds the local embedding and reranking
+models for every worker of the app.
+
+Workers talk to it over a Unix socket. Each message is a frame of two
+big-endian uint32 lengths followed by a JSON header and a binary payload;
+results come back as raw float32 arrays in the payload so embeddings are not
+converted to and from JSON. Encode and cross-encoder requests for the same
+model arriving within a few milliseconds of each other are run as one batch.
+
+The first worker that cannot connect starts the sidecar and the sidecar exits
+with that worker; the next request from any worker starts it again. A lock
+file next to the socket keeps a second sidecar from serving the same socket.
+"""
+
+import argparse
+import asyncio
+import fcntl
+import json
+import logging
+import os
+import socket
+import struct
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Optional, Union
+
+import numpy as np
+
+from open_webui.env import (
+    DEVICE_TYPE,
+    DOCKER,
+    RAG_INFERENCE_SIDECAR_BATCH_WAIT,
+    RAG_INFERENCE_SIDECAR_MAX_BATCH_SIZE,
+    RAG_INFERENCE_SIDECAR_SOCKET,
+    RAG_INFERENCE_SIDECAR_TIMEOUT,
+    RAG_LOCAL_MODEL_ENGINE,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["RAG"])
+
+FRAME_HEADER = struct.Struct(">II")
+
+# Seconds to wait for a newly started sidecar to accept connections
+START_TIMEOUT = 30
+
+# Seconds between checks that the worker which started the sidecar is alive
+PARENT_CHECK_INTERVAL = 2
+
+
+####################################
+# Protocol
+####################################
+
+
+def encode_frame(header: dict, payload: bytes = b"") -> bytes:
+    header = json.dumps(header).encode("utf-8")
+    return FRAME_HEADER.pack(len(header), len(payload)) + header + payload
+
+
+def decode_header(data: bytes) -> dict:
+    return json.loads(data.decode("utf-8"))
+
+
+def pack_array(array: np.ndarray) -> tuple[dict, bytes]:
+    array = np.ascontiguousarray(array, dtype=np.float32)
+    return {"shape": list(array.shape)}, array.tobytes()
+
+
+def unpack_array(header: dict, payload: bytes) -> np.ndarray:
+    return np.frombuffer(payload, dtype=np.float32).reshape(header["shape"])
+
+
+def recv_exactly(sock: socket.socket, size: int) -> bytes:
+    buffer = bytearray(size)
+    view = memoryview(buffer)
+    received = 0
+    while received < size:
+        count = sock.recv_into(view[received:])
+        if count == 0:
+            raise ConnectionError("Inference sidecar closed the connection")
+        received += count
+    return bytes(buffer)
+
+
+def recv_frame(sock: socket.socket) -> tuple[dict, bytes]:
+    header_size, payload_size = FRAME_HEADER.unpack(
+        recv_exactly(sock, FRAME_HEADER.size)
+    )
+    header = decode_header(recv_exactly(sock, header_size))
+    return header, recv_exactly(sock, payload_size) if payload_size else b""
+
+
+async def read_frame(reader: asyncio.StreamReader) -> tuple[dict, bytes]:
+    header_size, payload_size = FRAME_HEADER.unpack(
+        await reader.readexactly(FRAME_HEADER.size)
+    )
+    header = decode_header(await reader.readexactly(header_size))
+    return header, await reader.readexactly(payload_size) if payload_size else b""
+
+
+####################################
+# Server
+####################################
+
+
+class Batcher:
+    """
+    Runs `run(items)` over the items of concurrent requests in shared calls of
+    at most `max_batch_size` items. A request waits up to `wait` seconds for
+    others to join; a request larger than the batch size runs on its own.
+    """
+
+    def __init__(
+        self,
+        run: Callable[[list], np.ndarray],
+        executor: ThreadPoolExecutor,
+        max_batch_size: int,
+        wait: float,
+    ):
+        self.run = run
+        self.executor = executor
+        self.max_batch_size = max_batch_size
+        self.wait = wait
+        self.pending: list[tuple[list, asyncio.Future]] = []
+        self.task: Optional[asyncio.Task] = None
+
+    async def submit(self, items: list) -> np.ndarray:
+        future = asyncio.get_running_loop().create_future()
+        self.pending.append((items, future))
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self.drain())
+        return await future
+
+    def pending_size(self) -> int:
+        return sum(len(items) for items, _ in self.pending)
+
+    async def drain(self):
+        loop = asyncio.get_running_loop()
+        while self.pending:
+            if self.wait > 0 and self.pending_size() < self.max_batch_size:
+                await asyncio.sleep(self.wait)
+
+            batch, size = [], 0
+            while self.pending and (
+                not batch or size + len(self.pending[0][0]) <= self.max_batch_size
+            ):
+                items, future = self.pending.pop(0)
+                batch.append((items, future))
+                size += len(items)
+
+            inputs = [item for items, _ in batch for item in items]
+            try:
+                results = await loop.run_in_executor(self.executor, self.run, inputs)
+            except Exception as e:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                continue
+
+            offset = 0
+            for items, future in batch:
+                if not future.done():
+                    future.set_result(results[offset : offset + len(items)])
+                offset += len(items)
+
+
+class InferenceServer:
+    def __init__(
+        self,
+        max_batch_size: int = RAG_INFERENCE_SIDECAR_MAX_BATCH_SIZE,
+        batch_wait: float = RAG_INFERENCE_SIDECAR_BATCH_WAIT,
+    ):
+        self.max_batch_size = max_batch_size
+        self.batch_wait = batch_wait
+
+        # Models share one inference thread; torch parallelizes each call
+        self.executor = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="inference"
+        )
+        self.models: dict[tuple, object] = {}
+        self.loading: dict[tuple, asyncio.Lock] = {}
+        self.batchers: dict[tuple, Batcher] = {}
+
+    def load_model(self, kind: str, name: str, trust_remote_code: bool):
+        log.info(f"Inference sidecar: loading {kind} model {name}")
+        if RAG_LOCAL_MODEL_ENGINE == "onnx" and kind in ["embedding", "cross_encoder"]:
+            from open_webui.retrieval.models.onnx_engine import (
+                OnnxCrossEncoder,
+                OnnxEmbeddingModel,
+            )
+
+            model_class = (
+                OnnxEmbeddingModel if kind == "embedding" else OnnxCrossEncoder
+            )
+            try:
+                return model_class(name, trust_remote_code=trust_remote_code)
+            except Exception as e:
+                log.warning(f"ONNX Runtime engine failed, using PyTorch: {e}")
+
+        if kind == "embedding":
+            from sentence_transformers import SentenceTransformer
+
+            return SentenceTransformer(
+                name, device=DEVICE_TYPE, trust_remote_code=trust_remote_code
+            )
+        elif kind == "cross_encoder":
+            from sentence_transformers import CrossEncoder
+
+            return CrossEncoder(
+                name, device=DEVICE_TYPE, trust_remote_code=trust_remote_code
+            )
+        elif kind == "colbert":
+            from open_webui.retrieval.models.colbert import ColBERT
+
+            return ColBERT(name, env="docker" if DOCKER else None)
+        raise ValueError(f"Unknown model kind: {kind}")
+
+    async def get_model(self, header: dict):
+        key = (header["kind"], header["model"], bool(header.get("trust_remote_code")))
+        if key not in self.models:
+            lock = self.loading.setdefault(key, asyncio.Lock())
+            async with lock:
+                if key not in self.models:
+                    self.models[key] = await asyncio.get_running_loop().run_in_executor(
+                        self.executor, self.load_model, *key
+                    )
+        return self.models[key]
+
+    def get_batcher(self, key: tuple, run: Callable[[list], np.ndarray]) -> Batcher:
+        if key not in self.batchers:
+            self.batchers[key] = Batcher(
+                run, self.executor, self.max_batch_size, self.batch_wait
+            )
+        return self.batchers[key]
+
+    async def handle_request(self, header: dict) -> Union[np.ndarray, dict, None]:
+        op = header["op"]
+        model = await self.get_model(header)
+
+        if op == "load":
+            return None
+        elif op == "encode":
+            prompt = header.get("prompt")
+            batcher = self.get_batcher(
+                (op, id(model), prompt),
+                lambda texts: model.encode(
+                    texts, **({"prompt": prompt} if prompt else {})
+                ),
+            )
+            return await batcher.submit(header["texts"])
+        elif op == "rerank":
+            if header["kind"] == "colbert":
+                # Scores are normalized over the documents of one query, so
+                # ColBERT requests are not mixed
+                return await asyncio.get_running_loop().run_in_executor(
+                    self.executor, model.predict, header["pairs"]
+                )
+            batcher = self.get_batcher((op, id(model)), model.predict)
+            return await batcher.submit(header["pairs"])
+        elif op == "index":
+            await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                model.index_documents,
+                header["collection_name"],
+                header["documents"],
+            )
+            return None
+        elif op == "search":
+            results = await asyncio.get_running_loop().run_in_executor(
+                self.executor,
+                model.search,
+                header["collection_name"],
+                header["query"],
+                header["k"],
+            )
+            return {"results": results}
+        raise ValueError(f"Unknown operation: {op}")
+
+    async def handle_connection(
+        self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter
+    ):
+        try:
+            while True:
+                try:
+                    header, _ = await read_frame(reader)
+                except asyncio.IncompleteReadError:
+                    break
+
+                try:
+                    result = await self.handle_request(header)
+                    if result is None:
+                        writer.write(encode_frame({}))
+                    elif isinstance(result, dict):
+                        writer.write(encode_frame(result))
+                    else:
+                        writer.write(encode_frame(*pack_array(np.asarray(result))))
+                except Exception as e:
+                    log.exception(f"Inference sidecar: {header.get('op')} failed")
+                    writer.write(encode_frame({"error": str(e)}))
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, path: str, parent_pid: Optional[int] = None):
+        if os.path.exists(path):
+            os.unlink(path)
+        server = await asyncio.start_unix_server(self.handle_connection, path=path)
+        os.chmod(path, 0o600)
+        log.info(f"Inference sidecar: listening on {path}")
+
+        async with server:
+            while True:
+                await asyncio.sleep(PARENT_CHECK_INTERVAL)
+                if parent_pid is not None and os.getppid() != parent_pid:
+                    log.info("Inference sidecar: parent exited, shutting down")
+                    break
+
+        if os.path.exists(path):
+            os.unlink(path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Open WebUI inference sidecar")
+    parser.add_argument("--socket", default=RAG_INFERENCE_SIDECAR_SOCKET)
+    parser.add_argument("--parent-pid", type=int, default=None)
+    args = parser.parse_args()
+
+    logging.basicConfig(level=SRC_LOG_LEVELS["RAG"])
+    os.makedirs(os.path.dirname(args.socket) or ".", exist_ok=True)
+
+    lock_file = open(f"{args.socket}.lock", "w")
+    try:
+        fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except BlockingIOError:
+        log.info("Inference sidecar: already running")
+        return
+
+    asyncio.run(InferenceServer().serve(args.socket, args.parent_pid))
+
+
+####################################
+# Client
+####################################
+
+
+class InferenceSidecar:
+    """
+    Blocking client used from the request threads of a worker. Each thread
+    keeps its own connection; the sidecar is started when it is not running.
+    """
+
+    def __init__(
+        self,
+        path: str = RAG_INFERENCE_SIDECAR_SOCKET,
+        timeout: float = RAG_INFERENCE_SIDECAR_TIMEOUT,
+    ):
+        self.path = path
+        self.timeout = timeout
+        self.local = threading.local()
+        self.start_lock = threading.Lock()
+        self.process: Optional[subprocess.Popen] = None
+
+    def connect(self) -> socket.socket:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            sock.settimeout(self.timeout)
+            sock.connect(self.path)
+        except OSError:
+            sock.close()
+            raise
+        return sock
+
+    def start(self):
+        with self.start_lock:
+            try:
+                self.connect().close()
+                return
+            except OSError:
+                pass
+
+            if self.process is None or self.process.poll() is not None:
+                log.info(f"Starting inference sidecar on {self.path}")
+                self.process = subprocess.Popen(
+                    [
+                        sys.executable,
+                        "-m",
+                        "open_webui.retrieval.models.sidecar",
+                        "--socket",
+                        self.path,
+                        "--parent-pid",
+                        str(os.getpid()),
+                    ],
+                    start_new_session=True,
+                )
+
+            deadline = time.monotonic() + START_TIMEOUT
+            while time.monotonic() < deadline:
+                try:
+                    self.connect().close()
+                    return
+                except OSError:
+                    time.sleep(0.1)
+            raise ConnectionError(f"Inference sidecar did not start on {self.path}")
+
+    def close_connection(self):
+        sock = getattr(self.local, "sock", None)
+        if sock is not None:
+            sock.close()
+            self.local.sock = None
+
+    def request(self, header: dict) -> Union[np.ndarray, list, None]:
+        frame = encode_frame(header)
+        for attempt in range(2):
+            try:
+                if getattr(self.local, "sock", None) is None:
+                    try:
+                        self.local.sock = self.connect()
+                    except OSError:
+                        self.start()
+                        self.local.sock = self.connect()
+                self.local.sock.sendall(frame)
+                response, payload = recv_frame(self.local.sock)
+                break
+            except socket.timeout:
+                # The connection may still carry the late response
+                self.close_connection()
+                raise
+            except OSError:
+                # The sidecar restarted or is not running yet
+                self.close_connection()
+                if attempt:
+                    raise
+
+        if "error" in response:
+            raise Exception(f"Inference sidecar: {response['error']}")
+        if "results" in response:
+            return response["results"]
+        if "shape" not in response:
+            return None
+        return unpack_array(response, payload)
+
+    def stop(self):
+        self.close_connection()
+        if self.process is not None and self.process.poll() is None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+        self.process = None
+
+
+SIDECAR = InferenceSidecar()
+
+
+class SidecarEmbeddingModel:
+    """Stands in for a SentenceTransformer that runs in the sidecar."""
+
+    def __init__(
+        self,
+        model: str,
+        trust_remote_code: bool = False,
+        sidecar: InferenceSidecar = SIDECAR,
+    ):
+        self.header = {
+            "kind": "embedding",
+            "model": model,
+            "trust_remote_code": trust_remote_code,
+        }
+        self.sidecar = sidecar
+        self.sidecar.request({**self.header, "op": "load"})
+
+    def encode(self, sentences, prompt: Optional[str] = None, **kwargs) -> np.ndarray:
+        texts = [sentences] if isinstance(sentences, str) else list(sentences)
+        if not texts:
+            return np.empty((0,), dtype=np.float32)
+        embeddings = self.sidecar.request(
+            {**self.header, "op": "encode", "texts": texts, "prompt": prompt}
+        )
+        return embeddings[0] if isinstance(sentences, str) else embeddings
+
+
+class SidecarReranker:
+    """Stands in for a CrossEncoder or ColBERT model that runs in the sidecar."""
+
+    def __init__(
+        self,
+        model: str,
+        kind: str = "cross_encoder",
+        trust_remote_code: bool = False,
+        sidecar: InferenceSidecar = SIDECAR,
+    ):
+        self.header = {
+            "kind": kind,
+            "model": model,
+            "trust_remote_code": trust_remote_code,
+        }
+        self.sidecar = sidecar
+        self.sidecar.request({**self.header, "op": "load"})
+
+    def predict(self, sentences, **kwargs) -> np.ndarray:
+        pairs = [list(pair) for pair in sentences]
+        if not pairs:
+            return np.empty((0,), dtype=np.float32)
+        return self.sidecar.request({**self.header, "op": "rerank", "pairs": pairs})
+
+
+class SidecarColBERT(SidecarReranker):
+    """Stands in for a ColBERT model, including its stored token embeddings."""
+
+    def __init__(self, model: str, sidecar: InferenceSidecar = SIDECAR):
+        super().__init__(model, kind="colbert", sidecar=sidecar)
+
+    def index_documents(self, collection_name: str, documents: list[tuple[str, str]]):
+        self.sidecar.request(
+            {
+                **self.header,
+                "op": "index",
+                "collection_name": collection_name,
+                "documents": [list(document) for document in documents],
+            }
+        )
+
+    def search(self, collection_name: str, query: str, k: int):
+        return [
+            tuple(result)
+            for result in self.sidecar.request(
+                {
+                    **self.header,
+                    "op": "search",
+                    "collection_name": collection_name,
+                    "query": query,
+                    "k": k,
+                }
+            )
+        ]
+
+
+if __name__ == "__main__":
+    main()
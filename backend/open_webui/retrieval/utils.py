@@ -6,24 +6,32 @@ import requests
 import hashlib
 from concurrent.futures import ThreadPoolExecutor
 
+from fastapi import HTTPException, Request, status
 from huggingface_hub import snapshot_download
-from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
-from langchain_community.retrievers import BM25Retriever
 from langchain_core.documents import Document
 
 from open_webui.config import VECTOR_DB
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 
+from open_webui.constants import ERROR_MESSAGES
 from open_webui.models.users import UserModel
 from open_webui.models.files import Files
 
 from open_webui.retrieval.vector.main import GetResult
+from open_webui.utils.telemetry.metrics import (
+    RAG_EMBEDDING_DURATION,
+    RAG_EMBEDDING_TEXTS,
+    RAG_RERANK_DURATION,
+    RAG_RETRIEVAL_DURATION,
+    record_duration,
+)
 
 
 from open_webui.env import (
     SRC_LOG_LEVELS,
     OFFLINE_MODE,
     ENABLE_FORWARD_USER_INFO_HEADERS,
+    ENABLE_RAG_COLBERT_RETRIEVER,
 )
 from open_webui.config import (
     RAG_EMBEDDING_QUERY_PREFIX,
@@ -73,16 +81,61 @@ class VectorSearchRetriever(BaseRetriever):
         return results
 
 
+class ColBERTRetriever(BaseRetriever):
+    collection_name: Any
+    collection_result: Any
+    reranking_function: Any
+    top_k: int
+
+    def _get_relevant_documents(
+        self,
+        query: str,
+        *,
+        run_manager: CallbackManagerForRetrieverRun,
+    ) -> list[Document]:
+        chunks = {
+            id: (document, metadata)
+            for id, document, metadata in zip(
+                self.collection_result.ids[0],
+                self.collection_result.documents[0],
+                self.collection_result.metadatas[0],
+            )
+        }
+
+        results = []
+        for id, _ in self.reranking_function.search(
+            self.collection_name, query, self.top_k
+        ):
+            # Embeddings may outlive a chunk removed from the collection
+            if id in chunks:
+                document, metadata = chunks[id]
+                results.append(Document(metadata=metadata, page_content=document))
+        return results
+
+
+def check_models_ready(request: Request):
+    """
+    Raises a 503 while the embedding and reranking models are still loading
+    in the background, instead of failing on a missing model.
+    """
+    if not request.app.state.MODELS_READY:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail=ERROR_MESSAGES.MODELS_LOADING,
+        )
+
+
 def query_doc(
     collection_name: str, query_embedding: list[float], k: int, user: UserModel = None
 ):
     try:
         log.debug(f"query_doc:doc {collection_name}")
-        result = VECTOR_DB_CLIENT.search(
-            collection_name=collection_name,
-            vectors=[query_embedding],
-            limit=k,
-        )
+        with record_duration(RAG_RETRIEVAL_DURATION, {"search": "vector"}):
+            result = VECTOR_DB_CLIENT.search(
+                collection_name=collection_name,
+                vectors=[query_embedding],
+                limit=k,
+            )
 
         if result:
             log.info(f"query_doc:result {result.ids} {result.metadatas}")
@@ -117,6 +170,9 @@ def query_doc_with_hybrid_search(
     k_reranker: int,
     r: float,
 ) -> dict:
+    from langchain.retrievers import ContextualCompressionRetriever, EnsembleRetriever
+    from langchain_community.retrievers import BM25Retriever
+
     try:
         log.debug(f"query_doc_with_hybrid_search:doc {collection_name}")
         bm25_retriever = BM25Retriever.from_texts(
@@ -131,8 +187,19 @@ def query_doc_with_hybrid_search(
             top_k=k,
         )
 
+        retrievers = [bm25_retriever, vector_search_retriever]
+        if ENABLE_RAG_COLBERT_RETRIEVER and hasattr(reranking_function, "search"):
+            retrievers.append(
+                ColBERTRetriever(
+                    collection_name=collection_name,
+                    collection_result=collection_result,
+                    reranking_function=reranking_function,
+                    top_k=k,
+                )
+            )
+
         ensemble_retriever = EnsembleRetriever(
-            retrievers=[bm25_retriever, vector_search_retriever], weights=[0.5, 0.5]
+            retrievers=retrievers, weights=[1 / len(retrievers)] * len(retrievers)
         )
         compressor = RerankCompressor(
             embedding_function=embedding_function,
@@ -145,7 +212,8 @@ def query_doc_with_hybrid_search(
             base_compressor=compressor, base_retriever=ensemble_retriever
         )
 
-        result = compression_retriever.invoke(query)
+        with record_duration(RAG_RETRIEVAL_DURATION, {"search": "hybrid"}):
+            result = compression_retriever.invoke(query)
 
         distances = [d.metadata.get("score") for d in result]
         documents = [d.page_content for d in result]
@@ -363,10 +431,24 @@ def get_embedding_function(
     key,
     embedding_batch_size,
 ):
+    attributes = {"engine": embedding_engine or "local"}
+
+    def instrumented(func):
+        def wrapper(query, prefix=None, user=None):
+            RAG_EMBEDDING_TEXTS.add(
+                len(query) if isinstance(query, list) else 1, attributes
+            )
+            with record_duration(RAG_EMBEDDING_DURATION, attributes):
+                return func(query, prefix=prefix, user=user)
+
+        return wrapper
+
     if embedding_engine == "":
-        return lambda query, prefix=None, user=None: embedding_function.encode(
-            query, **({"prompt": prefix} if prefix else {})
-        ).tolist()
+        return instrumented(
+            lambda query, prefix=None, user=None: embedding_function.encode(
+                query, **({"prompt": prefix} if prefix else {})
+            ).tolist()
+        )
     elif embedding_engine in ["ollama", "openai"]:
         func = lambda query, prefix=None, user=None: generate_embeddings(
             engine=embedding_engine,
@@ -393,8 +475,10 @@ def get_embedding_function(
             else:
                 return func(query, prefix, user)
 
-        return lambda query, prefix=None, user=None: generate_multiple(
-            query, prefix, user, func
+        return instrumented(
+            lambda query, prefix=None, user=None: generate_multiple(
+                query, prefix, user, func
+            )
         )
     else:
         raise ValueError(f"Unknown embedding engine: {embedding_engine}")
@@ -781,18 +865,24 @@ class RerankCompressor(BaseDocumentCompressor):
     ) -> Sequence[Document]:
         reranking = self.reranking_function is not None
 
-        if reranking:
-            scores = self.reranking_function.predict(
-                [(query, doc.page_content) for doc in documents]
-            )
-        else:
-            from sentence_transformers import util
+        with record_duration(
+            RAG_RERANK_DURATION, {"method": "reranker" if reranking else "cosine"}
+        ):
+            if reranking:
+                scores = self.reranking_function.predict(
+                    [(query, doc.page_content) for doc in documents]
+                )
+            else:
+                from sentence_transformers import util
 
-            query_embedding = self.embedding_function(query, RAG_EMBEDDING_QUERY_PREFIX)
-            document_embedding = self.embedding_function(
-                [doc.page_content for doc in documents], RAG_EMBEDDING_CONTENT_PREFIX
-            )
-            scores = util.cos_sim(query_embedding, document_embedding)[0]
+                query_embedding = self.embedding_function(
+                    query, RAG_EMBEDDING_QUERY_PREFIX
+                )
+                document_embedding = self.embedding_function(
+                    [doc.page_content for doc in documents],
+                    RAG_EMBEDDING_CONTENT_PREFIX,
+                )
+                scores = util.cos_sim(query_embedding, document_embedding)[0]
 
         docs_with_scores = list(zip(documents, scores.tolist()))
         if self.r_score:
@@ -1,7 +1,5 @@
-import chromadb
 import logging
-from chromadb import Settings
-from chromadb.utils.batch_utils import create_batches
+import threading
 
 from typing import Optional
 
@@ -25,6 +23,23 @@ log.setLevel(SRC_LOG_LEVELS["RAG"])
 
 class ChromaClient:
     def __init__(self):
+        # chromadb is imported and the client created on first use, so that
+        # importing the app does not load it
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._create_client()
+        return self._client
+
+    def _create_client(self):
+        import chromadb
+        from chromadb import Settings
+
         settings_dict = {
             "allow_reset": True,
             "anonymized_telemetry": False,
@@ -37,7 +52,7 @@ class ChromaClient:
             )
 
         if CHROMA_HTTP_HOST != "":
-            self.client = chromadb.HttpClient(
+            return chromadb.HttpClient(
                 host=CHROMA_HTTP_HOST,
                 port=CHROMA_HTTP_PORT,
                 headers=CHROMA_HTTP_HEADERS,
@@ -47,7 +62,7 @@ class ChromaClient:
                 settings=Settings(**settings_dict),
             )
         else:
-            self.client = chromadb.PersistentClient(
+            return chromadb.PersistentClient(
                 path=CHROMA_DATA_PATH,
                 settings=Settings(**settings_dict),
                 tenant=CHROMA_TENANT,
@@ -131,6 +146,8 @@ class ChromaClient:
         return None
 
     def insert(self, collection_name: str, items: list[VectorItem]):
+        from chromadb.utils.batch_utils import create_batches
+
         # Insert the items into the collection, if the collection does not exist, it will be created.
         collection = self.client.get_or_create_collection(
             name=collection_name, metadata={"hnsw:space": "cosine"}
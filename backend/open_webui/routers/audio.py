@@ -5,8 +5,6 @@ import os
 import uuid
 from functools import lru_cache
 from pathlib import Path
-from pydub import AudioSegment
-from pydub.silence import split_on_silence
 
 import aiohttp
 import aiofiles
@@ -68,12 +66,11 @@ SPEECH_CACHE_DIR.mkdir(parents=True, exist_ok=True)
 #
 ##########################################
 
-from pydub import AudioSegment
-from pydub.utils import mediainfo
-
 
 def get_audio_format(file_path):
     """Check if the given file needs to be converted to a different format."""
+    from pydub.utils import mediainfo
+
     if not os.path.isfile(file_path):
         log.error(f"File not found: {file_path}")
         return False
@@ -94,6 +91,8 @@ def get_audio_format(file_path):
 
 def convert_audio_to_wav(file_path, output_path, conversion_type):
     """Convert MP4/OGG audio file to WAV format."""
+    from pydub import AudioSegment
+
     audio = AudioSegment.from_file(file_path, format=conversion_type)
     audio.export(output_path, format="wav")
     log.info(f"Converted {file_path} to {output_path}")
@@ -747,6 +746,8 @@ def transcribe(request: Request, file_path):
 
 def compress_audio(file_path):
     if os.path.getsize(file_path) > MAX_FILE_SIZE:
+        from pydub import AudioSegment
+
         file_dir = os.path.dirname(file_path)
         audio = AudioSegment.from_file(file_path)
         audio = audio.set_frame_rate(16000).set_channels(1)  # Compress audio
@@ -23,7 +23,7 @@ from open_webui.models.auths import (
 )
 from open_webui.models.users import Users
 from open_webui.models.groups import Groups
-from open_webui.models.user_logins import UserLogins
+from open_webui.utils.analytics import record_login
 from open_webui.internal.db import get_db
 
 from open_webui.constants import ERROR_MESSAGES, WEBHOOK_MESSAGES
@@ -206,7 +206,7 @@ async def anonymous_signin(request: Request, response: Response):
 
             ip_address = get_client_ip(request)
             user_agent = request.headers.get("User-Agent")
-            UserLogins.record_login(
+            record_login(
                 user_id=user.id,
                 ip_address=ip_address,
                 user_agent=user_agent,
@@ -457,7 +457,7 @@ async def ldap_auth(request: Request, response: Response, form_data: LdapForm):
                     ip_address = get_client_ip(request)
                     user_agent = request.headers.get("User-Agent")
                     
-                    UserLogins.record_login(
+                    record_login(
                         user_id=user.id,
                         ip_address=ip_address,
                         user_agent=user_agent,
@@ -575,7 +575,7 @@ async def signin(request: Request, response: Response, form_data: SigninForm):
                             remaining_time = auth.locked_until - current_time
                             remaining_minutes = remaining_time // 60
                             # 记录失败的登录尝试
-                            UserLogins.record_login(
+                            record_login(
                                 user_id=auth.id,
                                 ip_address=ip_address,
                                 user_agent=user_agent,
@@ -588,7 +588,7 @@ async def signin(request: Request, response: Response, form_data: SigninForm):
                             )
                         else:
                             # 记录失败的登录尝试
-                            UserLogins.record_login(
+                            record_login(
                                 user_id=auth.id,
                                 ip_address=ip_address,
                                 user_agent=user_agent,
@@ -681,7 +681,7 @@ async def signin(request: Request, response: Response, form_data: SigninForm):
                 # 这里需要根据实际LDAP登录逻辑判断
                 login_method = 'ldap'
             
-            UserLogins.record_login(
+            record_login(
                 user_id=user.id,
                 ip_address=ip_address,
                 user_agent=user_agent,
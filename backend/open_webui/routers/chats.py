@@ -10,6 +10,7 @@ from open_webui.models.chats import (
     ChatResponse,
     Chats,
     ChatTitleIdResponse,
+    parse_chat_list_cursor,
 )
 from open_webui.models.tags import TagModel, Tags
 from open_webui.models.folders import Folders
@@ -29,6 +30,19 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 
 router = APIRouter()
 
+
+def get_chat_list_cursor(cursor: Optional[str]) -> Optional[tuple[int, str]]:
+    if cursor is None:
+        return None
+    try:
+        return parse_chat_list_cursor(cursor)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=ERROR_MESSAGES.INVALID_CURSOR,
+        )
+
+
 ############################
 # GetChatList
 ############################
@@ -37,9 +51,16 @@ router = APIRouter()
 @router.get("/", response_model=list[ChatTitleIdResponse])
 @router.get("/list", response_model=list[ChatTitleIdResponse])
 async def get_session_user_chat_list(
-    user=Depends(get_verified_user), page: Optional[int] = None
+    user=Depends(get_verified_user),
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
-    if page is not None:
+    # Pages follow `cursor`, the `{updated_at}:{id}` of the last chat received
+    if cursor is not None:
+        return Chats.get_chat_title_id_list_by_user_id(
+            user.id, cursor=get_chat_list_cursor(cursor), limit=60
+        )
+    elif page is not None:
         limit = 60
         skip = (page - 1) * limit
 
@@ -79,6 +100,7 @@ async def get_user_chat_list_by_user_id(
     user=Depends(get_admin_user),
     skip: int = 0,
     limit: int = 50,
+    cursor: Optional[str] = None,
 ):
     if not ENABLE_ADMIN_CHAT_ACCESS:
         raise HTTPException(
@@ -86,7 +108,11 @@ async def get_user_chat_list_by_user_id(
             detail=ERROR_MESSAGES.ACCESS_PROHIBITED,
         )
     return Chats.get_chat_list_by_user_id(
-        user_id, include_archived=True, skip=skip, limit=limit
+        user_id,
+        include_archived=True,
+        cursor=get_chat_list_cursor(cursor),
+        skip=skip,
+        limit=limit,
     )
 
 
@@ -142,7 +168,10 @@ async def import_chat(form_data: ChatImportForm, user=Depends(get_verified_user)
 
 @router.get("/search", response_model=list[ChatTitleIdResponse])
 async def search_user_chats(
-    text: str, page: Optional[int] = None, user=Depends(get_verified_user)
+    text: str,
+    page: Optional[int] = None,
+    cursor: Optional[str] = None,
+    user=Depends(get_verified_user),
 ):
     if page is None:
         page = 1
@@ -150,16 +179,13 @@ async def search_user_chats(
     limit = 60
     skip = (page - 1) * limit
 
-    chat_list = [
-        ChatTitleIdResponse(**chat.model_dump())
-        for chat in Chats.get_chats_by_user_id_and_search_text(
-            user.id, text, skip=skip, limit=limit
-        )
-    ]
+    chat_list = Chats.get_chats_by_user_id_and_search_text(
+        user.id, text, cursor=get_chat_list_cursor(cursor), skip=skip, limit=limit
+    )
 
     # Delete tag if no chat is found
     words = text.strip().split(" ")
-    if page == 1 and len(words) == 1 and words[0].startswith("tag:"):
+    if page == 1 and cursor is None and len(words) == 1 and words[0].startswith("tag:"):
         tag_id = words[0].replace("tag:", "")
         if len(chat_list) == 0:
             if Tags.get_tag_by_name_and_user_id(tag_id, user.id):
@@ -194,12 +220,9 @@ async def get_chats_by_folder_id(folder_id: str, user=Depends(get_verified_user)
 ############################
 
 
-@router.get("/pinned", response_model=list[ChatResponse])
+@router.get("/pinned", response_model=list[ChatTitleIdResponse])
 async def get_user_pinned_chats(user=Depends(get_verified_user)):
-    return [
-        ChatResponse(**chat.model_dump())
-        for chat in Chats.get_pinned_chats_by_user_id(user.id)
-    ]
+    return Chats.get_pinned_chat_list_by_user_id(user.id)
 
 
 ############################
@@ -267,9 +290,14 @@ async def get_all_user_chats_in_db(user=Depends(get_admin_user)):
 
 @router.get("/archived", response_model=list[ChatTitleIdResponse])
 async def get_archived_session_user_chat_list(
-    user=Depends(get_verified_user), skip: int = 0, limit: int = 50
+    user=Depends(get_verified_user),
+    skip: int = 0,
+    limit: Optional[int] = None,
+    cursor: Optional[str] = None,
 ):
-    return Chats.get_archived_chat_list_by_user_id(user.id, skip, limit)
+    return Chats.get_archived_chat_list_by_user_id(
+        user.id, get_chat_list_cursor(cursor), skip, limit
+    )
 
 
 ############################
@@ -311,7 +339,8 @@ class TagForm(BaseModel):
 
 class TagFilterForm(TagForm):
     skip: Optional[int] = 0
-    limit: Optional[int] = 50
+    limit: Optional[int] = None
+    cursor: Optional[str] = None
 
 
 @router.post("/tags", response_model=list[ChatTitleIdResponse])
@@ -319,9 +348,13 @@ async def get_user_chat_list_by_tag_name(
     form_data: TagFilterForm, user=Depends(get_verified_user)
 ):
     chats = Chats.get_chat_list_by_user_id_and_tag_name(
-        user.id, form_data.name, form_data.skip, form_data.limit
+        user.id,
+        form_data.name,
+        get_chat_list_cursor(form_data.cursor),
+        form_data.skip,
+        form_data.limit,
     )
-    if len(chats) == 0:
+    if len(chats) == 0 and form_data.cursor is None and not form_data.skip:
         Tags.delete_tag_by_name_and_user_id(form_data.name, user.id)
 
     return chats
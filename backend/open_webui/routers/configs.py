@@ -7,7 +7,11 @@ from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.config import get_config, save_config
 from open_webui.config import BannerModel
 
-from open_webui.utils.tools import get_tool_server_data, get_tool_servers_data
+from open_webui.utils.tools import (
+    get_tool_server_data,
+    get_tool_server_stats,
+    get_tool_servers_data,
+)
 
 
 router = APIRouter()
@@ -113,6 +117,14 @@ async def set_tool_servers_config(
     }
 
 
+@router.get("/tool_servers/stats")
+async def get_tool_servers_stats(request: Request, user=Depends(get_admin_user)):
+    """
+    Per-operation call counts, errors and latency (seconds) for each tool server.
+    """
+    return get_tool_server_stats()
+
+
 @router.post("/tool_servers/verify")
 async def verify_tool_servers_config(
     request: Request, form_data: ToolServerConnection, user=Depends(get_admin_user)
@@ -1,5 +1,6 @@
+import asyncio
 from typing import Optional
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+from fastapi import APIRouter, Depends, HTTPException, status, Request, Response
 from pydantic import BaseModel
 
 from open_webui.models.users import Users, UserModel
@@ -11,7 +12,9 @@ from open_webui.models.feedbacks import (
 )
 
 from open_webui.constants import ERROR_MESSAGES
+from open_webui.retrieval.utils import check_models_ready
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.leaderboard import LEADERBOARD, get_query_hash
 
 router = APIRouter()
 
@@ -71,6 +74,97 @@ class FeedbackUserResponse(FeedbackResponse):
     user: Optional[FeedbackUserReponse] = None
 
 
+class FeedbackListResponse(BaseModel):
+    items: list[FeedbackUserResponse]
+    total: int
+
+
+############################
+# Leaderboard
+############################
+
+
+class LeaderboardEntry(BaseModel):
+    model_id: str
+    rating: int
+    won: int
+    lost: int
+    count: int
+
+
+class LeaderboardResponse(BaseModel):
+    items: list[LeaderboardEntry]
+    total: int
+    version: int
+
+
+@router.get("/leaderboard", response_model=LeaderboardResponse)
+async def get_leaderboard(
+    request: Request,
+    response: Response,
+    query: Optional[str] = None,
+    page: int = 1,
+    limit: int = 100,
+    user=Depends(get_admin_user),
+):
+    """
+    Elo ratings of all rated models, best first. With `query`, comparisons
+    are weighted by how similar their tags are to the query.
+    """
+    query = (query or "").strip()
+    if query:
+        check_models_ready(request)
+        config = request.app.state.config
+        version, ratings = await asyncio.to_thread(
+            LEADERBOARD.get_ratings_by_query,
+            query,
+            lambda texts: request.app.state.EMBEDDING_FUNCTION(texts, user=user),
+            f"{config.RAG_EMBEDDING_ENGINE}:{config.RAG_EMBEDDING_MODEL}",
+        )
+    else:
+        version, ratings = await asyncio.to_thread(LEADERBOARD.get_ratings)
+
+    # Arena placeholders and hidden models are not ranked
+    models = request.app.state.MODELS
+    if models:
+        ratings = [
+            rating
+            for rating in ratings
+            if rating["model_id"] not in models
+            or (
+                models[rating["model_id"]].get("owned_by") != "arena"
+                and not models[rating["model_id"]]
+                .get("info", {})
+                .get("meta", {})
+                .get("hidden", False)
+            )
+        ]
+
+    ratings = sorted(
+        ratings, key=lambda rating: (-rating["rating"], rating["model_id"])
+    )
+
+    etag = f'"{version}-{get_query_hash(query)}-{page}-{limit}"'
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED)
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, no-cache"
+
+    page = max(page, 1)
+    limit = max(min(limit, 1000), 1)
+    return {
+        "items": ratings[(page - 1) * limit : page * limit],
+        "total": len(ratings),
+        "version": version,
+    }
+
+
+@router.post("/leaderboard/recompute", response_model=bool)
+async def recompute_leaderboard(user=Depends(get_admin_user)):
+    await asyncio.to_thread(LEADERBOARD.reload)
+    return True
+
+
 @router.get("/feedbacks/all", response_model=list[FeedbackUserResponse])
 async def get_all_feedbacks(user=Depends(get_admin_user)):
     feedbacks = Feedbacks.get_all_feedbacks()
@@ -85,9 +179,53 @@ async def get_all_feedbacks(user=Depends(get_admin_user)):
     ]
 
 
+@router.get("/feedbacks/list", response_model=FeedbackListResponse)
+async def get_feedbacks_list(
+    type: str = "user_feedback",
+    query: Optional[str] = None,
+    order_by: str = "created_at",
+    direction: str = "desc",
+    page: int = 1,
+    limit: int = 20,
+    user=Depends(get_admin_user),
+):
+    page = max(page, 1)
+    limit = max(min(limit, 100), 1)
+    feedbacks, total = Feedbacks.get_feedbacks_page_by_type(
+        type,
+        query=(query or "").strip(),
+        order_by=order_by,
+        direction=direction,
+        skip=(page - 1) * limit,
+        limit=limit,
+    )
+
+    users = {
+        user.id: user
+        for user in Users.get_users_by_user_ids(
+            list({feedback.user_id for feedback in feedbacks})
+        )
+    }
+    return {
+        "items": [
+            FeedbackUserResponse(
+                **feedback.model_dump(),
+                user=(
+                    FeedbackUserReponse(**users[feedback.user_id].model_dump())
+                    if feedback.user_id in users
+                    else None
+                ),
+            )
+            for feedback in feedbacks
+        ],
+        "total": total,
+    }
+
+
 @router.delete("/feedbacks/all")
 async def delete_all_feedbacks(user=Depends(get_admin_user)):
     success = Feedbacks.delete_all_feedbacks()
+    LEADERBOARD.on_feedback_changed()
     return success
 
 
@@ -111,6 +249,7 @@ async def get_feedbacks(user=Depends(get_verified_user)):
 @router.delete("/feedbacks", response_model=bool)
 async def delete_feedbacks(user=Depends(get_verified_user)):
     success = Feedbacks.delete_feedbacks_by_user_id(user.id)
+    LEADERBOARD.on_feedback_changed()
     return success
 
 
@@ -127,6 +266,7 @@ async def create_feedback(
             detail=ERROR_MESSAGES.DEFAULT(),
         )
 
+    LEADERBOARD.on_feedback_inserted(feedback)
     return feedback
 
 
@@ -155,6 +295,7 @@ async def update_feedback_by_id(
             status_code=status.HTTP_404_NOT_FOUND, detail=ERROR_MESSAGES.NOT_FOUND
         )
 
+    LEADERBOARD.on_feedback_changed()
     return feedback
 
 
@@ -170,4 +311,5 @@ async def delete_feedback_by_id(id: str, user=Depends(get_verified_user)):
             status_code=status.HTTP_404_NOT_FOUND, detail=ERROR_MESSAGES.NOT_FOUND
         )
 
+    LEADERBOARD.on_feedback_changed()
     return success
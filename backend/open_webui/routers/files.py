@@ -2,6 +2,7 @@ import logging
 import mimetypes
 import os
 import uuid
+import weakref
 from fnmatch import fnmatch
 from pathlib import Path
 from typing import Optional
@@ -18,6 +19,7 @@ from fastapi import (
     Query, Form,
 )
 from fastapi.responses import FileResponse, StreamingResponse
+from starlette.background import BackgroundTask
 from open_webui.config import UPLOAD_DIR
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import SRC_LOG_LEVELS
@@ -32,7 +34,7 @@ from open_webui.models.knowledge import Knowledges
 from open_webui.routers.knowledge import get_knowledge, get_knowledge_list
 from open_webui.routers.retrieval import ProcessFileForm, process_file
 from open_webui.routers.audio import transcribe
-from open_webui.storage.provider import Storage
+from open_webui.storage.provider import Storage, parse_range
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.ragflow_assistant import upload_file_to_kb
 from pydantic import BaseModel
@@ -44,6 +46,35 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 router = APIRouter()
 
 
+def stored_file_response(file_path: str, **kwargs) -> FileResponse:
+    """
+    FileResponse for a stored file. Its local copy stays pinned in the storage
+    cache until the response has been sent, so it is not evicted mid-stream.
+    """
+    local_file_path = Path(Storage.acquire_file(file_path))
+    released = False
+
+    def release():
+        nonlocal released
+        if not released:
+            released = True
+            Storage.release_file(file_path)
+
+    if not local_file_path.is_file():
+        release()
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=ERROR_MESSAGES.NOT_FOUND,
+        )
+
+    response = FileResponse(
+        local_file_path, background=BackgroundTask(release), **kwargs
+    )
+    # A response that is dropped without being sent never runs its background
+    weakref.finalize(response, release)
+    return response
+
+
 ############################
 # Check if the current user has access to a file through any knowledge bases the user may be in.
 ############################
@@ -129,7 +160,7 @@ async def upload_file(
         id = str(uuid.uuid4())
         name = filename
         filename = f"{id}_{filename}"
-        contents, file_path = Storage.upload_file(file.file, filename)
+        uploaded, file_path = Storage.upload_file(file.file, filename)
 
         file_item = Files.insert_new_file(
             user.id,
@@ -141,7 +172,8 @@ async def upload_file(
                     "meta": {
                         "name": name,
                         "content_type": file.content_type,
-                        "size": len(contents),
+                        "size": uploaded.size,
+                        "sha256": uploaded.sha256,
                         "data": file_metadata,
                     },
                 }
@@ -155,8 +187,8 @@ async def upload_file(
                     "audio/ogg",
                     "audio/x-m4a",
                 ]:
-                    file_path = Storage.get_file(file_path)
-                    result = transcribe(request, file_path)
+                    with Storage.pinned_file(file_path) as local_file_path:
+                        result = transcribe(request, local_file_path)
 
                     process_file(
                         request,
@@ -209,21 +241,21 @@ async def upload_file(
                     if target_kb_ids:
                         Files.update_file_kb_id_by_id(id=id, kb_id=kb_ids)
                         # 获取实际文件路径（对于云存储会下载到本地）
-                        actual_file_path = Storage.get_file(file_path)
-                        log.info(f"开始上传文件到知识库: {name}, 路径: {actual_file_path}, 目标知识库: {target_kb_ids}")
-                        
-                        # 上传到每个指定的知识库
-                        upload_success_count = 0
-                        for kb_id in target_kb_ids:
-                            try:
-                                upload_result = upload_file_to_kb(actual_file_path, name, kb_id)
-                                if upload_result:
-                                    log.info(f"文件成功上传到知识库 {kb_id}: {name}")
-                                    upload_success_count += 1
-                                else:
-                                    log.error(f"文件上传到知识库 {kb_id} 失败: {name}")
-                            except Exception as kb_e:
-                                log.error(f"上传文件到知识库 {kb_id} 时发生异常: {name}, 错误: {str(kb_e)}")
+                        with Storage.pinned_file(file_path) as actual_file_path:
+                            log.info(f"开始上传文件到知识库: {name}, 路径: {actual_file_path}, 目标知识库: {target_kb_ids}")
+
+                            # 上传到每个指定的知识库
+                            upload_success_count = 0
+                            for kb_id in target_kb_ids:
+                                try:
+                                    upload_result = upload_file_to_kb(actual_file_path, name, kb_id)
+                                    if upload_result:
+                                        log.info(f"文件成功上传到知识库 {kb_id}: {name}")
+                                        upload_success_count += 1
+                                    else:
+                                        log.error(f"文件上传到知识库 {kb_id} 失败: {name}")
+                                except Exception as kb_e:
+                                    log.error(f"上传文件到知识库 {kb_id} 时发生异常: {name}, 错误: {str(kb_e)}")
                         
                         if upload_success_count > 0:
                             log.info(f"文件成功上传到 {upload_success_count}/{len(target_kb_ids)} 个知识库: {name}")
@@ -446,7 +478,10 @@ async def update_file_data_content_by_id(
 
 @router.get("/{id}/content")
 async def get_file_content_by_id(
-    id: str, user=Depends(get_verified_user), attachment: bool = Query(False)
+    id: str,
+    request: Request,
+    user=Depends(get_verified_user),
+    attachment: bool = Query(False),
 ):
     file = Files.get_file_by_id(id)
 
@@ -462,44 +497,52 @@ async def get_file_content_by_id(
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                # Handle Unicode filenames
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)  # RFC5987 encoding
-
-                content_type = file.meta.get("content_type")
-                filename = file.meta.get("name", file.filename)
-                encoded_filename = quote(filename)
-                headers = {}
-
-                if attachment:
+            # Handle Unicode filenames
+            content_type = file.meta.get("content_type")
+            filename = file.meta.get("name", file.filename)
+            encoded_filename = quote(filename)  # RFC5987 encoding
+            headers = {}
+
+            if attachment:
+                headers["Content-Disposition"] = (
+                    f"attachment; filename*=UTF-8''{encoded_filename}"
+                )
+            else:
+                if content_type == "application/pdf" or filename.lower().endswith(
+                    ".pdf"
+                ):
+                    headers["Content-Disposition"] = (
+                        f"inline; filename*=UTF-8''{encoded_filename}"
+                    )
+                    content_type = "application/pdf"
+                elif content_type != "text/plain":
                     headers["Content-Disposition"] = (
                         f"attachment; filename*=UTF-8''{encoded_filename}"
                     )
-                else:
-                    if content_type == "application/pdf" or filename.lower().endswith(
-                        ".pdf"
-                    ):
-                        headers["Content-Disposition"] = (
-                            f"inline; filename*=UTF-8''{encoded_filename}"
-                        )
-                        content_type = "application/pdf"
-                    elif content_type != "text/plain":
-                        headers["Content-Disposition"] = (
-                            f"attachment; filename*=UTF-8''{encoded_filename}"
-                        )
-
-                return FileResponse(file_path, headers=headers, media_type=content_type)
 
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            # Range requests (e.g. seeking in a large video) for files with no
+            # local copy are served from remote storage without a full download
+            range_header = request.headers.get("range")
+            if range_header and not Storage.is_cached(file.path):
+                size = Storage.get_file_size(file.path)
+                byte_range = parse_range(range_header, size)
+                if byte_range is not None:
+                    start, end = byte_range
+                    return StreamingResponse(
+                        Storage.iter_file(file.path, start, end),
+                        status_code=status.HTTP_206_PARTIAL_CONTENT,
+                        media_type=content_type,
+                        headers={
+                            **headers,
+                            "Accept-Ranges": "bytes",
+                            "Content-Range": f"bytes {start}-{end}/{size}",
+                            "Content-Length": str(end - start + 1),
+                        },
+                    )
+
+            return stored_file_response(
+                file.path, headers=headers, media_type=content_type
+            )
         except Exception as e:
             log.exception(e)
             log.error("Error getting file content")
@@ -530,18 +573,7 @@ async def get_html_file_content_by_id(id: str, user=Depends(get_verified_user)):
         or has_access_to_file(id, "read", user)
     ):
         try:
-            file_path = Storage.get_file(file.path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                log.info(f"file_path: {file_path}")
-                return FileResponse(file_path)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return stored_file_response(file.path)
         except Exception as e:
             log.exception(e)
             log.error("Error getting file content")
@@ -581,17 +613,7 @@ async def get_file_content_by_id(id: str, user=Depends(get_verified_user)):
         }
 
         if file_path:
-            file_path = Storage.get_file(file_path)
-            file_path = Path(file_path)
-
-            # Check if the file already exists in the cache
-            if file_path.is_file():
-                return FileResponse(file_path, headers=headers)
-            else:
-                raise HTTPException(
-                    status_code=status.HTTP_404_NOT_FOUND,
-                    detail=ERROR_MESSAGES.NOT_FOUND,
-                )
+            return stored_file_response(file_path, headers=headers)
         else:
             # File path doesn’t exist, return the content as .txt if possible
             file_content = file.content.get("content", "")
@@ -193,6 +193,8 @@ async def update_function_by_id(
 
         function = Functions.update_function_by_id(id, updated)
 
+        FUNCTIONS.notify_updated(id)
+
         if function:
             return function
         else:
@@ -220,9 +222,8 @@ async def delete_function_by_id(
     result = Functions.delete_function_by_id(id)
 
     if result:
-        FUNCTIONS = request.app.state.FUNCTIONS
-        if id in FUNCTIONS:
-            del FUNCTIONS[id]
+        # Other workers may hold the plugin even if this one never loaded it
+        request.app.state.FUNCTIONS.invalidate(id)
 
     return result
 
@@ -303,6 +304,7 @@ async def update_function_valves_by_id(
                 form_data = {k: v for k, v in form_data.items() if v is not None}
                 valves = Valves(**form_data)
                 Functions.update_function_valves_by_id(id, valves.model_dump())
+                request.app.state.FUNCTIONS.invalidate_valves(id)
                 return valves.model_dump()
             except Exception as e:
                 log.exception(f"Error updating function values by id {id}: {e}")
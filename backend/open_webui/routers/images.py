@@ -1,10 +1,10 @@
 import asyncio
 import base64
-import io
 import json
 import logging
 import mimetypes
 import re
+import tempfile
 from pathlib import Path
 from typing import Optional
 
@@ -15,6 +15,12 @@ from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import ENABLE_FORWARD_USER_INFO_HEADERS, SRC_LOG_LEVELS
 from open_webui.routers.files import upload_file
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.images.client import (
+    CHUNK_SIZE,
+    SPOOL_MAX_SIZE,
+    ImageGenerationClient,
+    get_image_generation_client,
+)
 from open_webui.utils.images.comfyui import (
     ComfyUIGenerateImageForm,
     ComfyUIWorkflow,
@@ -416,54 +422,83 @@ class GenerateImageForm(BaseModel):
 
 
 def load_b64_image_data(b64_str):
+    """
+    Decode a base64 (or data URI) image into a spooled temporary file, a
+    chunk at a time, so no second full copy of the image is held in memory.
+    Returns (file, mime_type), or None if the data is not valid base64.
+    """
     try:
-        if "," in b64_str:
-            header, encoded = b64_str.split(",", 1)
-            mime_type = header.split(";")[0]
-            img_data = base64.b64decode(encoded)
+        if b64_str.startswith("data:") and "," in b64_str[:256]:
+            header, _ = b64_str.split(",", 1)
+            mime_type = header.split(";")[0].removeprefix("data:")
+            start = len(header) + 1
         else:
             mime_type = "image/png"
-            img_data = base64.b64decode(b64_str)
-        return img_data, mime_type
+            start = 0
+
+        file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+        # Chunks must be a multiple of 4 characters to decode independently
+        step = CHUNK_SIZE * 4
+        for offset in range(start, len(b64_str), step):
+            file.write(base64.b64decode(b64_str[offset : offset + step]))
+        file.seek(0)
+        return file, mime_type
     except Exception as e:
         log.exception(f"Error loading image data: {e}")
         return None
 
 
-def load_url_image_data(url, headers=None):
-    try:
-        if headers:
-            r = requests.get(url, headers=headers)
-        else:
-            r = requests.get(url)
+async def load_b64(b64_str):
+    """Decode a base64 image off the event loop."""
+    return await asyncio.to_thread(load_b64_image_data, b64_str)
 
-        r.raise_for_status()
-        if r.headers["content-type"].split("/")[0] == "image":
-            mime_type = r.headers["content-type"]
-            return r.content, mime_type
-        else:
-            log.error("Url does not point to an image.")
-            return None
 
+async def load_url_image_data(client: ImageGenerationClient, url, headers=None):
+    try:
+        return await client.download(url, headers=headers)
     except Exception as e:
         log.exception(f"Error saving image: {e}")
         return None
 
 
-def upload_image(request, image_metadata, image_data, content_type, user):
+async def upload_image(request, image_metadata, image_file, content_type, user):
     image_format = mimetypes.guess_extension(content_type)
     file = UploadFile(
-        file=io.BytesIO(image_data),
+        file=image_file,
         filename=f"generated-image{image_format}",  # will be converted to a unique ID on upload_file
         headers={
             "content-type": content_type,
         },
     )
-    file_item = upload_file(request, file, user, file_metadata=image_metadata)
+    try:
+        file_item = await upload_file(
+            request, file, user, file_metadata=image_metadata, process=False
+        )
+    finally:
+        image_file.close()
     url = request.app.url_path_for("get_file_content_by_id", id=file_item.id)
     return url
 
 
+async def save_images(request, loaders, image_metadata, user):
+    """
+    Load and store generated images concurrently. `loaders` are awaitables
+    resolving to (file, content_type); results keep their order.
+    """
+
+    async def save(loader):
+        image = await loader
+        if image is None:
+            raise Exception("Failed to load generated image")
+        image_file, content_type = image
+        url = await upload_image(
+            request, image_metadata, image_file, content_type, user
+        )
+        return {"url": url}
+
+    return list(await asyncio.gather(*[save(loader) for loader in loaders]))
+
+
 @router.post("/generations")
 async def image_generations(
     request: Request,
@@ -472,9 +507,11 @@ async def image_generations(
 ):
     width, height = tuple(map(int, request.app.state.config.IMAGE_SIZE.split("x")))
 
-    r = None
     try:
         if request.app.state.config.IMAGE_GENERATION_ENGINE == "openai":
+            base_url = request.app.state.config.IMAGES_OPENAI_API_BASE_URL
+            client = get_image_generation_client("openai", base_url)
+
             headers = {}
             headers["Authorization"] = (
                 f"Bearer {request.app.state.config.IMAGES_OPENAI_API_KEY}"
@@ -503,30 +540,38 @@ async def image_generations(
                 "response_format": "b64_json",
             }
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_OPENAI_API_BASE_URL}/images/generations",
-                json=data,
-                headers=headers,
+            url = f"{base_url}/images/generations"
+            if data["model"] == "dall-e-3" and form_data.n > 1:
+                # dall-e-3 only accepts n=1; request the images side by side
+                responses = await asyncio.gather(
+                    *[
+                        client.generate(url, {**data, "n": 1}, headers)
+                        for _ in range(form_data.n)
+                    ]
+                )
+                results = [image for res in responses for image in res["data"]]
+            else:
+                res = await client.generate(url, data, headers)
+                results = res["data"]
+
+            return await save_images(
+                request,
+                [
+                    (
+                        load_url_image_data(client, image_url, headers)
+                        if (image_url := image.get("url", None))
+                        else load_b64(image["b64_json"])
+                    )
+                    for image in results
+                ],
+                data,
+                user,
             )
 
-            r.raise_for_status()
-            res = r.json()
-
-            images = []
-
-            for image in res["data"]:
-                if image_url := image.get("url", None):
-                    image_data, content_type = load_url_image_data(image_url, headers)
-                else:
-                    image_data, content_type = load_b64_image_data(image["b64_json"])
-
-                url = upload_image(request, data, image_data, content_type, user)
-                images.append({"url": url})
-            return images
-
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "gemini":
+            base_url = request.app.state.config.IMAGES_GEMINI_API_BASE_URL
+            client = get_image_generation_client("gemini", base_url)
+
             headers = {}
             headers["Content-Type"] = "application/json"
             headers["x-goog-api-key"] = request.app.state.config.IMAGES_GEMINI_API_KEY
@@ -540,28 +585,21 @@ async def image_generations(
                 },
             }
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.IMAGES_GEMINI_API_BASE_URL}/models/{model}:predict",
-                json=data,
-                headers=headers,
+            res = await client.generate(
+                f"{base_url}/models/{model}:predict", data, headers
             )
 
-            r.raise_for_status()
-            res = r.json()
-
-            images = []
-            for image in res["predictions"]:
-                image_data, content_type = load_b64_image_data(
-                    image["bytesBase64Encoded"]
-                )
-                url = upload_image(request, data, image_data, content_type, user)
-                images.append({"url": url})
-
-            return images
+            return await save_images(
+                request,
+                [load_b64(image["bytesBase64Encoded"]) for image in res["predictions"]],
+                data,
+                user,
+            )
 
         elif request.app.state.config.IMAGE_GENERATION_ENGINE == "comfyui":
+            base_url = request.app.state.config.COMFYUI_BASE_URL
+            client = get_image_generation_client("comfyui", base_url)
+
             data = {
                 "prompt": form_data.prompt,
                 "width": width,
@@ -586,40 +624,40 @@ async def image_generations(
                     **data,
                 }
             )
-            res = await comfyui_generate_image(
-                request.app.state.config.IMAGE_GENERATION_MODEL,
-                form_data,
-                user.id,
-                request.app.state.config.COMFYUI_BASE_URL,
-                request.app.state.config.COMFYUI_API_KEY,
-            )
+            async with client.slot():
+                res = await comfyui_generate_image(
+                    request.app.state.config.IMAGE_GENERATION_MODEL,
+                    form_data,
+                    user.id,
+                    base_url,
+                    request.app.state.config.COMFYUI_API_KEY,
+                )
             log.debug(f"res: {res}")
 
-            images = []
-
-            for image in res["data"]:
-                headers = None
-                if request.app.state.config.COMFYUI_API_KEY:
-                    headers = {
-                        "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
-                    }
-
-                image_data, content_type = load_url_image_data(image["url"], headers)
-                url = upload_image(
-                    request,
-                    form_data.model_dump(exclude_none=True),
-                    image_data,
-                    content_type,
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            headers = None
+            if request.app.state.config.COMFYUI_API_KEY:
+                headers = {
+                    "Authorization": f"Bearer {request.app.state.config.COMFYUI_API_KEY}"
+                }
+
+            return await save_images(
+                request,
+                [
+                    load_url_image_data(client, image["url"], headers)
+                    for image in res["data"]
+                ],
+                form_data.model_dump(exclude_none=True),
+                user,
+            )
         elif (
             request.app.state.config.IMAGE_GENERATION_ENGINE == "automatic1111"
             or request.app.state.config.IMAGE_GENERATION_ENGINE == ""
         ):
+            base_url = request.app.state.config.AUTOMATIC1111_BASE_URL
+            client = get_image_generation_client("automatic1111", base_url)
+
             if form_data.model:
-                set_image_model(form_data.model)
+                await asyncio.to_thread(set_image_model, request, form_data.model)
 
             data = {
                 "prompt": form_data.prompt,
@@ -643,34 +681,18 @@ async def image_generations(
             if request.app.state.config.AUTOMATIC1111_SCHEDULER:
                 data["scheduler"] = request.app.state.config.AUTOMATIC1111_SCHEDULER
 
-            # Use asyncio.to_thread for the requests.post call
-            r = await asyncio.to_thread(
-                requests.post,
-                url=f"{request.app.state.config.AUTOMATIC1111_BASE_URL}/sdapi/v1/txt2img",
-                json=data,
-                headers={"authorization": get_automatic1111_api_auth(request)},
+            res = await client.generate(
+                f"{base_url}/sdapi/v1/txt2img",
+                data,
+                {"authorization": get_automatic1111_api_auth(request)},
             )
-
-            res = r.json()
             log.debug(f"res: {res}")
 
-            images = []
-
-            for image in res["images"]:
-                image_data, content_type = load_b64_image_data(image)
-                url = upload_image(
-                    request,
-                    {**data, "info": res["info"]},
-                    image_data,
-                    content_type,
-                    user,
-                )
-                images.append({"url": url})
-            return images
+            return await save_images(
+                request,
+                [load_b64(image) for image in res["images"]],
+                {**data, "info": res["info"]},
+                user,
+            )
     except Exception as e:
-        error = e
-        if r != None:
-            data = r.json()
-            if "error" in data:
-                error = data["error"]["message"]
-        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(error))
+        raise HTTPException(status_code=400, detail=ERROR_MESSAGES.DEFAULT(e))
@@ -1,9 +1,13 @@
 from fastapi import APIRouter, Depends, HTTPException, Request
 from pydantic import BaseModel
+import asyncio
+import hashlib
 import logging
+from collections import OrderedDict
 from typing import Optional
 
 from open_webui.models.memories import Memories, MemoryModel
+from open_webui.retrieval.utils import check_models_ready
 from open_webui.retrieval.vector.connector import VECTOR_DB_CLIENT
 from open_webui.utils.auth import get_verified_user
 from open_webui.env import SRC_LOG_LEVELS
@@ -15,8 +19,86 @@ log.setLevel(SRC_LOG_LEVELS["MODELS"])
 router = APIRouter()
 
 
+def get_memory_collection_name(user_id: str) -> str:
+    return f"user-memory-{user_id}"
+
+
+def get_embedding_model_key(request: Request) -> str:
+    config = request.app.state.config
+    return f"{config.RAG_EMBEDDING_ENGINE}:{config.RAG_EMBEDDING_MODEL}"
+
+
+def get_memory_content_hash(request: Request, content: str) -> str:
+    # Includes the embedding model so that switching models re-embeds everything
+    return hashlib.sha256(
+        f"{get_embedding_model_key(request)}:{content}".encode("utf-8")
+    ).hexdigest()
+
+
+async def embed_texts(request: Request, texts: list[str], user) -> list[list[float]]:
+    """
+    Embed `texts` in one batched call to the embedding function, in a worker
+    thread so the event loop is not blocked by the model or HTTP call.
+    """
+    if not texts:
+        return []
+    return await asyncio.to_thread(
+        request.app.state.EMBEDDING_FUNCTION, texts, user=user
+    )
+
+
+async def upsert_memories(request: Request, user, memories: list[MemoryModel]):
+    vectors = await embed_texts(request, [memory.content for memory in memories], user)
+    await asyncio.to_thread(
+        VECTOR_DB_CLIENT.upsert,
+        collection_name=get_memory_collection_name(user.id),
+        items=[
+            {
+                "id": memory.id,
+                "text": memory.content,
+                "vector": vector,
+                "metadata": {
+                    "created_at": memory.created_at,
+                    "updated_at": memory.updated_at,
+                    "content_hash": get_memory_content_hash(request, memory.content),
+                    "embedding_model": get_embedding_model_key(request),
+                },
+            }
+            for memory, vector in zip(memories, vectors)
+        ],
+    )
+
+
+class QueryEmbeddingCache:
+    """
+    The last query embedding of each user, so that re-running the same
+    recall (e.g. when regenerating a response) does not embed it again.
+    """
+
+    def __init__(self, max_size: int = 1000):
+        self.max_size = max_size
+        self.entries = OrderedDict()
+
+    def get(self, user_id: str, key: str) -> Optional[list[float]]:
+        entry = self.entries.get(user_id)
+        if entry is None or entry[0] != key:
+            return None
+        self.entries.move_to_end(user_id)
+        return entry[1]
+
+    def set(self, user_id: str, key: str, vector: list[float]):
+        self.entries[user_id] = (key, vector)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+
+QUERY_EMBEDDING_CACHE = QueryEmbeddingCache()
+
+
 @router.get("/ef")
 async def get_embeddings(request: Request):
+    check_models_ready(request)
     return {"result": request.app.state.EMBEDDING_FUNCTION("hello world")}
 
 
@@ -49,21 +131,9 @@ async def add_memory(
     form_data: AddMemoryForm,
     user=Depends(get_verified_user),
 ):
+    check_models_ready(request)
     memory = Memories.insert_new_memory(user.id, form_data.content)
-
-    VECTOR_DB_CLIENT.upsert(
-        collection_name=f"user-memory-{user.id}",
-        items=[
-            {
-                "id": memory.id,
-                "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
-                "metadata": {"created_at": memory.created_at},
-            }
-        ],
-    )
+    await upsert_memories(request, user, [memory])
 
     return memory
 
@@ -82,9 +152,17 @@ class QueryMemoryForm(BaseModel):
 async def query_memory(
     request: Request, form_data: QueryMemoryForm, user=Depends(get_verified_user)
 ):
-    results = VECTOR_DB_CLIENT.search(
-        collection_name=f"user-memory-{user.id}",
-        vectors=[request.app.state.EMBEDDING_FUNCTION(form_data.content, user=user)],
+    check_models_ready(request)
+    key = get_memory_content_hash(request, form_data.content)
+    vector = QUERY_EMBEDDING_CACHE.get(user.id, key)
+    if vector is None:
+        vector = (await embed_texts(request, [form_data.content], user))[0]
+        QUERY_EMBEDDING_CACHE.set(user.id, key, vector)
+
+    results = await asyncio.to_thread(
+        VECTOR_DB_CLIENT.search,
+        collection_name=get_memory_collection_name(user.id),
+        vectors=[vector],
         limit=form_data.k,
     )
 
@@ -98,27 +176,57 @@ async def query_memory(
 async def reset_memory_from_vector_db(
     request: Request, user=Depends(get_verified_user)
 ):
-    VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
-
+    """
+    Re-sync the user's memory collection with the database. Only memories
+    whose content changed since they were indexed are re-embedded; vectors of
+    deleted memories are removed. The collection is recreated from scratch if
+    it was built with another embedding model, whose vectors may not even
+    have the same dimension.
+    """
+    check_models_ready(request)
+
+    collection_name = get_memory_collection_name(user.id)
     memories = Memories.get_memories_by_user_id(user.id)
-    VECTOR_DB_CLIENT.upsert(
-        collection_name=f"user-memory-{user.id}",
-        items=[
-            {
-                "id": memory.id,
-                "text": memory.content,
-                "vector": request.app.state.EMBEDDING_FUNCTION(
-                    memory.content, user=user
-                ),
-                "metadata": {
-                    "created_at": memory.created_at,
-                    "updated_at": memory.updated_at,
-                },
-            }
-            for memory in memories
-        ],
-    )
+    embedding_model = get_embedding_model_key(request)
+
+    indexed_hashes = {}
+    try:
+        if await asyncio.to_thread(VECTOR_DB_CLIENT.has_collection, collection_name):
+            result = await asyncio.to_thread(VECTOR_DB_CLIENT.get, collection_name)
+            if result and result.ids:
+                metadatas = [metadata or {} for metadata in result.metadatas[0]]
+                if all(
+                    metadata.get("embedding_model") == embedding_model
+                    for metadata in metadatas
+                ):
+                    indexed_hashes = {
+                        id: metadata.get("content_hash")
+                        for id, metadata in zip(result.ids[0], metadatas)
+                    }
+    except Exception as e:
+        log.warning(f"Could not read {collection_name}, rebuilding it: {e}")
+
+    if not indexed_hashes:
+        await asyncio.to_thread(VECTOR_DB_CLIENT.delete_collection, collection_name)
+
+    changed = [
+        memory
+        for memory in memories
+        if indexed_hashes.get(memory.id)
+        != get_memory_content_hash(request, memory.content)
+    ]
+    removed = list(indexed_hashes.keys() - {memory.id for memory in memories})
+
+    if removed:
+        await asyncio.to_thread(
+            VECTOR_DB_CLIENT.delete, collection_name=collection_name, ids=removed
+        )
+    if changed:
+        await upsert_memories(request, user, changed)
 
+    log.debug(
+        f"Synced {collection_name}: {len(changed)} embedded, {len(removed)} removed"
+    )
     return True
 
 
@@ -133,7 +241,10 @@ async def delete_memory_by_user_id(user=Depends(get_verified_user)):
 
     if result:
         try:
-            VECTOR_DB_CLIENT.delete_collection(f"user-memory-{user.id}")
+            await asyncio.to_thread(
+                VECTOR_DB_CLIENT.delete_collection,
+                get_memory_collection_name(user.id),
+            )
         except Exception as e:
             log.error(e)
         return True
@@ -153,6 +264,9 @@ async def update_memory_by_id(
     form_data: MemoryUpdateModel,
     user=Depends(get_verified_user),
 ):
+    if form_data.content is not None:
+        check_models_ready(request)
+
     memory = Memories.update_memory_by_id_and_user_id(
         memory_id, user.id, form_data.content
     )
@@ -160,22 +274,7 @@ async def update_memory_by_id(
         raise HTTPException(status_code=404, detail="Memory not found")
 
     if form_data.content is not None:
-        VECTOR_DB_CLIENT.upsert(
-            collection_name=f"user-memory-{user.id}",
-            items=[
-                {
-                    "id": memory.id,
-                    "text": memory.content,
-                    "vector": request.app.state.EMBEDDING_FUNCTION(
-                        memory.content, user=user
-                    ),
-                    "metadata": {
-                        "created_at": memory.created_at,
-                        "updated_at": memory.updated_at,
-                    },
-                }
-            ],
-        )
+        await upsert_memories(request, user, [memory])
 
     return memory
 
@@ -190,8 +289,10 @@ async def delete_memory_by_id(memory_id: str, user=Depends(get_verified_user)):
     result = Memories.delete_memory_by_id_and_user_id(memory_id, user.id)
 
     if result:
-        VECTOR_DB_CLIENT.delete(
-            collection_name=f"user-memory-{user.id}", ids=[memory_id]
+        await asyncio.to_thread(
+            VECTOR_DB_CLIENT.delete,
+            collection_name=get_memory_collection_name(user.id),
+            ids=[memory_id],
         )
         return True
 
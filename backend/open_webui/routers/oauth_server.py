@@ -21,7 +21,7 @@ from open_webui.models.oauth_clients import OAuthClients
 from open_webui.models.oauth_codes import OAuthCodes, OAuthCodeModel
 from open_webui.models.oauth_tokens import OAuthTokens
 from open_webui.models.users import Users
-from open_webui.models.user_logins import UserLogins
+from open_webui.utils.analytics import record_login
 from open_webui.utils.auth import get_current_user, get_password_hash
 from open_webui.utils.oauth_server import (
     generate_access_token,
@@ -421,7 +421,7 @@ async def token(request: Request, body: TokenRequest):
         )
 
         # 记录登录日志
-        UserLogins.record_login(
+        record_login(
             user_id=user.id,
             ip_address=request.client.host if request.client else "unknown",
             user_agent=request.headers.get("user-agent", ""),
@@ -46,6 +46,7 @@ from open_webui.utils.payload import (
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.telemetry.metrics import UpstreamRequestTracker
 
 
 from open_webui.config import (
@@ -102,11 +103,14 @@ async def send_get_request(url, key=None, user: UserModel = None):
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
+    tracker: Optional[UpstreamRequestTracker] = None,
 ):
     if response:
         response.close()
     if session:
         await session.close()
+    if tracker:
+        tracker.finish()
 
 
 async def send_post_request(
@@ -119,6 +123,7 @@ async def send_post_request(
 ):
 
     r = None
+    tracker = UpstreamRequestTracker("ollama")
     try:
         session = aiohttp.ClientSession(
             trust_env=True, timeout=aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT)
@@ -142,6 +147,7 @@ async def send_post_request(
                 ),
             },
         )
+        tracker.response_received(r.status)
         r.raise_for_status()
 
         if stream:
@@ -155,15 +161,16 @@ async def send_post_request(
                 status_code=r.status,
                 headers=response_headers,
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, session=session, tracker=tracker
                 ),
             )
         else:
             res = await r.json()
-            await cleanup_response(r, session)
+            await cleanup_response(r, session, tracker)
             return res
 
     except Exception as e:
+        tracker.finish()
         detail = None
 
         if r is not None:
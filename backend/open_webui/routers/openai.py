@@ -43,6 +43,16 @@ from open_webui.utils.misc import (
 
 from open_webui.utils.auth import get_admin_user, get_verified_user
 from open_webui.utils.access_control import has_access
+from open_webui.utils.telemetry.metrics import UpstreamRequestTracker
+from open_webui.utils.completion_cache import (
+    COMPLETION_CACHE,
+    completion_from_response,
+    completion_to_response,
+    get_cache_key,
+    is_cacheable,
+    replay_completion,
+)
+from open_webui.utils.stream import ChunkStreamingResponse
 
 
 log = logging.getLogger(__name__)
@@ -86,11 +96,14 @@ async def send_get_request(url, key=None, user: UserModel = None):
 async def cleanup_response(
     response: Optional[aiohttp.ClientResponse],
     session: Optional[aiohttp.ClientSession],
+    tracker: Optional[UpstreamRequestTracker] = None,
 ):
     if response:
         response.close()
     if session:
         await session.close()
+    if tracker:
+        tracker.finish()
 
 
 def openai_o1_o3_handler(payload):
@@ -694,12 +707,26 @@ async def generate_chat_completion(
     # temprature 设置为0    
     payload["temperature"] = 0
 
+    cache_key = None
+    if not model.get("pipeline") and is_cacheable(
+        payload, [form_data.get("model"), model_id]
+    ):
+        cache_key = get_cache_key(url, payload)
+        completion = await COMPLETION_CACHE.get(cache_key, model_id)
+        if completion is not None:
+            if payload.get("stream"):
+                return ChunkStreamingResponse(
+                    replay_completion(completion, payload["model"])
+                )
+            return completion_to_response(completion, payload["model"])
+
     payload = json.dumps(payload)
 
     r = None
     session = None
     streaming = False
     response = None
+    tracker = UpstreamRequestTracker("openai")
 
     try:
         session = aiohttp.ClientSession(
@@ -733,16 +760,21 @@ async def generate_chat_completion(
                 ),
             },
         )
+        tracker.response_received(r.status)
 
         # Check if response is SSE
         if "text/event-stream" in r.headers.get("Content-Type", ""):
             streaming = True
             return StreamingResponse(
-                r.content,
+                (
+                    COMPLETION_CACHE.record_stream(cache_key, model_id, r.content)
+                    if cache_key and r.status == 200
+                    else r.content
+                ),
                 status_code=r.status,
                 headers=dict(r.headers),
                 background=BackgroundTask(
-                    cleanup_response, response=r, session=session
+                    cleanup_response, response=r, session=session, tracker=tracker
                 ),
             )
         else:
@@ -753,6 +785,11 @@ async def generate_chat_completion(
                 response = await r.text()
 
             r.raise_for_status()
+
+            if cache_key and isinstance(response, dict):
+                completion = completion_from_response(response)
+                if completion is not None:
+                    await COMPLETION_CACHE.set(cache_key, model_id, completion)
             return response
     except Exception as e:
         log.exception(e)
@@ -769,6 +806,8 @@ async def generate_chat_completion(
             detail=detail if detail else "Open WebUI: Server Connection Error",
         )
     finally:
+        if not streaming:
+            tracker.finish()
         if not streaming and session:
             if r:
                 r.close()
@@ -12,6 +12,8 @@ from open_webui.models.page_views import (
     PageViewStatsResponse,
 )
 from open_webui.utils.auth import get_admin_user, get_verified_user
+from open_webui.utils.analytics import record_page_view as enqueue_page_view
+from open_webui.utils.analytics import get_analytics_buffer_stats
 from open_webui.models.users import Users
 
 log = logging.getLogger(__name__)
@@ -60,8 +62,8 @@ async def record_page_view(
         user_agent = request.headers.get("User-Agent")
         referer = request.headers.get("Referer")
         
-        # 记录页面访问
-        page_view = PageViews.record_page_view(
+        # 记录页面访问（写入缓冲队列，由后台任务批量入库）
+        enqueue_page_view(
             url=form_data.url,
             ip_address=ip_address,
             user_id=user.id,
@@ -69,11 +71,8 @@ async def record_page_view(
             referer=referer,
             access_type=form_data.access_type,
         )
-        
-        if page_view:
-            return {"message": "页面访问已记录", "id": page_view.id}
-        else:
-            raise HTTPException(status_code=500, detail="记录页面访问失败")
+
+        return {"message": "页面访问已记录"}
             
     except Exception as e:
         log.error(f"记录页面访问时出错: {e}")
@@ -189,4 +188,15 @@ async def get_access_type_statistics(
         return statistics
     except Exception as e:
         log.error(f"获取访问类型统计时出错: {e}")
-        raise HTTPException(status_code=500, detail=str(e))
\ No newline at end of file
+        raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.get("/analytics/ingestion")
+async def get_analytics_ingestion_stats(
+    user=Depends(get_admin_user)
+):
+    """
+    获取访问统计缓冲队列状态（待写入、已写入、丢弃、失败条数）
+    需要管理员权限
+    """
+    return get_analytics_buffer_stats()
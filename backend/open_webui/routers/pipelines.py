@@ -18,9 +18,11 @@ from pydantic import BaseModel
 from starlette.responses import FileResponse
 from typing import Optional
 
-from open_webui.utils.ragflow_assistant import get_assistant
+from aiocache import SimpleMemoryCache
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.ragflow_assistant import get_assistant_kb_ids
+
+from open_webui.env import RAGFLOW_ASSISTANT_CACHE_TTL, SRC_LOG_LEVELS
 from open_webui.config import CACHE_DIR
 from open_webui.constants import ERROR_MESSAGES
 
@@ -59,6 +61,56 @@ def get_sorted_filters(model_id, models):
     return sorted_filters
 
 
+# Filter chains per model id, valid for one version of the model registry.
+# `app.state.MODELS` is replaced (not mutated) whenever models are reloaded,
+# so the identity of the dict identifies the version.
+_filter_chains = (None, {})
+
+
+def get_filter_chain(model_id, models, outlet=False):
+    """
+    Pipeline filters to run for `model_id`, sorted by priority. When the model
+    is itself a pipeline it runs after the filters on the inlet and before
+    them on the outlet.
+    """
+    global _filter_chains
+
+    cached_models, chains = _filter_chains
+    if cached_models is not models:
+        chains = {}
+        _filter_chains = (models, chains)
+
+    key = (model_id, outlet)
+    if key not in chains:
+        chain = [
+            filter
+            for filter in get_sorted_filters(model_id, models)
+            if filter.get("urlIdx") is not None
+        ]
+        model = models[model_id]
+        if "pipeline" in model and model.get("urlIdx") is not None:
+            chain = [model] + chain if outlet else chain + [model]
+        chains[key] = chain
+
+    return chains[key]
+
+
+_session = None
+
+
+def get_pipelines_session():
+    """Shared aiohttp session for calls to pipeline servers."""
+    global _session
+    if _session is None or _session.closed:
+        _session = aiohttp.ClientSession(trust_env=True)
+    return _session
+
+
+async def close_pipelines_session():
+    if _session is not None and not _session.closed:
+        await _session.close()
+
+
 class ModelAppMapping:
     """模型到应用ID的映射"""
 
@@ -82,17 +134,46 @@ class ModelAppMapping:
         return model_id in cls.MODEL_APP_ID_MAP and model_id != "rag_flow_webapi_pipeline_cs"
 
 
+
+# (app_id, ragflow_user_id) -> assistant_id
+APP_SESSION_ASSISTANT_CACHE = SimpleMemoryCache()
+
+
+async def get_app_assistant_id(app_id, ragflow_user_id):
+    key = f"{app_id}:{ragflow_user_id}"
+    assistant_id = await APP_SESSION_ASSISTANT_CACHE.get(key)
+    if assistant_id is None:
+        from open_webui.models.app_sessions import AppSessions
+
+        existing_session = AppSessions.get_app_session_by_app_user(
+            app_id, ragflow_user_id
+        )
+        if existing_session is None:
+            return None
+        assistant_id = existing_session.assistant_id
+        await APP_SESSION_ASSISTANT_CACHE.set(
+            key, assistant_id, ttl=RAGFLOW_ASSISTANT_CACHE_TTL
+        )
+    return assistant_id
+
+
 async def process_pipeline_inlet_filter(request, payload, user, models):
+    model_id = payload["model"]
+
+    # 优先从请求 payload 中获取前端传来的 kb_ids，并从 payload 中移除，避免传递给下游
+    payload_kb_ids = payload.pop("kb_ids", None)
+
+    # Filters run in sequence, each receiving the previous filter's output,
+    # so only the lookups can be skipped when there is nothing to run
+    sorted_filters = get_filter_chain(model_id, models)
+    if not sorted_filters:
+        return payload
+
     # 通过model.id 获取assistant_id信息
     assistant_id = user.assistant_id
-    from open_webui.models.app_sessions import AppSessions
-    model_id = payload["model"]
     if ModelAppMapping.is_supported_model_except_rag_flow(model_id):
         app_id = ModelAppMapping.get_app_id(model_id)
-        existing_session = AppSessions.get_app_session_by_app_user(
-            app_id, user.ragflow_user_id
-        )
-        assistant_id = existing_session.assistant_id
+        assistant_id = await get_app_assistant_id(app_id, user.ragflow_user_id)
     user_dict = {
         "id": user.id,
         "email": user.email,
@@ -101,70 +182,62 @@ async def process_pipeline_inlet_filter(request, payload, user, models):
         "assistant_id": assistant_id,
     }
     kb_ids = []
-    # 优先从请求 payload 中获取前端传来的 kb_ids
-    if payload.get("kb_ids"):
-        kb_ids = payload["kb_ids"]
-        # 从 payload 中移除 kb_ids，避免传递给下游
-        del payload["kb_ids"]
+    if payload_kb_ids:
+        kb_ids = payload_kb_ids
     elif assistant_id:
         try:
-            assistant_response = await get_assistant(assistant_id)
-            print("assistant_response", assistant_response)
-            assistant_data = assistant_response['data']
-            kb_ids = assistant_data.get('kb_ids', [])
+            kb_ids = await get_assistant_kb_ids(assistant_id)
         except Exception as e:
             log.error(f"获取助手信息失败: {str(e)}")
             kb_ids = []
 
     # 添加 kb_ids 到用户信息中
     user_dict["kb_ids"] = kb_ids
-    sorted_filters = get_sorted_filters(model_id, models)
-    model = models[model_id]
 
-    if "pipeline" in model:
-        sorted_filters.append(model)
+    session = get_pipelines_session()
+    for filter in sorted_filters:
+        urlIdx = filter.get("urlIdx")
 
-    async with aiohttp.ClientSession() as session:
-        for filter in sorted_filters:
-            urlIdx = filter.get("urlIdx")
-            if urlIdx is None:
-                continue
-
-            url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
+        url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
+        key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
 
-            if not key:
-                continue
+        if not key:
+            continue
 
-            headers = {"Authorization": f"Bearer {key}"}
-            request_data = {
-                "user": user_dict,
-                "body": payload,
-            }
+        headers = {"Authorization": f"Bearer {key}"}
+        request_data = {
+            "user": user_dict,
+            "body": payload,
+        }
 
-            try:
-                async with session.post(
-                    f"{url}/{filter['id']}/filter/inlet",
-                    headers=headers,
-                    json=request_data,
-                ) as response:
-                    payload = await response.json()
-                    response.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                res = (
-                    await response.json()
-                    if response.content_type == "application/json"
-                    else {}
-                )
-                if "detail" in res:
-                    raise Exception(response.status, res["detail"])
-            except Exception as e:
-                log.exception(f"Connection error: {e}")
+        try:
+            async with session.post(
+                f"{url}/{filter['id']}/filter/inlet",
+                headers=headers,
+                json=request_data,
+            ) as response:
+                payload = await response.json()
+                response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
+            res = (
+                await response.json()
+                if response.content_type == "application/json"
+                else {}
+            )
+            if "detail" in res:
+                raise Exception(response.status, res["detail"])
+        except Exception as e:
+            log.exception(f"Connection error: {e}")
 
     return payload
 
 
 async def process_pipeline_outlet_filter(request, payload, user, models):
+    model_id = payload["model"]
+    sorted_filters = get_filter_chain(model_id, models, outlet=True)
+    if not sorted_filters:
+        return payload
+
     user = {
         "id": user.id,
         "email": user.email,
@@ -172,52 +245,48 @@ async def process_pipeline_outlet_filter(request, payload, user, models):
         "role": user.role,
         "assistant_id": user.assistant_id
     }
-    model_id = payload["model"]
-    sorted_filters = get_sorted_filters(model_id, models)
-    model = models[model_id]
 
-    if "pipeline" in model:
-        sorted_filters = [model] + sorted_filters
+    # The model's own pipeline runs first on the way out
+    if "pipeline" in models[model_id] and sorted_filters[-1] is models[model_id]:
+        sorted_filters = [sorted_filters[-1]] + sorted_filters[:-1]
 
-    async with aiohttp.ClientSession() as session:
-        for filter in sorted_filters:
-            urlIdx = filter.get("urlIdx")
-            if urlIdx is None:
-                continue
+    session = get_pipelines_session()
+    for filter in sorted_filters:
+        urlIdx = filter.get("urlIdx")
 
-            url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
-            key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
+        url = request.app.state.config.OPENAI_API_BASE_URLS[urlIdx]
+        key = request.app.state.config.OPENAI_API_KEYS[urlIdx]
 
-            if not key:
-                continue
+        if not key:
+            continue
 
-            headers = {"Authorization": f"Bearer {key}"}
-            request_data = {
-                "user": user,
-                "body": payload,
-            }
+        headers = {"Authorization": f"Bearer {key}"}
+        request_data = {
+            "user": user,
+            "body": payload,
+        }
 
+        try:
+            async with session.post(
+                f"{url}/{filter['id']}/filter/outlet",
+                headers=headers,
+                json=request_data,
+            ) as response:
+                payload = await response.json()
+                response.raise_for_status()
+        except aiohttp.ClientResponseError as e:
             try:
-                async with session.post(
-                    f"{url}/{filter['id']}/filter/outlet",
-                    headers=headers,
-                    json=request_data,
-                ) as response:
-                    payload = await response.json()
-                    response.raise_for_status()
-            except aiohttp.ClientResponseError as e:
-                try:
-                    res = (
-                        await response.json()
-                        if "application/json" in response.content_type
-                        else {}
-                    )
-                    if "detail" in res:
-                        raise Exception(response.status, res)
-                except Exception:
-                    pass
-            except Exception as e:
-                log.exception(f"Connection error: {e}")
+                res = (
+                    await response.json()
+                    if "application/json" in response.content_type
+                    else {}
+                )
+                if "detail" in res:
+                    raise Exception(response.status, res)
+            except Exception:
+                pass
+        except Exception as e:
+            log.exception(f"Connection error: {e}")
 
     return payload
 
@@ -31,6 +31,8 @@ from langchain_core.documents import Document
 
 from open_webui.models.files import FileModel, Files
 from open_webui.models.knowledge import Knowledges
+from open_webui.models.colbert_embeddings import ColBERTEmbeddings
+from open_webui.retrieval.models.colbert_index import delete_documents
 from open_webui.storage.provider import Storage
 
 
@@ -63,6 +65,7 @@ from open_webui.retrieval.web.perplexity import search_perplexity
 from open_webui.retrieval.web.sougou import search_sougou
 
 from open_webui.retrieval.utils import (
+    check_models_ready,
     get_embedding_function,
     get_model_path,
     query_collection,
@@ -90,6 +93,8 @@ from open_webui.env import (
     SRC_LOG_LEVELS,
     DEVICE_TYPE,
     DOCKER,
+    ENABLE_RAG_INFERENCE_SIDECAR,
+    RAG_LOCAL_MODEL_ENGINE,
 )
 from open_webui.constants import ERROR_MESSAGES
 
@@ -109,17 +114,41 @@ def get_ef(
     auto_update: bool = False,
 ):
     ef = None
-    if embedding_model and engine == "":
-        from sentence_transformers import SentenceTransformer
+    if embedding_model and engine == "" and ENABLE_RAG_INFERENCE_SIDECAR:
+        from open_webui.retrieval.models.sidecar import SidecarEmbeddingModel
 
         try:
-            ef = SentenceTransformer(
+            ef = SidecarEmbeddingModel(
                 get_model_path(embedding_model, auto_update),
-                device=DEVICE_TYPE,
                 trust_remote_code=RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
             )
         except Exception as e:
-            log.debug(f"Error loading SentenceTransformer: {e}")
+            log.debug(f"Error loading SentenceTransformer in inference sidecar: {e}")
+    elif embedding_model and engine == "":
+        model_path = get_model_path(embedding_model, auto_update)
+
+        if RAG_LOCAL_MODEL_ENGINE == "onnx":
+            from open_webui.retrieval.models.onnx_engine import OnnxEmbeddingModel
+
+            try:
+                ef = OnnxEmbeddingModel(
+                    model_path,
+                    trust_remote_code=RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
+                )
+            except Exception as e:
+                log.warning(f"ONNX Runtime engine failed, using PyTorch: {e}")
+
+        if ef is None:
+            from sentence_transformers import SentenceTransformer
+
+            try:
+                ef = SentenceTransformer(
+                    model_path,
+                    device=DEVICE_TYPE,
+                    trust_remote_code=RAG_EMBEDDING_MODEL_TRUST_REMOTE_CODE,
+                )
+            except Exception as e:
+                log.debug(f"Error loading SentenceTransformer: {e}")
 
     return ef
 
@@ -129,7 +158,21 @@ def get_rf(
     auto_update: bool = False,
 ):
     rf = None
-    if reranking_model:
+    if reranking_model and ENABLE_RAG_INFERENCE_SIDECAR:
+        from open_webui.retrieval.models.sidecar import SidecarColBERT, SidecarReranker
+
+        try:
+            if any(model in reranking_model for model in ["jinaai/jina-colbert-v2"]):
+                rf = SidecarColBERT(get_model_path(reranking_model, auto_update))
+            else:
+                rf = SidecarReranker(
+                    get_model_path(reranking_model, auto_update),
+                    trust_remote_code=RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
+                )
+        except Exception as e:
+            log.error(f"Inference sidecar: {e}")
+            raise Exception(ERROR_MESSAGES.DEFAULT(e))
+    elif reranking_model:
         if any(model in reranking_model for model in ["jinaai/jina-colbert-v2"]):
             try:
                 from open_webui.retrieval.models.colbert import ColBERT
@@ -143,17 +186,31 @@ def get_rf(
                 log.error(f"ColBERT: {e}")
                 raise Exception(ERROR_MESSAGES.DEFAULT(e))
         else:
-            import sentence_transformers
+            model_path = get_model_path(reranking_model, auto_update)
 
-            try:
-                rf = sentence_transformers.CrossEncoder(
-                    get_model_path(reranking_model, auto_update),
-                    device=DEVICE_TYPE,
-                    trust_remote_code=RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
-                )
-            except Exception as e:
-                log.error(f"CrossEncoder: {e}")
-                raise Exception(ERROR_MESSAGES.DEFAULT("CrossEncoder error"))
+            if RAG_LOCAL_MODEL_ENGINE == "onnx":
+                from open_webui.retrieval.models.onnx_engine import OnnxCrossEncoder
+
+                try:
+                    rf = OnnxCrossEncoder(
+                        model_path,
+                        trust_remote_code=RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
+                    )
+                except Exception as e:
+                    log.warning(f"ONNX Runtime engine failed, using PyTorch: {e}")
+
+            if rf is None:
+                import sentence_transformers
+
+                try:
+                    rf = sentence_transformers.CrossEncoder(
+                        model_path,
+                        device=DEVICE_TYPE,
+                        trust_remote_code=RAG_RERANKING_MODEL_TRUST_REMOTE_CODE,
+                    )
+                except Exception as e:
+                    log.error(f"CrossEncoder: {e}")
+                    raise Exception(ERROR_MESSAGES.DEFAULT("CrossEncoder error"))
     return rf
 
 
@@ -821,6 +878,7 @@ def save_docs_to_vector_db(
     log.info(
         f"save_docs_to_vector_db: document {_get_docs_info(docs)} {collection_name}"
     )
+    check_models_ready(request)
 
     # Check if entries with the same hash (metadata.hash) already exist
     if metadata and "hash" in metadata:
@@ -894,6 +952,7 @@ def save_docs_to_vector_db(
 
             if overwrite:
                 VECTOR_DB_CLIENT.delete_collection(collection_name=collection_name)
+                ColBERTEmbeddings.delete_by_collection_name(collection_name)
                 log.info(f"deleting existing collection {collection_name}")
             elif add is False:
                 log.info(
@@ -940,6 +999,15 @@ def save_docs_to_vector_db(
             items=items,
         )
 
+        # Store ColBERT token embeddings once instead of encoding on each query
+        if hasattr(request.app.state.rf, "index_documents"):
+            try:
+                request.app.state.rf.index_documents(
+                    collection_name, [(item["id"], item["text"]) for item in items]
+                )
+            except Exception as e:
+                log.warning(f"Error indexing ColBERT embeddings: {e}")
+
         return True
     except Exception as e:
         log.exception(e)
@@ -958,6 +1026,9 @@ def process_file(
     form_data: ProcessFileForm,
     user=Depends(get_verified_user),
 ):
+    if not request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL:
+        check_models_ready(request)
+
     try:
         file = Files.get_file_by_id(form_data.file_id)
 
@@ -973,6 +1044,7 @@ def process_file(
             try:
                 # /files/{file_id}/data/content/update
                 VECTOR_DB_CLIENT.delete_collection(collection_name=f"file-{file.id}")
+                ColBERTEmbeddings.delete_by_collection_name(f"file-{file.id}")
             except:
                 # Audio file upload pipeline
                 pass
@@ -1027,19 +1099,21 @@ def process_file(
             # Usage: /files/
             file_path = file.path
             if file_path:
-                file_path = Storage.get_file(file_path)
-                loader = Loader(
-                    engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
-                    TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
-                    DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
-                    PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
-                    DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
-                    DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
-                    MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
-                )
-                docs = loader.load(
-                    file.filename, file.meta.get("content_type"), file_path
-                )
+                with Storage.pinned_file(file_path) as local_file_path:
+                    loader = Loader(
+                        engine=request.app.state.config.CONTENT_EXTRACTION_ENGINE,
+                        TIKA_SERVER_URL=request.app.state.config.TIKA_SERVER_URL,
+                        DOCLING_SERVER_URL=request.app.state.config.DOCLING_SERVER_URL,
+                        PDF_EXTRACT_IMAGES=request.app.state.config.PDF_EXTRACT_IMAGES,
+                        DOCUMENT_INTELLIGENCE_ENDPOINT=request.app.state.config.DOCUMENT_INTELLIGENCE_ENDPOINT,
+                        DOCUMENT_INTELLIGENCE_KEY=request.app.state.config.DOCUMENT_INTELLIGENCE_KEY,
+                        MISTRAL_OCR_API_KEY=request.app.state.config.MISTRAL_OCR_API_KEY,
+                    )
+                    docs = loader.load(
+                        file.filename,
+                        file.meta.get("content_type"),
+                        local_file_path,
+                    )
 
                 docs = [
                     Document(
@@ -1143,6 +1217,8 @@ def process_text(
     form_data: ProcessTextForm,
     user=Depends(get_verified_user),
 ):
+    check_models_ready(request)
+
     collection_name = form_data.collection_name
     if collection_name is None:
         collection_name = calculate_sha256_string(form_data.content)
@@ -1174,6 +1250,8 @@ def process_text(
 def process_youtube_video(
     request: Request, form_data: ProcessUrlForm, user=Depends(get_verified_user)
 ):
+    check_models_ready(request)
+
     try:
         collection_name = form_data.collection_name
         if not collection_name:
@@ -1218,6 +1296,9 @@ def process_youtube_video(
 def process_web(
     request: Request, form_data: ProcessUrlForm, user=Depends(get_verified_user)
 ):
+    if not request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
+        check_models_ready(request)
+
     try:
         collection_name = form_data.collection_name
         if not collection_name:
@@ -1473,6 +1554,9 @@ def search_web(request: Request, engine: str, query: str) -> list[SearchResult]:
 async def process_web_search(
     request: Request, form_data: SearchForm, user=Depends(get_verified_user)
 ):
+    if not request.app.state.config.BYPASS_WEB_SEARCH_EMBEDDING_AND_RETRIEVAL:
+        check_models_ready(request)
+
     try:
         logging.info(
             f"trying to web search with {request.app.state.config.WEB_SEARCH_ENGINE, form_data.query}"
@@ -1564,6 +1648,8 @@ def query_doc_handler(
     form_data: QueryDocForm,
     user=Depends(get_verified_user),
 ):
+    check_models_ready(request)
+
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
             collection_results = {}
@@ -1620,6 +1706,8 @@ def query_collection_handler(
     form_data: QueryCollectionsForm,
     user=Depends(get_verified_user),
 ):
+    check_models_ready(request)
+
     try:
         if request.app.state.config.ENABLE_RAG_HYBRID_SEARCH:
             return query_collection_with_hybrid_search(
@@ -1675,9 +1763,8 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
             file = Files.get_file_by_id(form_data.file_id)
             hash = file.hash
 
-            VECTOR_DB_CLIENT.delete(
-                collection_name=form_data.collection_name,
-                metadata={"hash": hash},
+            delete_documents(
+                VECTOR_DB_CLIENT, form_data.collection_name, {"hash": hash}
             )
             return {"status": True}
         else:
@@ -1690,6 +1777,7 @@ def delete_entries_from_collection(form_data: DeleteForm, user=Depends(get_admin
 @router.post("/reset/db")
 def reset_vector_db(user=Depends(get_admin_user)):
     VECTOR_DB_CLIENT.reset()
+    ColBERTEmbeddings.delete_all()
     Knowledges.delete_all_knowledge()
 
 
@@ -1720,6 +1808,7 @@ if ENV == "dev":
 
     @router.get("/ef/{text}")
     async def get_embeddings(request: Request, text: Optional[str] = "Hello World!"):
+        check_models_ready(request)
         return {
             "result": request.app.state.EMBEDDING_FUNCTION(
                 text, prefix=RAG_EMBEDDING_QUERY_PREFIX
@@ -1752,6 +1841,8 @@ def process_files_batch(
     """
     Process a batch of files and save them to the vector database.
     """
+    check_models_ready(request)
+
     results: List[BatchProcessFilesResult] = []
     errors: List[BatchProcessFilesResult] = []
     collection_name = form_data.collection_name
@@ -9,6 +9,7 @@ import re
 from open_webui.utils.chat import generate_chat_completion
 from open_webui.utils.task import (
     title_generation_template,
+    batch_title_generation_template,
     query_generation_template,
     image_prompt_generation_template,
     autocomplete_generation_template,
@@ -28,6 +29,7 @@ from open_webui.utils.task import get_task_model_id
 
 from open_webui.config import (
     DEFAULT_TITLE_GENERATION_PROMPT_TEMPLATE,
+    DEFAULT_BATCH_TITLE_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_TAGS_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_IMAGE_PROMPT_GENERATION_PROMPT_TEMPLATE,
     DEFAULT_QUERY_GENERATION_PROMPT_TEMPLATE,
@@ -241,6 +243,79 @@ async def generate_title(
         )
 
 
+async def generate_titles(request: Request, form_data: dict, user):
+    """
+    Generates the titles of several chats of a user with a single request to
+    the task model; `form_data["chats"]` holds the messages of each chat.
+    Used by the background task queue when the default title prompt is in use.
+    """
+    models = request.app.state.MODELS
+
+    model_id = form_data["model"]
+    if model_id not in models:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail="Model not found",
+        )
+
+    task_model_id = get_task_model_id(
+        model_id,
+        request.app.state.config.TASK_MODEL,
+        request.app.state.config.TASK_MODEL_EXTERNAL,
+        models,
+    )
+
+    log.debug(
+        f"generating {len(form_data['chats'])} chat titles using model {task_model_id} for user {user.email} "
+    )
+
+    chats = [
+        [
+            {
+                **message,
+                "content": re.sub(
+                    r"<details\s+type=\"reasoning\"[^>]*>.*?<\/details>",
+                    "",
+                    message["content"],
+                    flags=re.S,
+                ).strip(),
+            }
+            for message in messages
+        ]
+        for messages in form_data["chats"]
+    ]
+
+    content = batch_title_generation_template(
+        DEFAULT_BATCH_TITLE_GENERATION_PROMPT_TEMPLATE,
+        chats,
+        {
+            "name": user.name,
+            "location": user.info.get("location") if user.info else None,
+        },
+    )
+
+    payload = {
+        "model": task_model_id,
+        "messages": [{"role": "user", "content": content}],
+        "stream": False,
+        **(
+            {"max_tokens": 1000 * len(chats)}
+            if models[task_model_id].get("owned_by") == "ollama"
+            else {
+                "max_completion_tokens": 1000 * len(chats),
+            }
+        ),
+        "metadata": {
+            "task": str(TASKS.TITLE_GENERATION),
+            "task_body": form_data,
+            "chat_id": None,
+        },
+    }
+
+    payload = await process_pipeline_inlet_filter(request, payload, user, models)
+    return await generate_chat_completion(request, form_data=payload, user=user)
+
+
 @router.post("/tags/completions")
 async def generate_chat_tags(
     request: Request, form_data: dict, user=Depends(get_verified_user)
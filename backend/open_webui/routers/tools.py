@@ -242,6 +242,8 @@ async def update_tools_by_id(
         log.debug(updated)
         tools = Tools.update_tool_by_id(id, updated)
 
+        TOOLS.notify_updated(id)
+
         if tools:
             return tools
         else:
@@ -285,9 +287,8 @@ async def delete_tools_by_id(
 
     result = Tools.delete_tool_by_id(id)
     if result:
-        TOOLS = request.app.state.TOOLS
-        if id in TOOLS:
-            del TOOLS[id]
+        # Other workers may hold the plugin even if this one never loaded it
+        request.app.state.TOOLS.invalidate(id)
 
     return result
 
@@ -387,6 +388,7 @@ async def update_tools_valves_by_id(
         form_data = {k: v for k, v in form_data.items() if v is not None}
         valves = Valves(**form_data)
         Tools.update_tool_valves_by_id(id, valves.model_dump())
+        request.app.state.TOOLS.invalidate_valves(id)
         return valves.model_dump()
     except Exception as e:
         log.exception(f"Failed to update tool valves by id {id}: {e}")
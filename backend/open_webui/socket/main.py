@@ -20,9 +20,17 @@ from open_webui.env import (
     WEBSOCKET_REDIS_LOCK_TIMEOUT,
     WEBSOCKET_SENTINEL_PORT,
     WEBSOCKET_SENTINEL_HOSTS,
+    WEBSOCKET_PRESENCE_HEARTBEAT_TTL,
+    WEBSOCKET_USER_LIST_DEBOUNCE,
 )
 from open_webui.utils.auth import decode_token
-from open_webui.socket.utils import RedisDict, RedisLock
+from open_webui.utils.telemetry.metrics import CHAT_DB_WRITES, SOCKET_EMITS
+from open_webui.socket.utils import (
+    RedisDict,
+    RedisLock,
+    RedisPresence,
+    LocalPresence,
+)
 
 from open_webui.env import (
     GLOBAL_LOG_LEVEL,
@@ -72,15 +80,11 @@ if WEBSOCKET_MANAGER == "redis":
     redis_sentinels = get_sentinels_from_env(
         WEBSOCKET_SENTINEL_HOSTS, WEBSOCKET_SENTINEL_PORT
     )
-    SESSION_POOL = RedisDict(
-        "open-webui:session_pool",
-        redis_url=WEBSOCKET_REDIS_URL,
-        redis_sentinels=redis_sentinels,
-    )
-    USER_POOL = RedisDict(
-        "open-webui:user_pool",
+    PRESENCE = RedisPresence(
+        "open-webui:presence",
         redis_url=WEBSOCKET_REDIS_URL,
         redis_sentinels=redis_sentinels,
+        heartbeat_ttl=WEBSOCKET_PRESENCE_HEARTBEAT_TTL,
     )
     USAGE_POOL = RedisDict(
         "open-webui:usage_pool",
@@ -98,8 +102,7 @@ if WEBSOCKET_MANAGER == "redis":
     renew_func = clean_up_lock.renew_lock
     release_func = clean_up_lock.release_lock
 else:
-    SESSION_POOL = {}
-    USER_POOL = {}
+    PRESENCE = LocalPresence()
     USAGE_POOL = {}
     aquire_func = release_func = renew_func = lambda: True
 
@@ -145,6 +148,65 @@ async def periodic_usage_pool_cleanup():
         release_func()
 
 
+async def periodic_presence_heartbeat():
+    """
+    Keep this node's presence entries alive and reap sessions left behind by
+    nodes that stopped heartbeating (e.g. crashed workers).
+    """
+    interval = max(WEBSOCKET_PRESENCE_HEARTBEAT_TTL / 3, 1)
+    while True:
+        try:
+            await PRESENCE.heartbeat()
+            for user_id in await PRESENCE.reap_dead_nodes():
+                user_list_broadcaster.user_left(user_id)
+        except Exception as e:
+            log.error(f"Error in presence heartbeat: {e}")
+
+        await asyncio.sleep(interval)
+
+
+class UserListBroadcaster:
+    """
+    Coalesces presence changes and broadcasts them as a single
+    `user-presence` delta after a short debounce window, instead of sending
+    the full user list on every connect and disconnect.
+    """
+
+    def __init__(self, debounce):
+        self.debounce = debounce
+        self.online = set()
+        self.offline = set()
+        self.task = None
+
+    def user_joined(self, user_id):
+        self.offline.discard(user_id)
+        self.online.add(user_id)
+        self._schedule()
+
+    def user_left(self, user_id):
+        self.online.discard(user_id)
+        self.offline.add(user_id)
+        self._schedule()
+
+    def _schedule(self):
+        if self.task is None or self.task.done():
+            self.task = asyncio.create_task(self._flush())
+
+    async def _flush(self):
+        await asyncio.sleep(self.debounce)
+
+        online, self.online = self.online, set()
+        offline, self.offline = self.offline, set()
+        if online or offline:
+            await sio.emit(
+                "user-presence",
+                {"online": list(online), "offline": list(offline)},
+            )
+
+
+user_list_broadcaster = UserListBroadcaster(WEBSOCKET_USER_LIST_DEBOUNCE)
+
+
 app = socketio.ASGIApp(
     sio,
     socketio_path="/ws/socket.io",
@@ -183,15 +245,15 @@ async def connect(sid, environ, auth):
             user = Users.get_user_by_id(data["id"])
 
         if user:
-            SESSION_POOL[sid] = user.model_dump()
-            if user.id in USER_POOL:
-                USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-            else:
-                USER_POOL[user.id] = [sid]
+            await sio.enter_room(sid, f"user:{user.id}")
+            if await PRESENCE.add_session(sid, user.model_dump()):
+                user_list_broadcaster.user_joined(user.id)
 
             # print(f"user {user.name}({user.id}) connected with session ID {sid}")
-            await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
-            await sio.emit("usage", {"models": get_models_in_use()})
+            await sio.emit(
+                "user-list", {"user_ids": await PRESENCE.get_user_ids()}, to=sid
+            )
+            await sio.emit("usage", {"models": get_models_in_use()}, to=sid)
 
 
 @sio.on("user-join")
@@ -209,11 +271,9 @@ async def user_join(sid, data):
     if not user:
         return
 
-    SESSION_POOL[sid] = user.model_dump()
-    if user.id in USER_POOL:
-        USER_POOL[user.id] = USER_POOL[user.id] + [sid]
-    else:
-        USER_POOL[user.id] = [sid]
+    await sio.enter_room(sid, f"user:{user.id}")
+    if await PRESENCE.add_session(sid, user.model_dump()):
+        user_list_broadcaster.user_joined(user.id)
 
     # Join all the channels
     channels = Channels.get_channels_by_user_id(user.id)
@@ -223,7 +283,7 @@ async def user_join(sid, data):
 
     # print(f"user {user.name}({user.id}) connected with session ID {sid}")
 
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": await PRESENCE.get_user_ids()}, to=sid)
     return {"id": user.id, "name": user.name}
 
 
@@ -264,13 +324,17 @@ async def channel_events(sid, data):
     event_type = event_data["type"]
 
     if event_type == "typing":
+        session_user = await PRESENCE.get_session_user(sid)
+        if session_user is None:
+            return
+
         await sio.emit(
             "channel-events",
             {
                 "channel_id": data["channel_id"],
                 "message_id": data.get("message_id", None),
                 "data": event_data,
-                "user": UserNameResponse(**SESSION_POOL[sid]).model_dump(),
+                "user": UserNameResponse(**session_user).model_dump(),
             },
             room=room,
         )
@@ -278,55 +342,43 @@ async def channel_events(sid, data):
 
 @sio.on("user-list")
 async def user_list(sid):
-    await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
+    await sio.emit("user-list", {"user_ids": await PRESENCE.get_user_ids()}, to=sid)
 
 
 @sio.event
 async def disconnect(sid):
-    if sid in SESSION_POOL:
-        user = SESSION_POOL[sid]
-        del SESSION_POOL[sid]
-
-        user_id = user["id"]
-        USER_POOL[user_id] = [_sid for _sid in USER_POOL[user_id] if _sid != sid]
-
-        if len(USER_POOL[user_id]) == 0:
-            del USER_POOL[user_id]
-
-        await sio.emit("user-list", {"user_ids": list(USER_POOL.keys())})
-    else:
+    user, went_offline = await PRESENCE.remove_session(sid)
+    if user is None:
         pass
         # print(f"Unknown session ID {sid} disconnected")
+    elif went_offline:
+        user_list_broadcaster.user_left(user["id"])
 
 
 def get_event_emitter(request_info, update_db=True):
     async def __event_emitter__(event_data):
         user_id = request_info["user_id"]
 
-        session_ids = list(
-            set(
-                USER_POOL.get(user_id, [])
-                + (
-                    [request_info.get("session_id")]
-                    if request_info.get("session_id")
-                    else []
-                )
-            )
-        )
+        # Every session of the user joins the `user:<id>` room on connect, so
+        # a single room emit reaches all of them without a presence lookup.
+        rooms = [f"user:{user_id}"]
+        if request_info.get("session_id"):
+            rooms.append(request_info["session_id"])
 
-        for session_id in session_ids:
-            await sio.emit(
-                "chat-events",
-                {
-                    "chat_id": request_info.get("chat_id", None),
-                    "message_id": request_info.get("message_id", None),
-                    "data": event_data,
-                },
-                to=session_id,
-            )
+        await sio.emit(
+            "chat-events",
+            {
+                "chat_id": request_info.get("chat_id", None),
+                "message_id": request_info.get("message_id", None),
+                "data": event_data,
+            },
+            to=rooms,
+        )
+        SOCKET_EMITS.add(1, {"event": "chat-events"})
 
         if update_db:
             if "type" in event_data and event_data["type"] == "status":
+                CHAT_DB_WRITES.add(1, {"operation": "status"})
                 Chats.add_message_status_to_chat_by_id_and_message_id(
                     request_info["chat_id"],
                     request_info["message_id"],
@@ -340,6 +392,7 @@ def get_event_emitter(request_info, update_db=True):
                 )
 
                 if message:
+                    CHAT_DB_WRITES.add(1, {"operation": "message"})
                     content = message.get("content", "")
                     content += event_data.get("data", {}).get("content", "")
 
@@ -354,6 +407,7 @@ def get_event_emitter(request_info, update_db=True):
             if "type" in event_data and event_data["type"] == "replace":
                 content = event_data.get("data", {}).get("content", "")
 
+                CHAT_DB_WRITES.add(1, {"operation": "replace"})
                 Chats.upsert_message_to_chat_by_id_and_message_id(
                     request_info["chat_id"],
                     request_info["message_id"],
@@ -384,28 +438,26 @@ def get_event_call(request_info):
 get_event_caller = get_event_call
 
 
-def get_user_id_from_session_pool(sid):
-    user = SESSION_POOL.get(sid)
+async def get_user_id_from_session_pool(sid):
+    user = await PRESENCE.get_session_user(sid)
     if user:
         return user["id"]
     return None
 
 
-def get_user_ids_from_room(room):
+async def get_user_ids_from_room(room):
     active_session_ids = sio.manager.get_participants(
         namespace="/",
         room=room,
     )
 
-    active_user_ids = list(
-        set(
-            [SESSION_POOL.get(session_id[0])["id"] for session_id in active_session_ids]
-        )
-    )
-    return active_user_ids
+    active_user_ids = set()
+    for session_id in active_session_ids:
+        user = await PRESENCE.get_session_user(session_id[0])
+        if user:
+            active_user_ids.add(user["id"])
+    return list(active_user_ids)
 
 
-def get_active_status_by_user_id(user_id):
-    if user_id in USER_POOL:
-        return True
-    return False
+async def get_active_status_by_user_id(user_id):
+    return await PRESENCE.is_user_active(user_id)
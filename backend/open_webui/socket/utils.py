@@ -1,6 +1,6 @@
 import json
 import uuid
-from open_webui.utils.redis import get_redis_connection
+from open_webui.utils.redis import get_redis_connection, get_async_redis_connection
 
 
 class RedisLock:
@@ -89,3 +89,187 @@ class RedisDict:
         if key not in self:
             self[key] = default
         return self[key]
+
+
+class LocalPresence:
+    """
+    In-process presence tracking used when no websocket manager is configured.
+
+    Mirrors the interface of RedisPresence so callers can await either one.
+    """
+
+    def __init__(self):
+        self.sessions = {}
+        self.user_sessions = {}
+
+    async def add_session(self, sid, user):
+        self.sessions[sid] = user
+        sids = self.user_sessions.setdefault(user["id"], set())
+        came_online = len(sids) == 0
+        sids.add(sid)
+        return came_online
+
+    async def remove_session(self, sid):
+        user = self.sessions.pop(sid, None)
+        if user is None:
+            return None, False
+
+        sids = self.user_sessions.get(user["id"], set())
+        sids.discard(sid)
+        if not sids:
+            self.user_sessions.pop(user["id"], None)
+            return user, True
+        return user, False
+
+    async def get_session_user(self, sid):
+        return self.sessions.get(sid)
+
+    async def get_user_ids(self):
+        return list(self.user_sessions.keys())
+
+    async def get_user_session_ids(self, user_id):
+        return list(self.user_sessions.get(user_id, set()))
+
+    async def is_user_active(self, user_id):
+        return user_id in self.user_sessions
+
+    async def heartbeat(self):
+        return True
+
+    async def reap_dead_nodes(self):
+        return []
+
+
+class RedisPresence:
+    """
+    Presence tracking backed by one Redis set of session ids per user.
+
+    Every operation touches a constant number of keys, so connecting and
+    disconnecting no longer read and rewrite the whole user pool. Sessions are
+    also indexed by the node that owns them; each node refreshes a TTL'd
+    heartbeat key, and sessions of nodes whose heartbeat has expired are
+    reaped by whichever node runs `reap_dead_nodes`.
+    """
+
+    # Removes a session and, if it was the user's last one, the user itself.
+    # Returns 1 when the user went offline.
+    REMOVE_SESSION_SCRIPT = """
+    redis.call('SREM', KEYS[1], ARGV[1])
+    redis.call('SREM', KEYS[2], ARGV[1])
+    redis.call('DEL', KEYS[3])
+    if redis.call('SCARD', KEYS[1]) == 0 then
+        redis.call('DEL', KEYS[1])
+        return redis.call('SREM', KEYS[4], ARGV[2])
+    end
+    return 0
+    """
+
+    def __init__(
+        self,
+        prefix,
+        redis_url,
+        redis_sentinels=[],
+        node_id=None,
+        heartbeat_ttl=30,
+    ):
+        self.prefix = prefix
+        self.node_id = node_id or str(uuid.uuid4())
+        self.heartbeat_ttl = heartbeat_ttl
+        self.redis = get_async_redis_connection(
+            redis_url, redis_sentinels, decode_responses=True
+        )
+        self._remove_session = self.redis.register_script(self.REMOVE_SESSION_SCRIPT)
+
+    def _session_key(self, sid):
+        return f"{self.prefix}:session:{sid}"
+
+    def _user_key(self, user_id):
+        return f"{self.prefix}:user:{user_id}:sessions"
+
+    def _node_key(self, node_id):
+        return f"{self.prefix}:node:{node_id}:sessions"
+
+    def _node_alive_key(self, node_id):
+        return f"{self.prefix}:node:{node_id}:alive"
+
+    @property
+    def _users_key(self):
+        return f"{self.prefix}:users"
+
+    @property
+    def _nodes_key(self):
+        return f"{self.prefix}:nodes"
+
+    async def _remove(self, sid, user_id, node_id):
+        went_offline = await self._remove_session(
+            keys=[
+                self._user_key(user_id),
+                self._node_key(node_id),
+                self._session_key(sid),
+                self._users_key,
+            ],
+            args=[sid, user_id],
+        )
+        return went_offline == 1
+
+    async def add_session(self, sid, user):
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.set(self._session_key(sid), json.dumps(user))
+            pipe.sadd(self._user_key(user["id"]), sid)
+            pipe.sadd(self._node_key(self.node_id), sid)
+            pipe.sadd(self._users_key, user["id"])
+            results = await pipe.execute()
+        return results[3] == 1
+
+    async def remove_session(self, sid):
+        user = await self.get_session_user(sid)
+        if user is None:
+            return None, False
+        return user, await self._remove(sid, user["id"], self.node_id)
+
+    async def get_session_user(self, sid):
+        value = await self.redis.get(self._session_key(sid))
+        if value is None:
+            return None
+        return json.loads(value)
+
+    async def get_user_ids(self):
+        return list(await self.redis.smembers(self._users_key))
+
+    async def get_user_session_ids(self, user_id):
+        return list(await self.redis.smembers(self._user_key(user_id)))
+
+    async def is_user_active(self, user_id):
+        return bool(await self.redis.sismember(self._users_key, user_id))
+
+    async def heartbeat(self):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            pipe.set(self._node_alive_key(self.node_id), 1, ex=self.heartbeat_ttl)
+            pipe.sadd(self._nodes_key, self.node_id)
+            await pipe.execute()
+        return True
+
+    async def reap_dead_nodes(self):
+        """
+        Remove the sessions of nodes that stopped sending heartbeats.
+
+        Returns the ids of users that went offline as a result.
+        """
+        offline_user_ids = []
+        for node_id in await self.redis.smembers(self._nodes_key):
+            if node_id == self.node_id:
+                continue
+            if await self.redis.exists(self._node_alive_key(node_id)):
+                continue
+
+            for sid in await self.redis.smembers(self._node_key(node_id)):
+                user = await self.get_session_user(sid)
+                if user is None:
+                    await self.redis.srem(self._node_key(node_id), sid)
+                elif await self._remove(sid, user["id"], node_id):
+                    offline_user_ids.append(user["id"])
+
+            await self.redis.delete(self._node_key(node_id))
+            await self.redis.srem(self._nodes_key, node_id)
+
+        return offline_user_ids
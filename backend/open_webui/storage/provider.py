@@ -1,13 +1,18 @@
 import os
 import shutil
 import json
+import hashlib
 import logging
+import threading
+import time
+import uuid
+import weakref
 from abc import ABC, abstractmethod
-from typing import BinaryIO, Tuple
+from collections import OrderedDict
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import BinaryIO, Callable, Iterator, NamedTuple, Optional, Tuple
 
-import boto3
-from botocore.config import Config
-from botocore.exceptions import ClientError
 from open_webui.config import (
     S3_ACCESS_KEY_ID,
     S3_BUCKET_NAME,
@@ -22,21 +27,338 @@ from open_webui.config import (
     AZURE_STORAGE_ENDPOINT,
     AZURE_STORAGE_CONTAINER_NAME,
     AZURE_STORAGE_KEY,
+    STORAGE_CACHE_MAX_SIZE,
+    STORAGE_CACHE_VALIDATE_INTERVAL,
     STORAGE_PROVIDER,
+    STORAGE_UPLOAD_CHUNK_SIZE,
     UPLOAD_DIR,
 )
-from google.cloud import storage
-from google.cloud.exceptions import GoogleCloudError, NotFound
 from open_webui.constants import ERROR_MESSAGES
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
-from azure.core.exceptions import ResourceNotFoundError
 from open_webui.env import SRC_LOG_LEVELS
 
+# The cloud SDKs are imported by the provider that uses them, so that only the
+# configured one is loaded at startup.
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
 
+# Read/write buffer used when copying uploads to disk
+COPY_BUFFER_SIZE = 1024 * 1024
+
+# Names of the copies the local storage cache wrote to UPLOAD_DIR, one per line
+STORAGE_CACHE_INDEX = ".storage_cache"
+
+
+class UploadedFile(NamedTuple):
+    """Metadata of a stored upload, computed while it was copied."""
+
+    size: int
+    sha256: str
+
+
+def copy_file_stream(file: BinaryIO, file_path: str) -> UploadedFile:
+    """
+    Copy `file` to `file_path` through one reusable buffer, computing the
+    size and sha256 on the way, so the upload is never held in memory.
+    """
+    sha256 = hashlib.sha256()
+    size = 0
+    buffer = bytearray(COPY_BUFFER_SIZE)
+    view = memoryview(buffer)
+    readinto = getattr(file, "readinto", None)
+
+    with open(file_path, "wb") as f:
+        while True:
+            if readinto is not None:
+                n = readinto(buffer)
+                chunk = view[:n]
+            else:
+                chunk = file.read(COPY_BUFFER_SIZE)
+                n = len(chunk)
+            if not n:
+                break
+            f.write(chunk)
+            sha256.update(chunk)
+            size += n
+
+    return UploadedFile(size=size, sha256=sha256.hexdigest())
+
+
+def iter_local_file(
+    file_path: str, start: int = 0, end: Optional[int] = None
+) -> Iterator[bytes]:
+    # Opened right away, so the stream survives the file being removed (e.g.
+    # evicted from the cache) before it is read
+    return iter_file_object(open(file_path, "rb"), start, end)
+
+
+def iter_file_object(
+    file: BinaryIO, start: int = 0, end: Optional[int] = None
+) -> Iterator[bytes]:
+    with file as f:
+        f.seek(start)
+        remaining = None if end is None else end - start + 1
+        while remaining is None or remaining > 0:
+            size = (
+                COPY_BUFFER_SIZE
+                if remaining is None
+                else min(COPY_BUFFER_SIZE, remaining)
+            )
+            chunk = f.read(size)
+            if not chunk:
+                break
+            if remaining is not None:
+                remaining -= len(chunk)
+            yield chunk
+
+
+@dataclass
+class CacheEntry:
+    size: int
+    etag: Optional[str]
+    checked_at: float
+    # Readers that must not have the copy evicted under them
+    readers: int = 0
+
+
+class LocalFileCache:
+    """
+    Bounded cache of remote objects in UPLOAD_DIR.
+
+    - Only copies the cache wrote itself are managed; their names are kept in
+      STORAGE_CACHE_INDEX so they are picked up again after a restart. Other
+      files in UPLOAD_DIR are never counted or evicted.
+
+    - A cached copy is served as is for STORAGE_CACHE_VALIDATE_INTERVAL
+      seconds, then revalidated against the object's etag (or its size for
+      copies whose etag is unknown, e.g. after a restart).
+    - Concurrent requests for the same object share one download; downloads
+      go to a temporary file that is renamed into place, so readers never
+      see a partial copy.
+    - Copies are evicted least recently used first once their total size
+      exceeds STORAGE_CACHE_MAX_SIZE. Pinned copies, e.g. ones being sent in
+      a response, are skipped until they are unpinned.
+    """
+
+    def __init__(self, max_size: int, validate_interval: int):
+        self.max_size = max_size
+        self.validate_interval = validate_interval
+        self.lock = threading.Lock()
+        self.entries: OrderedDict[str, CacheEntry] = OrderedDict()
+        self.size = 0
+        self.loaded = False
+        self.index_lines = 0
+        self.key_locks: "weakref.WeakValueDictionary[str, threading.Lock]" = (
+            weakref.WeakValueDictionary()
+        )
+
+    def _index_path(self) -> str:
+        return os.path.join(UPLOAD_DIR, STORAGE_CACHE_INDEX)
+
+    def _load(self):
+        """Adopt copies left in UPLOAD_DIR by a previous run, oldest first."""
+        self.loaded = True
+        try:
+            with open(self._index_path(), encoding="utf-8") as f:
+                names = set(f.read().splitlines())
+        except FileNotFoundError:
+            return
+        files = []
+        for name in names:
+            path = f"{UPLOAD_DIR}/{name}"
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            files.append((stat.st_atime, path, stat.st_size))
+        for _, path, size in sorted(files):
+            self.entries[path] = CacheEntry(size=size, etag=None, checked_at=0)
+            self.size += size
+        self._write_index()
+
+    def _write_index(self):
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        with open(self._index_path(), "w", encoding="utf-8") as f:
+            f.writelines(f"{os.path.basename(path)}\n" for path in self.entries)
+        self.index_lines = len(self.entries)
+
+    def _add_to_index(self, path: str):
+        # Appended as copies are added; names of evicted copies are dropped
+        # when the index is rewritten
+        if self.index_lines > 2 * len(self.entries) + 100:
+            self._write_index()
+            return
+        os.makedirs(UPLOAD_DIR, exist_ok=True)
+        with open(self._index_path(), "a", encoding="utf-8") as f:
+            f.write(f"{os.path.basename(path)}\n")
+        self.index_lines += 1
+
+    def _key_lock(self, path: str) -> threading.Lock:
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            lock = self.key_locks.get(path)
+            if lock is None:
+                lock = threading.Lock()
+                self.key_locks[path] = lock
+            return lock
+
+    def is_fresh(self, path: str) -> bool:
+        with self.lock:
+            entry = self.entries.get(path)
+            return (
+                entry is not None
+                and time.time() - entry.checked_at < self.validate_interval
+                and os.path.isfile(path)
+            )
+
+    def get(
+        self,
+        path: str,
+        head: Callable[[], Tuple[Optional[str], int]],
+        download: Callable[[str], Optional[str]],
+    ) -> str:
+        """
+        Return `path`, downloading the object first if there is no valid
+        copy. `head` returns the remote (etag, size); `download` writes the
+        object to the given path and returns its etag.
+        """
+        with self._key_lock(path):
+            with self.lock:
+                entry = self.entries.get(path)
+            if entry is not None and os.path.isfile(path):
+                if time.time() - entry.checked_at < self.validate_interval:
+                    self._touch(path)
+                    return path
+
+                etag, size = head()
+                if etag == entry.etag or (entry.etag is None and size == entry.size):
+                    with self.lock:
+                        entry.etag = etag
+                        entry.checked_at = time.time()
+                    self._touch(path)
+                    return path
+
+            tmp_path = f"{path}.{uuid.uuid4().hex}.part"
+            try:
+                etag = download(tmp_path)
+                os.replace(tmp_path, path)
+            finally:
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+            self.put(path, os.path.getsize(path), etag)
+            return path
+
+    def _touch(self, path: str):
+        with self.lock:
+            if path in self.entries:
+                self.entries.move_to_end(path)
+
+    def put(self, path: str, size: int, etag: Optional[str] = None):
+        """Record a fresh copy, e.g. one just written by an upload."""
+        with self.lock:
+            if not self.loaded:
+                self._load()
+            previous = self.entries.pop(path, None)
+            if previous is not None:
+                self.size -= previous.size
+            self.entries[path] = CacheEntry(
+                size=size,
+                etag=etag,
+                checked_at=time.time(),
+                readers=previous.readers if previous is not None else 0,
+            )
+            self.size += size
+            if previous is None:
+                self._add_to_index(path)
+            evicted = self._evict()
+        self._remove(evicted)
+
+    def pin(self, path: str) -> bool:
+        """
+        Keep the copy at `path` from being evicted until `unpin`. Returns
+        False if there is no copy, e.g. because it was just evicted.
+        """
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is None or not os.path.isfile(path):
+                return False
+            entry.readers += 1
+            return True
+
+    def unpin(self, path: str):
+        with self.lock:
+            entry = self.entries.get(path)
+            if entry is not None and entry.readers > 0:
+                entry.readers -= 1
+            evicted = self._evict()
+        self._remove(evicted)
+
+    def _evict(self) -> list[str]:
+        evicted = []
+        if not self.max_size or self.size <= self.max_size:
+            return evicted
+        # The most recently used copy is never evicted, even if it alone
+        # exceeds the limit
+        for path, entry in list(self.entries.items())[:-1]:
+            if self.size <= self.max_size:
+                break
+            if entry.readers:
+                continue
+            del self.entries[path]
+            self.size -= entry.size
+            evicted.append(path)
+        return evicted
+
+    def _remove(self, evicted: list[str]):
+        for evicted_path in evicted:
+            try:
+                os.remove(evicted_path)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                # e.g. still open on Windows
+                log.warning(f"Could not remove {evicted_path}: {e}")
+                continue
+            log.debug(f"Evicted {evicted_path} from the local storage cache")
+
+    def discard(self, path: str):
+        with self.lock:
+            entry = self.entries.pop(path, None)
+            if entry is not None:
+                self.size -= entry.size
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+            self.size = 0
+            if os.path.exists(self._index_path()):
+                self._write_index()
+
+
+def parse_range(value: Optional[str], size: int) -> Optional[Tuple[int, int]]:
+    """
+    Parse a single `bytes=start-end` Range header into an inclusive
+    (start, end) within `size`, or None if absent, multi-range or invalid.
+    """
+    if not value or not value.startswith("bytes=") or "," in value:
+        return None
+    start, _, end = value[len("bytes=") :].strip().partition("-")
+    try:
+        if start == "":
+            # Suffix range: the last `end` bytes
+            length = int(end)
+            if length <= 0:
+                return None
+            return max(size - length, 0), size - 1
+        start = int(start)
+        end = int(end) if end else size - 1
+    except ValueError:
+        return None
+    if start > end or start >= size:
+        return None
+    return start, min(end, size - 1)
+
 
 class StorageProvider(ABC):
     @abstractmethod
@@ -44,7 +366,7 @@ class StorageProvider(ABC):
         pass
 
     @abstractmethod
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[UploadedFile, str]:
         pass
 
     @abstractmethod
@@ -55,17 +377,115 @@ class StorageProvider(ABC):
     def delete_file(self, file_path: str) -> None:
         pass
 
+    def is_cached(self, file_path: str) -> bool:
+        """Whether `get_file` can return the file without downloading it."""
+        return True
+
+    def get_file_size(self, file_path: str) -> int:
+        return os.path.getsize(self.get_file(file_path))
+
+    def acquire_file(self, file_path: str) -> str:
+        """
+        Like `get_file`, but the local copy is kept until `release_file`,
+        e.g. while it is sent in a response.
+        """
+        return self.get_file(file_path)
+
+    def release_file(self, file_path: str) -> None:
+        pass
+
+    @contextmanager
+    def pinned_file(self, file_path: str) -> Iterator[str]:
+        """Local path of the file, acquired for the duration of the block."""
+        local_file_path = self.acquire_file(file_path)
+        try:
+            yield local_file_path
+        finally:
+            self.release_file(file_path)
+
+    def iter_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        """Yield bytes `start` to `end` (inclusive) of the file in chunks."""
+        return iter_local_file(self.get_file(file_path), start, end)
+
+
+class RemoteStorageProvider(StorageProvider):
+    """
+    Base for providers storing objects remotely. Local copies in UPLOAD_DIR
+    are managed by a shared LocalFileCache; range reads of objects without
+    a valid copy go straight to the remote store.
+    """
+
+    cache = LocalFileCache(STORAGE_CACHE_MAX_SIZE, STORAGE_CACHE_VALIDATE_INTERVAL)
+
+    @abstractmethod
+    def _head(self, file_path: str) -> Tuple[Optional[str], int]:
+        """(etag, size) of the remote object."""
+
+    @abstractmethod
+    def _download(self, file_path: str, local_file_path: str) -> Optional[str]:
+        """Stream the remote object to `local_file_path` and return its etag."""
+
+    @abstractmethod
+    def _iter_range(
+        self, file_path: str, start: int, end: Optional[int]
+    ) -> Iterator[bytes]:
+        """Yield bytes `start` to `end` (inclusive) of the remote object."""
+
+    def _local_path(self, file_path: str) -> str:
+        return f"{UPLOAD_DIR}/{file_path.split('/')[-1]}"
+
+    def _get_cached_file(self, file_path: str) -> str:
+        return self.cache.get(
+            self._local_path(file_path),
+            head=lambda: self._head(file_path),
+            download=lambda local_file_path: self._download(file_path, local_file_path),
+        )
+
+    def is_cached(self, file_path: str) -> bool:
+        return self.cache.is_fresh(self._local_path(file_path))
+
+    def get_file_size(self, file_path: str) -> int:
+        local_file_path = self._local_path(file_path)
+        if self.cache.is_fresh(local_file_path):
+            return os.path.getsize(local_file_path)
+        return self._head(file_path)[1]
+
+    def acquire_file(self, file_path: str) -> str:
+        while True:
+            local_file_path = self.get_file(file_path)
+            # Retry if it was evicted before it could be pinned
+            if self.cache.pin(local_file_path):
+                return local_file_path
+
+    def release_file(self, file_path: str) -> None:
+        self.cache.unpin(self._local_path(file_path))
+
+    def iter_file(
+        self, file_path: str, start: int = 0, end: Optional[int] = None
+    ) -> Iterator[bytes]:
+        local_file_path = self._local_path(file_path)
+        if self.cache.is_fresh(local_file_path) and self.cache.pin(local_file_path):
+            try:
+                return iter_local_file(local_file_path, start, end)
+            finally:
+                self.cache.unpin(local_file_path)
+        return self._iter_range(file_path, start, end)
+
+    def _cache_upload(self, local_file_path: str, uploaded: UploadedFile):
+        self.cache.put(local_file_path, uploaded.size)
+
 
 class LocalStorageProvider(StorageProvider):
     @staticmethod
-    def upload_file(file: BinaryIO, filename: str) -> Tuple[bytes, str]:
-        contents = file.read()
-        if not contents:
-            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+    def upload_file(file: BinaryIO, filename: str) -> Tuple[UploadedFile, str]:
         file_path = f"{UPLOAD_DIR}/{filename}"
-        with open(file_path, "wb") as f:
-            f.write(contents)
-        return contents, file_path
+        uploaded = copy_file_stream(file, file_path)
+        if not uploaded.size:
+            os.remove(file_path)
+            raise ValueError(ERROR_MESSAGES.EMPTY_CONTENT)
+        return uploaded, file_path
 
     @staticmethod
     def get_file(file_path: str) -> str:
@@ -99,8 +519,12 @@ class LocalStorageProvider(StorageProvider):
             log.warning(f"Directory {UPLOAD_DIR} not found in local storage.")
 
 
-class S3StorageProvider(StorageProvider):
+class S3StorageProvider(RemoteStorageProvider):
     def __init__(self):
+        import boto3
+        from boto3.s3.transfer import TransferConfig
+        from botocore.config import Config
+
         config = Config(
             s3={
                 "use_accelerate_endpoint": S3_USE_ACCELERATE_ENDPOINT,
@@ -130,32 +554,65 @@ class S3StorageProvider(StorageProvider):
 
         self.bucket_name = S3_BUCKET_NAME
         self.key_prefix = S3_KEY_PREFIX if S3_KEY_PREFIX else ""
+        self.transfer_config = TransferConfig(
+            multipart_threshold=STORAGE_UPLOAD_CHUNK_SIZE,
+            multipart_chunksize=STORAGE_UPLOAD_CHUNK_SIZE,
+        )
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[UploadedFile, str]:
         """Handles uploading of the file to S3 storage."""
-        _, file_path = LocalStorageProvider.upload_file(file, filename)
+        from botocore.exceptions import ClientError
+
+        uploaded, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             s3_key = os.path.join(self.key_prefix, filename)
-            self.s3_client.upload_file(file_path, self.bucket_name, s3_key)
-            return (
-                open(file_path, "rb").read(),
-                "s3://" + self.bucket_name + "/" + s3_key,
+            # Multipart upload streamed from disk for files above the chunk size
+            self.s3_client.upload_file(
+                file_path, self.bucket_name, s3_key, Config=self.transfer_config
             )
+            self._cache_upload(file_path, uploaded)
+            return uploaded, "s3://" + self.bucket_name + "/" + s3_key
         except ClientError as e:
             raise RuntimeError(f"Error uploading file to S3: {e}")
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from S3 storage."""
+        from botocore.exceptions import ClientError
+
         try:
-            s3_key = self._extract_s3_key(file_path)
-            local_file_path = self._get_local_file_path(s3_key)
-            self.s3_client.download_file(self.bucket_name, s3_key, local_file_path)
-            return local_file_path
+            return self._get_cached_file(file_path)
         except ClientError as e:
             raise RuntimeError(f"Error downloading file from S3: {e}")
 
+    def _head(self, file_path: str) -> Tuple[Optional[str], int]:
+        response = self.s3_client.head_object(
+            Bucket=self.bucket_name, Key=self._extract_s3_key(file_path)
+        )
+        return response.get("ETag"), response["ContentLength"]
+
+    def _download(self, file_path: str, local_file_path: str) -> Optional[str]:
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name, Key=self._extract_s3_key(file_path)
+        )
+        with open(local_file_path, "wb") as f:
+            for chunk in response["Body"].iter_chunks(COPY_BUFFER_SIZE):
+                f.write(chunk)
+        return response.get("ETag")
+
+    def _iter_range(
+        self, file_path: str, start: int, end: Optional[int]
+    ) -> Iterator[bytes]:
+        response = self.s3_client.get_object(
+            Bucket=self.bucket_name,
+            Key=self._extract_s3_key(file_path),
+            Range=f"bytes={start}-{'' if end is None else end}",
+        )
+        yield from response["Body"].iter_chunks(COPY_BUFFER_SIZE)
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from S3 storage."""
+        from botocore.exceptions import ClientError
+
         try:
             s3_key = self._extract_s3_key(file_path)
             self.s3_client.delete_object(Bucket=self.bucket_name, Key=s3_key)
@@ -163,10 +620,13 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from S3: {e}")
 
         # Always delete from local storage
+        self.cache.discard(self._local_path(file_path))
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from S3 storage."""
+        from botocore.exceptions import ClientError
+
         try:
             response = self.s3_client.list_objects_v2(Bucket=self.bucket_name)
             if "Contents" in response:
@@ -182,18 +642,18 @@ class S3StorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from S3: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
     # The s3 key is the name assigned to an object. It excludes the bucket name, but includes the internal path and the file name.
     def _extract_s3_key(self, full_file_path: str) -> str:
         return "/".join(full_file_path.split("//")[1].split("/")[1:])
 
-    def _get_local_file_path(self, s3_key: str) -> str:
-        return f"{UPLOAD_DIR}/{s3_key.split('/')[-1]}"
 
-
-class GCSStorageProvider(StorageProvider):
+class GCSStorageProvider(RemoteStorageProvider):
     def __init__(self):
+        from google.cloud import storage
+
         self.bucket_name = GCS_BUCKET_NAME
 
         if GOOGLE_APPLICATION_CREDENTIALS_JSON:
@@ -207,30 +667,65 @@ class GCSStorageProvider(StorageProvider):
             self.gcs_client = storage.Client()
         self.bucket = self.gcs_client.bucket(GCS_BUCKET_NAME)
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[UploadedFile, str]:
         """Handles uploading of the file to GCS storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
+        from google.cloud.exceptions import GoogleCloudError
+
+        uploaded, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
-            blob = self.bucket.blob(filename)
+            # Resumable upload in chunks, which must be multiples of 256 KiB
+            chunk_size = STORAGE_UPLOAD_CHUNK_SIZE // (256 * 1024) * (256 * 1024)
+            blob = self.bucket.blob(filename, chunk_size=chunk_size)
             blob.upload_from_filename(file_path)
-            return contents, "gs://" + self.bucket_name + "/" + filename
+            self._cache_upload(file_path, uploaded)
+            return uploaded, "gs://" + self.bucket_name + "/" + filename
         except GoogleCloudError as e:
             raise RuntimeError(f"Error uploading file to GCS: {e}")
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from GCS storage."""
-        try:
-            filename = file_path.removeprefix("gs://").split("/")[1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob = self.bucket.get_blob(filename)
-            blob.download_to_filename(local_file_path)
+        from google.cloud.exceptions import NotFound
 
-            return local_file_path
+        try:
+            return self._get_cached_file(file_path)
         except NotFound as e:
             raise RuntimeError(f"Error downloading file from GCS: {e}")
 
+    def _get_blob(self, file_path: str):
+        from google.cloud.exceptions import NotFound
+
+        filename = file_path.removeprefix("gs://").split("/")[1]
+        blob = self.bucket.get_blob(filename)
+        if blob is None:
+            raise NotFound(f"{filename} not found")
+        return blob
+
+    def _head(self, file_path: str) -> Tuple[Optional[str], int]:
+        blob = self._get_blob(file_path)
+        return blob.etag, blob.size
+
+    def _download(self, file_path: str, local_file_path: str) -> Optional[str]:
+        blob = self._get_blob(file_path)
+        # Pin the download to the generation whose etag is returned
+        blob.download_to_filename(local_file_path, if_generation_match=blob.generation)
+        return blob.etag
+
+    def _iter_range(
+        self, file_path: str, start: int, end: Optional[int]
+    ) -> Iterator[bytes]:
+        blob = self._get_blob(file_path)
+        end = blob.size - 1 if end is None else min(end, blob.size - 1)
+        while start <= end:
+            chunk_end = min(start + COPY_BUFFER_SIZE - 1, end)
+            yield blob.download_as_bytes(
+                start=start, end=chunk_end, if_generation_match=blob.generation
+            )
+            start = chunk_end + 1
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from GCS storage."""
+        from google.cloud.exceptions import NotFound
+
         try:
             filename = file_path.removeprefix("gs://").split("/")[1]
             blob = self.bucket.get_blob(filename)
@@ -239,10 +734,13 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.discard(self._local_path(file_path))
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
         """Handles deletion of all files from GCS storage."""
+        from google.cloud.exceptions import NotFound
+
         try:
             blobs = self.bucket.list_blobs()
 
@@ -253,11 +751,15 @@ class GCSStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from GCS: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
-class AzureStorageProvider(StorageProvider):
+class AzureStorageProvider(RemoteStorageProvider):
     def __init__(self):
+        from azure.identity import DefaultAzureCredential
+        from azure.storage.blob import BlobServiceClient
+
         self.endpoint = AZURE_STORAGE_ENDPOINT
         self.container_name = AZURE_STORAGE_CONTAINER_NAME
         storage_key = AZURE_STORAGE_KEY
@@ -265,42 +767,71 @@ class AzureStorageProvider(StorageProvider):
         if storage_key:
             # Configure using the Azure Storage Account Endpoint and Key
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=storage_key
+                account_url=self.endpoint,
+                credential=storage_key,
+                max_single_put_size=STORAGE_UPLOAD_CHUNK_SIZE,
+                max_block_size=STORAGE_UPLOAD_CHUNK_SIZE,
             )
         else:
             # Configure using the Azure Storage Account Endpoint and DefaultAzureCredential
             # If the key is not configured, then the DefaultAzureCredential will be used to support Managed Identity authentication
             self.blob_service_client = BlobServiceClient(
-                account_url=self.endpoint, credential=DefaultAzureCredential()
+                account_url=self.endpoint,
+                credential=DefaultAzureCredential(),
+                max_single_put_size=STORAGE_UPLOAD_CHUNK_SIZE,
+                max_block_size=STORAGE_UPLOAD_CHUNK_SIZE,
             )
         self.container_client = self.blob_service_client.get_container_client(
             self.container_name
         )
 
-    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[bytes, str]:
+    def upload_file(self, file: BinaryIO, filename: str) -> Tuple[UploadedFile, str]:
         """Handles uploading of the file to Azure Blob Storage."""
-        contents, file_path = LocalStorageProvider.upload_file(file, filename)
+        uploaded, file_path = LocalStorageProvider.upload_file(file, filename)
         try:
             blob_client = self.container_client.get_blob_client(filename)
-            blob_client.upload_blob(contents, overwrite=True)
-            return contents, f"{self.endpoint}/{self.container_name}/{filename}"
+            # Staged as blocks read from disk for files above the chunk size
+            with open(file_path, "rb") as f:
+                blob_client.upload_blob(f, length=uploaded.size, overwrite=True)
+            self._cache_upload(file_path, uploaded)
+            return uploaded, f"{self.endpoint}/{self.container_name}/{filename}"
         except Exception as e:
             raise RuntimeError(f"Error uploading file to Azure Blob Storage: {e}")
 
     def get_file(self, file_path: str) -> str:
         """Handles downloading of the file from Azure Blob Storage."""
+        from azure.core.exceptions import ResourceNotFoundError
+
         try:
-            filename = file_path.split("/")[-1]
-            local_file_path = f"{UPLOAD_DIR}/{filename}"
-            blob_client = self.container_client.get_blob_client(filename)
-            with open(local_file_path, "wb") as download_file:
-                download_file.write(blob_client.download_blob().readall())
-            return local_file_path
+            return self._get_cached_file(file_path)
         except ResourceNotFoundError as e:
             raise RuntimeError(f"Error downloading file from Azure Blob Storage: {e}")
 
+    def _get_blob_client(self, file_path: str):
+        return self.container_client.get_blob_client(file_path.split("/")[-1])
+
+    def _head(self, file_path: str) -> Tuple[Optional[str], int]:
+        properties = self._get_blob_client(file_path).get_blob_properties()
+        return properties.etag, properties.size
+
+    def _download(self, file_path: str, local_file_path: str) -> Optional[str]:
+        downloader = self._get_blob_client(file_path).download_blob()
+        with open(local_file_path, "wb") as download_file:
+            downloader.readinto(download_file)
+        return downloader.properties.etag
+
+    def _iter_range(
+        self, file_path: str, start: int, end: Optional[int]
+    ) -> Iterator[bytes]:
+        downloader = self._get_blob_client(file_path).download_blob(
+            offset=start, length=None if end is None else end - start + 1
+        )
+        yield from downloader.chunks()
+
     def delete_file(self, file_path: str) -> None:
         """Handles deletion of the file from Azure Blob Storage."""
+        from azure.core.exceptions import ResourceNotFoundError
+
         try:
             filename = file_path.split("/")[-1]
             blob_client = self.container_client.get_blob_client(filename)
@@ -309,6 +840,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting file from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.discard(self._local_path(file_path))
         LocalStorageProvider.delete_file(file_path)
 
     def delete_all_files(self) -> None:
@@ -321,6 +853,7 @@ class AzureStorageProvider(StorageProvider):
             raise RuntimeError(f"Error deleting all files from Azure Blob Storage: {e}")
 
         # Always delete from local storage
+        self.cache.clear()
         LocalStorageProvider.delete_all_files()
 
 
@@ -0,0 +1,203 @@
+import json
+import os
+import time
+from contextlib import contextmanager
+
+import pytest
+from sqlalchemy import create_engine, insert
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import chats as chats_module
+from open_webui.models.chats import Chat, ChatModel, Chats
+
+USERS = 2
+CHATS_PER_USER = 600
+PAGE_SIZE = 50
+
+# Set to the number of chats per user (e.g. 50000) to run the deep page
+# benchmark, which compares the old sidebar query with the cursor query
+BENCHMARK_CHATS = int(os.environ.get("CHAT_LIST_BENCHMARK_CHATS", 0))
+
+# A short conversation; real chats are often much larger
+CHAT = {
+    "title": "chat",
+    "models": ["model"],
+    "messages": [
+        {"role": role, "content": "lorem ipsum dolor sit amet " * 20}
+        for role in ["user", "assistant"] * 2
+    ],
+}
+
+
+def create_chat_db(path, chats_per_user):
+    engine = create_engine(f"sqlite:///{path}", json_serializer=json.dumps)
+    Chat.__table__.create(engine)
+
+    rows = []
+    for user in range(USERS):
+        for idx in range(chats_per_user):
+            rows.append(
+                {
+                    "id": f"{user}-{idx:06d}",
+                    "user_id": str(user),
+                    "title": f"Chat {idx}",
+                    "chat": CHAT,
+                    # Several chats per second, so pages split equal timestamps
+                    "created_at": idx // 3,
+                    "updated_at": idx // 3,
+                    "archived": idx % 10 == 0,
+                    "pinned": idx % 100 == 1,
+                    "meta": {"tags": ["tag"] if idx % 2 else []},
+                    "folder_id": "folder" if idx % 50 == 2 else None,
+                }
+            )
+    with engine.begin() as connection:
+        connection.execute(insert(Chat.__table__), rows)
+    return engine
+
+
+def use_engine(engine, monkeypatch):
+    Session = sessionmaker(bind=engine, expire_on_commit=False)
+
+    @contextmanager
+    def get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(chats_module, "get_db", get_db)
+    return get_db
+
+
+@pytest.fixture(scope="module")
+def engine(tmp_path_factory):
+    return create_chat_db(tmp_path_factory.mktemp("db") / "chats.db", CHATS_PER_USER)
+
+
+@pytest.fixture
+def db(engine, monkeypatch):
+    return use_engine(engine, monkeypatch)
+
+
+def get_all_pages(get_page):
+    pages = []
+    cursor = None
+    while True:
+        page = get_page(cursor)
+        if not page:
+            return pages
+        pages.append(page)
+        cursor = (page[-1].updated_at, page[-1].id)
+
+
+def get_sidebar_pages():
+    return get_all_pages(
+        lambda cursor: Chats.get_chat_title_id_list_by_user_id(
+            "0", cursor=cursor, limit=PAGE_SIZE
+        )
+    )
+
+
+def test_cursor_pages_do_not_overlap(db):
+    pages = get_sidebar_pages()
+    chats = [chat for page in pages for chat in page]
+    ids = [chat.id for chat in chats]
+    # Not archived, not pinned and not in a folder
+    expected = [
+        f"0-{idx:06d}"
+        for idx in range(CHATS_PER_USER)
+        if idx % 10 and idx % 100 != 1 and idx % 50 != 2
+    ]
+    assert len(ids) == len(set(ids))
+    assert sorted(ids) == expected
+    assert all(len(page) == PAGE_SIZE for page in pages[:-1])
+    assert chats[0].tags == (["tag"] if int(chats[0].id[2:]) % 2 else [])
+
+
+def test_ties_on_updated_at_are_ordered_by_id(db):
+    pages = get_sidebar_pages()
+    chats = [chat for page in pages for chat in page]
+    assert [(c.updated_at, c.id) for c in chats] == sorted(
+        [(c.updated_at, c.id) for c in chats], reverse=True
+    )
+    # Some page ends inside a group of chats updated in the same second
+    assert any(
+        page[-1].updated_at == next_page[0].updated_at
+        for page, next_page in zip(pages, pages[1:])
+    )
+
+
+def test_projection_has_no_chat_field(db):
+    with db() as session:
+        columns = [
+            column["name"]
+            for column in Chats._query_chat_list(session).column_descriptions
+        ]
+    assert "chat" not in columns
+
+    chat = Chats.get_chat_list_by_user_id("0", limit=1)[0]
+    assert "chat" not in chat.model_dump()
+
+
+def test_list_projections(db):
+    pinned = Chats.get_pinned_chat_list_by_user_id("1")
+    assert len(pinned) == CHATS_PER_USER // 100
+    assert all(chat.pinned for chat in pinned)
+
+    in_folder = Chats.get_chat_list_by_folder_id_and_user_id("folder", "1")
+    assert in_folder and all(chat.folder_id == "folder" for chat in in_folder)
+
+    archived = Chats.get_archived_chat_list_by_user_id("1", limit=PAGE_SIZE)
+    after = Chats.get_archived_chat_list_by_user_id(
+        "1", cursor=(archived[-1].updated_at, archived[-1].id), limit=PAGE_SIZE
+    )
+    assert archived[-1].updated_at >= after[0].updated_at
+    assert not {chat.id for chat in archived} & {chat.id for chat in after}
+
+
+def timed(fn, repeat=5):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@pytest.mark.skipif(not BENCHMARK_CHATS, reason="set CHAT_LIST_BENCHMARK_CHATS to run")
+def test_benchmark_deep_page(tmp_path, monkeypatch, record_property):
+    """
+    A page near the end of the chat list, fetched the way the sidebar did
+    (full rows and OFFSET) and with the projection and a cursor.
+    """
+    db = use_engine(create_chat_db(tmp_path / "chats.db", BENCHMARK_CHATS), monkeypatch)
+    skip = BENCHMARK_CHATS * 9 // 10 - 2 * PAGE_SIZE
+
+    def full_rows_offset():
+        with db() as session:
+            rows = (
+                session.query(Chat)
+                .filter_by(user_id="0", archived=False)
+                .order_by(Chat.updated_at.desc())
+                .offset(skip)
+                .limit(PAGE_SIZE)
+                .all()
+            )
+            return [ChatModel.model_validate(row) for row in rows]
+
+    offset_page = full_rows_offset()
+    last = offset_page[0]
+    cursor = (last.updated_at, last.id)
+
+    def projection_cursor():
+        return Chats.get_chat_list_by_user_id("0", cursor=cursor, limit=PAGE_SIZE)
+
+    assert projection_cursor()[0].updated_at <= last.updated_at
+
+    before = timed(full_rows_offset)
+    after = timed(projection_cursor)
+    record_property("full_rows_offset_ms", round(before * 1000, 1))
+    record_property("projection_cursor_ms", round(after * 1000, 1))
+    assert after < before
@@ -39,6 +39,16 @@ class TestChats(AbstractPostgresTest):
         assert first_chat["created_at"] is not None
         assert first_chat["updated_at"] is not None
 
+    def test_get_session_user_chat_list_cursor(self):
+        with mock_webui_user(id="2"):
+            first_chat = self.fast_api_client.get(self.create_url("/")).json()[0]
+            cursor = f"{first_chat['updated_at']}:{first_chat['id']}"
+            response = self.fast_api_client.get(self.create_url(f"/?cursor={cursor}"))
+            invalid = self.fast_api_client.get(self.create_url("/?cursor=invalid"))
+        assert response.status_code == 200
+        assert response.json() == []
+        assert invalid.status_code == 400
+
     def test_delete_all_user_chats(self):
         with mock_webui_user(id="2"):
             response = self.fast_api_client.delete(self.create_url("/"))
@@ -1,5 +1,7 @@
+import hashlib
 import io
 import os
+import tracemalloc
 import boto3
 import pytest
 from botocore.exceptions import ClientError
@@ -56,6 +58,22 @@ def test_class_instantiation():
     provider.AzureStorageProvider()
 
 
+class ZeroStream(io.RawIOBase):
+    """Readable stream of `size` zero bytes that never holds them in memory."""
+
+    def __init__(self, size):
+        self.remaining = size
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        # Only the byte count matters here; the buffer is left as it is
+        n = min(len(buffer), self.remaining)
+        self.remaining -= n
+        return n
+
+
 class TestLocalStorageProvider:
     Storage = provider.LocalStorageProvider()
     file_content = b"test content"
@@ -66,14 +84,37 @@ class TestLocalStorageProvider:
 
     def test_upload_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
+        uploaded, file_path = self.Storage.upload_file(self.file_bytesio, self.filename)
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert uploaded.size == len(self.file_content)
+        assert uploaded.sha256 == hashlib.sha256(self.file_content).hexdigest()
         assert file_path == str(upload_dir / self.filename)
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
 
+    def test_upload_file_memory(self, monkeypatch, tmp_path):
+        """
+        Peak memory of an upload stays bounded by the copy buffer, whatever
+        the file size. Set STORAGE_BENCHMARK_FILE_SIZE (bytes) to run it with
+        multi-GB files.
+        """
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        size = int(os.environ.get("STORAGE_BENCHMARK_FILE_SIZE", 64 * 1024 * 1024))
+
+        tracemalloc.start()
+        try:
+            uploaded, file_path = self.Storage.upload_file(
+                ZeroStream(size), self.filename
+            )
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        assert uploaded.size == size
+        assert (upload_dir / self.filename).stat().st_size == size
+        assert peak < 4 * provider.COPY_BUFFER_SIZE
+
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         file_path = str(upload_dir / self.filename)
@@ -116,7 +157,7 @@ class TestS3StorageProvider:
         with pytest.raises(Exception):
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        uploaded, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.s3_client.Object(self.Storage.bucket_name, self.filename)
@@ -124,7 +165,8 @@ class TestS3StorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert uploaded.size == len(self.file_content)
+        assert uploaded.sha256 == hashlib.sha256(self.file_content).hexdigest()
         assert s3_file_path == "s3://" + self.Storage.bucket_name + "/" + self.filename
         with pytest.raises(ValueError):
             self.Storage.upload_file(self.file_bytesio_empty, self.filename)
@@ -132,7 +174,7 @@ class TestS3StorageProvider:
     def test_get_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        uploaded, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(s3_file_path)
@@ -142,7 +184,7 @@ class TestS3StorageProvider:
     def test_delete_file(self, monkeypatch, tmp_path):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
         self.s3_client.create_bucket(Bucket=self.Storage.bucket_name)
-        contents, s3_file_path = self.Storage.upload_file(
+        uploaded, s3_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         assert (upload_dir / self.filename).exists()
@@ -229,7 +271,7 @@ class TestGCSStorageProvider:
         with pytest.raises(Exception):
             self.Storage.bucket = monkeypatch(self.Storage, "bucket", None)
             self.Storage.upload_file(io.BytesIO(self.file_content), self.filename)
-        contents, gcs_file_path = self.Storage.upload_file(
+        uploaded, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         object = self.Storage.bucket.get_blob(self.filename)
@@ -237,7 +279,8 @@ class TestGCSStorageProvider:
         # local checks
         assert (upload_dir / self.filename).exists()
         assert (upload_dir / self.filename).read_bytes() == self.file_content
-        assert contents == self.file_content
+        assert uploaded.size == len(self.file_content)
+        assert uploaded.sha256 == hashlib.sha256(self.file_content).hexdigest()
         assert gcs_file_path == "gs://" + self.Storage.bucket_name + "/" + self.filename
         # test error if file is empty
         with pytest.raises(ValueError):
@@ -245,7 +288,7 @@ class TestGCSStorageProvider:
 
     def test_get_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        uploaded, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         file_path = self.Storage.get_file(gcs_file_path)
@@ -254,7 +297,7 @@ class TestGCSStorageProvider:
 
     def test_delete_file(self, monkeypatch, tmp_path, setup):
         upload_dir = mock_upload_dir(monkeypatch, tmp_path)
-        contents, gcs_file_path = self.Storage.upload_file(
+        uploaded, gcs_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
         # ensure that local directory has the uploaded file as well
@@ -348,16 +391,20 @@ class TestAzureStorageProvider:
         # Reset side effect and create container
         self.Storage.container_client.get_blob_client.side_effect = None
         self.Storage.create_container()
-        contents, azure_file_path = self.Storage.upload_file(
+        uploaded, azure_file_path = self.Storage.upload_file(
             io.BytesIO(self.file_content), self.filename
         )
 
         # Assertions
         self.Storage.container_client.get_blob_client.assert_called_with(self.filename)
-        self.Storage.container_client.get_blob_client().upload_blob.assert_called_once_with(
-            self.file_content, overwrite=True
-        )
-        assert contents == self.file_content
+        upload_blob = self.Storage.container_client.get_blob_client().upload_blob
+        upload_blob.assert_called_once()
+        assert upload_blob.call_args.kwargs == {
+            "length": len(self.file_content),
+            "overwrite": True,
+        }
+        assert uploaded.size == len(self.file_content)
+        assert uploaded.sha256 == hashlib.sha256(self.file_content).hexdigest()
         assert (
             azure_file_path
             == f"https://myaccount.blob.core.windows.net/{self.Storage.container_name}/{self.filename}"
@@ -433,3 +480,118 @@ class TestAzureStorageProvider:
         )
         with pytest.raises(Exception, match="Blob not found"):
             self.Storage.get_file(file_url)
+
+
+class TestLocalFileCache:
+    def test_get_downloads_once_and_revalidates(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(max_size=0, validate_interval=0)
+        remote = {"content": b"v1", "etag": "e1"}
+        downloads = []
+
+        def head():
+            return remote["etag"], len(remote["content"])
+
+        def download(path):
+            downloads.append(path)
+            with open(path, "wb") as f:
+                f.write(remote["content"])
+            return remote["etag"]
+
+        path = str(upload_dir / "test.txt")
+        assert cache.get(path, head, download) == path
+        assert cache.get(path, head, download) == path
+        assert len(downloads) == 1
+
+        remote.update(content=b"v2", etag="e2")
+        cache.get(path, head, download)
+        assert len(downloads) == 2
+        assert (upload_dir / "test.txt").read_bytes() == b"v2"
+
+    def test_evicts_least_recently_used(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(max_size=20, validate_interval=60)
+        for name in ("a", "b", "c"):
+            (upload_dir / name).write_bytes(b"x" * 10)
+            cache.put(str(upload_dir / name), 10)
+            if name == "b":
+                # Use "a" again so that "b" becomes the oldest
+                cache.get(str(upload_dir / "a"), None, None)
+
+        assert sorted(os.listdir(upload_dir)) == [
+            provider.STORAGE_CACHE_INDEX,
+            "a",
+            "c",
+        ]
+        assert cache.size == 20
+
+    def test_pinned_copies_are_not_evicted(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        cache = provider.LocalFileCache(max_size=10, validate_interval=60)
+        (upload_dir / "a").write_bytes(b"x" * 10)
+        cache.put(str(upload_dir / "a"), 10)
+        assert cache.pin(str(upload_dir / "a"))
+
+        (upload_dir / "b").write_bytes(b"x" * 10)
+        cache.put(str(upload_dir / "b"), 10)
+        assert (upload_dir / "a").exists()
+
+        cache.unpin(str(upload_dir / "a"))
+        assert not (upload_dir / "a").exists()
+        assert not cache.pin(str(upload_dir / "a"))
+        assert cache.size == 10
+
+    def test_pinned_file_is_released(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+
+        class FakeRemoteStorageProvider(provider.RemoteStorageProvider):
+            cache = provider.LocalFileCache(max_size=10, validate_interval=60)
+            get_file = provider.RemoteStorageProvider._get_cached_file
+            upload_file = delete_file = delete_all_files = _iter_range = None
+
+            def _head(self, file_path):
+                return "etag", 10
+
+            def _download(self, file_path, local_file_path):
+                with open(local_file_path, "wb") as f:
+                    f.write(b"x" * 10)
+                return "etag"
+
+        storage = FakeRemoteStorageProvider()
+        with pytest.raises(RuntimeError):
+            with storage.pinned_file("remote/a") as local_file_path:
+                assert local_file_path == str(upload_dir / "a")
+                # Pinned copies outlive the cache size limit
+                storage.cache.put(str(upload_dir / "b"), 10)
+                assert (upload_dir / "a").exists()
+                raise RuntimeError()
+
+        # Released even though the block raised
+        assert not (upload_dir / "a").exists()
+
+    def test_only_adopts_its_own_copies(self, monkeypatch, tmp_path):
+        upload_dir = mock_upload_dir(monkeypatch, tmp_path)
+        (upload_dir / "upload").write_bytes(b"x" * 20)
+        (upload_dir / "a").write_bytes(b"x" * 10)
+        provider.LocalFileCache(max_size=0, validate_interval=60).put(
+            str(upload_dir / "a"), 10
+        )
+
+        # After a restart
+        cache = provider.LocalFileCache(max_size=10, validate_interval=60)
+        (upload_dir / "b").write_bytes(b"x" * 10)
+        cache.put(str(upload_dir / "b"), 10)
+
+        assert sorted(os.listdir(upload_dir)) == [
+            provider.STORAGE_CACHE_INDEX,
+            "b",
+            "upload",
+        ]
+        assert cache.size == 10
+
+    def test_parse_range(self):
+        assert provider.parse_range("bytes=0-99", 1000) == (0, 99)
+        assert provider.parse_range("bytes=900-", 1000) == (900, 999)
+        assert provider.parse_range("bytes=-100", 1000) == (900, 999)
+        assert provider.parse_range("bytes=0-1,5-6", 1000) is None
+        assert provider.parse_range("bytes=1000-", 1000) is None
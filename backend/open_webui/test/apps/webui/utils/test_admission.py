@@ -0,0 +1,172 @@
+import asyncio
+import random
+
+import pytest
+from starlette.responses import StreamingResponse
+
+from open_webui.utils.admission import (
+    PRIORITY_API,
+    PRIORITY_BACKGROUND,
+    PRIORITY_INTERACTIVE,
+    AdaptiveLimit,
+    AdmissionController,
+    AdmissionRejected,
+    TokenBuckets,
+)
+
+
+def make_controller(limit=2, max_queue=10, max_wait=1.0, **kwargs):
+    return AdmissionController(
+        limit=AdaptiveLimit(initial=limit, minimum=1, maximum=100, tolerance=2.0),
+        buckets=TokenBuckets(),
+        user_rate_limit=kwargs.pop("user_rate_limit", 0),
+        user_burst=kwargs.pop("user_burst", 1),
+        model_rate_limit=kwargs.pop("model_rate_limit", 0),
+        model_burst=kwargs.pop("model_burst", 1),
+        max_queue=max_queue,
+        max_wait=max_wait,
+    )
+
+
+def test_token_bucket():
+    async def run():
+        buckets = TokenBuckets()
+        waits = [await buckets.take("user:a", rate=10, burst=3) for _ in range(4)]
+        other = await buckets.take("user:b", rate=10, burst=3)
+        await asyncio.sleep(0.11)
+        return waits, other, await buckets.take("user:a", rate=10, burst=3)
+
+    waits, other, refilled = asyncio.run(run())
+    assert waits[:3] == [0, 0, 0]
+    assert waits[3] == pytest.approx(0.1, abs=0.01)
+    assert other == 0
+    assert refilled == 0
+
+
+def test_rate_limits_reject():
+    async def run():
+        controller = make_controller(user_rate_limit=60, user_burst=2)
+        for _ in range(2):
+            (await controller.acquire("user", "model")).release()
+        with pytest.raises(AdmissionRejected) as e:
+            await controller.acquire("user", "model")
+        # Background tasks are not rate limited
+        (await controller.acquire("user", "model", PRIORITY_BACKGROUND)).release()
+        return e.value
+
+    rejected = asyncio.run(run())
+    assert rejected.reason == "user_rate_limit"
+    assert rejected.headers == {"Retry-After": "1"}
+
+
+def test_aimd_limit():
+    limit = AdaptiveLimit(initial=10, minimum=2, maximum=12, tolerance=2.0)
+    for _ in range(50):
+        limit.update("model", 1.0, active=10)
+    assert int(limit) == 12
+
+    # Slow responses shrink the limit, at most once per cooldown
+    limit.update("model", 3.0, active=10)
+    limit.update("model", 3.0, active=10)
+    assert int(limit) == 10
+
+    limit.decreased_at = float("-inf")
+    limit.update("other", None, active=10, overloaded=True)
+    assert int(limit) == 9
+
+    # An idle limit does not grow
+    limit.update("model", 1.0, active=1)
+    assert int(limit) == 9
+
+
+def test_limit_holds_under_varying_latency():
+    rng = random.Random(0)
+    limit = AdaptiveLimit(initial=32, minimum=4, maximum=32, tolerance=2.0)
+    for _ in range(1000):
+        limit.decreased_at = float("-inf")
+        limit.update("model", rng.uniform(0.5, 1.5), active=32)
+    assert int(limit) == 32
+    assert limit.baselines["model"] == pytest.approx(1.0, abs=0.2)
+
+
+def test_fair_priority_queue():
+    async def run():
+        controller = make_controller(limit=1)
+        order = []
+
+        async def request(user, priority=PRIORITY_INTERACTIVE):
+            ticket = await controller.acquire(user, "model", priority)
+            order.append(user)
+            await asyncio.sleep(0.01)
+            ticket.release()
+
+        first = await controller.acquire("first", "model")
+        tasks = [asyncio.create_task(request("bg", PRIORITY_BACKGROUND))]
+        tasks += [asyncio.create_task(request("api", PRIORITY_API))]
+        tasks += [asyncio.create_task(request("a")) for _ in range(3)]
+        tasks += [asyncio.create_task(request("b")) for _ in range(2)]
+        await asyncio.sleep(0)
+        assert controller.queued == 7
+
+        first.release()
+        await asyncio.gather(*tasks)
+        return controller, order
+
+    controller, order = asyncio.run(run())
+    # Users take turns within a priority, API keys then background last
+    assert order == ["a", "b", "a", "b", "a", "api", "bg"]
+    assert controller.active == 0 and controller.queued == 0
+
+
+def test_queue_rejects():
+    async def run():
+        controller = make_controller(limit=1, max_queue=1, max_wait=0.05)
+        ticket = await controller.acquire("a", "model")
+        waiting = asyncio.create_task(controller.acquire("b", "model"))
+        await asyncio.sleep(0)
+
+        with pytest.raises(AdmissionRejected) as full:
+            await controller.acquire("c", "model")
+        with pytest.raises(AdmissionRejected) as timeout:
+            await waiting
+
+        # A cancelled waiter leaves the queue
+        cancelled = asyncio.create_task(controller.acquire("d", "model"))
+        await asyncio.sleep(0)
+        cancelled.cancel()
+        await asyncio.sleep(0)
+        ticket.release()
+        return controller, full.value.reason, timeout.value.reason
+
+    controller, full, timeout = asyncio.run(run())
+    assert (full, timeout) == ("queue_full", "timeout")
+    assert controller.active == 0 and controller.queued == 0
+
+
+def test_streaming_response_holds_slot():
+    async def run():
+        controller = make_controller(limit=1)
+
+        async def body():
+            yield "data: 1\n\n"
+            yield "data: 2\n\n"
+
+        ticket = await controller.acquire("a", "model")
+        response = ticket.hold(StreamingResponse(body()), started_at=0)
+        assert controller.active == 1
+
+        chunks = [chunk async for chunk in response.body_iterator]
+        assert controller.active == 0
+        # Time to first byte is sampled, complete responses are not
+        assert controller.limit.samples == {"model": 1}
+        ticket = await controller.acquire("a", "model")
+        ticket.hold({"choices": []}, started_at=0)
+        assert controller.limit.samples == {"model": 1}
+
+        # Dropped before it was sent
+        ticket = await controller.acquire("a", "model")
+        ticket.hold(StreamingResponse(body()))
+        assert controller.active == 0
+        return chunks
+
+    assert len(asyncio.run(run())) == 2
@@ -0,0 +1,105 @@
+import asyncio
+
+from open_webui.utils.background_tasks import BackgroundTask, BackgroundTaskScheduler
+
+
+def make_task(key, model="task-model", log=None, delay=0.01, **kwargs):
+    async def run(batch):
+        log.append(("start", [task.key for task in batch]))
+        await asyncio.sleep(delay)
+        log.append(("end", [task.key for task in batch]))
+
+    return BackgroundTask(key=key, model=model, run=run, **kwargs)
+
+
+def running_at_most(log):
+    running = 0
+    peak = 0
+    for event, keys in log:
+        running += 1 if event == "start" else -1
+        peak = max(peak, running)
+    return peak
+
+
+def test_priority_and_model_concurrency():
+    async def run():
+        log = []
+        scheduler = BackgroundTaskScheduler(max_concurrency=2, model_concurrency=1)
+        for idx in range(3):
+            scheduler.submit(make_task(f"tags:{idx}", log=log, priority=1))
+        scheduler.submit(make_task("title:0", log=log, priority=0))
+        scheduler.submit(make_task("title:other", model="other", log=log))
+        await asyncio.sleep(0.2)
+        await scheduler.stop()
+        return log
+
+    log = asyncio.run(run())
+    starts = [keys[0] for event, keys in log if event == "start"]
+    # Titles before tags, the other model runs next to them
+    assert starts == ["title:0", "title:other", "tags:0", "tags:1", "tags:2"]
+    assert running_at_most(log) == 2
+    assert running_at_most([entry for entry in log if "other" not in entry[1][0]]) == 1
+
+
+def test_duplicates_are_skipped():
+    async def run():
+        log = []
+        scheduler = BackgroundTaskScheduler(max_concurrency=1, model_concurrency=1)
+        assert scheduler.submit(make_task("title:chat", log=log))
+        await asyncio.sleep(0)
+        # Running
+        assert not scheduler.submit(make_task("title:chat", log=log))
+        await asyncio.sleep(0.05)
+        assert scheduler.submit(make_task("title:chat", log=log))
+        await asyncio.sleep(0.05)
+        await scheduler.stop()
+        return log
+
+    assert len(asyncio.run(run())) == 4
+
+
+def test_deadline_drops_queued_tasks():
+    async def run():
+        log = []
+        dropped = []
+
+        async def on_drop(task):
+            dropped.append(task.key)
+
+        scheduler = BackgroundTaskScheduler(max_concurrency=1, model_concurrency=1)
+        scheduler.submit(make_task("slow", log=log, delay=0.2))
+        scheduler.submit(
+            make_task("title:late", log=log, deadline=0.05, on_drop=on_drop)
+        )
+        await asyncio.sleep(0.1)
+        assert dropped == ["title:late"]
+        assert not scheduler.queued
+        await asyncio.sleep(0.15)
+        await scheduler.stop()
+        return log
+
+    log = asyncio.run(run())
+    assert [keys for event, keys in log if event == "start"] == [["slow"]]
+
+
+def test_batching():
+    async def run():
+        log = []
+        scheduler = BackgroundTaskScheduler(max_concurrency=1, model_concurrency=1)
+        scheduler.submit(make_task("busy", log=log, delay=0.05))
+        for idx in range(5):
+            scheduler.submit(
+                make_task(f"title:{idx}", log=log, batch_key="user", batch_size=3)
+            )
+        scheduler.submit(make_task("title:x", log=log, batch_key="other", batch_size=3))
+        await asyncio.sleep(0.3)
+        await scheduler.stop()
+        return log
+
+    log = asyncio.run(run())
+    assert [keys for event, keys in log if event == "start"] == [
+        ["busy"],
+        ["title:0", "title:1", "title:2"],
+        ["title:3", "title:4"],
+        ["title:x"],
+    ]
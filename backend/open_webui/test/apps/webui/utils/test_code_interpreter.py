@@ -0,0 +1,166 @@
+import asyncio
+import json
+import uuid
+
+import pytest
+from aiohttp import web
+
+from open_webui.utils import code_interpreter
+from open_webui.utils.code_interpreter import JupyterKernelPool
+
+
+class FakeJupyterServer:
+    """
+    Just enough of the Jupyter kernels API: each kernel answers an execute
+    request with its id and how many requests it has run.
+    """
+
+    def __init__(self, fail_channels=False):
+        self.kernels = {}
+        self.deleted = []
+        self.fail_channels = fail_channels
+
+        self.app = web.Application()
+        self.app.router.add_post("/api/kernels", self.start_kernel)
+        self.app.router.add_delete("/api/kernels/{id}", self.delete_kernel)
+        self.app.router.add_post("/api/kernels/{id}/interrupt", self.interrupt)
+        self.app.router.add_get("/api/kernels/{id}/channels", self.channels)
+
+    async def start_kernel(self, request):
+        kernel_id = uuid.uuid4().hex
+        self.kernels[kernel_id] = 0
+        return web.json_response({"id": kernel_id})
+
+    async def delete_kernel(self, request):
+        kernel_id = request.match_info["id"]
+        if self.kernels.pop(kernel_id, None) is None:
+            raise web.HTTPNotFound()
+        self.deleted.append(kernel_id)
+        return web.Response(status=204)
+
+    async def interrupt(self, request):
+        return web.Response(status=204)
+
+    async def channels(self, request):
+        kernel_id = request.match_info["id"]
+        if self.fail_channels or kernel_id not in self.kernels:
+            raise web.HTTPServiceUnavailable()
+
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        async for message in ws:
+            msg_id = json.loads(message.data)["header"]["msg_id"]
+            self.kernels[kernel_id] += 1
+            for msg_type, content in [
+                (
+                    "stream",
+                    {
+                        "name": "stdout",
+                        "text": f"{kernel_id} {self.kernels[kernel_id]}",
+                    },
+                ),
+                ("status", {"execution_state": "idle"}),
+            ]:
+                await ws.send_str(
+                    json.dumps(
+                        {
+                            "msg_type": msg_type,
+                            "parent_header": {"msg_id": msg_id},
+                            "content": content,
+                        }
+                    )
+                )
+        return ws
+
+
+def run_with_server(test, pool_size=0, max_kernels=10, idle_timeout=600, **kwargs):
+    async def run():
+        server = FakeJupyterServer(**kwargs)
+        runner = web.AppRunner(server.app)
+        await runner.setup()
+        site = web.TCPSite(runner, "127.0.0.1", 0)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+
+        pool = JupyterKernelPool(f"http://127.0.0.1:{port}")
+        try:
+            return await test(server, pool)
+        finally:
+            await pool.close()
+            await runner.cleanup()
+
+    with pytest.MonkeyPatch.context() as monkeypatch:
+        monkeypatch.setattr(code_interpreter, "JUPYTER_KERNEL_POOL_SIZE", pool_size)
+        monkeypatch.setattr(
+            code_interpreter, "JUPYTER_KERNEL_POOL_MAX_KERNELS", max_kernels
+        )
+        monkeypatch.setattr(
+            code_interpreter, "JUPYTER_KERNEL_IDLE_TIMEOUT", idle_timeout
+        )
+        return asyncio.run(run())
+
+
+def test_chat_kernel_is_reused():
+    async def test(server, pool):
+        first = await pool.execute("x = 1", chat_id="chat")
+        second = await pool.execute("x", chat_id="chat")
+        other = await pool.execute("x")
+        await asyncio.sleep(0.05)
+        return [*server.deleted], pool.kernel_count, first, second, other
+
+    deleted, kernel_count, first, second, other = run_with_server(test)
+    kernel_id = first.stdout.split()[0]
+    assert (first.stdout, second.stdout) == (f"{kernel_id} 1", f"{kernel_id} 2")
+    # Executions without a chat get their own kernel, shut down afterwards
+    assert other.stdout.split()[0] != kernel_id
+    assert deleted == [other.stdout.split()[0]]
+    assert kernel_count == 1
+
+
+def test_warm_kernel_is_used():
+    async def test(server, pool):
+        await pool.warm_up()
+        warm = pool.idle[0]
+        result = await pool.execute("x", chat_id="chat")
+        return warm, result.stdout
+
+    warm, stdout = run_with_server(test, pool_size=1)
+    assert stdout == f"{warm.id} 1"
+
+
+def test_idle_chat_kernels_are_reaped():
+    async def test(server, pool):
+        await pool.execute("x", chat_id="chat")
+        await asyncio.sleep(0.3)
+        return len(server.deleted), pool.chats == {}, pool.kernel_count
+
+    assert run_with_server(test, idle_timeout=0.1) == (1, True, 0)
+
+
+def test_least_recently_used_kernel_is_evicted():
+    async def test(server, pool):
+        first = await pool.execute("x", chat_id="first")
+        second = await pool.execute("x", chat_id="second")
+        return [*server.deleted], [*server.kernels], [*pool.chats], first, second
+
+    deleted, kernels, chats, first, second = run_with_server(test, max_kernels=1)
+    assert deleted == [first.stdout.split()[0]]
+    assert kernels == [second.stdout.split()[0]]
+    assert chats == ["second"]
+
+
+def test_shutdown_is_idempotent():
+    async def test(server, pool):
+        kernel = await pool.acquire("chat")
+        await asyncio.gather(pool.shutdown_kernel(kernel), pool.shutdown_kernel(kernel))
+        return len(server.deleted), pool.chats == {}, pool.kernel_count
+
+    assert run_with_server(test) == (1, True, 0)
+
+
+def test_failed_warm_up_deletes_kernel():
+    async def test(server, pool):
+        await pool.warm_up()
+        return len(server.kernels), len(server.deleted), pool.idle, pool.kernel_count
+
+    assert run_with_server(test, pool_size=1, fail_channels=True) == (0, 1, [], 0)
@@ -0,0 +1,274 @@
+from contextlib import contextmanager
+
+import numpy as np
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+from open_webui.models import colbert_embeddings
+from open_webui.models.colbert_embeddings import (
+    ColBERTCentroid,
+    ColBERTCentroidModel,
+    ColBERTCodesModel,
+    ColBERTCollectionStats,
+    ColBERTEmbedding,
+)
+from open_webui.retrieval.models import colbert_index
+from open_webui.retrieval.vector.main import GetResult
+from open_webui.retrieval.models.colbert_index import (
+    CollectionIndex,
+    ColBERTIndex,
+    assign_codes,
+    delete_documents,
+    kmeans,
+    maxsim,
+)
+
+DIM = 16
+rng = np.random.default_rng(0)
+
+
+def normalize(x):
+    return x / np.linalg.norm(x, axis=-1, keepdims=True)
+
+
+def random_documents(count, min_tokens=1, max_tokens=40):
+    return [
+        normalize(rng.standard_normal((rng.integers(min_tokens, max_tokens), DIM)))
+        for _ in range(count)
+    ]
+
+
+class FakeColBERTEmbeddings:
+    """In-memory stand-in for the ColBERTEmbeddings table."""
+
+    def __init__(self):
+        self.rows = {}
+        self.centroids = {}
+        self.time = 0
+
+    def insert_embeddings(self, collection_name, model, embeddings):
+        self.time += 1
+        for embedding in embeddings:
+            self.rows[embedding.id] = (collection_name, model, embedding, self.time)
+
+    def collection(self, collection_name, model):
+        return [
+            row[2] for row in self.rows.values() if row[:2] == (collection_name, model)
+        ]
+
+    def get_embeddings_by_ids(self, ids):
+        return [self.rows[id][2] for id in ids if id in self.rows]
+
+    def get_embeddings_by_text_hashes(self, model, text_hashes):
+        return [
+            row[2]
+            for row in self.rows.values()
+            if row[1] == model and row[2].text_hash in text_hashes
+        ]
+
+    def get_embeddings_by_collection(self, collection_name, model, limit=None):
+        return self.collection(collection_name, model)[:limit]
+
+    def get_codes_by_collection(self, collection_name, model):
+        return [
+            ColBERTCodesModel(id=e.id, num_tokens=e.num_tokens, codes=e.codes)
+            for e in sorted(self.collection(collection_name, model), key=lambda e: e.id)
+        ]
+
+    def get_collection_stats(self, collection_name, model):
+        rows = self.collection(collection_name, model)
+        return ColBERTCollectionStats(
+            count=len(rows),
+            num_tokens=sum(e.num_tokens for e in rows),
+            updated_at=self.time,
+        )
+
+    def update_codes(self, codes_by_id):
+        for id, codes in codes_by_id.items():
+            self.rows[id][2].codes = codes
+
+    def get_centroids(self, collection_name, model):
+        return self.centroids.get((collection_name, model))
+
+    def upsert_centroids(self, collection_name, model, num_centroids, data, num_tokens):
+        self.time += 1
+        self.centroids[(collection_name, model)] = ColBERTCentroidModel(
+            num_centroids=num_centroids,
+            data=data,
+            num_tokens=num_tokens,
+            updated_at=self.time,
+        )
+
+
+@pytest.fixture
+def store(monkeypatch):
+    store = FakeColBERTEmbeddings()
+    monkeypatch.setattr(colbert_index, "ColBERTEmbeddings", store)
+    return store
+
+
+def reference_maxsim(query, document):
+    return (document @ query.T).max(axis=0).sum()
+
+
+def test_maxsim():
+    query = normalize(rng.standard_normal((32, DIM)))
+    documents = random_documents(150) + [np.empty((0, DIM))]
+
+    scores = maxsim(query, [d.astype(np.float16) for d in documents])
+    expected = [reference_maxsim(query, d) for d in documents[:-1]] + [0]
+    np.testing.assert_allclose(scores, expected, atol=0.05)
+
+
+def test_kmeans_codes():
+    centers = normalize(rng.standard_normal((8, DIM)))
+    sample = normalize(
+        np.repeat(centers, 100, axis=0) + 0.05 * rng.standard_normal((800, DIM))
+    )
+    centroids = kmeans(sample, 8)
+
+    codes = assign_codes(sample, centroids)
+    assert codes.dtype == np.uint16
+    # Tokens are close to their centroid
+    assert (sample * centroids[codes]).sum(axis=1).mean() > 0.9
+
+
+def test_prefilter_keeps_best_documents():
+    documents = random_documents(500)
+    centroids = kmeans(np.concatenate(documents), 64)
+    index = CollectionIndex(
+        [
+            ColBERTCodesModel(
+                id=str(idx),
+                num_tokens=len(document),
+                codes=assign_codes(document, centroids).tobytes(),
+            )
+            for idx, document in enumerate(documents)
+        ],
+        centroids,
+    )
+
+    # A query made of tokens of one document keeps that document among a
+    # tenth of the collection
+    for target in [7, 123, 321]:
+        query = normalize(documents[target][:8] + 0.01 * rng.standard_normal((8, DIM)))
+        candidates = index.candidates(query, nprobe=2, limit=50)
+        assert len(candidates) == 50
+        assert str(target) in candidates
+
+
+def test_index_stores_and_reuses_embeddings(store, monkeypatch):
+    monkeypatch.setattr(colbert_index, "RAG_COLBERT_MIN_CENTROID_TOKENS", 2000)
+    encoded = []
+    documents = {}
+
+    def encode_documents(texts):
+        encoded.extend(texts)
+        for text in texts:
+            documents.setdefault(text, random_documents(1, 20, 40)[0])
+        return [documents[text] for text in texts]
+
+    index = ColBERTIndex("colbert", encode_documents)
+    texts = [f"chunk {idx}" for idx in range(100)]
+    index.add_documents("kb", [(f"id-{idx}", text) for idx, text in enumerate(texts)])
+    assert len(encoded) == 100
+
+    # Reranking stored chunks does not encode them again
+    embeddings = index.get_document_embeddings(texts[:5] + ["new chunk"])
+    assert encoded[100:] == ["new chunk"]
+    np.testing.assert_allclose(embeddings[0], documents["chunk 0"], atol=1e-3)
+
+    # More than 2000 tokens: the collection has centroids and codes
+    assert store.get_centroids("kb", "colbert") is not None
+    assert all(row.codes for row in store.get_codes_by_collection("kb", "colbert"))
+
+    query = documents["chunk 42"][:8]
+    results = index.search("kb", query, 5)
+    assert results[0][0] == "id-42"
+    assert [score for _, score in results] == sorted(
+        [score for _, score in results], reverse=True
+    )
+
+
+def test_search_small_collection(store):
+    documents = random_documents(10)
+    index = ColBERTIndex("colbert", lambda texts: [documents[int(t)] for t in texts])
+    index.add_documents("kb", [(f"id-{idx}", str(idx)) for idx in range(10)])
+
+    assert store.get_centroids("kb", "colbert") is None
+    assert index.search("kb", documents[3], 1)[0][0] == "id-3"
+
+
+class FakeVectorDB:
+    def __init__(self, metadatas):
+        self.metadatas = metadatas
+
+    def matches(self, filter):
+        return [
+            id
+            for id, metadata in self.metadatas.items()
+            if all(metadata.get(key) == value for key, value in filter.items())
+        ]
+
+    def query(self, collection_name, filter, limit=None):
+        return GetResult(ids=[self.matches(filter)], documents=[[]], metadatas=[[]])
+
+    def delete(self, collection_name, ids=None, filter=None):
+        for id in self.matches(filter):
+            del self.metadatas[id]
+
+
+@pytest.fixture
+def vector_db(tmp_path, monkeypatch):
+    engine = create_engine(f"sqlite:///{tmp_path / 'colbert.db'}")
+    ColBERTEmbedding.__table__.create(engine)
+    ColBERTCentroid.__table__.create(engine)
+    Session = sessionmaker(bind=engine)
+
+    @contextmanager
+    def get_db():
+        session = Session()
+        try:
+            yield session
+        finally:
+            session.close()
+
+    monkeypatch.setattr(colbert_embeddings, "get_db", get_db)
+    monkeypatch.setattr(colbert_index, "RAG_COLBERT_MIN_CENTROID_TOKENS", 100)
+    documents = random_documents(12, 20, 40)
+    index = ColBERTIndex("colbert", lambda texts: [documents[int(t)] for t in texts])
+    index.add_documents("kb", [(f"id-{idx}", str(idx)) for idx in range(12)])
+    return FakeVectorDB(
+        {
+            f"id-{idx}": {"file_id": f"file-{idx % 3}", "hash": f"hash-{idx % 3}"}
+            for idx in range(12)
+        }
+    )
+
+
+def stored_ids():
+    return {
+        row.id
+        for row in colbert_embeddings.ColBERTEmbeddings.get_codes_by_collection(
+            "kb", "colbert"
+        )
+    }
+
+
+# Removing a file from a knowledge base, and deleting by hash
+@pytest.mark.parametrize("filter", [{"file_id": "file-1"}, {"hash": "hash-1"}])
+def test_delete_documents_deletes_embeddings(vector_db, filter):
+    delete_documents(vector_db, "kb", filter)
+    remaining = {f"id-{idx}" for idx in range(12) if idx % 3 != 1}
+    assert set(vector_db.metadatas) == remaining
+    assert stored_ids() == remaining
+
+
+# Resetting the vector DB
+def test_delete_all_embeddings(vector_db):
+    store = colbert_embeddings.ColBERTEmbeddings
+    assert store.get_centroids("kb", "colbert") is not None
+    store.delete_all()
+    assert stored_ids() == set()
+    assert store.get_centroids("kb", "colbert") is None
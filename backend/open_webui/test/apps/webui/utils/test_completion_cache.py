@@ -0,0 +1,120 @@
+import asyncio
+
+from open_webui.utils import completion_cache
+from open_webui.utils.completion_cache import (
+    CompletionCache,
+    CompletionRecorder,
+    completion_from_response,
+    completion_to_chunks,
+    completion_to_response,
+    get_cache_key,
+)
+from open_webui.utils.stream import encode_sse
+
+COMPLETION = {
+    "model": "gpt-4o",
+    "content": "Paris " * 100,
+    "reasoning_content": "The capital of France.",
+    "tool_calls": [
+        {
+            "id": "call_1",
+            "type": "function",
+            "function": {"name": "search", "arguments": '{"q": "Paris"}'},
+        }
+    ],
+    "finish_reason": "tool_calls",
+    "usage": {"prompt_tokens": 10, "completion_tokens": 200, "total_tokens": 210},
+}
+
+
+def get_cache(**kwargs) -> CompletionCache:
+    return CompletionCache(
+        **{"ttl": 60, "max_size": 10, "max_entry_size": 64 * 1024, **kwargs}
+    )
+
+
+async def lines(chunks):
+    for chunk in chunks:
+        yield encode_sse(chunk)
+    yield b"data: [DONE]\n\n"
+
+
+def test_cache_key():
+    payload = {
+        "model": "gpt-4o",
+        "messages": [{"role": "user", "content": "Hi"}],
+        "temperature": 0,
+    }
+    key = get_cache_key("https://api", payload)
+
+    assert key == get_cache_key("https://api", dict(reversed(payload.items())))
+    assert key == get_cache_key("https://api", {**payload, "stream": True})
+    assert key != get_cache_key("https://other", payload)
+    assert key != get_cache_key("https://api", {**payload, "tools": []})
+    assert key != get_cache_key(
+        "https://api", {**payload, "messages": [{"role": "user", "content": "Hey"}]}
+    )
+
+
+def test_stream_round_trip():
+    recorder = CompletionRecorder()
+    for chunk in completion_to_chunks(COMPLETION, "gpt-4o"):
+        recorder.feed(chunk)
+    assert recorder.completion() == COMPLETION
+
+    response = completion_to_response(COMPLETION, "gpt-4o")
+    assert completion_from_response(response) == COMPLETION
+
+
+def test_incomplete_stream_is_not_recorded():
+    recorder = CompletionRecorder()
+    for chunk in completion_to_chunks(COMPLETION, "gpt-4o")[:-2]:
+        recorder.feed(chunk)
+    assert recorder.completion() is None
+
+
+def test_memory_lru_and_ttl(monkeypatch):
+    async def run():
+        cache = get_cache(max_size=2)
+        await cache.set("a", "m", COMPLETION)
+        await cache.set("b", "m", COMPLETION)
+        assert await cache.get("a", "m") == COMPLETION
+
+        # "b" is least recently used
+        await cache.set("c", "m", COMPLETION)
+        assert await cache.get("b", "m") is None
+        assert await cache.get("a", "m") == COMPLETION
+
+        now = completion_cache.time.time()
+        monkeypatch.setattr(completion_cache.time, "time", lambda: now + 61)
+        assert await cache.get("a", "m") is None
+
+    asyncio.run(run())
+
+
+def test_max_entry_size():
+    async def run():
+        cache = get_cache(max_entry_size=100)
+        await cache.set("a", "m", COMPLETION)
+        assert await cache.get("a", "m") is None
+
+    asyncio.run(run())
+
+
+def test_record_stream():
+    async def run():
+        cache = get_cache()
+        chunks = completion_to_chunks(COMPLETION, "gpt-4o")
+
+        passed = [line async for line in cache.record_stream("a", "m", lines(chunks))]
+        assert passed == [line async for line in lines(chunks)]
+        assert await cache.get("a", "m") == COMPLETION
+
+        # A stream cut short is passed through but not cached
+        passed = [
+            line async for line in cache.record_stream("b", "m", lines(chunks[:3]))
+        ]
+        assert len(passed) == 4
+        assert await cache.get("b", "m") is None
+
+    asyncio.run(run())
@@ -0,0 +1,150 @@
+import json
+import os
+import random
+import time
+
+from open_webui.utils.content_blocks import (
+    ChatContentStream,
+    ContentBlockSerializer,
+    common_prefix_length,
+    serialize_content_blocks,
+)
+
+
+def stream_blocks(tokens: int, seed: int = 0):
+    """
+    Simulate the content blocks of a streaming answer: a reasoning block, a
+    tool call, then text, the way `process_chat_response` builds them.
+    Yields the block list after every token.
+    """
+    rng = random.Random(seed)
+    words = ["alpha", "beta", "gamma", "> quoted", "`code`", "\n", "\r\n", "\n\n"]
+
+    reasoning = {
+        "type": "reasoning",
+        "start_tag": "think",
+        "end_tag": "/think",
+        "attributes": {"type": "reasoning_content"},
+        "content": "",
+        "started_at": time.time(),
+    }
+    content_blocks = [{"type": "text", "content": ""}, reasoning]
+
+    for _ in range(tokens // 2):
+        reasoning["content"] += f" {rng.choice(words)}"
+        yield content_blocks
+
+    reasoning["duration"] = 3
+    content_blocks.append(
+        {
+            "type": "tool_calls",
+            "content": [
+                {
+                    "id": "call_1",
+                    "function": {"name": "search", "arguments": '{"q": "x"}'},
+                }
+            ],
+        }
+    )
+    yield content_blocks
+
+    content_blocks[-1]["results"] = [{"tool_call_id": "call_1", "content": "found"}]
+    content_blocks.append({"type": "text", "content": ""})
+    yield content_blocks
+
+    for _ in range(tokens - tokens // 2):
+        content_blocks[-1]["content"] += f" {rng.choice(words)}"
+        yield content_blocks
+
+
+def test_common_prefix_length():
+    assert common_prefix_length("", "abc") == 0
+    assert common_prefix_length("abc", "abcdef") == 3
+    assert common_prefix_length("abcdef", "abc") == 3
+    assert common_prefix_length("abxdef", "abydef") == 2
+    assert common_prefix_length("xbc", "abc") == 0
+
+    rng = random.Random(1)
+    for _ in range(200):
+        a = "".join(rng.choice("ab") for _ in range(rng.randint(0, 40)))
+        b = "".join(rng.choice("ab") for _ in range(rng.randint(0, 40)))
+        expected = 0
+        while expected < min(len(a), len(b)) and a[expected] == b[expected]:
+            expected += 1
+        assert common_prefix_length(a, b) == expected
+
+
+def test_serializer_matches_full_serialization():
+    serializer = ContentBlockSerializer()
+    for content_blocks in stream_blocks(2000):
+        assert serializer.serialize(content_blocks) == serialize_content_blocks(
+            content_blocks
+        )
+
+
+def apply_delta(client: str, delta: dict) -> str:
+    """`applyContentStream` in Chat.svelte, which slices UTF-16 code units."""
+    units = client.encode("utf-16-le")
+    assert delta["offset"] <= len(units) // 2
+    return units[: 2 * delta["offset"]].decode("utf-16-le") + delta["content"]
+
+
+def test_client_reconstructs_content():
+    stream = ChatContentStream(snapshot_interval=60)
+    client = None
+    seq = 0
+
+    for idx, content_blocks in enumerate(stream_blocks(2000)):
+        data = stream.event(content_blocks)
+        assert data["seq"] == seq + 1
+        seq = data["seq"]
+
+        if idx == 0:
+            assert "content" in data
+        if "content" in data:
+            client = data["content"]
+        else:
+            client = apply_delta(client, data["delta"])
+
+        assert client == serialize_content_blocks(content_blocks)
+
+    data = stream.event(content_blocks, snapshot=True)
+    assert data["content"] == client
+
+
+def test_offsets_count_utf16_code_units():
+    stream = ChatContentStream(snapshot_interval=60)
+    client = stream.update("😀 a")["content"]
+    for content in ["😀 ab", "😀 abc", "😀 a𝄞", "😀 a𝄞 é"]:
+        client = apply_delta(client, stream.update(content)["delta"])
+        assert client == content
+
+    assert stream.update("😀 a𝄞 éx")["delta"] == {"offset": 8, "content": "x"}
+
+
+def test_snapshot_interval():
+    stream = ChatContentStream(snapshot_interval=0)
+    for content_blocks in stream_blocks(20):
+        assert "content" in stream.event(content_blocks)
+
+
+def test_stream_bytes():
+    """
+    Bytes sent for one streamed answer, full content per event against
+    deltas. Set CHAT_STREAM_BENCHMARK_TOKENS to change the answer length
+    (10k tokens by default).
+    """
+    tokens = int(os.environ.get("CHAT_STREAM_BENCHMARK_TOKENS", 10000))
+
+    full_bytes = 0
+    for content_blocks in stream_blocks(tokens):
+        full_bytes += len(
+            json.dumps({"content": serialize_content_blocks(content_blocks)})
+        )
+
+    stream = ChatContentStream()
+    delta_bytes = 0
+    for content_blocks in stream_blocks(tokens):
+        delta_bytes += len(json.dumps(stream.event(content_blocks)))
+
+    assert delta_bytes * 10 < full_bytes
@@ -0,0 +1,65 @@
+import pytest
+
+from open_webui.utils.importtime import (
+    IMPORT_TIME_BUDGET,
+    find_imports,
+    get_package_times,
+    parse_importtime,
+    profile_imports,
+)
+
+OUTPUT = """\
+import time: self [us] | cumulative | imported package
+import time:       200 |        200 |   _io
+import time:       300 |        500 | _frozen_importlib_external
+import time:      4000 |       4000 |         torch._C
+import time:     90000 |      94000 |       torch
+import time:      1000 |      95000 |     sentence_transformers
+import time:      2000 |      97000 |   open_webui.routers.retrieval
+import time:       500 |        500 |   open_webui.env
+import time:       100 |      97600 | open_webui.main
+some log line printed while importing
+"""
+
+
+def test_parse_importtime():
+    entries = parse_importtime(OUTPUT)
+    assert [entry.name for entry in entries] == [
+        "_frozen_importlib_external",
+        "open_webui.main",
+    ]
+    main = entries[1]
+    assert [child.name for child in main.children] == [
+        "open_webui.routers.retrieval",
+        "open_webui.env",
+    ]
+    assert main.children[0].children[0].children[0].name == "torch"
+    assert sum(entry.cumulative_us for entry in entries) == 98100
+
+
+def test_package_times_and_deferred_imports():
+    entries = parse_importtime(OUTPUT)
+    packages = get_package_times(entries)
+    assert packages[0] == ("torch", 0.094)
+    assert dict(packages)["open_webui"] == pytest.approx(0.0026)
+
+    assert find_imports(entries, ["torch", "boto3"]) == {
+        "torch": [
+            "open_webui.main",
+            "open_webui.routers.retrieval",
+            "sentence_transformers",
+            "torch",
+        ]
+    }
+
+
+def test_main_import_budget():
+    try:
+        report = profile_imports("open_webui.main")
+    except ModuleNotFoundError as e:
+        # Only a dependency missing from this environment skips the check,
+        # any other import error fails it
+        pytest.importorskip(e.name)
+        raise
+
+    assert not report.exceeds(IMPORT_TIME_BUDGET), report.format(IMPORT_TIME_BUDGET)
@@ -0,0 +1,88 @@
+import asyncio
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pytest
+
+from open_webui.retrieval.models.sidecar import (
+    InferenceServer,
+    InferenceSidecar,
+    SidecarEmbeddingModel,
+    SidecarReranker,
+)
+
+
+class FakeEmbeddingModel:
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, texts, prompt=None):
+        self.batches.append(len(texts))
+        time.sleep(0.01)
+        return np.array(
+            [[len(text), len(prompt or "")] for text in texts], dtype=np.float32
+        )
+
+
+class FakeCrossEncoder:
+    def predict(self, pairs):
+        if any(not doc for _, doc in pairs):
+            raise ValueError("empty document")
+        return np.array([len(doc) for _, doc in pairs], dtype=np.float32)
+
+
+@pytest.fixture
+def sidecar(tmp_path):
+    server = InferenceServer(max_batch_size=8, batch_wait=0.02)
+    models = {"embedding": FakeEmbeddingModel(), "cross_encoder": FakeCrossEncoder()}
+    server.load_model = lambda kind, name, trust_remote_code: models[kind]
+
+    path = str(tmp_path / "inference.sock")
+    loop = asyncio.new_event_loop()
+    thread = threading.Thread(
+        target=loop.run_until_complete, args=(server.serve(path),), daemon=True
+    )
+    thread.start()
+
+    client = InferenceSidecar(path, timeout=5)
+    # Keep the client from starting a real sidecar process
+    client.start = lambda: time.sleep(0.1)
+    yield client, models
+    client.close_connection()
+
+
+def test_encode(sidecar):
+    client, models = sidecar
+    model = SidecarEmbeddingModel("fake", sidecar=client)
+
+    assert model.encode("abc").tolist() == [3, 0]
+    assert model.encode(["a", "ab"], prompt="query: ").tolist() == [[1, 7], [2, 7]]
+    assert model.encode([]).shape == (0,)
+
+
+def test_encode_batches_concurrent_requests(sidecar):
+    client, models = sidecar
+    model = SidecarEmbeddingModel("fake", sidecar=client)
+
+    texts = ["x" * i for i in range(32)]
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(model.encode, texts))
+
+    assert [result.tolist() for result in results] == [[i, 0] for i in range(32)]
+    batches = models["embedding"].batches
+    assert sum(batches) == 32
+    assert max(batches) <= 8
+    assert len(batches) < 32
+
+
+def test_rerank(sidecar):
+    client, _ = sidecar
+    reranker = SidecarReranker("fake", sidecar=client)
+
+    assert reranker.predict([("q", "a"), ("q", "abc")]).tolist() == [1, 3]
+    with pytest.raises(Exception, match="empty document"):
+        reranker.predict([("q", "")])
+    # The connection stays usable after an error
+    assert reranker.predict([("q", "ab")]).tolist() == [2]
@@ -0,0 +1,279 @@
+import json
+import os
+import time
+
+import numpy as np
+import pytest
+
+onnx = pytest.importorskip("onnx")
+pytest.importorskip("onnxruntime")
+pytest.importorskip("transformers")
+
+from onnx import TensorProto, helper, numpy_helper
+from tokenizers import Tokenizer, models, pre_tokenizers, processors
+from transformers import PreTrainedTokenizerFast
+
+from open_webui.retrieval.models import onnx_engine
+from open_webui.retrieval.models.onnx_engine import (
+    OnnxCrossEncoder,
+    OnnxEmbeddingModel,
+)
+
+WORDS = ["the", "cat", "sat", "on", "mat", "dog", "ran", "in", "park", "a"]
+HIDDEN_SIZE = 32
+
+rng = np.random.default_rng(0)
+VOCAB = {"[PAD]": 0, "[UNK]": 1, "[CLS]": 2, "[SEP]": 3}
+VOCAB.update({word: idx + 4 for idx, word in enumerate(WORDS)})
+EMBEDDINGS = rng.standard_normal((len(VOCAB), HIDDEN_SIZE)).astype(np.float32)
+WEIGHTS = rng.standard_normal((HIDDEN_SIZE, HIDDEN_SIZE)).astype(np.float32)
+HEAD = rng.standard_normal((HIDDEN_SIZE, 1)).astype(np.float32)
+
+TEXTS = ["the cat sat on the mat", "a dog", "the dog ran in the park", "cat"]
+
+
+def save_tokenizer(path):
+    tokenizer = Tokenizer(models.WordLevel(VOCAB, unk_token="[UNK]"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    tokenizer.post_processor = processors.TemplateProcessing(
+        single="[CLS] $A [SEP]",
+        pair="[CLS] $A [SEP] $B:1 [SEP]:1",
+        special_tokens=[("[CLS]", 2), ("[SEP]", 3)],
+    )
+    PreTrainedTokenizerFast(
+        tokenizer_object=tokenizer,
+        unk_token="[UNK]",
+        pad_token="[PAD]",
+        cls_token="[CLS]",
+        sep_token="[SEP]",
+        model_max_length=64,
+    ).save_pretrained(path)
+
+
+def token_embeddings(input_ids, attention_mask):
+    return (EMBEDDINGS[input_ids] @ WEIGHTS) * attention_mask[..., None]
+
+
+def save_graph(path, nodes, output_name, output_shape, initializers):
+    graph = helper.make_graph(
+        nodes,
+        "model",
+        [
+            helper.make_tensor_value_info(name, TensorProto.INT64, ["batch", "seq"])
+            for name in ["input_ids", "attention_mask"]
+        ],
+        [helper.make_tensor_value_info(output_name, TensorProto.FLOAT, output_shape)],
+        [numpy_helper.from_array(value, name) for name, value in initializers.items()],
+    )
+    model = helper.make_model(graph, opset_imports=[helper.make_opsetid("", 17)])
+    model.ir_version = 8
+    onnx.save(model, str(path / "onnx" / "model.onnx"))
+
+
+def transformer_nodes(output):
+    return [
+        helper.make_node("Gather", ["embeddings", "input_ids"], ["tokens"]),
+        helper.make_node("MatMul", ["tokens", "weights"], ["hidden"]),
+        helper.make_node("Cast", ["attention_mask"], ["mask"], to=TensorProto.FLOAT),
+        helper.make_node("Unsqueeze", ["mask", "axis"], ["mask_3d"]),
+        helper.make_node("Mul", ["hidden", "mask_3d"], [output]),
+    ]
+
+
+@pytest.fixture
+def embedding_model_path(tmp_path):
+    (tmp_path / "onnx").mkdir()
+    (tmp_path / "1_Pooling").mkdir()
+    save_tokenizer(tmp_path)
+    save_graph(
+        tmp_path,
+        transformer_nodes("last_hidden_state"),
+        "last_hidden_state",
+        ["batch", "seq", HIDDEN_SIZE],
+        {
+            "embeddings": EMBEDDINGS,
+            "weights": WEIGHTS,
+            "axis": np.array([2], dtype=np.int64),
+        },
+    )
+    modules = [
+        {"idx": 0, "path": "", "type": "sentence_transformers.models.Transformer"},
+        {"idx": 1, "path": "1_Pooling", "type": "sentence_transformers.models.Pooling"},
+        {
+            "idx": 2,
+            "path": "2_Normalize",
+            "type": "sentence_transformers.models.Normalize",
+        },
+    ]
+    (tmp_path / "modules.json").write_text(json.dumps(modules))
+    (tmp_path / "1_Pooling" / "config.json").write_text(
+        json.dumps({"pooling_mode_mean_tokens": True})
+    )
+    return str(tmp_path)
+
+
+@pytest.fixture
+def cross_encoder_path(tmp_path):
+    (tmp_path / "onnx").mkdir()
+    save_tokenizer(tmp_path)
+    save_graph(
+        tmp_path,
+        transformer_nodes("masked")
+        + [
+            helper.make_node(
+                "ReduceSum", ["masked", "seq_axis"], ["pooled"], keepdims=0
+            ),
+            helper.make_node("MatMul", ["pooled", "head"], ["logits"]),
+        ],
+        "logits",
+        ["batch", 1],
+        {
+            "embeddings": EMBEDDINGS,
+            "weights": WEIGHTS,
+            "head": HEAD,
+            "axis": np.array([2], dtype=np.int64),
+            "seq_axis": np.array([1], dtype=np.int64),
+        },
+    )
+    (tmp_path / "config.json").write_text(json.dumps({"id2label": {"0": "LABEL_0"}}))
+    return str(tmp_path)
+
+
+@pytest.fixture(autouse=True)
+def onnx_cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(onnx_engine, "ONNX_CACHE_DIR", tmp_path / "cache")
+
+
+def expected_embeddings(path, texts):
+    tokenizer = PreTrainedTokenizerFast.from_pretrained(path)
+    features = tokenizer(texts, padding=True, return_tensors="np")
+    mask = features["attention_mask"]
+    hidden = token_embeddings(features["input_ids"], mask)
+    embeddings = hidden.sum(axis=1) / mask.sum(axis=1, keepdims=True)
+    return embeddings / np.linalg.norm(embeddings, axis=1, keepdims=True)
+
+
+def cosine(a, b):
+    return (a * b).sum(axis=-1) / (
+        np.linalg.norm(a, axis=-1) * np.linalg.norm(b, axis=-1)
+    )
+
+
+def test_embedding_model(embedding_model_path):
+    model = OnnxEmbeddingModel(embedding_model_path, quantize=False)
+    expected = expected_embeddings(embedding_model_path, TEXTS)
+
+    # Batches of one and of all inputs give the same results in input order
+    np.testing.assert_allclose(model.encode(TEXTS, batch_size=1), expected, atol=1e-5)
+    np.testing.assert_allclose(model.encode(TEXTS, batch_size=3), expected, atol=1e-5)
+    np.testing.assert_allclose(model.encode(TEXTS[0]), expected[0], atol=1e-5)
+    np.testing.assert_allclose(
+        model.encode(["mat"], prompt="the cat sat on the "), expected[:1], atol=1e-5
+    )
+    assert model.encode([]).shape == (0,)
+
+
+def test_quantized_embedding_model(embedding_model_path, tmp_path):
+    model = OnnxEmbeddingModel(embedding_model_path)
+    assert (tmp_path / "cache").exists()
+
+    expected = expected_embeddings(embedding_model_path, TEXTS)
+    assert cosine(model.encode(TEXTS), expected).min() > 0.99
+
+
+def test_unsupported_modules(embedding_model_path):
+    modules = json.loads(
+        open(os.path.join(embedding_model_path, "modules.json")).read()
+    )
+    modules.append(
+        {"idx": 3, "path": "3_Dense", "type": "sentence_transformers.models.Dense"}
+    )
+    with open(os.path.join(embedding_model_path, "modules.json"), "w") as f:
+        json.dump(modules, f)
+
+    with pytest.raises(ValueError):
+        OnnxEmbeddingModel(embedding_model_path)
+
+
+def test_cross_encoder(cross_encoder_path):
+    model = OnnxCrossEncoder(cross_encoder_path, quantize=False)
+    pairs = [("the cat", text) for text in TEXTS]
+
+    tokenizer = PreTrainedTokenizerFast.from_pretrained(cross_encoder_path)
+    features = tokenizer(
+        [query for query, _ in pairs],
+        [doc for _, doc in pairs],
+        padding=True,
+        return_tensors="np",
+    )
+    logits = (
+        token_embeddings(features["input_ids"], features["attention_mask"]).sum(axis=1)
+        @ HEAD
+    )[:, 0]
+
+    np.testing.assert_allclose(
+        model.predict(pairs, batch_size=2), 1 / (1 + np.exp(-logits)), rtol=1e-4
+    )
+
+
+def test_onnx_benchmark():
+    """
+    Throughput and accuracy of the ONNX Runtime engine against PyTorch for
+    a real embedding model and reranker. Needs sentence-transformers and the
+    models in the Hugging Face cache (or network access); set
+    RAG_ONNX_BENCHMARK_EMBEDDING_MODEL / RAG_ONNX_BENCHMARK_RERANKING_MODEL to
+    compare other models.
+    """
+    sentence_transformers = pytest.importorskip("sentence_transformers")
+    from huggingface_hub import snapshot_download
+
+    embedding_model = os.environ.get(
+        "RAG_ONNX_BENCHMARK_EMBEDDING_MODEL", "sentence-transformers/all-MiniLM-L6-v2"
+    )
+    reranking_model = os.environ.get(
+        "RAG_ONNX_BENCHMARK_RERANKING_MODEL", "cross-encoder/ms-marco-MiniLM-L-6-v2"
+    )
+    try:
+        embedding_path = snapshot_download(embedding_model)
+        reranking_path = snapshot_download(reranking_model)
+    except Exception as e:
+        pytest.skip(f"Benchmark models unavailable: {e}")
+
+    words = "retrieval augmented generation splits documents into chunks and ranks them".split()
+    texts = [" ".join(rng.choice(words, size=rng.integers(8, 64))) for _ in range(256)]
+    pairs = [("how are documents ranked", text) for text in texts]
+
+    def throughput(func, inputs):
+        func(inputs[:8])
+        start = time.perf_counter()
+        result = func(inputs)
+        return result, len(inputs) / (time.perf_counter() - start)
+
+    torch_model = sentence_transformers.SentenceTransformer(
+        embedding_path, device="cpu"
+    )
+    torch_embeddings, torch_rate = throughput(torch_model.encode, texts)
+    onnx_embeddings, onnx_rate = throughput(
+        OnnxEmbeddingModel(embedding_path).encode, texts
+    )
+    similarity = cosine(torch_embeddings, onnx_embeddings)
+
+    torch_reranker = sentence_transformers.CrossEncoder(reranking_path, device="cpu")
+    torch_scores, torch_rerank_rate = throughput(torch_reranker.predict, pairs)
+    onnx_scores, onnx_rerank_rate = throughput(
+        OnnxCrossEncoder(reranking_path).predict, pairs
+    )
+    top = 10
+    overlap = len(
+        set(np.argsort(-torch_scores)[:top]) & set(np.argsort(-onnx_scores)[:top])
+    )
+
+    print(
+        f"\nembedding {embedding_model}: torch {torch_rate:.0f}/s, "
+        f"onnx int8 {onnx_rate:.0f}/s, cosine to torch "
+        f"mean {similarity.mean():.4f} min {similarity.min():.4f}"
+        f"\nreranking {reranking_model}: torch {torch_rerank_rate:.0f}/s, "
+        f"onnx int8 {onnx_rerank_rate:.0f}/s, max score delta "
+        f"{np.abs(torch_scores - onnx_scores).max():.4f}, top-{top} overlap {overlap}/{top}"
+    )
+    assert similarity.min() > 0.95
@@ -0,0 +1,144 @@
+import asyncio
+import json
+import os
+import time
+
+import pytest
+
+from open_webui.utils.response import convert_streaming_response_ollama_to_openai
+from open_webui.utils.stream import (
+    BATCH_MAX_FRAMES,
+    batch_frames,
+    encode_sse,
+    encode_sse_stream,
+    parse_chunk,
+)
+
+
+class OllamaResponse:
+    def __init__(self, chunks: int):
+        self.chunks = chunks
+
+    @property
+    def body_iterator(self):
+        return self.iterate()
+
+    async def iterate(self):
+        for idx in range(self.chunks):
+            yield json.dumps(
+                {
+                    "model": "llama3",
+                    "created_at": "2025-01-01T00:00:00Z",
+                    "message": {"role": "assistant", "content": f" token{idx}"},
+                    "done": False,
+                }
+            ).encode("utf-8")
+
+
+async def items(values, delay: float = 0):
+    for value in values:
+        if delay:
+            await asyncio.sleep(delay)
+        yield value
+
+
+def test_parse_chunk():
+    chunk = {"choices": []}
+    assert parse_chunk(chunk) is chunk
+    assert parse_chunk(b'data: {"a": 1}\n') == {"a": 1}
+    assert parse_chunk('data:{"a": 1}') == {"a": 1}
+    assert parse_chunk(b"data: [DONE]") is None
+    assert parse_chunk(": keep-alive") is None
+    assert parse_chunk(b"\n") is None
+    with pytest.raises(ValueError):
+        parse_chunk("data: {")
+
+
+def test_encode_sse():
+    assert encode_sse({"a": "é"}) == 'data: {"a":"é"}\n\n'.encode("utf-8")
+    assert encode_sse("data: [DONE]\n\n") == b"data: [DONE]\n\n"
+    assert encode_sse({1: "x"}) == b'data: {"1": "x"}\n\n'
+
+
+def test_batch_frames():
+    async def run():
+        # Without a window every item is its own batch
+        assert [b async for b in batch_frames(items(range(3)), 0)] == [[0], [1], [2]]
+
+        # A burst is collected into a few batches
+        batches = [b async for b in batch_frames(items(range(100)), 0.05)]
+        assert [i for b in batches for i in b] == list(range(100))
+        assert len(batches) <= 4
+
+        # Items far apart are not held back
+        start = time.monotonic()
+        batches = [b async for b in batch_frames(items(range(3), 0.1), 0.02)]
+        assert batches == [[0], [1], [2]]
+        assert time.monotonic() - start < 0.5
+
+    asyncio.run(run())
+
+
+def test_batch_frames_error():
+    async def failing():
+        yield 1
+        raise RuntimeError("upstream closed")
+
+    async def run():
+        received = []
+        with pytest.raises(RuntimeError):
+            async for batch in batch_frames(failing(), 0.05):
+                received.extend(batch)
+        assert received == [1]
+
+    asyncio.run(run())
+
+
+def test_ollama_stream_yields_parsed_chunks():
+    async def run():
+        chunks = [
+            c
+            async for c in convert_streaming_response_ollama_to_openai(
+                OllamaResponse(3)
+            )
+        ]
+        assert chunks[-1] == "data: [DONE]\n\n"
+        assert [c["choices"][0]["delta"]["content"] for c in chunks[:-1]] == [
+            " token0",
+            " token1",
+            " token2",
+        ]
+
+        body = b"".join([b async for b in encode_sse_stream(items(chunks), 0.05)])
+        frames = [f for f in body.split(b"\n\n") if f]
+        assert len(frames) == 4
+        assert parse_chunk(frames[0]) == chunks[0]
+
+    asyncio.run(run())
+
+
+def test_stream_frames_and_bytes():
+    """
+    Frames and bytes for an Ollama stream sent through the chat middleware:
+    every chunk becomes exactly one frame and a burst goes out in a few
+    writes of at most BATCH_MAX_FRAMES frames. Set STREAM_BENCHMARK_CHUNKS
+    to change the stream length.
+    """
+    chunks = int(os.environ.get("STREAM_BENCHMARK_CHUNKS", 1000))
+
+    async def run():
+        parsed = [
+            c
+            async for c in convert_streaming_response_ollama_to_openai(
+                OllamaResponse(chunks)
+            )
+        ]
+        writes = [w async for w in encode_sse_stream(items(parsed), 0.05)]
+        return parsed, writes
+
+    parsed, writes = asyncio.run(run())
+    frames = [f for w in writes for f in w.split(b"\n\n") if f]
+    assert len(frames) == chunks + 1
+    assert sum(map(len, writes)) == sum(len(encode_sse(c)) for c in parsed)
+    assert all(w.count(b"\n\n") <= BATCH_MAX_FRAMES for w in writes)
+    assert len(writes) * 10 < len(frames)
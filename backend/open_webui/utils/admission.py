@@ -0,0 +1,482 @@
+import asyncio
+import logging
+import math
+import time
+import weakref
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from typing import Optional
+
+from fastapi import Request
+
+from open_webui.env import (
+    ADMISSION_INITIAL_CONCURRENCY,
+    ADMISSION_LATENCY_TOLERANCE,
+    ADMISSION_MAX_CONCURRENCY,
+    ADMISSION_MAX_QUEUE,
+    ADMISSION_MAX_WAIT,
+    ADMISSION_MIN_CONCURRENCY,
+    ADMISSION_MODEL_BURST,
+    ADMISSION_MODEL_RATE_LIMIT,
+    ADMISSION_USER_BURST,
+    ADMISSION_USER_RATE_LIMIT,
+    ENABLE_ADMISSION_CONTROL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.redis import get_async_redis_connection, get_sentinels_from_env
+from open_webui.utils.telemetry.metrics import (
+    ADMISSION_ACTIVE,
+    ADMISSION_LIMIT,
+    ADMISSION_QUEUE_DEPTH,
+    ADMISSION_REJECTED,
+    ADMISSION_WAIT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+RATE_LIMIT_KEY_PREFIX = "open-webui:rate-limit:"
+
+# Lower is served first
+PRIORITY_INTERACTIVE = 0
+PRIORITY_API = 1
+PRIORITY_BACKGROUND = 2
+PRIORITY_NAMES = ["interactive", "api", "background"]
+
+# Upstream latencies below this are too noisy to shrink the limit for
+LATENCY_FLOOR = 0.25
+
+# Weight of a latency sample in the moving average baseline
+BASELINE_WEIGHT = 0.05
+
+# Latency samples of a model before slow ones shrink the limit
+BASELINE_MIN_SAMPLES = 10
+
+# Refills the bucket for the time since its last update, then takes a token.
+# Returns 0, or the seconds until a token is available. Uses the server clock
+# so that replicas with skewed clocks share one bucket.
+TOKEN_BUCKET_SCRIPT = """
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'updated')
+local tokens = tonumber(bucket[1]) or burst
+local updated = tonumber(bucket[2]) or now
+tokens = math.min(burst, tokens + math.max(now - updated, 0) * rate)
+local wait = 0
+if tokens >= 1 then
+    tokens = tokens - 1
+else
+    wait = (1 - tokens) / rate
+end
+redis.call('HSET', KEYS[1], 'tokens', tostring(tokens), 'updated', tostring(now))
+redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 1)
+return tostring(wait)
+"""
+
+
+class AdmissionRejected(Exception):
+    def __init__(self, reason: str, retry_after: float):
+        super().__init__(f"Too many requests ({reason})")
+        self.reason = reason
+        self.retry_after = retry_after
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(math.ceil(self.retry_after), 1))}
+
+
+def get_request_priority(request: Request) -> int:
+    """Requests authenticated with an API key rank below the web UI."""
+    authorization = request.headers.get("Authorization", "")
+    token = authorization.split(" ", 1)[-1] if authorization else ""
+    if not token:
+        token = request.cookies.get("token", "")
+    return PRIORITY_API if token.startswith("sk-") else PRIORITY_INTERACTIVE
+
+
+def is_overload_error(error) -> bool:
+    """Whether an exception, or an error response, means upstream is overloaded."""
+    if isinstance(error, (asyncio.TimeoutError, TimeoutError)):
+        return True
+    status_code = getattr(error, "status_code", None)
+    return status_code == 429 or (status_code is not None and status_code >= 500)
+
+
+class TokenBuckets:
+    """
+    Token buckets kept in Redis so every replica draws from the same bucket,
+    and in process when Redis is not configured or unreachable.
+    """
+
+    # In-process buckets are pruned once there are more than this many
+    MAX_LOCAL_BUCKETS = 10000
+
+    def __init__(self, redis_url: str = "", redis_sentinels: list = None):
+        # key -> tokens, last update, time the bucket is full again
+        self.buckets: dict[str, tuple[float, float, float]] = {}
+        self.redis = (
+            get_async_redis_connection(redis_url, redis_sentinels)
+            if redis_url
+            else None
+        )
+        self.script = None
+        self.redis_failed = False
+
+    def _take_local(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        tokens, updated, _ = self.buckets.pop(key, (burst, now, now))
+        tokens = min(burst, tokens + (now - updated) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+
+        if len(self.buckets) >= self.MAX_LOCAL_BUCKETS:
+            # Full buckets are the same as missing ones
+            self.buckets = {k: v for k, v in self.buckets.items() if v[2] > now}
+        self.buckets[key] = (tokens, now, now + (burst - tokens) / rate)
+        return wait
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """
+        Takes a token from the bucket refilled at `rate` per second. Returns 0,
+        or the seconds until a token is available.
+        """
+        if self.redis is not None:
+            try:
+                if self.script is None:
+                    self.script = self.redis.register_script(TOKEN_BUCKET_SCRIPT)
+                wait = float(
+                    await self.script(
+                        keys=[f"{RATE_LIMIT_KEY_PREFIX}{key}"], args=[rate, burst]
+                    )
+                )
+                self.redis_failed = False
+                return wait
+            except Exception as e:
+                if not self.redis_failed:
+                    log.warning(
+                        f"Rate limits unavailable in Redis, limiting in process: {e}"
+                    )
+                self.redis_failed = True
+        return self._take_local(key, rate, burst)
+
+
+class AdaptiveLimit:
+    """
+    Concurrency limit adjusted by AIMD on upstream latency: it shrinks by
+    `backoff` when a request takes more than `tolerance` times the usual
+    latency of its model or upstream reports overload, at most once per
+    `cooldown` seconds, and otherwise grows by one slot per limit's worth of
+    requests that find it nearly used.
+
+    The usual latency of a model is an exponentially weighted moving average
+    of its samples, a plain average until it has 1 / BASELINE_WEIGHT of them.
+    Samples are the time to first byte of streamed responses: the duration of
+    a complete response depends on how much it generates, not only on load.
+    """
+
+    def __init__(
+        self,
+        initial: int,
+        minimum: int,
+        maximum: int,
+        tolerance: float,
+        backoff: float = 0.9,
+        cooldown: float = 1.0,
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.tolerance = tolerance
+        self.backoff = backoff
+        self.cooldown = cooldown
+        self.baselines: dict[str, float] = {}
+        self.samples: dict[str, int] = {}
+        self.decreased_at = float("-inf")
+        ADMISSION_LIMIT.add(int(self.limit))
+
+    def __int__(self) -> int:
+        return int(self.limit)
+
+    def _set(self, limit: float):
+        previous = int(self.limit)
+        self.limit = min(max(limit, self.minimum), self.maximum)
+        if int(self.limit) != previous:
+            ADMISSION_LIMIT.add(int(self.limit) - previous)
+
+    def update(
+        self,
+        model_id: str,
+        latency: Optional[float],
+        active: int,
+        overloaded: bool = False,
+    ):
+        if latency is not None:
+            baseline = self.baselines.get(model_id, latency)
+            samples = self.samples.get(model_id, 0) + 1
+            if samples > BASELINE_MIN_SAMPLES and latency > self.tolerance * max(
+                baseline, LATENCY_FLOOR
+            ):
+                overloaded = True
+
+            self.samples[model_id] = samples
+            self.baselines[model_id] = baseline + (latency - baseline) * max(
+                BASELINE_WEIGHT, 1 / samples
+            )
+
+        if overloaded:
+            now = time.monotonic()
+            if now - self.decreased_at >= self.cooldown:
+                self.decreased_at = now
+                self._set(self.limit * self.backoff)
+        elif latency is not None and active * 2 >= self.limit:
+            # Only grow a limit that is being used
+            self._set(self.limit + 1 / self.limit)
+
+
+class AdmissionTicket:
+    """A concurrency slot, given back once with `release`."""
+
+    def __init__(self, controller: Optional["AdmissionController"], model_id: str):
+        self.controller = controller
+        self.model_id = model_id
+        self.released = controller is None
+
+    def record_latency(self, latency: float):
+        if self.controller is not None:
+            self.controller.limit.update(self.model_id, latency, self.controller.active)
+
+    def release(self, error=None):
+        if self.released:
+            return
+        self.released = True
+        if error is not None and is_overload_error(error):
+            self.controller.limit.update(
+                self.model_id, None, self.controller.active, overloaded=True
+            )
+        self.controller.release()
+
+    def hold(self, response, started_at: Optional[float] = None):
+        """
+        Keeps the slot until a streaming response has been sent, and gives it
+        back now otherwise. With `started_at`, the time until the stream's
+        first chunk is recorded as the request's latency.
+        """
+        if self.released or not hasattr(response, "body_iterator"):
+            self.release(response)
+            return response
+
+        body_iterator = response.body_iterator
+
+        async def release_after_stream():
+            waiting = started_at is not None
+            try:
+                async for chunk in body_iterator:
+                    if waiting:
+                        waiting = False
+                        self.record_latency(time.monotonic() - started_at)
+                    yield chunk
+            except BaseException as e:
+                self.release(e)
+                raise
+            finally:
+                self.release()
+
+        stream = release_after_stream()
+        # A stream that is dropped without being started never runs its
+        # finally block
+        weakref.finalize(stream, self.release)
+        response.body_iterator = stream
+        return response
+
+
+class AdmissionController:
+    """
+    Admits chat completions under per-user and per-model rate limits and an
+    adaptive concurrency limit.
+
+    Requests over a rate limit are rejected at once. Requests over the
+    concurrency limit wait in a queue ordered by priority, and within a
+    priority served round-robin across users, so one user's burst cannot
+    starve the others. Interactive and API requests waiting longer than
+    `max_wait`, or finding `max_queue` others waiting, are rejected; background
+    requests are bounded by their own scheduler and wait for a slot.
+
+    The concurrency limit adapts per worker, the rate limits are shared by
+    all replicas through Redis.
+    """
+
+    def __init__(
+        self,
+        limit: AdaptiveLimit,
+        buckets: TokenBuckets,
+        user_rate_limit: float,
+        user_burst: int,
+        model_rate_limit: float,
+        model_burst: int,
+        max_queue: int,
+        max_wait: float,
+        enabled: bool = True,
+    ):
+        self.limit = limit
+        self.buckets = buckets
+        self.user_rate_limit = user_rate_limit
+        self.user_burst = user_burst
+        self.model_rate_limit = model_rate_limit
+        self.model_burst = model_burst
+        self.max_queue = max_queue
+        self.max_wait = max_wait
+        self.enabled = enabled
+
+        self.active = 0
+        # priority -> user id -> waiting requests
+        self.waiting: list[OrderedDict[str, deque[asyncio.Future]]] = [
+            OrderedDict() for _ in PRIORITY_NAMES
+        ]
+        self.queued = 0
+
+    def _reject(self, reason: str, retry_after: float):
+        ADMISSION_REJECTED.add(1, {"reason": reason})
+        raise AdmissionRejected(reason, retry_after)
+
+    async def _check_rate_limits(self, user_id: str, model_id: str):
+        if self.user_rate_limit > 0:
+            wait = await self.buckets.take(
+                f"user:{user_id}", self.user_rate_limit / 60, self.user_burst
+            )
+            if wait > 0:
+                self._reject("user_rate_limit", wait)
+
+        if self.model_rate_limit > 0:
+            wait = await self.buckets.take(
+                f"model:{model_id}", self.model_rate_limit / 60, self.model_burst
+            )
+            if wait > 0:
+                self._reject("model_rate_limit", wait)
+
+    def _admit(self):
+        self.active += 1
+        ADMISSION_ACTIVE.add(1)
+
+    def _dequeue(self) -> Optional[asyncio.Future]:
+        for users in self.waiting:
+            if not users:
+                continue
+
+            user_id, futures = next(iter(users.items()))
+            future = futures.popleft()
+            if futures:
+                users.move_to_end(user_id)
+            else:
+                del users[user_id]
+            return future
+        return None
+
+    def _withdraw(self, future: asyncio.Future, user_id: str, priority: int) -> bool:
+        """Removes a waiting request; False if it was given a slot already."""
+        if future.done():
+            return False
+
+        futures = self.waiting[priority][user_id]
+        futures.remove(future)
+        if not futures:
+            del self.waiting[priority][user_id]
+        self.queued -= 1
+        ADMISSION_QUEUE_DEPTH.add(-1)
+        future.cancel()
+        return True
+
+    def _grant(self):
+        while self.queued and self.active < int(self.limit):
+            future = self._dequeue()
+            self.queued -= 1
+            ADMISSION_QUEUE_DEPTH.add(-1)
+            self._admit()
+            future.set_result(None)
+
+    async def _wait(self, user_id: str, priority: int):
+        background = priority == PRIORITY_BACKGROUND
+        if not background and self.queued >= self.max_queue:
+            self._reject("queue_full", self.max_wait)
+
+        future = asyncio.get_running_loop().create_future()
+        self.waiting[priority].setdefault(user_id, deque()).append(future)
+        self.queued += 1
+        ADMISSION_QUEUE_DEPTH.add(1)
+
+        start = time.monotonic()
+        try:
+            await asyncio.wait([future], timeout=None if background else self.max_wait)
+        except asyncio.CancelledError:
+            if not self._withdraw(future, user_id, priority):
+                self.release()
+            raise
+
+        ADMISSION_WAIT.record(
+            time.monotonic() - start, {"priority": PRIORITY_NAMES[priority]}
+        )
+        if self._withdraw(future, user_id, priority):
+            self._reject("timeout", self.max_wait)
+
+    async def acquire(
+        self, user_id: str, model_id: str, priority: int = PRIORITY_INTERACTIVE
+    ) -> AdmissionTicket:
+        """Raises AdmissionRejected when the request is not admitted."""
+        if not self.enabled:
+            return AdmissionTicket(None, model_id)
+
+        if priority != PRIORITY_BACKGROUND:
+            await self._check_rate_limits(user_id, model_id)
+
+        if not self.queued and self.active < int(self.limit):
+            self._admit()
+        else:
+            await self._wait(user_id, priority)
+        return AdmissionTicket(self, model_id)
+
+    def release(self):
+        self.active -= 1
+        ADMISSION_ACTIVE.add(-1)
+        self._grant()
+
+    @asynccontextmanager
+    async def slot(self, user_id: str, model_id: str, priority: int):
+        ticket = await self.acquire(user_id, model_id, priority)
+        try:
+            yield ticket
+        except BaseException as e:
+            ticket.release(e)
+            raise
+        finally:
+            ticket.release()
+
+
+ADMISSION = AdmissionController(
+    limit=AdaptiveLimit(
+        initial=ADMISSION_INITIAL_CONCURRENCY,
+        minimum=ADMISSION_MIN_CONCURRENCY,
+        maximum=ADMISSION_MAX_CONCURRENCY,
+        tolerance=ADMISSION_LATENCY_TOLERANCE,
+    ),
+    buckets=TokenBuckets(
+        redis_url=REDIS_URL if ENABLE_ADMISSION_CONTROL else "",
+        redis_sentinels=get_sentinels_from_env(
+            REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT
+        ),
+    ),
+    user_rate_limit=ADMISSION_USER_RATE_LIMIT,
+    user_burst=ADMISSION_USER_BURST,
+    model_rate_limit=ADMISSION_MODEL_RATE_LIMIT,
+    model_burst=ADMISSION_MODEL_BURST,
+    max_queue=ADMISSION_MAX_QUEUE,
+    max_wait=ADMISSION_MAX_WAIT,
+    enabled=ENABLE_ADMISSION_CONTROL,
+)
@@ -0,0 +1,168 @@
+import asyncio
+import logging
+import time
+import uuid
+from collections import deque
+from typing import Callable, Optional
+
+from open_webui.models.page_views import PageViews
+from open_webui.models.user_logins import UserLogins
+from open_webui.env import (
+    ANALYTICS_BATCH_SIZE,
+    ANALYTICS_BUFFER_MAX_SIZE,
+    ANALYTICS_FLUSH_INTERVAL,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+class AnalyticsBuffer:
+    """
+    Bounded in-memory queue of analytics rows that are written in batches.
+
+    Recording a row never touches the database; `flush` drains the queue in
+    chunks of `batch_size` and hands each chunk to `write_batch` on a worker
+    thread. When the queue is full new rows are dropped and counted instead
+    of growing memory without limit.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        write_batch: Callable[[list[dict]], int],
+        max_size: int,
+        batch_size: int,
+    ):
+        self.name = name
+        self.write_batch = write_batch
+        self.max_size = max_size
+        self.batch_size = batch_size
+        self.queue = deque()
+
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+
+    def add(self, row: dict) -> bool:
+        if len(self.queue) >= self.max_size:
+            self.dropped += 1
+            if self.dropped % 1000 == 1:
+                log.warning(
+                    f"Analytics buffer '{self.name}' is full, {self.dropped} rows dropped so far"
+                )
+            return False
+
+        self.queue.append(row)
+        return True
+
+    def _next_batch(self) -> list[dict]:
+        batch = []
+        while self.queue and len(batch) < self.batch_size:
+            batch.append(self.queue.popleft())
+        return batch
+
+    async def flush(self):
+        while self.queue:
+            batch = self._next_batch()
+            try:
+                self.written += await asyncio.to_thread(self.write_batch, batch)
+            except Exception as e:
+                self.failed += len(batch)
+                log.exception(
+                    f"Failed to write {len(batch)} rows from analytics buffer '{self.name}': {e}"
+                )
+
+    def flush_sync(self):
+        while self.queue:
+            batch = self._next_batch()
+            try:
+                self.written += self.write_batch(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                log.exception(
+                    f"Failed to write {len(batch)} rows from analytics buffer '{self.name}': {e}"
+                )
+
+    def get_stats(self) -> dict:
+        return {
+            "pending": len(self.queue),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+        }
+
+
+PAGE_VIEW_BUFFER = AnalyticsBuffer(
+    "page_view",
+    PageViews.insert_page_views,
+    max_size=ANALYTICS_BUFFER_MAX_SIZE,
+    batch_size=ANALYTICS_BATCH_SIZE,
+)
+
+LOGIN_BUFFER = AnalyticsBuffer(
+    "user_login",
+    UserLogins.insert_logins,
+    max_size=ANALYTICS_BUFFER_MAX_SIZE,
+    batch_size=ANALYTICS_BATCH_SIZE,
+)
+
+ANALYTICS_BUFFERS = [PAGE_VIEW_BUFFER, LOGIN_BUFFER]
+
+
+def record_page_view(
+    url: str,
+    ip_address: str,
+    user_id: Optional[str] = None,
+    user_agent: Optional[str] = None,
+    referer: Optional[str] = None,
+    access_type: Optional[str] = None,
+) -> bool:
+    return PAGE_VIEW_BUFFER.add(
+        {
+            "url": url,
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "referer": referer,
+            "access_type": access_type,
+            "created_at": int(time.time()),
+        }
+    )
+
+
+def record_login(
+    user_id: str,
+    ip_address: str,
+    user_agent: Optional[str] = None,
+    login_method: Optional[str] = None,
+    success: bool = True,
+) -> bool:
+    return LOGIN_BUFFER.add(
+        {
+            "id": str(uuid.uuid4()),
+            "user_id": user_id,
+            "ip_address": ip_address,
+            "user_agent": user_agent,
+            "login_method": login_method,
+            "success": "true" if success else "false",
+            "created_at": int(time.time()),
+        }
+    )
+
+
+def get_analytics_buffer_stats() -> dict:
+    return {buffer.name: buffer.get_stats() for buffer in ANALYTICS_BUFFERS}
+
+
+def flush_analytics_buffers():
+    for buffer in ANALYTICS_BUFFERS:
+        buffer.flush_sync()
+
+
+async def periodic_analytics_flush():
+    while True:
+        await asyncio.sleep(ANALYTICS_FLUSH_INTERVAL)
+        for buffer in ANALYTICS_BUFFERS:
+            await buffer.flush()
@@ -1,7 +1,10 @@
+import asyncio
 from contextlib import asynccontextmanager
 from dataclasses import asdict, dataclass
 from enum import Enum
+import random
 import re
+import time
 from typing import (
     TYPE_CHECKING,
     Any,
@@ -24,9 +27,23 @@ from asgiref.typing import (
 from loguru import logger
 from starlette.requests import Request
 
-from open_webui.env import AUDIT_LOG_LEVEL, MAX_BODY_LOG_SIZE
-from open_webui.utils.auth import get_current_user, get_http_authorization_cred
-from open_webui.models.users import UserModel
+from open_webui.env import (
+    AUDIT_BATCH_SIZE,
+    AUDIT_BODY_SAMPLE_RATE,
+    AUDIT_LOG_LEVEL,
+    AUDIT_LOG_SINKS,
+    AUDIT_QUEUE_MAX_SIZE,
+    MAX_BODY_LOG_SIZE,
+)
+from open_webui.utils.auth import decode_token, get_http_authorization_cred
+from open_webui.utils.telemetry.metrics import (
+    AUDIT_DROPPED,
+    AUDIT_QUEUE_DEPTH,
+    AUDIT_WRITE_DURATION,
+    record_duration,
+)
+from open_webui.utils.user_cache import USER_CACHE
+from open_webui.models.users import UserModel, Users
 
 
 if TYPE_CHECKING:
@@ -48,6 +65,8 @@ class AuditLogEntry:
     # `Request Response` level
     response_object: Any = None
     response_status_code: Optional[int] = None
+    # Time the request was received, as entries are written asynchronously
+    timestamp: Optional[int] = None
 
 
 class AuditLevel(str, Enum):
@@ -87,6 +106,191 @@ class AuditLogger:
             **entry,
         )
 
+    def write_batch(self, entries: list[AuditLogEntry]):
+        for entry in entries:
+            self.write(entry)
+
+
+class OTelAuditLogger:
+    """
+    Emits audit entries as OpenTelemetry log records through the globally
+    configured LoggerProvider.
+    """
+
+    def __init__(self):
+        from opentelemetry._logs import get_logger
+
+        self.logger = get_logger("open_webui.audit")
+
+    def write_batch(self, entries: list[AuditLogEntry]):
+        from opentelemetry._logs import LogRecord, SeverityNumber
+
+        for entry in entries:
+            attributes = {
+                key: value if isinstance(value, (str, int, float, bool)) else str(value)
+                for key, value in asdict(entry).items()
+                if value is not None
+            }
+            self.logger.emit(
+                LogRecord(
+                    timestamp=(entry.timestamp or int(time.time())) * 1_000_000_000,
+                    severity_number=SeverityNumber.INFO,
+                    severity_text="INFO",
+                    body=f"{entry.verb} {entry.request_uri}",
+                    attributes=attributes,
+                )
+            )
+
+
+@dataclass
+class PendingAuditEntry:
+    """
+    What the request path hands to the writer: raw values only. Decoding
+    bodies and resolving the user happen later on the writer's thread.
+    """
+
+    id: str
+    timestamp: int
+    verb: str
+    request_uri: str
+    authorization: Optional[str]
+    user: Optional[UserModel] = None
+    user_agent: Optional[str] = None
+    source_ip: Optional[str] = None
+    response_status_code: Optional[int] = None
+    request_body: bytes = b""
+    response_body: bytes = b""
+
+
+class AuditLogWriter:
+    """
+    Background writer for audit entries.
+
+    The middleware only enqueues `PendingAuditEntry` objects into a bounded
+    queue; a single task drains it in batches and writes each batch to the
+    configured sinks in a worker thread. When the queue is full, entries are
+    dropped and counted instead of delaying the request.
+    """
+
+    def __init__(self, sinks: list, max_queue_size: int, batch_size: int):
+        self.sinks = sinks
+        self.max_queue_size = max_queue_size
+        self.batch_size = batch_size
+        self.queue: Optional[asyncio.Queue] = None
+        self.task: Optional[asyncio.Task] = None
+        self.dropped = 0
+
+    def enqueue(self, pending: PendingAuditEntry) -> bool:
+        if self.task is None or self.task.done():
+            self.queue = self.queue or asyncio.Queue(maxsize=self.max_queue_size)
+            self.task = asyncio.create_task(self._run())
+
+        try:
+            self.queue.put_nowait(pending)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            AUDIT_DROPPED.add(1)
+            return False
+
+        AUDIT_QUEUE_DEPTH.add(1)
+        return True
+
+    def _next_batch(self, first: PendingAuditEntry) -> list[PendingAuditEntry]:
+        batch = [first]
+        while len(batch) < self.batch_size and not self.queue.empty():
+            batch.append(self.queue.get_nowait())
+        AUDIT_QUEUE_DEPTH.add(-len(batch))
+        return batch
+
+    async def _run(self):
+        while True:
+            batch = self._next_batch(await self.queue.get())
+            try:
+                await asyncio.to_thread(self._write_batch, batch)
+            except Exception as e:
+                logger.error(f"Failed to write {len(batch)} audit entries: {str(e)}")
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+        while self.queue is not None and not self.queue.empty():
+            self._write_batch(self._next_batch(self.queue.get_nowait()))
+
+    def _write_batch(self, batch: list[PendingAuditEntry]):
+        entries = []
+        for pending in batch:
+            try:
+                entries.append(self._build_entry(pending))
+            except Exception as e:
+                logger.error(f"Failed to build audit entry: {str(e)}")
+
+        with record_duration(AUDIT_WRITE_DURATION):
+            for sink in self.sinks:
+                try:
+                    sink.write_batch(entries)
+                except Exception as e:
+                    logger.error(f"Failed to write audit entries: {str(e)}")
+
+    def _resolve_user(self, pending: PendingAuditEntry) -> Optional[UserModel]:
+        if pending.user is not None:
+            return pending.user
+
+        credentials = get_http_authorization_cred(pending.authorization)
+        if credentials is None:
+            return None
+
+        token = credentials.credentials
+        if token.startswith("sk-"):
+            return Users.get_user_by_api_key(token)
+
+        data = decode_token(token)
+        if data is None or "id" not in data:
+            return None
+        return USER_CACHE.get_or_load(data["id"], Users.get_user_by_id)
+
+    def _build_entry(self, pending: PendingAuditEntry) -> AuditLogEntry:
+        user = self._resolve_user(pending)
+        if user is None:
+            raise ValueError(f"Unable to resolve user for {pending.request_uri}")
+
+        return AuditLogEntry(
+            id=pending.id,
+            user=user.model_dump(include={"id", "name", "email", "role"}),
+            audit_level=AUDIT_LOG_LEVEL,
+            verb=pending.verb,
+            request_uri=pending.request_uri,
+            response_status_code=pending.response_status_code,
+            source_ip=pending.source_ip,
+            user_agent=pending.user_agent,
+            request_object=pending.request_body.decode("utf-8", errors="replace"),
+            response_object=pending.response_body.decode("utf-8", errors="replace"),
+            timestamp=pending.timestamp,
+        )
+
+
+def get_audit_sinks() -> list:
+    sinks = []
+    for name in AUDIT_LOG_SINKS:
+        if name == "file":
+            sinks.append(AuditLogger(logger))
+        elif name == "otel":
+            try:
+                sinks.append(OTelAuditLogger())
+            except ImportError:
+                logger.error("Audit sink 'otel' requires opentelemetry to be installed")
+        else:
+            logger.error(f"Unknown audit sink: {name}")
+    return sinks
+
+
+AUDIT_LOG_WRITER = AuditLogWriter(
+    get_audit_sinks(),
+    max_queue_size=AUDIT_QUEUE_MAX_SIZE,
+    batch_size=AUDIT_BATCH_SIZE,
+)
+
 
 class AuditContext:
     """
@@ -100,22 +304,32 @@ class AuditContext:
     """
 
     def __init__(self, max_body_size: int = MAX_BODY_LOG_SIZE):
-        self.request_body = bytearray()
-        self.response_body = bytearray()
+        self.request_chunks: list[bytes] = []
+        self.response_chunks: list[bytes] = []
+        self.request_size = 0
+        self.response_size = 0
         self.max_body_size = max_body_size
         self.metadata: Dict[str, Any] = {}
 
     def add_request_chunk(self, chunk: bytes):
-        if len(self.request_body) < self.max_body_size:
-            self.request_body.extend(
-                chunk[: self.max_body_size - len(self.request_body)]
-            )
+        if chunk and self.request_size < self.max_body_size:
+            chunk = chunk[: self.max_body_size - self.request_size]
+            self.request_chunks.append(chunk)
+            self.request_size += len(chunk)
 
     def add_response_chunk(self, chunk: bytes):
-        if len(self.response_body) < self.max_body_size:
-            self.response_body.extend(
-                chunk[: self.max_body_size - len(self.response_body)]
-            )
+        if chunk and self.response_size < self.max_body_size:
+            chunk = chunk[: self.max_body_size - self.response_size]
+            self.response_chunks.append(chunk)
+            self.response_size += len(chunk)
+
+    @property
+    def request_body(self) -> bytes:
+        return b"".join(self.request_chunks)
+
+    @property
+    def response_body(self) -> bytes:
+        return b"".join(self.response_chunks)
 
 
 class AuditLoggingMiddleware:
@@ -132,12 +346,15 @@ class AuditLoggingMiddleware:
         excluded_paths: Optional[list[str]] = None,
         max_body_size: int = MAX_BODY_LOG_SIZE,
         audit_level: AuditLevel = AuditLevel.NONE,
+        body_sample_rate: float = AUDIT_BODY_SAMPLE_RATE,
+        writer: AuditLogWriter = AUDIT_LOG_WRITER,
     ) -> None:
         self.app = app
-        self.audit_logger = AuditLogger(logger)
+        self.writer = writer
         self.excluded_paths = excluded_paths or []
         self.max_body_size = max_body_size
         self.audit_level = audit_level
+        self.body_sample_rate = body_sample_rate
 
     async def __call__(
         self,
@@ -154,9 +371,14 @@ class AuditLoggingMiddleware:
             return await self.app(scope, receive, send)
 
         async with self._audit_context(request) as context:
+            capture_bodies = (
+                self.body_sample_rate >= 1 or random.random() < self.body_sample_rate
+            )
 
             async def send_wrapper(message: ASGISendEvent) -> None:
-                if self.audit_level == AuditLevel.REQUEST_RESPONSE:
+                if message["type"] == "http.response.start":
+                    context.metadata["response_status_code"] = message["status"]
+                elif capture_bodies and self.audit_level == AuditLevel.REQUEST_RESPONSE:
                     await self._capture_response(message, context)
 
                 await send(message)
@@ -167,7 +389,7 @@ class AuditLoggingMiddleware:
                 nonlocal original_receive
                 message = await original_receive()
 
-                if self.audit_level in (
+                if capture_bodies and self.audit_level in (
                     AuditLevel.REQUEST,
                     AuditLevel.REQUEST_RESPONSE,
                 ):
@@ -184,20 +406,13 @@ class AuditLoggingMiddleware:
         """
         async context manager that ensures that an audit log entry is recorded after the request is processed.
         """
-        context = AuditContext()
+        context = AuditContext(max_body_size=self.max_body_size)
+        context.metadata["timestamp"] = int(time.time())
         try:
             yield context
         finally:
             await self._log_audit_entry(request, context)
 
-    async def _get_authenticated_user(self, request: Request) -> UserModel:
-
-        auth_header = request.headers.get("Authorization")
-        assert auth_header
-        user = get_current_user(request, None, get_http_authorization_cred(auth_header))
-
-        return user
-
     def _should_skip_auditing(self, request: Request) -> bool:
         if (
             request.method not in {"POST", "PUT", "PATCH", "DELETE"}
@@ -220,30 +435,30 @@ class AuditLoggingMiddleware:
             context.add_request_chunk(body)
 
     async def _capture_response(self, message: ASGISendEvent, context: AuditContext):
-        if message["type"] == "http.response.start":
-            context.metadata["response_status_code"] = message["status"]
-
-        elif message["type"] == "http.response.body":
+        if message["type"] == "http.response.body":
             body = message.get("body", b"")
             context.add_response_chunk(body)
 
     async def _log_audit_entry(self, request: Request, context: AuditContext):
         try:
-            user = await self._get_authenticated_user(request)
-
-            entry = AuditLogEntry(
-                id=str(uuid.uuid4()),
-                user=user.model_dump(include={"id", "name", "email", "role"}),
-                audit_level=self.audit_level.value,
-                verb=request.method,
-                request_uri=str(request.url),
-                response_status_code=context.metadata.get("response_status_code", None),
-                source_ip=request.client.host if request.client else None,
-                user_agent=request.headers.get("user-agent"),
-                request_object=context.request_body.decode("utf-8", errors="replace"),
-                response_object=context.response_body.decode("utf-8", errors="replace"),
+            # Reuse the user resolved by `get_current_user` while handling the
+            # request; the writer falls back to the auth header otherwise.
+            self.writer.enqueue(
+                PendingAuditEntry(
+                    id=str(uuid.uuid4()),
+                    timestamp=context.metadata["timestamp"],
+                    verb=request.method,
+                    request_uri=str(request.url),
+                    authorization=request.headers.get("Authorization"),
+                    user=getattr(request.state, "user", None),
+                    user_agent=request.headers.get("user-agent"),
+                    source_ip=request.client.host if request.client else None,
+                    response_status_code=context.metadata.get(
+                        "response_status_code", None
+                    ),
+                    request_body=context.request_body,
+                    response_body=context.response_body,
+                )
             )
-
-            self.audit_logger.write(entry)
         except Exception as e:
             logger.error(f"Failed to log audit entry: {str(e)}")
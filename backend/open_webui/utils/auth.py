@@ -1,3 +1,4 @@
+import asyncio
 import logging
 import uuid
 import jwt
@@ -14,6 +15,7 @@ from pytz import UTC
 from typing import Optional, Union, List, Dict
 
 from open_webui.models.users import Users
+from open_webui.utils.user_cache import USER_CACHE, LAST_ACTIVE_TRACKER
 
 from open_webui.constants import ERROR_MESSAGES
 from open_webui.env import (
@@ -21,6 +23,7 @@ from open_webui.env import (
     TRUSTED_SIGNATURE_KEY,
     STATIC_DIR,
     SRC_LOG_LEVELS,
+    USER_LAST_ACTIVE_FLUSH_INTERVAL,
 )
 
 from fastapi import BackgroundTasks, Depends, HTTPException, Request, Response, status
@@ -237,7 +240,10 @@ def get_current_user(
                     status.HTTP_403_FORBIDDEN, detail=ERROR_MESSAGES.API_KEY_NOT_ALLOWED
                 )
 
-        return get_current_user_by_api_key(token)
+        user = get_current_user_by_api_key(token)
+        # Kept on the request so the audit middleware does not resolve it again
+        request.state.user = user
+        return user
 
     # auth by jwt token
     try:
@@ -249,17 +255,16 @@ def get_current_user(
         )
 
     if data is not None and "id" in data:
-        user = Users.get_user_by_id(data["id"])
+        user = USER_CACHE.get_or_load(data["id"], Users.get_user_by_id)
         if user is None:
             raise HTTPException(
                 status_code=status.HTTP_401_UNAUTHORIZED,
                 detail=ERROR_MESSAGES.INVALID_TOKEN,
             )
         else:
-            # Refresh the user's last active timestamp asynchronously
-            # to prevent blocking the request
-            if background_tasks:
-                background_tasks.add_task(Users.update_user_last_active_by_id, user.id)
+            # Refresh the user's last active timestamp in the next batched flush
+            LAST_ACTIVE_TRACKER.touch(user.id)
+        request.state.user = user
         return user
     else:
         raise HTTPException(
@@ -269,7 +274,10 @@ def get_current_user(
 
 
 def get_current_user_by_api_key(api_key: str):
-    user = Users.get_user_by_api_key(api_key)
+    user = USER_CACHE.get_by_api_key(api_key)
+    if user is None:
+        user = Users.get_user_by_api_key(api_key)
+        USER_CACHE.set(user)
 
     if user is None:
         raise HTTPException(
@@ -277,11 +285,26 @@ def get_current_user_by_api_key(api_key: str):
             detail=ERROR_MESSAGES.INVALID_TOKEN,
         )
     else:
-        Users.update_user_last_active_by_id(user.id)
+        LAST_ACTIVE_TRACKER.touch(user.id)
 
     return user
 
 
+def flush_user_last_active():
+    last_active = LAST_ACTIVE_TRACKER.drain()
+    if last_active and not Users.update_users_last_active_by_ids(last_active):
+        log.warning(f"Failed to flush last active time for {len(last_active)} users")
+
+
+async def periodic_user_last_active_flush():
+    while True:
+        await asyncio.sleep(USER_LAST_ACTIVE_FLUSH_INTERVAL)
+        try:
+            await asyncio.to_thread(flush_user_last_active)
+        except Exception as e:
+            log.exception(f"Error flushing user last active time: {e}")
+
+
 def get_verified_user(user=Depends(get_current_user)):
     if user.role not in {"user", "admin"}:
         raise HTTPException(
@@ -0,0 +1,208 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Awaitable, Callable, Optional
+
+from open_webui.env import (
+    BACKGROUND_TASK_CONCURRENCY,
+    BACKGROUND_TASK_MODEL_CONCURRENCY,
+    SRC_LOG_LEVELS,
+)
+from open_webui.utils.telemetry.metrics import (
+    BACKGROUND_TASK_DROPPED,
+    BACKGROUND_TASK_QUEUE_DEPTH,
+    BACKGROUND_TASK_WAIT,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+# Lower runs first
+PRIORITY_TITLE = 0
+PRIORITY_TAGS = 1
+
+
+@dataclass
+class BackgroundTask:
+    """
+    A queued call to a task model. `run` receives the task and, when
+    `batch_key` is set, up to `batch_size - 1` other queued tasks with the same
+    key, to be answered with a single request.
+    """
+
+    key: str  # tasks with a key already queued or running are skipped
+    model: str
+    run: Callable[[list["BackgroundTask"]], Awaitable[None]]
+    data: dict = field(default_factory=dict)
+    priority: int = 0
+    deadline: Optional[float] = None  # seconds in the queue
+    on_drop: Optional[Callable[["BackgroundTask"], Awaitable[None]]] = None
+    batch_key: Optional[str] = None
+    batch_size: int = 1
+    created_at: float = field(default_factory=time.monotonic)
+
+    @property
+    def expires_at(self) -> float:
+        return self.created_at + self.deadline if self.deadline else float("inf")
+
+
+class BackgroundTaskScheduler:
+    """
+    Runs title and tag generation after chat responses without letting them
+    compete with chat traffic for the upstream models.
+
+    Tasks wait in a priority queue and run at most `max_concurrency` at once
+    and `model_concurrency` per task model. A task whose key is already
+    queued or running is skipped, and one that is still queued at its
+    deadline is dropped (and its `on_drop` called) instead of piling up
+    behind a busy model.
+    """
+
+    def __init__(self, max_concurrency: int, model_concurrency: int):
+        self.max_concurrency = max_concurrency
+        self.model_concurrency = model_concurrency
+        self.queue: list[tuple[int, int, BackgroundTask]] = []
+        self.queued: dict[str, BackgroundTask] = {}
+        self.running_keys: set[str] = set()
+        self.running_models: dict[str, int] = defaultdict(int)
+        self.running: set[asyncio.Task] = set()
+        self.counter = itertools.count()
+        self.wakeup: Optional[asyncio.Event] = None
+        self.task: Optional[asyncio.Task] = None
+
+    def submit(self, task: BackgroundTask) -> bool:
+        if task.key in self.queued or task.key in self.running_keys:
+            BACKGROUND_TASK_DROPPED.add(1, {"reason": "duplicate"})
+            return False
+
+        if self.task is None or self.task.done():
+            self.wakeup = asyncio.Event()
+            self.task = asyncio.create_task(self._run())
+
+        self.queued[task.key] = task
+        heapq.heappush(self.queue, (task.priority, next(self.counter), task))
+        BACKGROUND_TASK_QUEUE_DEPTH.add(1)
+        self.wakeup.set()
+        return True
+
+    def _remove(self, task: BackgroundTask):
+        del self.queued[task.key]
+        BACKGROUND_TASK_QUEUE_DEPTH.add(-1)
+
+    def _drop_expired(self, now: float):
+        for task in [task for task in self.queued.values() if task.expires_at <= now]:
+            self._remove(task)
+            BACKGROUND_TASK_DROPPED.add(1, {"reason": "deadline"})
+            log.debug(f"Dropped background task {task.key} at its deadline")
+            if task.on_drop:
+                self._start(task.on_drop(task), [])
+
+    def _next(self) -> Optional[BackgroundTask]:
+        """Highest priority queued task whose model has a free slot."""
+        skipped = []
+        found = None
+        while self.queue:
+            entry = heapq.heappop(self.queue)
+            task = entry[2]
+            if self.queued.get(task.key) is not task:
+                continue  # dropped
+            if self.running_models[task.model] < self.model_concurrency:
+                found = task
+                break
+            skipped.append(entry)
+
+        for entry in skipped:
+            heapq.heappush(self.queue, entry)
+        return found
+
+    def _batch(self, task: BackgroundTask) -> list[BackgroundTask]:
+        batch = [task]
+        if task.batch_key is None:
+            return batch
+
+        for other in sorted(
+            self.queued.values(), key=lambda other: (other.priority, other.created_at)
+        ):
+            if len(batch) >= task.batch_size:
+                break
+            if other is not task and other.batch_key == task.batch_key:
+                batch.append(other)
+        return batch
+
+    def _start(self, coroutine: Awaitable, batch: list[BackgroundTask]):
+        async def run():
+            try:
+                await coroutine
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                log.exception(f"Background task failed: {e}")
+
+        task = asyncio.create_task(run())
+        self.running.add(task)
+
+        if batch:
+            model = batch[0].model
+            self.running_models[model] += 1
+            self.running_keys.update(t.key for t in batch)
+
+        def done(_):
+            self.running.discard(task)
+            if batch:
+                self.running_models[model] -= 1
+                self.running_keys.difference_update(t.key for t in batch)
+            self.wakeup.set()
+
+        task.add_done_callback(done)
+
+    def _dispatch(self):
+        now = time.monotonic()
+        self._drop_expired(now)
+
+        while sum(self.running_models.values()) < self.max_concurrency:
+            task = self._next()
+            if task is None:
+                break
+
+            batch = self._batch(task)
+            for queued in batch:
+                self._remove(queued)
+                BACKGROUND_TASK_WAIT.record(now - queued.created_at)
+            self._start(task.run(batch), batch)
+
+    async def _run(self):
+        while True:
+            self._dispatch()
+
+            timeout = None
+            if self.queued:
+                next_deadline = min(task.expires_at for task in self.queued.values())
+                if next_deadline != float("inf"):
+                    timeout = max(next_deadline - time.monotonic(), 0)
+
+            try:
+                await asyncio.wait_for(self.wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self.wakeup.clear()
+
+    async def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
+
+        for task in list(self.running):
+            task.cancel()
+        BACKGROUND_TASK_QUEUE_DEPTH.add(-len(self.queued))
+        self.queue.clear()
+        self.queued.clear()
+
+
+BACKGROUND_TASKS = BackgroundTaskScheduler(
+    max_concurrency=BACKGROUND_TASK_CONCURRENCY,
+    model_concurrency=BACKGROUND_TASK_MODEL_CONCURRENCY,
+)
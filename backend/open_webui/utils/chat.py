@@ -48,6 +48,7 @@ from open_webui.utils.response import (
     convert_response_ollama_to_openai,
     convert_streaming_response_ollama_to_openai,
 )
+from open_webui.utils.stream import ChunkStreamingResponse
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
     process_filter_functions,
@@ -227,16 +228,15 @@ async def generate_chat_completion(
             if form_data.get("stream") == True:
 
                 async def stream_wrapper(stream):
-                    yield f"data: {json.dumps({'selected_model_id': selected_model_id})}\n\n"
+                    yield {"selected_model_id": selected_model_id}
                     async for chunk in stream:
                         yield chunk
 
                 response = await generate_chat_completion(
                     request, form_data, user, bypass_filter=True
                 )
-                return StreamingResponse(
+                return ChunkStreamingResponse(
                     stream_wrapper(response.body_iterator),
-                    media_type="text/event-stream",
                     background=response.background,
                 )
             else:
@@ -271,7 +271,7 @@ async def generate_chat_completion(
             )
             if form_data.get("stream"):
                 response.headers["content-type"] = "text/event-stream"
-                return StreamingResponse(
+                return ChunkStreamingResponse(
                     convert_streaming_response_ollama_to_openai(response),
                     headers=dict(response.headers),
                     background=response.background,
@@ -404,8 +404,12 @@ async def chat_action(request: Request, action_id: str, form_data: dict, user: A
         request.app.state.FUNCTIONS[action_id] = function_module
 
     if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-        valves = Functions.get_function_valves_by_id(action_id)
-        function_module.valves = function_module.Valves(**(valves if valves else {}))
+        function_module.valves = request.app.state.FUNCTIONS.get_valves(
+            action_id,
+            lambda: function_module.Valves(
+                **(Functions.get_function_valves_by_id(action_id) or {})
+            ),
+        )
 
     if hasattr(function_module, "action"):
         try:
@@ -1,6 +1,7 @@
 import asyncio
 import json
 import logging
+import time
 import uuid
 from typing import Optional
 
@@ -8,7 +9,12 @@ import aiohttp
 import websockets
 from pydantic import BaseModel
 
-from open_webui.env import SRC_LOG_LEVELS
+from open_webui.env import (
+    JUPYTER_KERNEL_IDLE_TIMEOUT,
+    JUPYTER_KERNEL_POOL_MAX_KERNELS,
+    JUPYTER_KERNEL_POOL_SIZE,
+    SRC_LOG_LEVELS,
+)
 
 logger = logging.getLogger(__name__)
 logger.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -24,187 +30,431 @@ class ResultModel(BaseModel):
     result: Optional[str] = ""
 
 
-class JupyterCodeExecuter:
+class KernelUnavailableError(Exception):
+    """The kernel went away (restarted, culled or deleted) before or during execution."""
+
+
+async def execute_in_jupyter(
+    ws, code: str, timeout: int, session_id: str
+) -> tuple[ResultModel, bool]:
+    """
+    Run `code` over an open kernel channels websocket and collect its output.
+
+    Returns the result and whether execution timed out. Messages belonging to
+    other (e.g. earlier, timed out) requests are skipped.
+    """
+    # send message
+    msg_id = uuid.uuid4().hex
+    await ws.send(
+        json.dumps(
+            {
+                "header": {
+                    "msg_id": msg_id,
+                    "msg_type": "execute_request",
+                    "username": "user",
+                    "session": session_id,
+                    "date": "",
+                    "version": "5.3",
+                },
+                "parent_header": {},
+                "metadata": {},
+                "content": {
+                    "code": code,
+                    "silent": False,
+                    "store_history": True,
+                    "user_expressions": {},
+                    "allow_stdin": False,
+                    "stop_on_error": True,
+                },
+                "channel": "shell",
+            }
+        )
+    )
+    # parse message
+    stdout, stderr, result = "", "", []
+    timed_out = False
+    while True:
+        try:
+            # wait for message
+            message = await asyncio.wait_for(ws.recv(), timeout)
+            message_data = json.loads(message)
+            # msg id not match, skip
+            if message_data.get("parent_header", {}).get("msg_id") != msg_id:
+                continue
+            # check message type
+            msg_type = message_data.get("msg_type")
+            match msg_type:
+                case "stream":
+                    if message_data["content"]["name"] == "stdout":
+                        stdout += message_data["content"]["text"]
+                    elif message_data["content"]["name"] == "stderr":
+                        stderr += message_data["content"]["text"]
+                case "execute_result" | "display_data":
+                    data = message_data["content"]["data"]
+                    if "image/png" in data:
+                        result.append(f"data:image/png;base64,{data['image/png']}")
+                    elif "text/plain" in data:
+                        result.append(data["text/plain"])
+                case "error":
+                    stderr += "\n".join(message_data["content"]["traceback"])
+                case "status":
+                    if message_data["content"]["execution_state"] == "idle":
+                        break
+
+        except asyncio.TimeoutError:
+            stderr += "\nExecution timed out."
+            timed_out = True
+            break
+
+    return (
+        ResultModel(
+            stdout=stdout.strip(),
+            stderr=stderr.strip(),
+            result="\n".join(result).strip() if result else "",
+        ),
+        timed_out,
+    )
+
+
+class JupyterKernel:
+    """
+    A kernel on the Jupyter server together with its open channels websocket.
+    """
+
+    def __init__(self, kernel_id: str):
+        self.id = kernel_id
+        self.ws = None
+        self.session_id = uuid.uuid4().hex
+        self.lock = asyncio.Lock()
+        self.chat_id: Optional[str] = None
+        self.last_used = time.monotonic()
+        self.closed = False
+
+
+class JupyterKernelPool:
     """
-    Execute code in jupyter notebook
+    Kernels on one Jupyter server, shared by every code execution against it.
+
+    - One HTTP session is signed in once and reused; password logins are
+      repeated only when the server rejects the session.
+    - Up to JUPYTER_KERNEL_POOL_SIZE kernels are started ahead of time.
+    - Executions for a chat keep using the chat's kernel, so variables and
+      imports survive between code blocks. A chat's kernel is shut down
+      after JUPYTER_KERNEL_IDLE_TIMEOUT seconds without use.
+    - Executions without a chat get a fresh kernel that is shut down
+      afterwards, so state never leaks between users.
+    - At most JUPYTER_KERNEL_POOL_MAX_KERNELS kernels exist at a time. When
+      the limit is reached the least recently used idle chat kernel is
+      evicted, and if every kernel is busy callers wait.
     """
 
-    def __init__(
-        self,
-        base_url: str,
-        code: str,
-        token: str = "",
-        password: str = "",
-        timeout: int = 60,
-    ):
-        """
-        :param base_url: Jupyter server URL (e.g., "http://localhost:8888")
-        :param code: Code to execute
-        :param token: Jupyter authentication token (optional)
-        :param password: Jupyter password (optional)
-        :param timeout: WebSocket timeout in seconds (default: 60s)
-        """
+    def __init__(self, base_url: str, token: str = "", password: str = ""):
         self.base_url = base_url.rstrip("/")
-        self.code = code
         self.token = token
         self.password = password
-        self.timeout = timeout
-        self.kernel_id = ""
-        self.session = aiohttp.ClientSession(base_url=self.base_url)
-        self.params = {}
-        self.result = ResultModel()
+        self.params = {"token": token} if token else {}
 
-    async def __aenter__(self):
-        return self
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.signed_in = False
+        self.sign_in_lock = asyncio.Lock()
 
-    async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if self.kernel_id:
-            try:
-                async with self.session.delete(
-                    f"/api/kernels/{self.kernel_id}", params=self.params
+        self.idle: list[JupyterKernel] = []
+        self.chats: dict[str, JupyterKernel] = {}
+        self.kernel_count = 0
+        self.condition = asyncio.Condition()
+
+        self.warm_up_task: Optional[asyncio.Task] = None
+        self.reaper_task: Optional[asyncio.Task] = None
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(base_url=self.base_url, trust_env=True)
+            self.signed_in = False
+        return self.session
+
+    async def sign_in(self) -> None:
+        async with self.sign_in_lock:
+            if self.signed_in:
+                return
+
+            session = self.get_session()
+            # password authentication
+            if self.password and not self.token:
+                async with session.get("/login") as response:
+                    response.raise_for_status()
+                    xsrf_token = response.cookies["_xsrf"].value
+                    if not xsrf_token:
+                        raise ValueError("_xsrf token not found")
+                    session.cookie_jar.update_cookies(response.cookies)
+                    session.headers.update({"X-XSRFToken": xsrf_token})
+                async with session.post(
+                    "/login",
+                    data={"_xsrf": xsrf_token, "password": self.password},
+                    allow_redirects=False,
                 ) as response:
                     response.raise_for_status()
-            except Exception as err:
-                logger.exception("close kernel failed, %s", err)
-        await self.session.close()
+                    session.cookie_jar.update_cookies(response.cookies)
 
-    async def run(self) -> ResultModel:
-        try:
-            await self.sign_in()
-            await self.init_kernel()
-            await self.execute_code()
-        except Exception as err:
-            logger.exception("execute code failed, %s", err)
-            self.result.stderr = f"Error: {err}"
-        return self.result
+            self.signed_in = True
 
-    async def sign_in(self) -> None:
-        # password authentication
-        if self.password and not self.token:
-            async with self.session.get("/login") as response:
-                response.raise_for_status()
-                xsrf_token = response.cookies["_xsrf"].value
-                if not xsrf_token:
-                    raise ValueError("_xsrf token not found")
-                self.session.cookie_jar.update_cookies(response.cookies)
-                self.session.headers.update({"X-XSRFToken": xsrf_token})
-            async with self.session.post(
-                "/login",
-                data={"_xsrf": xsrf_token, "password": self.password},
-                allow_redirects=False,
+    async def request(self, method: str, path: str):
+        await self.sign_in()
+        for attempt in range(2):
+            async with self.get_session().request(
+                method, path, params=self.params
             ) as response:
+                if response.status in (401, 403) and attempt == 0:
+                    # Session expired, e.g. the Jupyter server restarted
+                    self.signed_in = False
+                    await self.sign_in()
+                    continue
+                if response.status == 404:
+                    raise KernelUnavailableError(path)
                 response.raise_for_status()
-                self.session.cookie_jar.update_cookies(response.cookies)
-
-        # token authentication
-        if self.token:
-            self.params.update({"token": self.token})
-
-    async def init_kernel(self) -> None:
-        async with self.session.post(
-            url="/api/kernels", params=self.params
-        ) as response:
-            response.raise_for_status()
-            kernel_data = await response.json()
-            self.kernel_id = kernel_data["id"]
-
-    def init_ws(self) -> (str, dict):
-        ws_base = self.base_url.replace("http", "ws")
+                if response.content_type == "application/json":
+                    return await response.json()
+                return None
+
+    async def start_kernel(self) -> JupyterKernel:
+        kernel_data = await self.request("POST", "/api/kernels")
+        return JupyterKernel(kernel_data["id"])
+
+    async def connect(self, kernel: JupyterKernel):
+        if kernel.ws is not None and kernel.ws.close_code is None:
+            return kernel.ws
+
+        ws_base = self.base_url.replace("http", "ws", 1)
         ws_params = "?" + "&".join([f"{key}={val}" for key, val in self.params.items()])
-        websocket_url = f"{ws_base}/api/kernels/{self.kernel_id}/channels{ws_params if len(ws_params) > 1 else ''}"
+        websocket_url = f"{ws_base}/api/kernels/{kernel.id}/channels{ws_params if len(ws_params) > 1 else ''}"
         ws_headers = {}
         if self.password and not self.token:
+            session = self.get_session()
             ws_headers = {
                 "Cookie": "; ".join(
-                    [
-                        f"{cookie.key}={cookie.value}"
-                        for cookie in self.session.cookie_jar
-                    ]
+                    [f"{cookie.key}={cookie.value}" for cookie in session.cookie_jar]
                 ),
-                **self.session.headers,
+                **session.headers,
             }
-        return websocket_url, ws_headers
 
-    async def execute_code(self) -> None:
-        # initialize ws
-        websocket_url, ws_headers = self.init_ws()
-        # execute
-        async with websockets.connect(
+        kernel.ws = await websockets.connect(
             websocket_url, additional_headers=ws_headers
-        ) as ws:
-            await self.execute_in_jupyter(ws)
-
-    async def execute_in_jupyter(self, ws) -> None:
-        # send message
-        msg_id = uuid.uuid4().hex
-        await ws.send(
-            json.dumps(
-                {
-                    "header": {
-                        "msg_id": msg_id,
-                        "msg_type": "execute_request",
-                        "username": "user",
-                        "session": uuid.uuid4().hex,
-                        "date": "",
-                        "version": "5.3",
-                    },
-                    "parent_header": {},
-                    "metadata": {},
-                    "content": {
-                        "code": self.code,
-                        "silent": False,
-                        "store_history": True,
-                        "user_expressions": {},
-                        "allow_stdin": False,
-                        "stop_on_error": True,
-                    },
-                    "channel": "shell",
-                }
-            )
         )
-        # parse message
-        stdout, stderr, result = "", "", []
+        return kernel.ws
+
+    async def shutdown_kernel(self, kernel: JupyterKernel) -> None:
+        async with self.condition:
+            # The reaper, eviction and a failed execution may race to close it
+            if kernel.closed:
+                return
+            kernel.closed = True
+            if kernel.chat_id and self.chats.get(kernel.chat_id) is kernel:
+                del self.chats[kernel.chat_id]
+            if kernel in self.idle:
+                self.idle.remove(kernel)
+        try:
+            if kernel.ws is not None:
+                await kernel.ws.close()
+            await self.request("DELETE", f"/api/kernels/{kernel.id}")
+        except KernelUnavailableError:
+            pass
+        except Exception as err:
+            logger.exception("close kernel failed, %s", err)
+        finally:
+            async with self.condition:
+                self.kernel_count -= 1
+                self.condition.notify()
+
+    def ensure_background_tasks(self) -> None:
+        if self.reaper_task is None or self.reaper_task.done():
+            self.reaper_task = asyncio.create_task(self.reap_idle_kernels())
+        if JUPYTER_KERNEL_POOL_SIZE and (
+            self.warm_up_task is None or self.warm_up_task.done()
+        ):
+            self.warm_up_task = asyncio.create_task(self.warm_up())
+
+    async def warm_up(self) -> None:
         while True:
+            async with self.condition:
+                if (
+                    len(self.idle) >= JUPYTER_KERNEL_POOL_SIZE
+                    or self.kernel_count >= JUPYTER_KERNEL_POOL_MAX_KERNELS
+                ):
+                    return
+                self.kernel_count += 1
+
+            kernel = None
+            try:
+                kernel = await self.start_kernel()
+                await self.connect(kernel)
+            except Exception as err:
+                logger.warning(f"Could not pre-warm Jupyter kernel: {err}")
+                if kernel is not None:
+                    # Don't leave the started kernel running on the server
+                    await self.shutdown_kernel(kernel)
+                else:
+                    async with self.condition:
+                        self.kernel_count -= 1
+                        self.condition.notify()
+                return
+
+            async with self.condition:
+                self.idle.append(kernel)
+                self.condition.notify()
+
+    async def reap_idle_kernels(self) -> None:
+        while True:
+            await asyncio.sleep(min(JUPYTER_KERNEL_IDLE_TIMEOUT, 60))
+            cutoff = time.monotonic() - JUPYTER_KERNEL_IDLE_TIMEOUT
+            for kernel in list(self.chats.values()):
+                if kernel.last_used < cutoff and not kernel.lock.locked():
+                    logger.debug(f"Shutting down idle Jupyter kernel {kernel.id}")
+                    await self.shutdown_kernel(kernel)
+
+    def evict_least_recently_used(self) -> Optional[JupyterKernel]:
+        candidates = [
+            kernel for kernel in self.chats.values() if not kernel.lock.locked()
+        ]
+        if not candidates:
+            return None
+        kernel = min(candidates, key=lambda kernel: kernel.last_used)
+        del self.chats[kernel.chat_id]
+        return kernel
+
+    async def acquire(self, chat_id: Optional[str] = None) -> JupyterKernel:
+        if chat_id and chat_id in self.chats:
+            return self.chats[chat_id]
+
+        kernel = None
+        while kernel is None:
+            evicted = None
+            async with self.condition:
+                if self.idle:
+                    kernel = self.idle.pop()
+                elif self.kernel_count < JUPYTER_KERNEL_POOL_MAX_KERNELS:
+                    self.kernel_count += 1
+                    break
+                else:
+                    evicted = self.evict_least_recently_used()
+                    if evicted is None:
+                        await self.condition.wait()
+            if evicted is not None:
+                await self.shutdown_kernel(evicted)
+
+        if kernel is None:
+            try:
+                kernel = await self.start_kernel()
+            except BaseException:
+                async with self.condition:
+                    self.kernel_count -= 1
+                    self.condition.notify()
+                raise
+
+        if chat_id:
+            if chat_id in self.chats:
+                # Another execution for this chat got a kernel first
+                async with self.condition:
+                    self.idle.append(kernel)
+                    self.condition.notify()
+                return self.chats[chat_id]
+            kernel.chat_id = chat_id
+            self.chats[chat_id] = kernel
+
+        # Refill the warm pool and make sure idle chat kernels get reaped
+        self.ensure_background_tasks()
+        return kernel
+
+    async def run(self, kernel: JupyterKernel, code: str, timeout: int) -> ResultModel:
+        async with kernel.lock:
+            if kernel.closed:
+                # Reaped or evicted between acquire and run
+                raise KernelUnavailableError(kernel.id)
             try:
-                # wait for message
-                message = await asyncio.wait_for(ws.recv(), self.timeout)
-                message_data = json.loads(message)
-                # msg id not match, skip
-                if message_data.get("parent_header", {}).get("msg_id") != msg_id:
+                ws = await self.connect(kernel)
+                result, timed_out = await execute_in_jupyter(
+                    ws, code, timeout, kernel.session_id
+                )
+            except (websockets.exceptions.WebSocketException, OSError) as err:
+                raise KernelUnavailableError(str(err))
+            finally:
+                kernel.last_used = time.monotonic()
+
+            if timed_out:
+                # Stop the runaway cell so the kernel is usable for the next block
+                try:
+                    await self.request("POST", f"/api/kernels/{kernel.id}/interrupt")
+                except Exception as err:
+                    logger.warning(f"Could not interrupt Jupyter kernel: {err}")
+            return result
+
+    async def execute(
+        self, code: str, chat_id: Optional[str] = None, timeout: int = 60
+    ) -> ResultModel:
+        for attempt in range(2):
+            kernel = await self.acquire(chat_id)
+            try:
+                result = await self.run(kernel, code, timeout)
+            except KernelUnavailableError:
+                # Kernel was culled or the server restarted; start over once
+                await self.shutdown_kernel(kernel)
+                if attempt == 0:
                     continue
-                # check message type
-                msg_type = message_data.get("msg_type")
-                match msg_type:
-                    case "stream":
-                        if message_data["content"]["name"] == "stdout":
-                            stdout += message_data["content"]["text"]
-                        elif message_data["content"]["name"] == "stderr":
-                            stderr += message_data["content"]["text"]
-                    case "execute_result" | "display_data":
-                        data = message_data["content"]["data"]
-                        if "image/png" in data:
-                            result.append(f"data:image/png;base64,{data['image/png']}")
-                        elif "text/plain" in data:
-                            result.append(data["text/plain"])
-                    case "error":
-                        stderr += "\n".join(message_data["content"]["traceback"])
-                    case "status":
-                        if message_data["content"]["execution_state"] == "idle":
-                            break
-
-            except asyncio.TimeoutError:
-                stderr += "\nExecution timed out."
-                break
-        self.result.stdout = stdout.strip()
-        self.result.stderr = stderr.strip()
-        self.result.result = "\n".join(result).strip() if result else ""
+                raise
+            except BaseException:
+                await self.shutdown_kernel(kernel)
+                raise
+
+            if not chat_id:
+                asyncio.create_task(self.shutdown_kernel(kernel))
+            return result
+
+    async def close(self) -> None:
+        for task in (self.warm_up_task, self.reaper_task):
+            if task is not None:
+                task.cancel()
+        for kernel in [*self.idle, *self.chats.values()]:
+            await self.shutdown_kernel(kernel)
+        self.idle.clear()
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+
+KERNEL_POOLS: dict[tuple[str, str, str], JupyterKernelPool] = {}
+
+
+def get_kernel_pool(
+    base_url: str, token: str = "", password: str = ""
+) -> JupyterKernelPool:
+    key = (base_url.rstrip("/"), token or "", password or "")
+    pool = KERNEL_POOLS.get(key)
+    if pool is None:
+        pool = JupyterKernelPool(*key)
+        KERNEL_POOLS[key] = pool
+    return pool
+
+
+async def close_kernel_pools() -> None:
+    for pool in KERNEL_POOLS.values():
+        await pool.close()
+    KERNEL_POOLS.clear()
 
 
 async def execute_code_jupyter(
-    base_url: str, code: str, token: str = "", password: str = "", timeout: int = 60
+    base_url: str,
+    code: str,
+    token: str = "",
+    password: str = "",
+    timeout: int = 60,
+    chat_id: Optional[str] = None,
 ) -> dict:
-    async with JupyterCodeExecuter(
-        base_url, code, token, password, timeout
-    ) as executor:
-        result = await executor.run()
-        return result.model_dump()
+    """
+    Execute `code` on a pooled kernel. With `chat_id` the chat's kernel is
+    reused, so state carries over between the chat's code blocks.
+    """
+    try:
+        result = await get_kernel_pool(base_url, token, password).execute(
+            code, chat_id=chat_id, timeout=timeout
+        )
+    except Exception as err:
+        logger.exception("execute code failed, %s", err)
+        result = ResultModel(stderr=f"Error: {err}")
+    return result.model_dump()
@@ -0,0 +1,419 @@
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from collections import OrderedDict
+from typing import AsyncIterator, Optional
+
+from open_webui.env import (
+    COMPLETION_CACHE_MAX_ENTRY_SIZE,
+    COMPLETION_CACHE_MAX_SIZE,
+    COMPLETION_CACHE_MODELS,
+    COMPLETION_CACHE_STORE,
+    COMPLETION_CACHE_TTL,
+    ENABLE_COMPLETION_CACHE,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    REDIS_URL,
+    SRC_LOG_LEVELS,
+)
+from open_webui.models.completion_cache import CompletionCacheEntries
+from open_webui.utils.redis import get_async_redis_connection, get_sentinels_from_env
+from open_webui.utils.stream import json_dumps, json_loads, parse_chunk
+from open_webui.utils.telemetry.metrics import (
+    COMPLETION_CACHE_REQUESTS,
+    COMPLETION_CACHE_SAVED_TOKENS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["OPENAI"])
+
+COMPLETION_CACHE_KEY_PREFIX = "open-webui:completion-cache:"
+
+# Request fields that do not change the generated completion
+IGNORED_PARAMS = {"stream", "stream_options", "user", "metadata"}
+
+# Characters per content delta when a cached completion is replayed as a stream
+REPLAY_CHUNK_SIZE = 256
+
+# Expired database entries are purged every this many writes
+DATABASE_PURGE_INTERVAL = 100
+
+
+def get_cache_key(url: str, payload: dict) -> str:
+    """Canonical hash of everything in the request that shapes the answer."""
+    data = {k: v for k, v in payload.items() if k not in IGNORED_PARAMS}
+    canonical = json.dumps(
+        {"url": url, **data},
+        sort_keys=True,
+        separators=(",", ":"),
+        ensure_ascii=False,
+        default=str,
+    )
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+def is_cacheable(payload: dict, model_ids: list[str]) -> bool:
+    """
+    `model_ids` are the ids the request is known by, e.g. a workspace model
+    and its base model; caching enabled for either applies.
+    """
+    if not ENABLE_COMPLETION_CACHE:
+        return False
+    if COMPLETION_CACHE_MODELS and not any(
+        model_id in COMPLETION_CACHE_MODELS for model_id in model_ids
+    ):
+        return False
+    # Only deterministic requests can be answered from a cache
+    return payload.get("temperature") == 0 and payload.get("n", 1) == 1
+
+
+####################
+# Completions
+#
+# A completion is cached in a form independent of how it was requested:
+# {"model", "content", "reasoning_content", "tool_calls", "finish_reason",
+# "usage"}, so a streamed answer can serve a non-streamed request and the
+# other way around.
+####################
+
+
+def completion_from_response(response: dict) -> Optional[dict]:
+    choices = response.get("choices") or []
+    if len(choices) != 1 or "message" not in choices[0]:
+        return None
+
+    message = choices[0]["message"] or {}
+    return {
+        "model": response.get("model"),
+        "content": message.get("content") or "",
+        "reasoning_content": message.get("reasoning_content"),
+        "tool_calls": message.get("tool_calls"),
+        "finish_reason": choices[0].get("finish_reason") or "stop",
+        "usage": response.get("usage"),
+    }
+
+
+class CompletionRecorder:
+    """Rebuilds a completion from the chunks of a streamed response."""
+
+    def __init__(self):
+        self.model = None
+        self.content = []
+        self.reasoning_content = []
+        self.tool_calls: dict[int, dict] = {}
+        self.finish_reason = None
+        self.usage = None
+        self.failed = False
+
+    def feed(self, chunk: dict):
+        if "error" in chunk:
+            self.failed = True
+            return
+
+        self.model = chunk.get("model") or self.model
+        if chunk.get("usage"):
+            self.usage = chunk["usage"]
+
+        for choice in chunk.get("choices") or []:
+            if choice.get("index", 0) != 0:
+                self.failed = True
+                return
+
+            delta = choice.get("delta") or {}
+            if delta.get("content"):
+                self.content.append(delta["content"])
+
+            reasoning_content = delta.get("reasoning_content") or delta.get("reasoning")
+            if reasoning_content:
+                self.reasoning_content.append(reasoning_content)
+
+            for delta_tool_call in delta.get("tool_calls") or []:
+                index = delta_tool_call.get("index", 0)
+                function = delta_tool_call.get("function") or {}
+
+                tool_call = self.tool_calls.setdefault(
+                    index,
+                    {
+                        "id": delta_tool_call.get("id"),
+                        "type": delta_tool_call.get("type", "function"),
+                        "function": {"name": "", "arguments": ""},
+                    },
+                )
+                tool_call["id"] = tool_call["id"] or delta_tool_call.get("id")
+                tool_call["function"]["name"] += function.get("name") or ""
+                tool_call["function"]["arguments"] += function.get("arguments") or ""
+
+            if choice.get("finish_reason"):
+                self.finish_reason = choice["finish_reason"]
+
+    def completion(self) -> Optional[dict]:
+        # Streams that failed or ended early are not cached
+        if self.failed or self.finish_reason is None:
+            return None
+
+        return {
+            "model": self.model,
+            "content": "".join(self.content),
+            "reasoning_content": "".join(self.reasoning_content) or None,
+            "tool_calls": (
+                [self.tool_calls[index] for index in sorted(self.tool_calls)]
+                if self.tool_calls
+                else None
+            ),
+            "finish_reason": self.finish_reason,
+            "usage": self.usage,
+        }
+
+
+def completion_to_response(completion: dict, model: str) -> dict:
+    message = {"role": "assistant", "content": completion["content"]}
+    if completion.get("reasoning_content"):
+        message["reasoning_content"] = completion["reasoning_content"]
+    if completion.get("tool_calls"):
+        message["tool_calls"] = completion["tool_calls"]
+
+    return {
+        "id": f"chatcmpl-{uuid.uuid4()}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": completion.get("model") or model,
+        "choices": [
+            {
+                "index": 0,
+                "message": message,
+                "logprobs": None,
+                "finish_reason": completion["finish_reason"],
+            }
+        ],
+        **({"usage": completion["usage"]} if completion.get("usage") else {}),
+    }
+
+
+def completion_to_chunks(completion: dict, model: str) -> list[dict]:
+    """The chunks an OpenAI-compatible backend streams for this completion."""
+    id = f"chatcmpl-{uuid.uuid4()}"
+    created = int(time.time())
+    model = completion.get("model") or model
+
+    def chunk(delta: dict, finish_reason: Optional[str] = None) -> dict:
+        return {
+            "id": id,
+            "object": "chat.completion.chunk",
+            "created": created,
+            "model": model,
+            "choices": [
+                {
+                    "index": 0,
+                    "delta": delta,
+                    "logprobs": None,
+                    "finish_reason": finish_reason,
+                }
+            ],
+        }
+
+    chunks = [chunk({"role": "assistant", "content": ""})]
+
+    reasoning_content = completion.get("reasoning_content") or ""
+    for start in range(0, len(reasoning_content), REPLAY_CHUNK_SIZE):
+        chunks.append(
+            chunk(
+                {
+                    "reasoning_content": reasoning_content[
+                        start : start + REPLAY_CHUNK_SIZE
+                    ]
+                }
+            )
+        )
+
+    content = completion.get("content") or ""
+    for start in range(0, len(content), REPLAY_CHUNK_SIZE):
+        chunks.append(chunk({"content": content[start : start + REPLAY_CHUNK_SIZE]}))
+
+    for index, tool_call in enumerate(completion.get("tool_calls") or []):
+        chunks.append(chunk({"tool_calls": [{"index": index, **tool_call}]}))
+
+    chunks.append(chunk({}, completion["finish_reason"]))
+
+    if completion.get("usage"):
+        chunks.append(
+            {
+                "id": id,
+                "object": "chat.completion.chunk",
+                "created": created,
+                "model": model,
+                "choices": [],
+                "usage": completion["usage"],
+            }
+        )
+
+    return chunks
+
+
+async def replay_completion(completion: dict, model: str) -> AsyncIterator:
+    for chunk in completion_to_chunks(completion, model):
+        yield chunk
+    yield "data: [DONE]\n\n"
+
+
+####################
+# Cache
+####################
+
+
+class CompletionCache:
+    """
+    Two-tier cache of chat completions keyed by `get_cache_key`.
+
+    Each worker keeps a size-bounded LRU in memory. Behind it, a shared store
+    (Redis, or the completion_cache table) lets workers reuse each other's
+    completions; entries found there are promoted into memory. Both tiers
+    expire entries after `ttl` seconds, and completions larger than
+    `max_entry_size` bytes are not cached.
+    """
+
+    def __init__(
+        self,
+        ttl: int,
+        max_size: int,
+        max_entry_size: int,
+        store: str = "",
+        redis_url: str = "",
+        redis_sentinels=[],
+    ):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.max_entry_size = max_entry_size
+        self.entries: OrderedDict[str, tuple[float, dict]] = OrderedDict()
+
+        self.store = store or ("redis" if redis_url else "memory")
+        self.redis = None
+        self.writes = 0
+
+        if self.store == "redis":
+            try:
+                self.redis = get_async_redis_connection(
+                    redis_url, redis_sentinels, decode_responses=True
+                )
+            except Exception as e:
+                log.warning(f"Completion cache Redis store disabled: {e}")
+                self.store = "memory"
+
+    def get_local(self, key: str) -> Optional[dict]:
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+
+        expires_at, completion = entry
+        if expires_at < time.time():
+            del self.entries[key]
+            return None
+
+        self.entries.move_to_end(key)
+        return completion
+
+    def set_local(self, key: str, completion: dict, expires_at: float):
+        self.entries[key] = (expires_at, completion)
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def get_shared(self, key: str) -> Optional[dict]:
+        data = None
+        if self.store == "redis" and self.redis is not None:
+            data = await self.redis.get(f"{COMPLETION_CACHE_KEY_PREFIX}{key}")
+        elif self.store == "database":
+            data = await asyncio.to_thread(
+                CompletionCacheEntries.get_entry_data_by_id, key
+            )
+        return json_loads(data) if data else None
+
+    async def set_shared(self, key: str, model: str, data: str):
+        if self.store == "redis" and self.redis is not None:
+            await self.redis.set(
+                f"{COMPLETION_CACHE_KEY_PREFIX}{key}", data, ex=self.ttl
+            )
+        elif self.store == "database":
+            await asyncio.to_thread(
+                CompletionCacheEntries.upsert_entry, key, model, data, self.ttl
+            )
+
+            self.writes += 1
+            if self.writes % DATABASE_PURGE_INTERVAL == 0:
+                await asyncio.to_thread(CompletionCacheEntries.delete_expired_entries)
+
+    async def get(self, key: str, model: str) -> Optional[dict]:
+        tier = "memory"
+        completion = self.get_local(key)
+
+        if completion is None and self.store != "memory":
+            tier = self.store
+            try:
+                completion = await self.get_shared(key)
+            except Exception as e:
+                log.warning(f"Completion cache lookup failed: {e}")
+
+            if completion is not None:
+                self.set_local(key, completion, time.time() + self.ttl)
+
+        if completion is None:
+            COMPLETION_CACHE_REQUESTS.add(
+                1, {"model": model, "result": "miss", "tier": "none"}
+            )
+            return None
+
+        COMPLETION_CACHE_REQUESTS.add(
+            1, {"model": model, "result": "hit", "tier": tier}
+        )
+        usage = completion.get("usage") or {}
+        tokens = usage.get("total_tokens") or (
+            (usage.get("prompt_tokens") or 0) + (usage.get("completion_tokens") or 0)
+        )
+        if tokens:
+            COMPLETION_CACHE_SAVED_TOKENS.add(tokens, {"model": model})
+        return completion
+
+    async def set(self, key: str, model: str, completion: dict):
+        data = json_dumps(completion)
+        if len(data) > self.max_entry_size:
+            return
+
+        self.set_local(key, completion, time.time() + self.ttl)
+        try:
+            await self.set_shared(key, model, data)
+        except Exception as e:
+            log.warning(f"Completion cache write failed: {e}")
+
+    async def record_stream(
+        self, key: str, model: str, iterator: AsyncIterator
+    ) -> AsyncIterator:
+        """
+        Pass a streamed response through unchanged and cache the completion
+        once the stream has finished cleanly.
+        """
+        recorder = CompletionRecorder()
+        async for line in iterator:
+            if not recorder.failed:
+                try:
+                    chunk = parse_chunk(line)
+                    if chunk is not None:
+                        recorder.feed(chunk)
+                except Exception:
+                    recorder.failed = True
+            yield line
+
+        completion = recorder.completion()
+        if completion is not None:
+            await self.set(key, model, completion)
+
+
+COMPLETION_CACHE = CompletionCache(
+    ttl=COMPLETION_CACHE_TTL,
+    max_size=COMPLETION_CACHE_MAX_SIZE,
+    max_entry_size=COMPLETION_CACHE_MAX_ENTRY_SIZE,
+    store=COMPLETION_CACHE_STORE if ENABLE_COMPLETION_CACHE else "memory",
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
@@ -0,0 +1,287 @@
+import html
+import json
+import time
+from typing import Optional
+
+from open_webui.env import CHAT_STREAM_SNAPSHOT_INTERVAL
+
+
+def split_content_and_whitespace(content):
+    content_stripped = content.rstrip()
+    original_whitespace = (
+        content[len(content_stripped) :] if len(content) > len(content_stripped) else ""
+    )
+    return content_stripped, original_whitespace
+
+
+def is_opening_code_block(content):
+    backtick_segments = content.split("```")
+    # Even number of segments means the last backticks are opening a new block
+    return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
+
+
+def quote_reasoning(content: str) -> str:
+    return "\n".join(
+        (f"> {line}" if not line.startswith(">") else line)
+        for line in content.splitlines()
+    )
+
+
+def serialize_content_block(
+    content: str,
+    block: dict,
+    raw: bool = False,
+    reasoning_display_content: Optional[str] = None,
+) -> str:
+    """
+    Append the serialized form of one block to the content serialized so far.
+
+    `reasoning_display_content` may carry the already quoted content of a
+    reasoning block so streaming callers do not have to quote it again.
+    """
+    if block["type"] == "text":
+        content = f"{content}{block['content'].strip()}\n"
+    elif block["type"] == "tool_calls":
+        tool_calls = block.get("content", [])
+        results = block.get("results", [])
+
+        if results:
+
+            tool_calls_display_content = ""
+            for tool_call in tool_calls:
+
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_result = None
+                tool_result_files = None
+                for result in results:
+                    if tool_call_id == result.get("tool_call_id", ""):
+                        tool_result = result.get("content", None)
+                        tool_result_files = result.get("files", None)
+                        break
+
+                if tool_result:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
+                else:
+                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+        else:
+            tool_calls_display_content = ""
+
+            for tool_call in tool_calls:
+                tool_call_id = tool_call.get("id", "")
+                tool_name = tool_call.get("function", {}).get("name", "")
+                tool_arguments = tool_call.get("function", {}).get("arguments", "")
+
+                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
+
+            if not raw:
+                content = f"{content}\n{tool_calls_display_content}\n\n"
+
+    elif block["type"] == "reasoning":
+        if reasoning_display_content is None:
+            reasoning_display_content = quote_reasoning(block["content"])
+
+        reasoning_duration = block.get("duration", None)
+
+        if reasoning_duration is not None:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
+            else:
+                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
+
+    elif block["type"] == "code_interpreter":
+        attributes = block.get("attributes", {})
+        output = block.get("output", None)
+        lang = attributes.get("lang", "")
+
+        content_stripped, original_whitespace = split_content_and_whitespace(content)
+        if is_opening_code_block(content_stripped):
+            # Remove trailing backticks that would open a new block
+            content = content_stripped.rstrip("`").rstrip() + original_whitespace
+        else:
+            # Keep content as is - either closing backticks or no backticks
+            content = content_stripped + original_whitespace
+
+        if output:
+            output = html.escape(json.dumps(output))
+
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+        else:
+            if raw:
+                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
+            else:
+                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
+
+    else:
+        block_content = str(block["content"]).strip()
+        content = f"{content}{block['type']}: {block_content}\n"
+
+    return content
+
+
+def serialize_content_blocks(content_blocks: list[dict], raw: bool = False) -> str:
+    content = ""
+    for block in content_blocks:
+        content = serialize_content_block(content, block, raw)
+    return content.strip()
+
+
+def common_prefix_length(a: str, b: str) -> int:
+    """Length of the longest common prefix, found with C-level comparisons."""
+    if b.startswith(a):
+        return len(a)
+
+    # Binary search that only compares the still undecided range, so the
+    # total work stays linear in the length of the strings
+    low, high = 0, min(len(a), len(b))
+    while low < high:
+        mid = (low + high + 1) // 2
+        if b.startswith(a[low:mid], low):
+            low = mid
+        else:
+            high = mid - 1
+    return low
+
+
+def utf16_length(text: str) -> int:
+    """Length of `text` in UTF-16 code units, the way JavaScript counts it."""
+    if text.isascii():
+        return len(text)
+    return len(text.encode("utf-16-le")) // 2
+
+
+class ContentBlockSerializer:
+    """
+    Incremental `serialize_content_blocks` for a streaming response.
+
+    Only the last block changes while tokens arrive, so the serialization of
+    the blocks before it is kept until the list of blocks changes, and a
+    streaming reasoning block keeps its quoted lines up to the last newline.
+    Blocks other than the last one must not be modified in place.
+    """
+
+    def __init__(self):
+        self.prefix_blocks: list[dict] = []
+        self.prefix = ""
+
+        self.reasoning_block: Optional[dict] = None
+        self.reasoning_head = ""
+        self.reasoning_quoted = ""
+
+    def has_prefix(self, blocks: list[dict]) -> bool:
+        return len(blocks) == len(self.prefix_blocks) and all(
+            block is cached for block, cached in zip(blocks, self.prefix_blocks)
+        )
+
+    def quote_reasoning(self, block: dict) -> str:
+        content = block["content"]
+
+        if block is not self.reasoning_block or not content.startswith(
+            self.reasoning_head
+        ):
+            self.reasoning_block = block
+            self.reasoning_head = ""
+            self.reasoning_quoted = ""
+
+        # Complete lines never change once their newline has arrived
+        head_end = content.rfind("\n") + 1
+        if head_end > len(self.reasoning_head):
+            quoted = quote_reasoning(content[len(self.reasoning_head) : head_end])
+            self.reasoning_quoted = (
+                f"{self.reasoning_quoted}\n{quoted}" if self.reasoning_head else quoted
+            )
+            self.reasoning_head = content[:head_end]
+
+        tail = content[head_end:]
+        if not tail:
+            return self.reasoning_quoted
+
+        quoted = quote_reasoning(tail)
+        return f"{self.reasoning_quoted}\n{quoted}" if self.reasoning_head else quoted
+
+    def serialize(self, content_blocks: list[dict]) -> str:
+        if not content_blocks:
+            return ""
+
+        blocks, block = content_blocks[:-1], content_blocks[-1]
+        if not self.has_prefix(blocks):
+            content = ""
+            for prefix_block in blocks:
+                content = serialize_content_block(content, prefix_block)
+            self.prefix_blocks = blocks
+            self.prefix = content
+
+        return serialize_content_block(
+            self.prefix,
+            block,
+            reasoning_display_content=(
+                self.quote_reasoning(block) if block["type"] == "reasoning" else None
+            ),
+        ).strip()
+
+
+class ChatContentStream:
+    """
+    Builds the `chat:completion` payloads for one streaming message.
+
+    Instead of the full content, most events carry a delta
+    `{"offset": n, "content": text}`: the client keeps the first n characters
+    of the content it has and appends text. The offset counts UTF-16 code
+    units, as JavaScript strings do, so characters outside the BMP (e.g.
+    emoji) count twice. Appended tokens are pure appends;
+    changes inside the last block (a reasoning block closing, code output
+    arriving) resend the content from the first changed character. A full
+    snapshot goes out on the first event and then at most every
+    CHAT_STREAM_SNAPSHOT_INTERVAL seconds so clients that missed events
+    resync. Every payload carries a sequence number for gap detection.
+    """
+
+    def __init__(self, snapshot_interval: float = CHAT_STREAM_SNAPSHOT_INTERVAL):
+        self.serializer = ContentBlockSerializer()
+        self.snapshot_interval = snapshot_interval
+        self.content = ""
+        self.seq = 0
+        self.snapshot_at: Optional[float] = None
+
+    def serialize(self, content_blocks: list[dict]) -> str:
+        return self.serializer.serialize(content_blocks)
+
+    def update(self, content: str, snapshot: bool = False) -> dict:
+        self.seq += 1
+        offset = common_prefix_length(self.content, content)
+        self.content = content
+
+        now = time.monotonic()
+        if (
+            snapshot
+            or offset == 0
+            or self.snapshot_interval <= 0
+            or self.snapshot_at is None
+            or now - self.snapshot_at >= self.snapshot_interval
+        ):
+            self.snapshot_at = now
+            return {"content": content, "seq": self.seq}
+
+        return {
+            "delta": {
+                "offset": utf16_length(content[:offset]),
+                "content": content[offset:],
+            },
+            "seq": self.seq,
+        }
+
+    def event(self, content_blocks: list[dict], snapshot: bool = False) -> dict:
+        return self.update(self.serialize(content_blocks), snapshot)
@@ -4,6 +4,7 @@ import logging
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.models.functions import Functions
 from open_webui.env import SRC_LOG_LEVELS
+from open_webui.utils.telemetry.metrics import FILTER_DURATION, record_duration
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -60,9 +61,11 @@ async def process_filter_functions(
 
         # Apply valves to the function
         if hasattr(function_module, "valves") and hasattr(function_module, "Valves"):
-            valves = Functions.get_function_valves_by_id(filter_id)
-            function_module.valves = function_module.Valves(
-                **(valves if valves else {})
+            function_module.valves = request.app.state.FUNCTIONS.get_valves(
+                filter_id,
+                lambda: function_module.Valves(
+                    **(Functions.get_function_valves_by_id(filter_id) or {})
+                ),
             )
 
         try:
@@ -95,10 +98,13 @@ async def process_filter_functions(
                         log.exception(f"Failed to get user values: {e}")
 
             # Execute handler
-            if inspect.iscoroutinefunction(handler):
-                form_data = await handler(**params)
-            else:
-                form_data = handler(**params)
+            with record_duration(
+                FILTER_DURATION, {"filter_id": filter_id, "filter_type": filter_type}
+            ):
+                if inspect.iscoroutinefunction(handler):
+                    form_data = await handler(**params)
+                else:
+                    form_data = handler(**params)
 
         except Exception as e:
             log.debug(f"Error in {filter_type} handler {filter_id}: {e}")
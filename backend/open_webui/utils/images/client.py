@@ -0,0 +1,142 @@
+import asyncio
+import logging
+import tempfile
+from contextlib import asynccontextmanager
+from typing import Optional
+
+import aiohttp
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION,
+    IMAGE_GENERATION_CONCURRENCY,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["IMAGES"])
+
+# Images up to this size stay in memory while they are written to storage
+SPOOL_MAX_SIZE = 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+
+
+class ImageGenerationClient:
+    """
+    Pooled HTTP client for one image generation backend.
+
+    Generation requests hold one of the backend's IMAGE_GENERATION_CONCURRENCY
+    slots while they run; further requests wait in FIFO order instead of
+    piling onto the GPU. Image downloads share the connection pool but do not
+    take a slot.
+    """
+
+    def __init__(self, engine: str, base_url: str):
+        self.engine = engine
+        self.base_url = base_url
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.semaphore = asyncio.Semaphore(IMAGE_GENERATION_CONCURRENCY)
+        self.active = 0
+        self.waiting = 0
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=IMAGE_GENERATION_CONCURRENCY * 4),
+                timeout=aiohttp.ClientTimeout(
+                    total=AIOHTTP_CLIENT_TIMEOUT_IMAGE_GENERATION
+                ),
+                trust_env=True,
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    @asynccontextmanager
+    async def slot(self):
+        """Wait for and hold one of the backend's generation slots."""
+        self.waiting += 1
+        if self.semaphore.locked():
+            log.debug(
+                f"{self.engine} at {self.base_url} busy, "
+                f"{self.waiting} image generation request(s) queued"
+            )
+        try:
+            await self.semaphore.acquire()
+        finally:
+            self.waiting -= 1
+
+        self.active += 1
+        try:
+            yield
+        finally:
+            self.active -= 1
+            self.semaphore.release()
+
+    async def request_json(
+        self,
+        method: str,
+        url: str,
+        payload: Optional[dict] = None,
+        headers: Optional[dict] = None,
+    ):
+        async with self.get_session().request(
+            method, url, json=payload, headers=headers
+        ) as response:
+            data = await response.json(content_type=None)
+            if response.status >= 400:
+                error = data
+                if isinstance(data, dict) and "error" in data:
+                    error = data["error"]
+                    if isinstance(error, dict):
+                        error = error.get("message", error)
+                raise Exception(error)
+            return data
+
+    async def generate(
+        self, url: str, payload: dict, headers: Optional[dict] = None
+    ) -> dict:
+        async with self.slot():
+            return await self.request_json("POST", url, payload, headers)
+
+    async def download(self, url: str, headers: Optional[dict] = None):
+        """
+        Stream an image into a spooled temporary file.
+
+        Returns (file, content_type), or None when the URL does not point to
+        an image. The file is positioned at the start.
+        """
+        async with self.get_session().get(url, headers=headers) as response:
+            response.raise_for_status()
+            content_type = response.headers.get("content-type", "")
+            if content_type.split("/")[0] != "image":
+                log.error("Url does not point to an image.")
+                return None
+
+            file = tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_SIZE)
+            try:
+                async for chunk in response.content.iter_chunked(CHUNK_SIZE):
+                    file.write(chunk)
+            except BaseException:
+                file.close()
+                raise
+
+        file.seek(0)
+        return file, content_type
+
+
+IMAGE_GENERATION_CLIENTS: dict[tuple[str, str], ImageGenerationClient] = {}
+
+
+def get_image_generation_client(engine: str, base_url: str) -> ImageGenerationClient:
+    key = (engine, base_url)
+    client = IMAGE_GENERATION_CLIENTS.get(key)
+    if client is None:
+        client = ImageGenerationClient(engine, base_url)
+        IMAGE_GENERATION_CLIENTS[key] = client
+    return client
+
+
+async def close_image_generation_clients():
+    for client in IMAGE_GENERATION_CLIENTS.values():
+        await client.close()
@@ -0,0 +1,159 @@
+"""
+Import time profile of the backend, built from ``python -X importtime``.
+
+Heavy libraries (model runtimes, cloud SDKs, vector database clients,
+document loaders, audio and browser tooling) are imported on first use; ``open-webui importtime`` checks that importing
+``open_webui.main`` stays within a time budget and loads none of them.
+"""
+
+import re
+import subprocess
+import sys
+from collections import defaultdict
+from dataclasses import dataclass, field
+from typing import Optional
+
+# Seconds allowed to import open_webui.main. Measured at 3.3-4.3s with the
+# SQLite database, most of it spent in the migrations and config.py.
+IMPORT_TIME_BUDGET = 6.0
+
+# Modules that must only be imported when the feature using them is enabled
+DEFERRED_MODULES = [
+    "torch",
+    "sentence_transformers",
+    "onnxruntime",
+    "colbert",
+    "faster_whisper",
+    "boto3",
+    "google.cloud.storage",
+    "azure.storage.blob",
+    "azure.identity",
+    "pydub",
+    "playwright",
+    "langchain_community",
+    "chromadb",
+]
+
+
+@dataclass
+class ImportEntry:
+    name: str
+    self_us: int
+    cumulative_us: int
+    children: list["ImportEntry"] = field(default_factory=list)
+
+
+@dataclass
+class ImportReport:
+    module: str
+    total: float  # seconds
+    packages: list[tuple[str, float]]  # self time by top-level package
+    deferred: dict[str, list[str]]  # deferred module -> chain of importers
+
+    def exceeds(self, budget: float) -> bool:
+        return self.total > budget or bool(self.deferred)
+
+    def format(self, budget: float, top: int = 25) -> str:
+        lines = [
+            f"Import time of {self.module}: {self.total:.2f}s (budget {budget:.2f}s)"
+        ]
+        lines.append("")
+        lines.append(f"{'self time':>10}  package")
+        for package, seconds in self.packages[:top]:
+            lines.append(f"{seconds:>9.3f}s  {package}")
+
+        if self.deferred:
+            lines.append("")
+            lines.append("Modules that should be imported on first use:")
+            for name, chain in self.deferred.items():
+                lines.append(f"  {name}: {' > '.join(chain)}")
+        return "\n".join(lines)
+
+
+def parse_importtime(output: str) -> list[ImportEntry]:
+    """
+    Parses the stderr of ``python -X importtime`` into a tree. Modules are
+    printed after the modules they import, indented two spaces per level.
+    """
+    pending = defaultdict(list)  # depth -> entries waiting for their importer
+    for line in output.splitlines():
+        if not line.startswith("import time:"):
+            continue
+        try:
+            self_us, cumulative_us, name = line[len("import time:") :].split("|")
+            self_us, cumulative_us = int(self_us), int(cumulative_us)
+        except ValueError:
+            continue  # header
+
+        name = name[1:]
+        depth = (len(name) - len(name.lstrip(" "))) // 2
+        entry = ImportEntry(
+            name=name.strip(),
+            self_us=self_us,
+            cumulative_us=cumulative_us,
+            children=pending.pop(depth + 1, []),
+        )
+        pending[depth].append(entry)
+    return pending[0]
+
+
+def walk(entries: list[ImportEntry], chain: Optional[list[str]] = None):
+    for entry in entries:
+        path = (chain or []) + [entry.name]
+        yield entry, path
+        yield from walk(entry.children, path)
+
+
+def get_package_times(entries: list[ImportEntry]) -> list[tuple[str, float]]:
+    """Self time of every module summed by top-level package, slowest first."""
+    totals = defaultdict(int)
+    for entry, _ in walk(entries):
+        totals[entry.name.split(".")[0]] += entry.self_us
+    return sorted(
+        ((package, us / 1e6) for package, us in totals.items()),
+        key=lambda item: item[1],
+        reverse=True,
+    )
+
+
+def find_imports(
+    entries: list[ImportEntry], modules: list[str]
+) -> dict[str, list[str]]:
+    """Chain of importers of the first import of each of the modules."""
+    found = {}
+    for entry, chain in walk(entries):
+        for module in modules:
+            if module not in found and (
+                entry.name == module or entry.name.startswith(f"{module}.")
+            ):
+                found[module] = chain
+    return found
+
+
+def profile_imports(module: str = "open_webui.main") -> ImportReport:
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        errors = [
+            line
+            for line in result.stderr.splitlines()
+            if not line.startswith("import time:")
+        ]
+        error = errors[-1] if errors else str(result.returncode)
+        missing = re.match(r"ModuleNotFoundError: No module named '([^']+)'", error)
+        if missing:
+            raise ModuleNotFoundError(
+                f"Importing {module} failed: {error}", name=missing.group(1)
+            )
+        raise RuntimeError(f"Importing {module} failed: {error}")
+
+    entries = parse_importtime(result.stderr)
+    return ImportReport(
+        module=module,
+        total=sum(entry.cumulative_us for entry in entries) / 1e6,
+        packages=get_package_times(entries),
+        deferred=find_imports(entries, DEFERRED_MODULES),
+    )
@@ -0,0 +1,303 @@
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional
+
+import numpy as np
+
+from open_webui.models.feedbacks import FeedbackModel, Feedbacks
+from open_webui.env import SRC_LOG_LEVELS
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+ELO_K = 32
+ELO_INITIAL_RATING = 1000
+
+
+def parse_comparison(data: Optional[dict]) -> Optional[tuple[str, list[str], int]]:
+    """
+    (model_id, opponent model ids, outcome) of an arena rating, or None when
+    the feedback is not a usable win/loss.
+    """
+    data = data or {}
+    outcome = {"1": 1, "-1": 0}.get(str(data.get("rating")))
+    if outcome is None or not data.get("model_id"):
+        return None
+    return data["model_id"], data.get("sibling_model_ids") or [], outcome
+
+
+class EloRatings:
+    """
+    Ratings and win/loss counts for a set of models. Comparisons are applied
+    in order, each one moving both models by K * (outcome - expected) scaled
+    by the comparison's weight.
+    """
+
+    def __init__(self):
+        self.index: dict[str, int] = {}
+        self.ratings: list[float] = []
+        self.won: list[int] = []
+        self.lost: list[int] = []
+
+    def _model(self, model_id: str) -> int:
+        idx = self.index.get(model_id)
+        if idx is None:
+            idx = len(self.ratings)
+            self.index[model_id] = idx
+            self.ratings.append(float(ELO_INITIAL_RATING))
+            self.won.append(0)
+            self.lost.append(0)
+        return idx
+
+    def apply(self, model_a: str, opponents: list[str], outcome: int, weight=1.0):
+        a = self._model(model_a)
+        for model_b in opponents:
+            b = self._model(model_b)
+            ratings = self.ratings
+            expected_a = 1 / (1 + 10 ** ((ratings[b] - ratings[a]) / 400))
+            change = ELO_K * (outcome - expected_a) * weight
+            ratings[a] += change
+            ratings[b] -= change
+
+            if outcome == 1:
+                self.won[a] += 1
+                self.lost[b] += 1
+            else:
+                self.lost[a] += 1
+                self.won[b] += 1
+
+    @classmethod
+    def from_comparisons(
+        cls, comparisons: list[tuple[str, list[str], int]], weights=None
+    ) -> "EloRatings":
+        """
+        Full recompute. Pairs are encoded as index arrays once and win/loss
+        counts are computed with NumPy; only the rating updates, which depend
+        on the previous ones, run as a loop, and zero-weight pairs are skipped.
+        """
+        elo = cls()
+        pairs_a, pairs_b, outcomes, pair_weights = [], [], [], []
+        for i, (model_a, opponents, outcome) in enumerate(comparisons):
+            a = elo._model(model_a)
+            weight = 1.0 if weights is None else float(weights[i])
+            for model_b in opponents:
+                pairs_a.append(a)
+                pairs_b.append(elo._model(model_b))
+                outcomes.append(outcome)
+                pair_weights.append(weight)
+
+        if not pairs_a:
+            return elo
+
+        pairs_a = np.asarray(pairs_a)
+        pairs_b = np.asarray(pairs_b)
+        outcomes = np.asarray(outcomes)
+        size = len(elo.ratings)
+
+        elo.won = (
+            np.bincount(pairs_a[outcomes == 1], minlength=size)
+            + np.bincount(pairs_b[outcomes == 0], minlength=size)
+        ).tolist()
+        elo.lost = (
+            np.bincount(pairs_a[outcomes == 0], minlength=size)
+            + np.bincount(pairs_b[outcomes == 1], minlength=size)
+        ).tolist()
+
+        ratings = elo.ratings
+        for a, b, outcome, weight in zip(
+            pairs_a.tolist(), pairs_b.tolist(), outcomes.tolist(), pair_weights
+        ):
+            if weight == 0:
+                continue
+            expected_a = 1 / (1 + 10 ** ((ratings[b] - ratings[a]) / 400))
+            change = ELO_K * (outcome - expected_a) * weight
+            ratings[a] += change
+            ratings[b] -= change
+
+        return elo
+
+    def to_list(self) -> list[dict]:
+        return [
+            {
+                "model_id": model_id,
+                "rating": round(self.ratings[idx]),
+                "won": self.won[idx],
+                "lost": self.lost[idx],
+                "count": self.won[idx] + self.lost[idx],
+            }
+            for model_id, idx in self.index.items()
+        ]
+
+
+class Leaderboard:
+    """
+    Server-side arena leaderboard.
+
+    Keeps every usable comparison (in creation order) and the resulting Elo
+    ratings in memory. New feedback is applied incrementally; edits and
+    deletes mark the ratings dirty and the next read recomputes them. Reads
+    also compare the feedback table's row count and latest update time with
+    what this process has seen, so changes made by other workers trigger a
+    reload.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.comparisons: OrderedDict[str, tuple] = OrderedDict()
+        self.tags: dict[str, list[str]] = {}
+        self.last_created_at = 0
+        self.elo: Optional[EloRatings] = None
+        self.state: Optional[tuple] = None
+        self.version = 0
+
+        self.tag_embeddings: dict[tuple[str, str], np.ndarray] = {}
+        self.query_cache: OrderedDict[tuple, list[dict]] = OrderedDict()
+
+    def _invalidate(self):
+        self.elo = None
+        self.version += 1
+        self.query_cache.clear()
+
+    def reload(self):
+        """Reload all comparisons from the database and recompute."""
+        state = Feedbacks.get_feedbacks_state()
+        rows = Feedbacks.get_feedback_ratings()
+
+        with self.lock:
+            self.comparisons.clear()
+            self.tags.clear()
+            self.last_created_at = 0
+            for id, data, created_at in rows:
+                self._add(id, data, created_at)
+
+            self.elo = EloRatings.from_comparisons(list(self.comparisons.values()))
+            self.state = state
+            self.version += 1
+            self.query_cache.clear()
+
+        log.debug(f"Leaderboard recomputed from {len(self.comparisons)} comparisons")
+
+    def _add(self, id: str, data: Optional[dict], created_at: int) -> bool:
+        comparison = parse_comparison(data)
+        if comparison is None:
+            return False
+        self.comparisons[id] = comparison
+        self.tags[id] = (data or {}).get("tags") or []
+        self.last_created_at = max(self.last_created_at, created_at or 0)
+        return True
+
+    def _refresh_if_stale(self):
+        state = Feedbacks.get_feedbacks_state()
+        if self.elo is None or state != self.state:
+            self.reload()
+
+    def on_feedback_inserted(self, feedback: FeedbackModel):
+        with self.lock:
+            if self.state is None:
+                return
+
+            if feedback.created_at < self.last_created_at:
+                # Elo depends on order; an older comparison needs a recompute
+                self.state = None
+                self._invalidate()
+                return
+
+            count, updated_at = self.state
+            self.state = (count + 1, max(updated_at or 0, feedback.updated_at))
+
+            if self._add(feedback.id, feedback.data, feedback.created_at):
+                if self.elo is not None:
+                    self.elo.apply(*self.comparisons[feedback.id])
+                self.version += 1
+                self.query_cache.clear()
+
+    def on_feedback_changed(self):
+        """Called after feedback is updated or deleted."""
+        with self.lock:
+            self.state = None
+            self._invalidate()
+
+    def get_ratings(self) -> tuple[int, list[dict]]:
+        self._refresh_if_stale()
+        with self.lock:
+            if self.elo is None:
+                self.elo = EloRatings.from_comparisons(list(self.comparisons.values()))
+            return self.version, self.elo.to_list()
+
+    def get_ratings_by_query(
+        self,
+        query: str,
+        embed: Callable[[list[str]], list[list[float]]],
+        embedding_key: str,
+    ) -> tuple[int, list[dict]]:
+        """
+        Ratings recomputed with each comparison weighted by the highest cosine
+        similarity between `query` and the feedback's tags.
+        """
+        self._refresh_if_stale()
+
+        cache_key = (self.version, embedding_key, query)
+        with self.lock:
+            if cache_key in self.query_cache:
+                self.query_cache.move_to_end(cache_key)
+                return self.version, self.query_cache[cache_key]
+            ids = list(self.comparisons.keys())
+            comparisons = list(self.comparisons.values())
+            feedback_tags = [self.tags.get(id, []) for id in ids]
+
+        tags = sorted({tag for tag_list in feedback_tags for tag in tag_list})
+        missing = [
+            tag for tag in tags if (embedding_key, tag) not in self.tag_embeddings
+        ]
+        if missing:
+            for tag, vector in zip(missing, embed(missing)):
+                self.tag_embeddings[(embedding_key, tag)] = np.asarray(
+                    vector, dtype=np.float32
+                )
+
+        weights = np.zeros(len(comparisons), dtype=np.float32)
+        if tags:
+            tag_matrix = np.stack(
+                [self.tag_embeddings[(embedding_key, tag)] for tag in tags]
+            )
+            query_vector = np.asarray(embed([query])[0], dtype=np.float32)
+
+            norms = np.linalg.norm(tag_matrix, axis=1) * np.linalg.norm(query_vector)
+            similarities = np.divide(
+                tag_matrix @ query_vector,
+                norms,
+                out=np.zeros(len(tags), dtype=np.float32),
+                where=norms != 0,
+            )
+
+            # Max similarity over each feedback's tags, via one flat index
+            tag_index = {tag: i for i, tag in enumerate(tags)}
+            has_tags = np.array([bool(tag_list) for tag_list in feedback_tags])
+            flat = np.array(
+                [tag_index[tag] for tag_list in feedback_tags for tag in tag_list],
+                dtype=np.int64,
+            )
+            lengths = np.array([len(tag_list) for tag_list in feedback_tags])
+            if flat.size:
+                starts = np.concatenate(([0], np.cumsum(lengths[has_tags])[:-1]))
+                weights[has_tags] = np.maximum.reduceat(
+                    np.maximum(similarities[flat], 0), starts
+                )
+
+        ratings = EloRatings.from_comparisons(comparisons, weights).to_list()
+
+        with self.lock:
+            self.query_cache[cache_key] = ratings
+            while len(self.query_cache) > 32:
+                self.query_cache.popitem(last=False)
+        return self.version, ratings
+
+
+def get_query_hash(query: str) -> str:
+    return hashlib.sha256(query.encode("utf-8")).hexdigest()[:16]
+
+
+LEADERBOARD = Leaderboard()
@@ -75,7 +75,8 @@ def file_format(record: "Record"):
 
     audit_data = {
         "id": record["extra"].get("id", ""),
-        "timestamp": int(record["time"].timestamp()),
+        "timestamp": record["extra"].get("timestamp")
+        or int(record["time"].timestamp()),
         "user": record["extra"].get("user", dict()),
         "audit_level": record["extra"].get("audit_level", ""),
         "verb": record["extra"].get("verb", ""),
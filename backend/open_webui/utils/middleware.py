@@ -33,6 +33,7 @@ from open_webui.socket.main import (
 from open_webui.routers.tasks import (
     generate_queries,
     generate_title,
+    generate_titles,
     generate_image_prompt,
     generate_chat_tags,
 )
@@ -50,7 +51,7 @@ from open_webui.models.users import UserModel
 from open_webui.models.functions import Functions
 from open_webui.models.models import Models
 
-from open_webui.retrieval.utils import get_sources_from_files
+from open_webui.retrieval.utils import check_models_ready, get_sources_from_files
 
 
 from open_webui.utils.chat import generate_chat_completion
@@ -69,15 +70,33 @@ from open_webui.utils.misc import (
     prepend_to_first_user_message_content,
     convert_logit_bias_input_to_json,
 )
-from open_webui.utils.tools import get_tools
+from open_webui.utils.tools import execute_tool_calls, get_tools
 from open_webui.utils.plugin import load_function_module_by_id
 from open_webui.utils.filter import (
     get_sorted_filter_ids,
     process_filter_functions,
 )
 from open_webui.utils.code_interpreter import execute_code_jupyter
+from open_webui.utils.content_blocks import (
+    ChatContentStream,
+    serialize_content_blocks,
+)
+from open_webui.utils.stream import (
+    ChunkStreamingResponse,
+    batch_frames,
+    encode_sse,
+    parse_chunk,
+)
+from open_webui.utils.telemetry.metrics import CHAT_DB_WRITES, StreamTimer
 
 from open_webui.tasks import create_task
+from open_webui.utils.admission import ADMISSION, PRIORITY_BACKGROUND
+from open_webui.utils.background_tasks import (
+    BACKGROUND_TASKS,
+    PRIORITY_TAGS,
+    PRIORITY_TITLE,
+    BackgroundTask,
+)
 
 from open_webui.config import (
     CACHE_DIR,
@@ -89,6 +108,8 @@ from open_webui.env import (
     GLOBAL_LOG_LEVEL,
     BYPASS_MODEL_ACCESS_CONTROL,
     ENABLE_REALTIME_CHAT_SAVE,
+    BACKGROUND_TASK_DEADLINE,
+    BACKGROUND_TASK_TITLE_BATCH_SIZE,
 )
 from open_webui.constants import TASKS
 
@@ -203,15 +224,10 @@ async def chat_completion_tools_handler(
 
             result = json.loads(content)
 
-            async def tool_call_handler(tool_call):
-                nonlocal skip_files
-
+            async def execute_tool_call(tool_call):
                 log.debug(f"{tool_call=}")
 
                 tool_function_name = tool_call.get("name", None)
-                if tool_function_name not in tools:
-                    return body, {}
-
                 tool_function_params = tool_call.get("parameters", {})
 
                 try:
@@ -248,6 +264,13 @@ async def chat_completion_tools_handler(
                 except Exception as e:
                     tool_result = str(e)
 
+                return tool_result
+
+            def tool_call_handler(tool_call, tool_result):
+                nonlocal skip_files
+
+                tool_function_name = tool_call.get("name", None)
+
                 tool_result_files = []
                 if isinstance(tool_result, list):
                     for item in tool_result:
@@ -296,11 +319,23 @@ async def chat_completion_tools_handler(
                         skip_files = True
 
             # check if "tool_calls" in result
-            if result.get("tool_calls"):
-                for tool_call in result.get("tool_calls"):
-                    await tool_call_handler(tool_call)
-            else:
-                await tool_call_handler(result)
+            tool_calls = [
+                tool_call
+                for tool_call in (result.get("tool_calls") or [result])
+                if tool_call.get("name", None) in tools
+            ]
+
+            # Run the calls concurrently, then apply their results in the
+            # order the model requested them
+            tool_results = await execute_tool_calls(
+                tool_calls,
+                execute_tool_call,
+                chat_id=metadata.get("chat_id", None),
+                get_name=lambda tool_call: tool_call.get("name", ""),
+                event_emitter=extra_params.get("__event_emitter__", None),
+            )
+            for tool_call, tool_result in zip(tool_calls, tool_results):
+                tool_call_handler(tool_call, tool_result)
 
         except Exception as e:
             log.debug(f"Error: {e}")
@@ -637,6 +672,12 @@ async def chat_completion_files_handler(
         if len(queries) == 0:
             queries = [get_last_user_message(body["messages"])]
 
+        if not (
+            request.app.state.config.BYPASS_EMBEDDING_AND_RETRIEVAL
+            or request.app.state.config.RAG_FULL_CONTEXT
+        ):
+            check_models_ready(request)
+
         try:
             # Offload get_sources_from_files to a separate thread
             loop = asyncio.get_running_loop()
@@ -910,6 +951,8 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     try:
         form_data, flags = await chat_completion_files_handler(request, form_data, user)
         sources.extend(flags.get("sources", []))
+    except HTTPException:
+        raise
     except Exception as e:
         log.exception(e)
 
@@ -1002,6 +1045,141 @@ async def process_chat_payload(request, form_data, user, metadata, model):
     return form_data, metadata, events
 
 
+def get_background_task_model_id(request, model_id: str) -> str:
+    if getattr(request.state, "direct", False) and hasattr(request.state, "model"):
+        models = {request.state.model["id"]: request.state.model}
+    else:
+        models = request.app.state.MODELS
+
+    if model_id not in models:
+        return model_id
+    return get_task_model_id(
+        model_id,
+        request.app.state.config.TASK_MODEL,
+        request.app.state.config.TASK_MODEL_EXTERNAL,
+        models,
+    )
+
+
+def get_response_json(res: dict) -> dict:
+    """The JSON object in the content of a task model response."""
+    if len(res.get("choices", [])) == 1:
+        content = res["choices"][0].get("message", {}).get("content", "")
+    else:
+        content = ""
+    return json.loads(content[content.find("{") : content.rfind("}") + 1])
+
+
+def is_untitled(task: BackgroundTask) -> bool:
+    """False when the chat was renamed or titled while the task was queued."""
+    return Chats.get_chat_title_by_id(task.data["chat_id"]) == task.data["title"]
+
+
+async def set_title(task: BackgroundTask, title: str):
+    Chats.update_chat_title_by_id(task.data["chat_id"], title)
+    await task.data["event_emitter"](
+        {
+            "type": "chat:title",
+            "data": title,
+        }
+    )
+
+
+async def set_fallback_title(task: BackgroundTask):
+    if is_untitled(task):
+        await set_title(task, task.data["messages"][0].get("content", "New Chat"))
+
+
+async def run_admitted(run, request, batch: list[BackgroundTask]):
+    """Runs a background task in a chat completion slot, below chat traffic."""
+    async with ADMISSION.slot(
+        batch[0].data["user"].id, batch[0].model, PRIORITY_BACKGROUND
+    ):
+        await run(request, batch)
+
+
+async def run_title_generation(request, batch: list[BackgroundTask]):
+    batch = [task for task in batch if is_untitled(task)]
+
+    titles = {}
+    if len(batch) > 1:
+        try:
+            res = await generate_titles(
+                request,
+                {
+                    "model": batch[0].data["model"],
+                    "chats": [task.data["messages"] for task in batch],
+                },
+                batch[0].data["user"],
+            )
+            generated = get_response_json(res).get("titles", {})
+            titles = {
+                task.key: str(generated[str(idx)])
+                for idx, task in enumerate(batch, start=1)
+                if generated.get(str(idx))
+            }
+        except Exception as e:
+            log.debug(f"Batched title generation failed, titling one by one: {e}")
+
+    for task in batch:
+        title = titles.get(task.key)
+        if title is None:
+            res = await generate_title(
+                request,
+                {
+                    "model": task.data["model"],
+                    "messages": task.data["messages"],
+                    "chat_id": task.data["chat_id"],
+                },
+                task.data["user"],
+            )
+            if not (res and isinstance(res, dict)):
+                continue
+
+            try:
+                title = get_response_json(res).get("title", "New Chat")
+            except Exception:
+                title = ""
+
+            if not title:
+                title = task.data["messages"][0].get("content", "New Chat")
+
+        await set_title(task, title)
+
+
+async def run_tags_generation(request, batch: list[BackgroundTask]):
+    for task in batch:
+        chat = Chats.get_chat_by_id(task.data["chat_id"])
+        if chat is None or chat.meta.get("tags"):
+            continue  # tagged while the task was queued
+
+        res = await generate_chat_tags(
+            request,
+            {
+                "model": task.data["model"],
+                "messages": task.data["messages"],
+                "chat_id": task.data["chat_id"],
+            },
+            task.data["user"],
+        )
+
+        if res and isinstance(res, dict):
+            try:
+                tags = get_response_json(res).get("tags", [])
+                Chats.update_chat_tags_by_id(
+                    task.data["chat_id"], tags, task.data["user"]
+                )
+
+                await task.data["event_emitter"](
+                    {
+                        "type": "chat:tags",
+                        "data": tags,
+                    }
+                )
+            except Exception as e:
+                pass
+
+
 async def process_chat_response(
     request, response, form_data, user, metadata, model, events, tasks
 ):
@@ -1013,49 +1191,48 @@ async def process_chat_response(
             messages = get_message_list(message_map, message.get("id"))
 
             if tasks and messages:
+                task_model_id = get_background_task_model_id(request, message["model"])
+                data = {
+                    "chat_id": metadata["chat_id"],
+                    "model": message["model"],
+                    "messages": messages,
+                    "message": message,
+                    "user": user,
+                    "event_emitter": event_emitter,
+                }
+
                 if TASKS.TITLE_GENERATION in tasks:
                     if tasks[TASKS.TITLE_GENERATION]:
-                        res = await generate_title(
-                            request,
-                            {
-                                "model": message["model"],
-                                "messages": messages,
-                                "chat_id": metadata["chat_id"],
-                            },
-                            user,
-                        )
-
-                        if res and isinstance(res, dict):
-                            if len(res.get("choices", [])) == 1:
-                                title_string = (
-                                    res.get("choices", [])[0]
-                                    .get("message", {})
-                                    .get("content", message.get("content", "New Chat"))
-                                )
-                            else:
-                                title_string = ""
-
-                            title_string = title_string[
-                                title_string.find("{") : title_string.rfind("}") + 1
-                            ]
-
-                            try:
-                                title = json.loads(title_string).get(
-                                    "title", "New Chat"
+                        if request.app.state.config.ENABLE_TITLE_GENERATION:
+                            batchable = (
+                                BACKGROUND_TASK_TITLE_BATCH_SIZE > 1
+                                and request.app.state.config.TITLE_GENERATION_PROMPT_TEMPLATE
+                                == ""
+                                and not getattr(request.state, "direct", False)
+                            )
+                            BACKGROUND_TASKS.submit(
+                                BackgroundTask(
+                                    key=f"title:{metadata['chat_id']}",
+                                    model=task_model_id,
+                                    run=lambda batch: run_admitted(
+                                        run_title_generation, request, batch
+                                    ),
+                                    data={
+                                        **data,
+                                        "title": Chats.get_chat_title_by_id(
+                                            metadata["chat_id"]
+                                        ),
+                                    },
+                                    priority=PRIORITY_TITLE,
+                                    deadline=BACKGROUND_TASK_DEADLINE,
+                                    on_drop=set_fallback_title,
+                                    batch_key=(
+                                        f"title:{user.id}:{task_model_id}"
+                                        if batchable
+                                        else None
+                                    ),
+                                    batch_size=BACKGROUND_TASK_TITLE_BATCH_SIZE,
                                 )
-                            except Exception as e:
-                                title = ""
-
-                            if not title:
-                                title = messages[0].get("content", "New Chat")
-
-                            Chats.update_chat_title_by_id(metadata["chat_id"], title)
-
-                            await event_emitter(
-                                {
-                                    "type": "chat:title",
-                                    "data": title,
-                                }
                             )
                     elif len(messages) == 2:
                         title = messages[0].get("content", "New Chat")
@@ -1069,46 +1246,24 @@ async def process_chat_response(
                             }
                         )
 
-                if TASKS.TAGS_GENERATION in tasks and tasks[TASKS.TAGS_GENERATION]:
-                    res = await generate_chat_tags(
-                        request,
-                        {
-                            "model": message["model"],
-                            "messages": messages,
-                            "chat_id": metadata["chat_id"],
-                        },
-                        user,
+                if (
+                    TASKS.TAGS_GENERATION in tasks
+                    and tasks[TASKS.TAGS_GENERATION]
+                    and request.app.state.config.ENABLE_TAGS_GENERATION
+                ):
+                    BACKGROUND_TASKS.submit(
+                        BackgroundTask(
+                            key=f"tags:{metadata['chat_id']}",
+                            model=task_model_id,
+                            run=lambda batch: run_admitted(
+                                run_tags_generation, request, batch
+                            ),
+                            data=data,
+                            priority=PRIORITY_TAGS,
+                            deadline=BACKGROUND_TASK_DEADLINE,
+                        )
                     )
 
-                    if res and isinstance(res, dict):
-                        if len(res.get("choices", [])) == 1:
-                            tags_string = (
-                                res.get("choices", [])[0]
-                                .get("message", {})
-                                .get("content", "")
-                            )
-                        else:
-                            tags_string = ""
-
-                        tags_string = tags_string[
-                            tags_string.find("{") : tags_string.rfind("}") + 1
-                        ]
-
-                        try:
-                            tags = json.loads(tags_string).get("tags", [])
-                            Chats.update_chat_tags_by_id(
-                                metadata["chat_id"], tags, user
-                            )
-
-                            await event_emitter(
-                                {
-                                    "type": "chat:tags",
-                                    "data": tags,
-                                }
-                            )
-                        except Exception as e:
-                            pass
-
     event_emitter = None
     event_caller = None
     if (
@@ -1180,7 +1335,7 @@ async def process_chat_response(
                     )
 
                     # Send a webhook notification if the user is not active
-                    if get_active_status_by_user_id(user.id) is None:
+                    if not await get_active_status_by_user_id(user.id):
                         webhook_url = Users.get_user_webhook_url_by_id(user.id)
                         if webhook_url:
                             post_webhook(
@@ -1239,135 +1394,8 @@ async def process_chat_response(
             },
         )
 
-        def split_content_and_whitespace(content):
-            content_stripped = content.rstrip()
-            original_whitespace = (
-                content[len(content_stripped) :]
-                if len(content) > len(content_stripped)
-                else ""
-            )
-            return content_stripped, original_whitespace
-
-        def is_opening_code_block(content):
-            backtick_segments = content.split("```")
-            # Even number of segments means the last backticks are opening a new block
-            return len(backtick_segments) > 1 and len(backtick_segments) % 2 == 0
-
         # Handle as a background task
         async def post_response_handler(response, events):
-            def serialize_content_blocks(content_blocks, raw=False):
-                content = ""
-
-                for block in content_blocks:
-                    if block["type"] == "text":
-                        content = f"{content}{block['content'].strip()}\n"
-                    elif block["type"] == "tool_calls":
-                        attributes = block.get("attributes", {})
-
-                        tool_calls = block.get("content", [])
-                        results = block.get("results", [])
-
-                        if results:
-
-                            tool_calls_display_content = ""
-                            for tool_call in tool_calls:
-
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_result = None
-                                tool_result_files = None
-                                for result in results:
-                                    if tool_call_id == result.get("tool_call_id", ""):
-                                        tool_result = result.get("content", None)
-                                        tool_result_files = result.get("files", None)
-                                        break
-
-                                if tool_result:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="true" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}" result="{html.escape(json.dumps(tool_result))}" files="{html.escape(json.dumps(tool_result_files)) if tool_result_files else ""}">\n<summary>Tool Executed</summary>\n</details>\n'
-                                else:
-                                    tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-                        else:
-                            tool_calls_display_content = ""
-
-                            for tool_call in tool_calls:
-                                tool_call_id = tool_call.get("id", "")
-                                tool_name = tool_call.get("function", {}).get(
-                                    "name", ""
-                                )
-                                tool_arguments = tool_call.get("function", {}).get(
-                                    "arguments", ""
-                                )
-
-                                tool_calls_display_content = f'{tool_calls_display_content}\n<details type="tool_calls" done="false" id="{tool_call_id}" name="{tool_name}" arguments="{html.escape(json.dumps(tool_arguments))}">\n<summary>Executing...</summary>\n</details>'
-
-                            if not raw:
-                                content = f"{content}\n{tool_calls_display_content}\n\n"
-
-                    elif block["type"] == "reasoning":
-                        reasoning_display_content = "\n".join(
-                            (f"> {line}" if not line.startswith(">") else line)
-                            for line in block["content"].splitlines()
-                        )
-
-                        reasoning_duration = block.get("duration", None)
-
-                        if reasoning_duration is not None:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="true" duration="{reasoning_duration}">\n<summary>Thought for {reasoning_duration} seconds</summary>\n{reasoning_display_content}\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<{block["start_tag"]}>{block["content"]}<{block["end_tag"]}>\n'
-                            else:
-                                content = f'{content}\n<details type="reasoning" done="false">\n<summary>Thinking…</summary>\n{reasoning_display_content}\n</details>\n'
-
-                    elif block["type"] == "code_interpreter":
-                        attributes = block.get("attributes", {})
-                        output = block.get("output", None)
-                        lang = attributes.get("lang", "")
-
-                        content_stripped, original_whitespace = (
-                            split_content_and_whitespace(content)
-                        )
-                        if is_opening_code_block(content_stripped):
-                            # Remove trailing backticks that would open a new block
-                            content = (
-                                content_stripped.rstrip("`").rstrip()
-                                + original_whitespace
-                            )
-                        else:
-                            # Keep content as is - either closing backticks or no backticks
-                            content = content_stripped + original_whitespace
-
-                        if output:
-                            output = html.escape(json.dumps(output))
-
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n```output\n{output}\n```\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="true" output="{output}">\n<summary>Analyzed</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-                        else:
-                            if raw:
-                                content = f'{content}\n<code_interpreter type="code" lang="{lang}">\n{block["content"]}\n</code_interpreter>\n'
-                            else:
-                                content = f'{content}\n<details type="code_interpreter" done="false">\n<summary>Analyzing...</summary>\n```{lang}\n{block["content"]}\n```\n</details>\n'
-
-                    else:
-                        block_content = str(block["content"]).strip()
-                        content = f"{content}{block['type']}: {block_content}\n"
-
-                return content.strip()
-
             def convert_content_blocks_to_messages(content_blocks):
                 messages = []
 
@@ -1555,6 +1583,7 @@ async def process_chat_response(
                     "content": content,
                 }
             ]
+            content_stream = ChatContentStream()
 
             # We might want to disable this by default
             DETECT_REASONING = True
@@ -1595,262 +1624,274 @@ async def process_chat_response(
                         },
                     )
 
+                stream_timer = StreamTimer(model.get("id", form_data.get("model", "")))
+                completion_tokens = None
+
                 async def stream_body_handler(response):
                     nonlocal content
                     nonlocal content_blocks
+                    nonlocal completion_tokens
 
                     response_tool_calls = []
+                    content_changed = False
+                    end_of_stream = False
 
-                    async for line in response.body_iterator:
-                        line = line.decode("utf-8") if isinstance(line, bytes) else line
-                        data = line
-
-                        # Skip empty lines
-                        if not data.strip():
-                            continue
+                    frames = batch_frames(response.body_iterator)
+                    async for lines in frames:
+                        for line in lines:
+                            try:
+                                # Converted upstreams yield parsed chunks;
+                                # raw "data:" lines are parsed here, once
+                                data = parse_chunk(line)
+                                if data is None:
+                                    continue
+
+                                data, _ = await process_filter_functions(
+                                    request=request,
+                                    filter_functions=filter_functions,
+                                    filter_type="stream",
+                                    form_data=data,
+                                    extra_params=extra_params,
+                                )
 
-                        # "data:" is the prefix for each event
-                        if not data.startswith("data:"):
-                            continue
+                                if data:
+                                    if "event" in data:
+                                        await event_emitter(data.get("event", {}))
+
+                                    if "selected_model_id" in data:
+                                        model_id = data["selected_model_id"]
+                                        Chats.upsert_message_to_chat_by_id_and_message_id(
+                                            metadata["chat_id"],
+                                            metadata["message_id"],
+                                            {
+                                                "selectedModelId": model_id,
+                                            },
+                                        )
+                                    else:
+                                        choices = data.get("choices", [])
+                                        if not choices:
+                                            error = data.get("error", {})
+                                            if error:
+                                                await event_emitter(
+                                                    {
+                                                        "type": "chat:completion",
+                                                        "data": {
+                                                            "error": error,
+                                                        },
+                                                    }
+                                                )
+                                            usage = data.get("usage", {})
+                                            if usage:
+                                                completion_tokens = usage.get(
+                                                    "completion_tokens", completion_tokens
+                                                )
+                                                await event_emitter(
+                                                    {
+                                                        "type": "chat:completion",
+                                                        "data": {
+                                                            "usage": usage,
+                                                        },
+                                                    }
+                                                )
+                                            continue
 
-                        # Remove the prefix
-                        data = data[len("data:") :].strip()
+                                        delta = choices[0].get("delta", {})
+                                        delta_tool_calls = delta.get("tool_calls", None)
 
-                        try:
-                            data = json.loads(data)
-
-                            data, _ = await process_filter_functions(
-                                request=request,
-                                filter_functions=filter_functions,
-                                filter_type="stream",
-                                form_data=data,
-                                extra_params=extra_params,
-                            )
+                                        if delta_tool_calls:
+                                            for delta_tool_call in delta_tool_calls:
+                                                tool_call_index = delta_tool_call.get(
+                                                    "index"
+                                                )
 
-                            if data:
-                                if "event" in data:
-                                    await event_emitter(data.get("event", {}))
+                                                if tool_call_index is not None:
+                                                    # Check if the tool call already exists
+                                                    current_response_tool_call = None
+                                                    for (
+                                                        response_tool_call
+                                                    ) in response_tool_calls:
+                                                        if (
+                                                            response_tool_call.get("index")
+                                                            == tool_call_index
+                                                        ):
+                                                            current_response_tool_call = (
+                                                                response_tool_call
+                                                            )
+                                                            break
+
+                                                    if current_response_tool_call is None:
+                                                        # Add the new tool call
+                                                        response_tool_calls.append(
+                                                            delta_tool_call
+                                                        )
+                                                    else:
+                                                        # Update the existing tool call
+                                                        delta_name = delta_tool_call.get(
+                                                            "function", {}
+                                                        ).get("name")
+                                                        delta_arguments = (
+                                                            delta_tool_call.get(
+                                                                "function", {}
+                                                            ).get("arguments")
+                                                        )
 
-                                if "selected_model_id" in data:
-                                    model_id = data["selected_model_id"]
-                                    Chats.upsert_message_to_chat_by_id_and_message_id(
-                                        metadata["chat_id"],
-                                        metadata["message_id"],
-                                        {
-                                            "selectedModelId": model_id,
-                                        },
-                                    )
-                                else:
-                                    choices = data.get("choices", [])
-                                    if not choices:
-                                        error = data.get("error", {})
-                                        if error:
-                                            await event_emitter(
-                                                {
-                                                    "type": "chat:completion",
-                                                    "data": {
-                                                        "error": error,
-                                                    },
-                                                }
-                                            )
-                                        usage = data.get("usage", {})
-                                        if usage:
-                                            await event_emitter(
-                                                {
-                                                    "type": "chat:completion",
-                                                    "data": {
-                                                        "usage": usage,
+                                                        if delta_name:
+                                                            current_response_tool_call[
+                                                                "function"
+                                                            ]["name"] += delta_name
+
+                                                        if delta_arguments:
+                                                            current_response_tool_call[
+                                                                "function"
+                                                            ][
+                                                                "arguments"
+                                                            ] += delta_arguments
+
+                                        value = delta.get("content")
+
+                                        reasoning_content = delta.get(
+                                            "reasoning_content"
+                                        ) or delta.get("reasoning")
+                                        if value or reasoning_content:
+                                            stream_timer.on_token()
+                                        if reasoning_content:
+                                            if (
+                                                not content_blocks
+                                                or content_blocks[-1]["type"] != "reasoning"
+                                            ):
+                                                reasoning_block = {
+                                                    "type": "reasoning",
+                                                    "start_tag": "think",
+                                                    "end_tag": "/think",
+                                                    "attributes": {
+                                                        "type": "reasoning_content"
                                                     },
+                                                    "content": "",
+                                                    "started_at": time.time(),
                                                 }
-                                            )
-                                        continue
-
-                                    delta = choices[0].get("delta", {})
-                                    delta_tool_calls = delta.get("tool_calls", None)
-
-                                    if delta_tool_calls:
-                                        for delta_tool_call in delta_tool_calls:
-                                            tool_call_index = delta_tool_call.get(
-                                                "index"
-                                            )
-
-                                            if tool_call_index is not None:
-                                                # Check if the tool call already exists
-                                                current_response_tool_call = None
-                                                for (
-                                                    response_tool_call
-                                                ) in response_tool_calls:
-                                                    if (
-                                                        response_tool_call.get("index")
-                                                        == tool_call_index
-                                                    ):
-                                                        current_response_tool_call = (
-                                                            response_tool_call
-                                                        )
-                                                        break
-
-                                                if current_response_tool_call is None:
-                                                    # Add the new tool call
-                                                    response_tool_calls.append(
-                                                        delta_tool_call
-                                                    )
-                                                else:
-                                                    # Update the existing tool call
-                                                    delta_name = delta_tool_call.get(
-                                                        "function", {}
-                                                    ).get("name")
-                                                    delta_arguments = (
-                                                        delta_tool_call.get(
-                                                            "function", {}
-                                                        ).get("arguments")
-                                                    )
+                                                content_blocks.append(reasoning_block)
+                                            else:
+                                                reasoning_block = content_blocks[-1]
 
-                                                    if delta_name:
-                                                        current_response_tool_call[
-                                                            "function"
-                                                        ]["name"] += delta_name
-
-                                                    if delta_arguments:
-                                                        current_response_tool_call[
-                                                            "function"
-                                                        ][
-                                                            "arguments"
-                                                        ] += delta_arguments
-
-                                    value = delta.get("content")
-
-                                    reasoning_content = delta.get(
-                                        "reasoning_content"
-                                    ) or delta.get("reasoning")
-                                    if reasoning_content:
-                                        if (
-                                            not content_blocks
-                                            or content_blocks[-1]["type"] != "reasoning"
-                                        ):
-                                            reasoning_block = {
-                                                "type": "reasoning",
-                                                "start_tag": "think",
-                                                "end_tag": "/think",
-                                                "attributes": {
-                                                    "type": "reasoning_content"
-                                                },
-                                                "content": "",
-                                                "started_at": time.time(),
-                                            }
-                                            content_blocks.append(reasoning_block)
-                                        else:
-                                            reasoning_block = content_blocks[-1]
+                                            reasoning_block["content"] += reasoning_content
 
-                                        reasoning_block["content"] += reasoning_content
+                                            data = None
+                                            content_changed = True
 
-                                        data = {
-                                            "content": serialize_content_blocks(
+                                        if value:
+                                            if (
                                                 content_blocks
-                                            )
-                                        }
+                                                and content_blocks[-1]["type"]
+                                                == "reasoning"
+                                                and content_blocks[-1]
+                                                .get("attributes", {})
+                                                .get("type")
+                                                == "reasoning_content"
+                                            ):
+                                                reasoning_block = content_blocks[-1]
+                                                reasoning_block["ended_at"] = time.time()
+                                                reasoning_block["duration"] = int(
+                                                    reasoning_block["ended_at"]
+                                                    - reasoning_block["started_at"]
+                                                )
 
-                                    if value:
-                                        if (
-                                            content_blocks
-                                            and content_blocks[-1]["type"]
-                                            == "reasoning"
-                                            and content_blocks[-1]
-                                            .get("attributes", {})
-                                            .get("type")
-                                            == "reasoning_content"
-                                        ):
-                                            reasoning_block = content_blocks[-1]
-                                            reasoning_block["ended_at"] = time.time()
-                                            reasoning_block["duration"] = int(
-                                                reasoning_block["ended_at"]
-                                                - reasoning_block["started_at"]
-                                            )
+                                                content_blocks.append(
+                                                    {
+                                                        "type": "text",
+                                                        "content": "",
+                                                    }
+                                                )
 
-                                            content_blocks.append(
-                                                {
-                                                    "type": "text",
-                                                    "content": "",
-                                                }
-                                            )
+                                            content = f"{content}{value}"
+                                            if not content_blocks:
+                                                content_blocks.append(
+                                                    {
+                                                        "type": "text",
+                                                        "content": "",
+                                                    }
+                                                )
 
-                                        content = f"{content}{value}"
-                                        if not content_blocks:
-                                            content_blocks.append(
-                                                {
-                                                    "type": "text",
-                                                    "content": "",
-                                                }
+                                            content_blocks[-1]["content"] = (
+                                                content_blocks[-1]["content"] + value
                                             )
 
-                                        content_blocks[-1]["content"] = (
-                                            content_blocks[-1]["content"] + value
-                                        )
-
-                                        if DETECT_REASONING:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "reasoning",
-                                                    reasoning_tags,
-                                                    content,
-                                                    content_blocks,
+                                            if DETECT_REASONING:
+                                                content, content_blocks, _ = (
+                                                    tag_content_handler(
+                                                        "reasoning",
+                                                        reasoning_tags,
+                                                        content,
+                                                        content_blocks,
+                                                    )
                                                 )
-                                            )
 
-                                        if DETECT_CODE_INTERPRETER:
-                                            content, content_blocks, end = (
-                                                tag_content_handler(
-                                                    "code_interpreter",
-                                                    code_interpreter_tags,
-                                                    content,
-                                                    content_blocks,
+                                            if DETECT_CODE_INTERPRETER:
+                                                content, content_blocks, end = (
+                                                    tag_content_handler(
+                                                        "code_interpreter",
+                                                        code_interpreter_tags,
+                                                        content,
+                                                        content_blocks,
+                                                    )
                                                 )
-                                            )
 
-                                            if end:
-                                                break
-
-                                        if DETECT_SOLUTION:
-                                            content, content_blocks, _ = (
-                                                tag_content_handler(
-                                                    "solution",
-                                                    solution_tags,
-                                                    content,
-                                                    content_blocks,
+                                                if end:
+                                                    end_of_stream = True
+                                                    break
+
+                                            if DETECT_SOLUTION:
+                                                content, content_blocks, _ = (
+                                                    tag_content_handler(
+                                                        "solution",
+                                                        solution_tags,
+                                                        content,
+                                                        content_blocks,
+                                                    )
                                                 )
-                                            )
 
-                                        if ENABLE_REALTIME_CHAT_SAVE:
-                                            # Save message in the database
-                                            Chats.upsert_message_to_chat_by_id_and_message_id(
-                                                metadata["chat_id"],
-                                                metadata["message_id"],
-                                                {
-                                                    "content": serialize_content_blocks(
-                                                        content_blocks
-                                                    ),
-                                                },
-                                            )
-                                        else:
-                                            data = {
-                                                "content": serialize_content_blocks(
-                                                    content_blocks
-                                                ),
+                                            if ENABLE_REALTIME_CHAT_SAVE:
+                                                # Save message in the database
+                                                CHAT_DB_WRITES.add(
+                                                    1, {"operation": "realtime_save"}
+                                                )
+                                                Chats.upsert_message_to_chat_by_id_and_message_id(
+                                                    metadata["chat_id"],
+                                                    metadata["message_id"],
+                                                    {
+                                                        "content": content_stream.serialize(
+                                                            content_blocks
+                                                        ),
+                                                    },
+                                                )
+                                            else:
+                                                data = None
+                                                content_changed = True
+
+                                    if data:
+                                        await event_emitter(
+                                            {
+                                                "type": "chat:completion",
+                                                "data": data,
                                             }
-
-                                await event_emitter(
-                                    {
-                                        "type": "chat:completion",
-                                        "data": data,
-                                    }
-                                )
-                        except Exception as e:
-                            done = "data: [DONE]" in line
-                            if done:
-                                pass
-                            else:
-                                log.debug("Error: ", e)
+                                        )
+                            except Exception as e:
+                                log.debug(f"Error: {e}")
                                 continue
 
+                        # Content updates of a batch go out as one event
+                        if content_changed:
+                            content_changed = False
+                            await event_emitter(
+                                {
+                                    "type": "chat:completion",
+                                    "data": content_stream.event(content_blocks),
+                                }
+                            )
+
+                        if end_of_stream:
+                            await frames.aclose()
+                            break
+
                     if content_blocks:
                         # Clean up the last text block
                         if content_blocks[-1]["type"] == "text":
@@ -1895,17 +1936,13 @@ async def process_chat_response(
                     await event_emitter(
                         {
                             "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
+                            "data": content_stream.event(content_blocks),
                         }
                     )
 
                     tools = metadata.get("tools", {})
 
-                    results = []
-                    for tool_call in response_tool_calls:
-                        tool_call_id = tool_call.get("id", "")
+                    async def execute_tool_call(tool_call):
                         tool_name = tool_call.get("function", {}).get("name", "")
 
                         tool_function_params = {}
@@ -1970,6 +2007,26 @@ async def process_chat_response(
                             except Exception as e:
                                 tool_result = str(e)
 
+                        return tool_result
+
+                    # Independent calls run concurrently; results keep the
+                    # order of the model's tool calls
+                    tool_results = await execute_tool_calls(
+                        response_tool_calls,
+                        execute_tool_call,
+                        chat_id=metadata.get("chat_id", None),
+                        get_name=lambda tool_call: tool_call.get("function", {}).get(
+                            "name", ""
+                        ),
+                        event_emitter=event_emitter,
+                    )
+
+                    results = []
+                    for tool_call, tool_result in zip(
+                        response_tool_calls, tool_results
+                    ):
+                        tool_call_id = tool_call.get("id", "")
+
                         tool_result_files = []
                         if isinstance(tool_result, list):
                             for item in tool_result:
@@ -2007,9 +2064,7 @@ async def process_chat_response(
                     await event_emitter(
                         {
                             "type": "chat:completion",
-                            "data": {
-                                "content": serialize_content_blocks(content_blocks),
-                            },
+                            "data": content_stream.event(content_blocks),
                         }
                     )
 
@@ -2047,9 +2102,7 @@ async def process_chat_response(
                         await event_emitter(
                             {
                                 "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
+                                "data": content_stream.event(content_blocks),
                             }
                         )
 
@@ -2097,6 +2150,7 @@ async def process_chat_response(
                                             else None
                                         ),
                                         request.app.state.config.CODE_INTERPRETER_JUPYTER_TIMEOUT,
+                                        chat_id=metadata.get("chat_id"),
                                     )
                                 else:
                                     output = {
@@ -2184,9 +2238,7 @@ async def process_chat_response(
                         await event_emitter(
                             {
                                 "type": "chat:completion",
-                                "data": {
-                                    "content": serialize_content_blocks(content_blocks),
-                                },
+                                "data": content_stream.event(content_blocks),
                             }
                         )
 
@@ -2217,25 +2269,30 @@ async def process_chat_response(
                             log.debug(e)
                             break
 
+                stream_timer.finish(completion_tokens)
+
                 title = Chats.get_chat_title_by_id(metadata["chat_id"])
                 data = {
                     "done": True,
-                    "content": serialize_content_blocks(content_blocks),
+                    **content_stream.update(
+                        serialize_content_blocks(content_blocks), snapshot=True
+                    ),
                     "title": title,
                 }
 
                 if not ENABLE_REALTIME_CHAT_SAVE:
                     # Save message in the database
+                    CHAT_DB_WRITES.add(1, {"operation": "final_save"})
                     Chats.upsert_message_to_chat_by_id_and_message_id(
                         metadata["chat_id"],
                         metadata["message_id"],
                         {
-                            "content": serialize_content_blocks(content_blocks),
+                            "content": content_stream.content,
                         },
                     )
 
                 # Send a webhook notification if the user is not active
-                if get_active_status_by_user_id(user.id) is None:
+                if not await get_active_status_by_user_id(user.id):
                     webhook_url = Users.get_user_webhook_url_by_id(user.id)
                     if webhook_url:
                         post_webhook(
@@ -2284,9 +2341,6 @@ async def process_chat_response(
     else:
         # Fallback to the original response
         async def stream_wrapper(original_generator, events):
-            def wrap_item(item):
-                return f"data: {item}\n\n"
-
             for event in events:
                 event, _ = await process_filter_functions(
                     request=request,
@@ -2297,9 +2351,13 @@ async def process_chat_response(
                 )
 
                 if event:
-                    yield wrap_item(json.dumps(event))
+                    yield event
 
             async for data in original_generator:
+                if filter_functions and isinstance(data, dict):
+                    # Stream filters here have always seen the raw SSE text
+                    data = encode_sse(data).decode("utf-8")
+
                 data, _ = await process_filter_functions(
                     request=request,
                     filter_functions=filter_functions,
@@ -2311,7 +2369,7 @@ async def process_chat_response(
                 if data:
                     yield data
 
-        return StreamingResponse(
+        return ChunkStreamingResponse(
             stream_wrapper(response.body_iterator, events),
             headers=dict(response.headers),
             background=response.background,
@@ -1,15 +1,30 @@
+import hashlib
+import marshal
 import os
 import re
 import subprocess
 import sys
+import threading
+import time
+import uuid
 from importlib import util
 import types
 import tempfile
 import logging
-
-from open_webui.env import SRC_LOG_LEVELS, PIP_OPTIONS, PIP_PACKAGE_INDEX_OPTIONS
+from typing import Callable
+
+from open_webui.config import CACHE_DIR
+from open_webui.env import (
+    SRC_LOG_LEVELS,
+    PIP_OPTIONS,
+    PIP_PACKAGE_INDEX_OPTIONS,
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+)
 from open_webui.models.functions import Functions
 from open_webui.models.tools import Tools
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
 
 log = logging.getLogger(__name__)
 log.setLevel(SRC_LOG_LEVELS["MAIN"])
@@ -68,6 +83,87 @@ def replace_imports(content):
     return content
 
 
+PLUGIN_CACHE_DIR = CACHE_DIR / "plugins"
+PLUGIN_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+
+# Previous versions of a plugin are kept this long, since modules loaded from
+# them by other workers still name them in `__file__` and tracebacks
+PLUGIN_CACHE_MAX_AGE = 24 * 60 * 60
+
+PLUGIN_CACHE_FILE_PATTERN = re.compile(r"(.+)_([0-9a-f]{16})\.pyc?")
+
+
+def prune_plugin_cache(max_age: float = PLUGIN_CACHE_MAX_AGE):
+    """
+    Remove cached versions of plugins that are not the latest version of
+    their plugin and were written more than `max_age` seconds ago. Run at
+    startup, never while a plugin is being loaded.
+    """
+    versions = {}
+    for path in PLUGIN_CACHE_DIR.iterdir():
+        match = PLUGIN_CACHE_FILE_PATTERN.fullmatch(path.name)
+        if match is None:
+            continue
+        try:
+            mtime = path.stat().st_mtime
+        except FileNotFoundError:
+            continue
+        module_versions = versions.setdefault(match.group(1), {})
+        module_versions.setdefault(match.group(2), []).append((mtime, path))
+
+    cutoff = time.time() - max_age
+    for module_versions in versions.values():
+        latest = max(
+            module_versions,
+            key=lambda version: max(mtime for mtime, _ in module_versions[version]),
+        )
+        for version, files in module_versions.items():
+            if version == latest or any(mtime >= cutoff for mtime, _ in files):
+                continue
+            for _, path in files:
+                path.unlink(missing_ok=True)
+
+
+def get_plugin_code(module_name: str, content: str):
+    """
+    Return the compiled code object for a plugin's source, keyed by the hash
+    of the source. The source and its marshalled bytecode are kept under
+    PLUGIN_CACHE_DIR so every worker compiles each version only once and
+    `__file__` points at a real file.
+    """
+    content_hash = hashlib.sha256(content.encode("utf-8")).hexdigest()[:16]
+    source_path = PLUGIN_CACHE_DIR / f"{module_name}_{content_hash}.py"
+    bytecode_path = source_path.with_suffix(".pyc")
+
+    try:
+        with open(bytecode_path, "rb") as f:
+            if f.read(len(util.MAGIC_NUMBER)) == util.MAGIC_NUMBER:
+                return marshal.load(f), str(source_path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        log.warning(f"Ignoring unreadable plugin bytecode {bytecode_path}: {e}")
+
+    code = compile(content, str(source_path), "exec")
+
+    try:
+        # Write to temporary files first so concurrent workers never read a
+        # partially written file
+        for path, data in (
+            (source_path, content.encode("utf-8")),
+            (bytecode_path, util.MAGIC_NUMBER + marshal.dumps(code)),
+        ):
+            with tempfile.NamedTemporaryFile(
+                dir=PLUGIN_CACHE_DIR, delete=False
+            ) as temp_file:
+                temp_file.write(data)
+            os.replace(temp_file.name, path)
+    except Exception as e:
+        log.warning(f"Failed to write plugin cache for {module_name}: {e}")
+
+    return code, str(source_path)
+
+
 def load_tool_module_by_id(tool_id, content=None):
 
     if content is None:
@@ -75,10 +171,9 @@ def load_tool_module_by_id(tool_id, content=None):
         if not tool:
             raise Exception(f"Toolkit not found: {tool_id}")
 
-        content = tool.content
-
-        content = replace_imports(content)
-        Tools.update_tool_by_id(tool_id, {"content": content})
+        content = replace_imports(tool.content)
+        if content != tool.content:
+            Tools.update_tool_by_id(tool_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         # Install required packages found within the frontmatter
@@ -88,17 +183,11 @@ def load_tool_module_by_id(tool_id, content=None):
     module = types.ModuleType(module_name)
     sys.modules[module_name] = module
 
-    # Create a temporary file and use it to define `__file__` so
-    # that it works as expected from the module's perspective.
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.close()
     try:
-        with open(temp_file.name, "w", encoding="utf-8") as f:
-            f.write(content)
-        module.__dict__["__file__"] = temp_file.name
+        code, module.__dict__["__file__"] = get_plugin_code(module_name, content)
 
         # Executing the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec(code, module.__dict__)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
@@ -111,8 +200,6 @@ def load_tool_module_by_id(tool_id, content=None):
         log.error(f"Error loading module: {tool_id}: {e}")
         del sys.modules[module_name]  # Clean up
         raise e
-    finally:
-        os.unlink(temp_file.name)
 
 
 def load_function_module_by_id(function_id, content=None):
@@ -120,10 +207,10 @@ def load_function_module_by_id(function_id, content=None):
         function = Functions.get_function_by_id(function_id)
         if not function:
             raise Exception(f"Function not found: {function_id}")
-        content = function.content
 
-        content = replace_imports(content)
-        Functions.update_function_by_id(function_id, {"content": content})
+        content = replace_imports(function.content)
+        if content != function.content:
+            Functions.update_function_by_id(function_id, {"content": content})
     else:
         frontmatter = extract_frontmatter(content)
         install_frontmatter_requirements(frontmatter.get("requirements", ""))
@@ -132,17 +219,11 @@ def load_function_module_by_id(function_id, content=None):
     module = types.ModuleType(module_name)
     sys.modules[module_name] = module
 
-    # Create a temporary file and use it to define `__file__` so
-    # that it works as expected from the module's perspective.
-    temp_file = tempfile.NamedTemporaryFile(delete=False)
-    temp_file.close()
     try:
-        with open(temp_file.name, "w", encoding="utf-8") as f:
-            f.write(content)
-        module.__dict__["__file__"] = temp_file.name
+        code, module.__dict__["__file__"] = get_plugin_code(module_name, content)
 
         # Execute the modified content in the created module's namespace
-        exec(content, module.__dict__)
+        exec(code, module.__dict__)
         frontmatter = extract_frontmatter(content)
         log.info(f"Loaded module: {module.__name__}")
 
@@ -161,8 +242,144 @@ def load_function_module_by_id(function_id, content=None):
 
         Functions.update_function_by_id(function_id, {"is_active": False})
         raise e
-    finally:
-        os.unlink(temp_file.name)
+
+
+class PluginModuleCache(dict):
+    """
+    Loaded Tool or Function instances by id, as stored in
+    `app.state.TOOLS` / `app.state.FUNCTIONS`, plus their Valves objects.
+
+    Entries stay until the plugin or its valves change. Routers call
+    `invalidate` / `invalidate_valves` after writing to the database; with
+    Redis configured the id is also published so every other worker drops
+    its copy and reloads it on next use.
+    """
+
+    def __init__(self, kind: str, redis_url="", redis_sentinels=[]):
+        super().__init__()
+        self.kind = kind
+        self.channel = f"open-webui:plugin-cache:{kind}:invalidate"
+        self.node_id = str(uuid.uuid4())
+        self.valves = {}
+        self.lock = threading.Lock()
+
+        self.redis = None
+        self.pubsub_thread = None
+        if redis_url:
+            try:
+                self.redis = get_redis_connection(
+                    redis_url, redis_sentinels, decode_responses=True
+                )
+            except Exception as e:
+                log.warning(f"Plugin cache invalidation via Redis disabled: {e}")
+
+    def __setitem__(self, id, module):
+        with self.lock:
+            super().__setitem__(id, module)
+            # Valves built from a previous version of the module are stale
+            self.valves.pop(id, None)
+
+    def __delitem__(self, id):
+        self.invalidate(id)
+
+    def get_valves(self, id: str, load: Callable[[], object]):
+        """
+        Return the cached Valves object for `id`, building it with `load` if
+        it is not cached yet.
+        """
+        valves = self.valves.get(id)
+        if valves is None:
+            valves = load()
+            self.valves[id] = valves
+        return valves
+
+    def invalidate(self, id: str, publish: bool = True):
+        with self.lock:
+            self.pop(id, None)
+            self.valves.pop(id, None)
+        if publish:
+            self._publish("module", id)
+
+    def notify_updated(self, id: str):
+        """
+        Tell other workers that `id` changed; this worker already holds the
+        new version, stored after the update.
+        """
+        self._publish("module", id)
+
+    def invalidate_valves(self, id: str, publish: bool = True):
+        self.valves.pop(id, None)
+        if publish:
+            self._publish("valves", id)
+
+    def _publish(self, scope: str, id: str):
+        if self.redis is not None:
+            try:
+                self.redis.publish(self.channel, f"{self.node_id}:{scope}:{id}")
+            except Exception as e:
+                log.warning(f"Failed to publish {self.kind} cache invalidation: {e}")
+
+    def start_listener(self):
+        """
+        Subscribe to invalidations published by other workers in a daemon
+        thread, ignoring this worker's own messages.
+        """
+        if self.redis is None or self.pubsub_thread is not None:
+            return
+
+        def handle_message(message):
+            node_id, scope, id = message["data"].split(":", 2)
+            if node_id == self.node_id:
+                return
+            if scope == "valves":
+                self.invalidate_valves(id, publish=False)
+            else:
+                self.invalidate(id, publish=False)
+
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{self.channel: handle_message})
+            self.pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            log.warning(f"Failed to subscribe to {self.kind} cache invalidations: {e}")
+
+
+TOOL_MODULES = PluginModuleCache(
+    "tool",
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
+FUNCTION_MODULES = PluginModuleCache(
+    "function",
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
+
+
+def warm_up_plugins():
+    """
+    Load every Tool and active Function so the first requests using them do
+    not pay for loading. Failures are logged and left to the lazy path.
+    """
+    for tool in Tools.get_tools():
+        if tool.id not in TOOL_MODULES:
+            try:
+                TOOL_MODULES[tool.id], _ = load_tool_module_by_id(tool.id)
+            except Exception as e:
+                log.warning(f"Failed to warm up tool {tool.id}: {e}")
+
+    for function in Functions.get_functions(active_only=True):
+        if function.id not in FUNCTION_MODULES:
+            try:
+                FUNCTION_MODULES[function.id], _, _ = load_function_module_by_id(
+                    function.id
+                )
+            except Exception as e:
+                log.warning(f"Failed to warm up function {function.id}: {e}")
+
+    log.info(
+        f"Warmed up {len(TOOL_MODULES)} tools and {len(FUNCTION_MODULES)} functions"
+    )
 
 
 def install_frontmatter_requirements(requirements: str):
@@ -1,5 +1,7 @@
 import aiohttp
 import asyncio
+from aiocache import SimpleMemoryCache
+from open_webui.env import RAGFLOW_ASSISTANT_CACHE_TTL
 from open_webui.config import TENANT_ID, KNOWLEDGE_BASE_URL, BASE_KB_ID, RAGFLOW_LLM_ID, RAGFLOW_RERANK_ID, RAGFLOW_SIMILARITY_THRESHOLD, RAGFLOW_VECTOR_SIMILARITY_WEIGHT
 import requests
 from open_webui.utils.auth import create_token
@@ -12,6 +14,9 @@ REQUEST_TIMEOUT = 10  # 10秒超时
 # 全局 aiohttp session，使用连接池复用连接
 _session = None
 
+# assistant 的 kb_ids 缓存，update_assistant 时失效
+ASSISTANT_CACHE = SimpleMemoryCache()
+
 async def get_session():
     """获取全局 aiohttp session，支持连接池复用"""
     global _session
@@ -174,13 +179,30 @@ async def get_assistant(assistant_id):
     async with session.get(api_url, headers=headers) as response:
         return await response.json()
 
+async def get_assistant_kb_ids(assistant_id):
+    """获取assistant的kb_ids，带TTL缓存"""
+    kb_ids = await ASSISTANT_CACHE.get(assistant_id)
+    if kb_ids is None:
+        assistant_response = await get_assistant(assistant_id)
+        kb_ids = assistant_response['data'].get('kb_ids', [])
+        await ASSISTANT_CACHE.set(assistant_id, kb_ids, ttl=RAGFLOW_ASSISTANT_CACHE_TTL)
+    return kb_ids
+
+async def invalidate_assistant(assistant_id):
+    await ASSISTANT_CACHE.delete(assistant_id)
+
 async def update_assistant(payload):
     api_url = f"{KNOWLEDGE_BASE_URL}/v1/dialog/set_assistant"
     
     session = await get_session()
     headers = {'Content-Type': 'application/json'}
-    async with session.post(api_url, json=payload, headers=headers) as response:
-        return await response.json()
+    try:
+        async with session.post(api_url, json=payload, headers=headers) as response:
+            return await response.json()
+    finally:
+        # 所有更新接口都经过这里，更新后使缓存失效
+        if payload.get("dialog_id"):
+            await invalidate_assistant(payload["dialog_id"])
     
 async def get_kbs(kb_ids):
     if isinstance(kb_ids, list):
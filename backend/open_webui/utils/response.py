@@ -4,6 +4,7 @@ from open_webui.utils.misc import (
     openai_chat_chunk_message_template,
     openai_chat_completion_message_template,
 )
+from open_webui.utils.stream import json_loads
 
 
 def convert_ollama_tool_call_to_openai(tool_calls: dict) -> dict:
@@ -100,8 +101,12 @@ def convert_response_ollama_to_openai(ollama_response: dict) -> dict:
 
 
 async def convert_streaming_response_ollama_to_openai(ollama_streaming_response):
+    """
+    Yield the Ollama stream as parsed OpenAI chunks. They are only encoded
+    when sent to a client (see ChunkStreamingResponse).
+    """
     async for data in ollama_streaming_response.body_iterator:
-        data = json.loads(data)
+        data = json_loads(data)
 
         model = data.get("model", "ollama")
         message_content = data.get("message", {}).get("content", None)
@@ -117,11 +122,8 @@ async def convert_streaming_response_ollama_to_openai(ollama_streaming_response)
         if done:
             usage = convert_ollama_usage_to_openai(data)
 
-        data = openai_chat_chunk_message_template(
+        yield openai_chat_chunk_message_template(
             model, message_content, openai_tool_calls, usage
         )
 
-        line = f"data: {json.dumps(data)}\n\n"
-        yield line
-
     yield "data: [DONE]\n\n"
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import time
+from typing import Any, AsyncIterator, Optional, Union
+
+from fastapi.responses import StreamingResponse
+from open_webui.env import CHAT_STREAM_BATCH_WINDOW
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Frames sent together in one batch at most
+BATCH_MAX_FRAMES = 64
+
+
+def json_loads(data: Union[str, bytes]) -> Any:
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def json_dumps_bytes(obj: Any) -> bytes:
+    if orjson is not None:
+        # Fall back for values orjson does not handle, e.g. non-str dict keys
+        try:
+            return orjson.dumps(obj)
+        except TypeError:
+            pass
+    return json.dumps(obj).encode("utf-8")
+
+
+def json_dumps(obj: Any) -> str:
+    return json_dumps_bytes(obj).decode("utf-8")
+
+
+def encode_sse(chunk: Union[dict, str, bytes]) -> bytes:
+    """
+    Encode one stream item for the client. Parsed chunks become a `data:`
+    frame; raw SSE text is passed through as is.
+    """
+    if isinstance(chunk, bytes):
+        return chunk
+    if isinstance(chunk, str):
+        return chunk.encode("utf-8")
+    return b"data: " + json_dumps_bytes(chunk) + b"\n\n"
+
+
+def parse_chunk(line: Union[dict, str, bytes]) -> Optional[dict]:
+    """
+    Chunk carried by one stream item. Parsed chunks are returned as they are,
+    `data:` lines are decoded, and anything else (blank lines, comments,
+    `[DONE]`) gives None. Raises ValueError for malformed JSON.
+    """
+    if isinstance(line, dict):
+        return line
+
+    line = line.strip()
+    prefix = b"data:" if isinstance(line, bytes) else "data:"
+    if not line.startswith(prefix):
+        return None
+
+    data = line[len(prefix) :].lstrip()
+    if data in (b"[DONE]", "[DONE]"):
+        return None
+    return json_loads(data)
+
+
+async def batch_frames(
+    iterator: AsyncIterator,
+    window: float = CHAT_STREAM_BATCH_WINDOW,
+    max_frames: int = BATCH_MAX_FRAMES,
+) -> AsyncIterator[list]:
+    """
+    Group the items of a stream into lists, at most one list per `window`
+    seconds. An item arriving after a quiet period is yielded right away;
+    items arriving within `window` of the last batch wait for the window to
+    close so a fast stream turns into a few larger batches.
+    """
+    if window <= 0:
+        async for item in iterator:
+            yield [item]
+        return
+
+    queue: asyncio.Queue = asyncio.Queue(maxsize=max_frames * 4)
+    end = object()
+
+    async def pump():
+        try:
+            async for item in iterator:
+                await queue.put(item)
+            await queue.put(end)
+        except Exception as e:
+            await queue.put(e)
+
+    task = asyncio.create_task(pump())
+    flushed_at = float("-inf")
+    done = False
+    error: Optional[Exception] = None
+
+    def take(item) -> bool:
+        nonlocal done, error
+        if item is end or isinstance(item, Exception):
+            done = True
+            error = item if item is not end else None
+            return False
+        batch.append(item)
+        return True
+
+    try:
+        while not done:
+            batch = []
+            if not take(await queue.get()):
+                break
+
+            deadline = flushed_at + window
+            while len(batch) < max_frames:
+                if not queue.empty():
+                    item = queue.get_nowait()
+                else:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    try:
+                        item = await asyncio.wait_for(queue.get(), remaining)
+                    except asyncio.TimeoutError:
+                        break
+                if not take(item):
+                    break
+
+            flushed_at = time.monotonic()
+            yield batch
+
+        if error is not None:
+            raise error
+    finally:
+        if not task.done():
+            task.cancel()
+
+
+async def encode_sse_stream(
+    iterator: AsyncIterator, window: float = CHAT_STREAM_BATCH_WINDOW
+) -> AsyncIterator[bytes]:
+    async for batch in batch_frames(iterator, window):
+        yield b"".join(encode_sse(item) for item in batch)
+
+
+class ChunkStreamingResponse(StreamingResponse):
+    """
+    Event stream whose body iterator may yield parsed chunks (dicts) next to
+    raw SSE text. Consumers inside the app read the chunks without parsing
+    them again; they are encoded, and small frames batched, only when the
+    response is sent to the client.
+    """
+
+    media_type = "text/event-stream"
+
+    async def stream_response(self, send) -> None:
+        self.body_iterator = encode_sse_stream(self.body_iterator)
+        await super().stream_response(send)
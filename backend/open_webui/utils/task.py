@@ -207,6 +207,29 @@ def title_generation_template(
     return template
 
 
+def batch_title_generation_template(
+    template: str, chats: list[list[dict]], user: Optional[dict] = None
+) -> str:
+    histories = "\n".join(
+        f'<chat_history id="{idx}">\n'
+        f"{replace_messages_variable('{{MESSAGES:END:2}}', messages)}\n"
+        "</chat_history>"
+        for idx, messages in enumerate(chats, start=1)
+    )
+    template = template.replace("{{CHATS}}", histories)
+
+    template = prompt_template(
+        template,
+        **(
+            {"user_name": user.get("name"), "user_location": user.get("location")}
+            if user
+            else {}
+        ),
+    )
+
+    return template
+
+
 def tags_generation_template(
     template: str, messages: list[dict], user: Optional[dict] = None
 ) -> str:
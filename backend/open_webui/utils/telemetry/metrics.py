@@ -0,0 +1,373 @@
+"""
+Metrics for the chat pipeline hot paths.
+
+Instruments are created through the OpenTelemetry metrics API. Until a
+MeterProvider is configured by `setup_metrics` they are no-op proxies, so
+recording costs a function call and nothing else when metrics are disabled.
+If opentelemetry is not installed at all, plain no-op instruments are used.
+
+Metric catalog
+--------------
+
+=====================================  ==============  =====  ===========================
+Name                                   Kind            Unit   Attributes
+=====================================  ==============  =====  ===========================
+webui.rag.retrieval.duration           histogram       s      search (vector, hybrid)
+webui.rag.embedding.duration           histogram       s      engine
+webui.rag.embedding.texts              counter         1      engine
+webui.rag.rerank.duration              histogram       s      method (reranker, cosine)
+webui.filter.duration                  histogram       s      filter_id, filter_type
+webui.chat.time_to_first_token         histogram       s      model
+webui.chat.tokens_per_second           histogram       1/s    model
+webui.chat.response.duration           histogram       s      model, stream
+webui.chat.db_writes                   counter         1      operation
+webui.socket.emits                     counter         1      event
+webui.upstream.requests.active         updowncounter   1      backend
+webui.upstream.request.duration        histogram       s      backend, status
+webui.tool_server.request.duration     histogram       s      server, operation, status
+webui.audit.queue.depth                updowncounter   1
+webui.audit.dropped                    counter         1
+webui.audit.write.duration             histogram       s
+webui.completion_cache.requests        counter         1      model, result, tier
+webui.completion_cache.saved_tokens    counter         1      model
+webui.background_task.queue.depth      updowncounter   1
+webui.background_task.dropped          counter         1      reason
+webui.background_task.wait             histogram       s
+webui.admission.queue.depth            updowncounter   1
+webui.admission.wait                   histogram       s      priority
+webui.admission.rejected               counter         1      reason
+webui.admission.active                 updowncounter   1
+webui.admission.limit                  updowncounter   1
+=====================================  ==============  =====  ===========================
+
+`webui.upstream.requests.active` is the number of requests currently open
+against Ollama / OpenAI-compatible backends and is the signal to watch for
+upstream pool saturation. A growing `webui.audit.queue.depth` or any
+`webui.audit.dropped` means the audit sinks cannot keep up with traffic.
+The completion cache hit ratio is the share of `result=hit` in
+`webui.completion_cache.requests`; `tier` tells whether a hit came from
+memory or the shared store.
+Title and tag tasks dropped with `reason=deadline` in
+`webui.background_task.dropped` mean the task models cannot keep up.
+`webui.admission.limit` is the adaptive chat completion concurrency limit of
+the worker; when it sits at its minimum with a deep `webui.admission.queue.depth`,
+upstream is the bottleneck, and `webui.admission.rejected` counts the 429s.
+Tokens per second is measured from the first
+token to the end of the stream, using the usage block when the backend
+sends one and the number of content deltas otherwise.
+"""
+
+import logging
+import time
+from contextlib import contextmanager
+
+from open_webui.env import (
+    ENABLE_OTEL,
+    ENABLE_OTEL_METRICS,
+    ENABLE_PROMETHEUS_METRICS,
+    OTEL_EXPORTER_OTLP_ENDPOINT,
+    OTEL_METRICS_EXPORT_INTERVAL,
+    OTEL_SERVICE_NAME,
+    SRC_LOG_LEVELS,
+)
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MAIN"])
+
+
+class _NoOpInstrument:
+    def add(self, amount, attributes=None):
+        pass
+
+    def record(self, amount, attributes=None):
+        pass
+
+
+class _NoOpMeter:
+    def create_counter(self, *args, **kwargs):
+        return _NoOpInstrument()
+
+    create_up_down_counter = create_counter
+    create_histogram = create_counter
+
+
+try:
+    from opentelemetry import metrics
+
+    meter = metrics.get_meter("open_webui")
+except ImportError:
+    metrics = None
+    meter = _NoOpMeter()
+
+# Latency buckets in seconds; the SDK defaults are tuned for milliseconds
+DURATION_BUCKETS = [0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60]
+
+RAG_RETRIEVAL_DURATION = meter.create_histogram(
+    "webui.rag.retrieval.duration",
+    unit="s",
+    description="Time spent querying the vector store for chat context",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+RAG_EMBEDDING_DURATION = meter.create_histogram(
+    "webui.rag.embedding.duration",
+    unit="s",
+    description="Time spent computing embeddings",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+RAG_EMBEDDING_TEXTS = meter.create_counter(
+    "webui.rag.embedding.texts",
+    unit="1",
+    description="Number of texts sent to the embedding model",
+)
+RAG_RERANK_DURATION = meter.create_histogram(
+    "webui.rag.rerank.duration",
+    unit="s",
+    description="Time spent reranking retrieved documents",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+FILTER_DURATION = meter.create_histogram(
+    "webui.filter.duration",
+    unit="s",
+    description="Time spent in a filter function handler",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+CHAT_TIME_TO_FIRST_TOKEN = meter.create_histogram(
+    "webui.chat.time_to_first_token",
+    unit="s",
+    description="Time from the start of the response to the first content token",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+CHAT_TOKENS_PER_SECOND = meter.create_histogram(
+    "webui.chat.tokens_per_second",
+    unit="1/s",
+    description="Generation speed of a streamed response after the first token",
+)
+CHAT_RESPONSE_DURATION = meter.create_histogram(
+    "webui.chat.response.duration",
+    unit="s",
+    description="Total time spent processing a chat response",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+CHAT_DB_WRITES = meter.create_counter(
+    "webui.chat.db_writes",
+    unit="1",
+    description="Database writes made while processing chat responses",
+)
+SOCKET_EMITS = meter.create_counter(
+    "webui.socket.emits",
+    unit="1",
+    description="Socket.IO events emitted to clients",
+)
+UPSTREAM_ACTIVE_REQUESTS = meter.create_up_down_counter(
+    "webui.upstream.requests.active",
+    unit="1",
+    description="Requests currently in flight to upstream model backends",
+)
+UPSTREAM_REQUEST_DURATION = meter.create_histogram(
+    "webui.upstream.request.duration",
+    unit="s",
+    description="Time until an upstream model backend returned response headers",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+TOOL_SERVER_REQUEST_DURATION = meter.create_histogram(
+    "webui.tool_server.request.duration",
+    unit="s",
+    description="Time spent invoking an OpenAPI tool server operation",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+AUDIT_QUEUE_DEPTH = meter.create_up_down_counter(
+    "webui.audit.queue.depth",
+    unit="1",
+    description="Audit entries waiting to be written",
+)
+AUDIT_DROPPED = meter.create_counter(
+    "webui.audit.dropped",
+    unit="1",
+    description="Audit entries dropped because the queue was full",
+)
+AUDIT_WRITE_DURATION = meter.create_histogram(
+    "webui.audit.write.duration",
+    unit="s",
+    description="Time spent writing a batch of audit entries to the sinks",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+COMPLETION_CACHE_REQUESTS = meter.create_counter(
+    "webui.completion_cache.requests",
+    unit="1",
+    description="Cacheable chat completion requests by cache result",
+)
+COMPLETION_CACHE_SAVED_TOKENS = meter.create_counter(
+    "webui.completion_cache.saved_tokens",
+    unit="1",
+    description="Upstream tokens not spent because a completion was cached",
+)
+BACKGROUND_TASK_QUEUE_DEPTH = meter.create_up_down_counter(
+    "webui.background_task.queue.depth",
+    unit="1",
+    description="Title and tag generation tasks waiting to run",
+)
+BACKGROUND_TASK_DROPPED = meter.create_counter(
+    "webui.background_task.dropped",
+    unit="1",
+    description="Background tasks skipped as duplicates or dropped at their deadline",
+)
+BACKGROUND_TASK_WAIT = meter.create_histogram(
+    "webui.background_task.wait",
+    unit="s",
+    description="Time a background task waited in the queue before running",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+ADMISSION_QUEUE_DEPTH = meter.create_up_down_counter(
+    "webui.admission.queue.depth",
+    unit="1",
+    description="Chat completions waiting for a concurrency slot",
+)
+ADMISSION_WAIT = meter.create_histogram(
+    "webui.admission.wait",
+    unit="s",
+    description="Time a chat completion waited for a concurrency slot",
+    explicit_bucket_boundaries_advisory=DURATION_BUCKETS,
+)
+ADMISSION_REJECTED = meter.create_counter(
+    "webui.admission.rejected",
+    unit="1",
+    description="Chat completions rejected by rate limits or a full queue",
+)
+ADMISSION_ACTIVE = meter.create_up_down_counter(
+    "webui.admission.active",
+    unit="1",
+    description="Chat completions holding a concurrency slot",
+)
+ADMISSION_LIMIT = meter.create_up_down_counter(
+    "webui.admission.limit",
+    unit="1",
+    description="Current adaptive chat completion concurrency limit",
+)
+
+
+@contextmanager
+def record_duration(histogram, attributes: dict = None):
+    """
+    Record the wall-clock duration of the wrapped block on `histogram`,
+    including when the block raises.
+    """
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        histogram.record(time.perf_counter() - start, attributes or {})
+
+
+class UpstreamRequestTracker:
+    """
+    Counts a request as in flight against an upstream backend from creation
+    until `finish`, which for streamed responses happens when the stream is
+    closed rather than when the handler returns.
+    """
+
+    def __init__(self, backend: str):
+        self.attributes = {"backend": backend}
+        self.start = time.perf_counter()
+        self.active = True
+        UPSTREAM_ACTIVE_REQUESTS.add(1, self.attributes)
+
+    def response_received(self, status):
+        UPSTREAM_REQUEST_DURATION.record(
+            time.perf_counter() - self.start,
+            {**self.attributes, "status": str(status)},
+        )
+
+    def finish(self):
+        if self.active:
+            self.active = False
+            UPSTREAM_ACTIVE_REQUESTS.add(-1, self.attributes)
+
+
+class StreamTimer:
+    """
+    Measures time to first token and generation speed of a streamed response.
+    """
+
+    def __init__(self, model: str):
+        self.attributes = {"model": model}
+        self.start = time.perf_counter()
+        self.first_token_at = None
+        self.token_count = 0
+
+    def on_token(self, count: int = 1):
+        if self.first_token_at is None:
+            self.first_token_at = time.perf_counter()
+            CHAT_TIME_TO_FIRST_TOKEN.record(
+                self.first_token_at - self.start, self.attributes
+            )
+        self.token_count += count
+
+    def finish(self, completion_tokens: int = None):
+        end = time.perf_counter()
+        CHAT_RESPONSE_DURATION.record(
+            end - self.start, {**self.attributes, "stream": True}
+        )
+
+        tokens = completion_tokens or self.token_count
+        if self.first_token_at is not None and tokens and end > self.first_token_at:
+            CHAT_TOKENS_PER_SECOND.record(
+                tokens / (end - self.first_token_at), self.attributes
+            )
+
+
+def setup_metrics(app):
+    """
+    Install a MeterProvider exporting over OTLP and/or to a Prometheus
+    `/metrics` endpoint, depending on configuration.
+    """
+    if metrics is None:
+        log.warning("opentelemetry is not installed; metrics are disabled")
+        return
+
+    from opentelemetry.sdk.metrics import MeterProvider
+    from opentelemetry.sdk.resources import SERVICE_NAME, Resource
+
+    readers = []
+
+    if ENABLE_OTEL and ENABLE_OTEL_METRICS:
+        from opentelemetry.exporter.otlp.proto.grpc.metric_exporter import (
+            OTLPMetricExporter,
+        )
+        from opentelemetry.sdk.metrics.export import PeriodicExportingMetricReader
+
+        readers.append(
+            PeriodicExportingMetricReader(
+                OTLPMetricExporter(endpoint=OTEL_EXPORTER_OTLP_ENDPOINT),
+                export_interval_millis=OTEL_METRICS_EXPORT_INTERVAL,
+            )
+        )
+
+    if ENABLE_PROMETHEUS_METRICS:
+        try:
+            from opentelemetry.exporter.prometheus import PrometheusMetricReader
+            from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
+        except ImportError:
+            log.warning(
+                "ENABLE_PROMETHEUS_METRICS is set but opentelemetry-exporter-prometheus "
+                "is not installed; /metrics will not be served"
+            )
+        else:
+            from fastapi import Response
+
+            readers.append(PrometheusMetricReader())
+
+            @app.get("/metrics", include_in_schema=False)
+            async def get_metrics():
+                return Response(
+                    content=generate_latest(), media_type=CONTENT_TYPE_LATEST
+                )
+
+    if not readers:
+        return
+
+    metrics.set_meter_provider(
+        MeterProvider(
+            resource=Resource.create(attributes={SERVICE_NAME: OTEL_SERVICE_NAME}),
+            metric_readers=readers,
+        )
+    )
@@ -4,8 +4,13 @@ import re
 import inspect
 import aiohttp
 import asyncio
+import hashlib
+import json
+import time
 import yaml
 
+from dataclasses import dataclass
+
 from pydantic import BaseModel
 from pydantic.fields import FieldInfo
 from typing import (
@@ -36,9 +41,17 @@ from langchain_core.utils.function_calling import (
 from open_webui.models.tools import Tools
 from open_webui.models.users import UserModel
 from open_webui.utils.plugin import load_tool_module_by_id
-from open_webui.env import AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA
+from open_webui.env import (
+    AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA,
+    TOOL_CALL_CONCURRENCY,
+    TOOL_CALL_TIMEOUT,
+    TOOL_SERVER_MAX_CONNECTIONS,
+    TOOL_SERVER_SPEC_REFRESH_INTERVAL,
+)
+from open_webui.utils.telemetry.metrics import TOOL_SERVER_REQUEST_DURATION
 
 import copy
+import weakref
 
 log = logging.getLogger(__name__)
 
@@ -144,8 +157,12 @@ def get_tools(
 
             # Set valves for the tool
             if hasattr(module, "valves") and hasattr(module, "Valves"):
-                valves = Tools.get_tool_valves_by_id(tool_id) or {}
-                module.valves = module.Valves(**valves)
+                module.valves = request.app.state.TOOLS.get_valves(
+                    tool_id,
+                    lambda: module.Valves(
+                        **(Tools.get_tool_valves_by_id(tool_id) or {})
+                    ),
+                )
             if hasattr(module, "UserValves"):
                 extra_params["__user__"]["valves"] = module.UserValves(  # type: ignore
                     **Tools.get_user_valves_by_id_and_user_id(tool_id, user.id)
@@ -420,52 +437,283 @@ def convert_openapi_to_tool_payload(openapi_spec):
     return tool_payload
 
 
-async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
-    headers = {
-        "Accept": "application/json",
-        "Content-Type": "application/json",
-    }
-    if token:
-        headers["Authorization"] = f"Bearer {token}"
-
-    error = None
-    try:
+@dataclass
+class ToolServerOperation:
+    method: str
+    path: str
+    path_params: list[str]
+    query_params: list[str]
+    has_body: bool
+
+
+def build_operation_index(openapi: dict) -> dict[str, ToolServerOperation]:
+    """
+    Map each operationId of an OpenAPI document to what is needed to call it.
+    """
+    index = {}
+    for path, methods in openapi.get("paths", {}).items():
+        for method, operation in methods.items():
+            if not isinstance(operation, dict) or not operation.get("operationId"):
+                continue
+
+            parameters = operation.get("parameters", [])
+            index.setdefault(
+                operation["operationId"],
+                ToolServerOperation(
+                    method=method.lower(),
+                    path=path,
+                    path_params=[p["name"] for p in parameters if p["in"] == "path"],
+                    query_params=[p["name"] for p in parameters if p["in"] == "query"],
+                    has_body=bool(operation.get("requestBody", {}).get("content")),
+                ),
+            )
+    return index
+
+
+class ToolServerClient:
+    """
+    Client for one OpenAPI tool server.
+
+    Keeps a pooled aiohttp session, the last fetched spec together with its
+    converted tool specs and operationId index, and per-operation latency and
+    error counters. Spec fetches send `If-None-Match` and skip re-conversion
+    when the server answers 304 or returns an unchanged document.
+    """
+
+    def __init__(self, url: str, spec_url: str):
+        self.url = url
+        self.spec_url = spec_url
+        self.session: Optional[aiohttp.ClientSession] = None
+        self.etag: Optional[str] = None
+        self.spec_hash: Optional[str] = None
+        self.data: Optional[Dict[str, Any]] = None
+        self.index: dict[str, ToolServerOperation] = {}
+        self.stats: dict[str, dict] = {}
+
+    def get_session(self) -> aiohttp.ClientSession:
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=TOOL_SERVER_MAX_CONNECTIONS),
+                trust_env=True,
+            )
+        return self.session
+
+    async def close(self):
+        if self.session is not None and not self.session.closed:
+            await self.session.close()
+
+    def set_spec(self, openapi: dict):
+        self.data = {
+            "openapi": openapi,
+            "info": openapi.get("info", {}),
+            "specs": convert_openapi_to_tool_payload(openapi),
+        }
+        self.index = build_operation_index(openapi)
+
+    async def fetch_spec(self, token: Optional[str] = None) -> Dict[str, Any]:
+        headers = {
+            "Accept": "application/json",
+            "Content-Type": "application/json",
+        }
+        if token:
+            headers["Authorization"] = f"Bearer {token}"
+        if self.etag and self.data is not None:
+            headers["If-None-Match"] = self.etag
+
         timeout = aiohttp.ClientTimeout(total=AIOHTTP_CLIENT_TIMEOUT_TOOL_SERVER_DATA)
-        async with aiohttp.ClientSession(timeout=timeout) as session:
-            async with session.get(url, headers=headers) as response:
-                if response.status != 200:
-                    error_body = await response.json()
-                    raise Exception(error_body)
-
-                # Check if URL ends with .yaml or .yml to determine format
-                if url.lower().endswith((".yaml", ".yml")):
-                    text_content = await response.text()
-                    res = yaml.safe_load(text_content)
+        async with self.get_session().get(
+            self.spec_url, headers=headers, timeout=timeout
+        ) as response:
+            if response.status == 304 and self.data is not None:
+                return self.data
+
+            if response.status != 200:
+                raise Exception(await response.text())
+
+            content = await response.read()
+            self.etag = response.headers.get("ETag")
+
+        spec_hash = hashlib.sha256(content).hexdigest()
+        if spec_hash != self.spec_hash or self.data is None:
+            # Check if URL ends with .yaml or .yml to determine format
+            if self.spec_url.lower().endswith((".yaml", ".yml")):
+                openapi = yaml.safe_load(content)
+            else:
+                openapi = json.loads(content)
+
+            self.set_spec(openapi)
+            self.spec_hash = spec_hash
+            log.debug(f"Loaded tool server spec from {self.spec_url}")
+
+        return self.data
+
+    def record(self, name: str, duration: float, error: bool):
+        stats = self.stats.setdefault(
+            name, {"count": 0, "errors": 0, "total_duration": 0.0, "max_duration": 0.0}
+        )
+        stats["count"] += 1
+        stats["errors"] += int(error)
+        stats["total_duration"] += duration
+        stats["max_duration"] = max(stats["max_duration"], duration)
+
+        TOOL_SERVER_REQUEST_DURATION.record(
+            duration,
+            {
+                "server": self.url,
+                "operation": name,
+                "status": "error" if error else "ok",
+            },
+        )
+
+    def get_stats(self) -> dict[str, dict]:
+        return {
+            name: {
+                **stats,
+                "avg_duration": stats["total_duration"] / stats["count"],
+            }
+            for name, stats in self.stats.items()
+        }
+
+    async def execute(
+        self,
+        token: Optional[str],
+        name: str,
+        params: Dict[str, Any],
+        server_data: Optional[Dict[str, Any]] = None,
+    ) -> Any:
+        start = time.perf_counter()
+        error = None
+        try:
+            if not self.index and server_data is not None:
+                self.set_spec(server_data.get("openapi", {}))
+
+            operation = self.index.get(name)
+            if operation is None:
+                raise Exception(f"No matching route found for operationId: {name}")
+
+            final_url = f"{self.url}{operation.path}"
+            for key in operation.path_params:
+                if key in params:
+                    final_url = final_url.replace(f"{{{key}}}", str(params[key]))
+
+            query_params = {
+                key: str(params[key]) for key in operation.query_params if key in params
+            }
+
+            body_params = None
+            if operation.has_body:
+                if params:
+                    body_params = params
                 else:
-                    res = await response.json()
-    except Exception as err:
-        log.exception(f"Could not fetch tool server spec from {url}")
-        if isinstance(err, dict) and "detail" in err:
-            error = err["detail"]
-        else:
+                    raise Exception(
+                        f"Request body expected for operation '{name}' but none found."
+                    )
+
+            headers = {"Content-Type": "application/json"}
+            if token:
+                headers["Authorization"] = f"Bearer {token}"
+
+            async with self.get_session().request(
+                operation.method,
+                final_url,
+                params=query_params or None,
+                json=(
+                    body_params
+                    if operation.method in ["post", "put", "patch"]
+                    else None
+                ),
+                headers=headers,
+            ) as response:
+                if response.status >= 400:
+                    text = await response.text()
+                    raise Exception(f"HTTP error {response.status}: {text}")
+                return await response.json()
+
+        except Exception as err:
             error = str(err)
-        raise Exception(error)
+            log.warning(f"Tool server {self.url} operation {name} failed: {error}")
+            return {"error": error}
+        finally:
+            self.record(name, time.perf_counter() - start, error is not None)
+
+    async def execute_many(
+        self, token: Optional[str], calls: list[tuple[str, Dict[str, Any]]]
+    ) -> list[Any]:
+        """
+        Invoke several operations concurrently over the pooled session and
+        return their results in the order of `calls`.
+        """
+        return await asyncio.gather(
+            *(self.execute(token, name, params) for name, params in calls)
+        )
+
+
+TOOL_SERVER_CLIENTS: dict[str, ToolServerClient] = {}
+
+# Replaced clients being closed, referenced until their close finishes
+CLOSING_TOOL_SERVER_CLIENTS: set[asyncio.Task] = set()
+
+
+def close_tool_server_client(client: ToolServerClient):
+    task = asyncio.create_task(client.close())
+    CLOSING_TOOL_SERVER_CLIENTS.add(task)
+    task.add_done_callback(CLOSING_TOOL_SERVER_CLIENTS.discard)
+
+
+def get_tool_server_client(url: str, spec_url: str) -> ToolServerClient:
+    client = TOOL_SERVER_CLIENTS.get(url)
+    if client is None or client.spec_url != spec_url:
+        if client is not None:
+            close_tool_server_client(client)
+        client = ToolServerClient(url, spec_url)
+        TOOL_SERVER_CLIENTS[url] = client
+    return client
 
-    data = {
-        "openapi": res,
-        "info": res.get("info", {}),
-        "specs": convert_openapi_to_tool_payload(res),
-    }
 
-    print("Fetched data:", data)
-    return data
+def remove_tool_server_clients(urls: set[str]):
+    """Closes the clients of servers that are no longer configured."""
+    for url in [url for url in TOOL_SERVER_CLIENTS if url not in urls]:
+        close_tool_server_client(TOOL_SERVER_CLIENTS.pop(url))
+
+
+def get_tool_server_stats() -> dict[str, dict]:
+    return {url: client.get_stats() for url, client in TOOL_SERVER_CLIENTS.items()}
+
+
+async def close_tool_server_clients():
+    for client in TOOL_SERVER_CLIENTS.values():
+        await client.close()
+
+
+async def get_tool_server_data(token: str, url: str) -> Dict[str, Any]:
+    """
+    Fetch and convert a tool server spec without caching it, e.g. to verify
+    a connection before it is saved.
+    """
+    client = ToolServerClient(url, url)
+    try:
+        return await client.fetch_spec(token)
+    except Exception as err:
+        log.exception(f"Could not fetch tool server spec from {url}")
+        raise Exception(str(err))
+    finally:
+        await client.close()
 
 
 async def get_tool_servers_data(
-    servers: List[Dict[str, Any]], session_token: Optional[str] = None
+    servers: List[Dict[str, Any]],
+    session_token: Optional[str] = None,
+    fetch_session_auth: bool = True,
 ) -> List[Dict[str, Any]]:
+    """
+    Fetch the specs of the enabled tool servers. With `fetch_session_auth`
+    off, servers authenticated by the user's session are not requested and
+    keep their last fetched spec, e.g. in the background refresh where there
+    is no session.
+    """
     # Prepare list of enabled servers along with their original index
     server_entries = []
+    cached_entries = []
     for idx, server in enumerate(servers):
         if server.get("config", {}).get("enable"):
             url_path = server.get("path", "openapi.json")
@@ -478,20 +726,45 @@ async def get_tool_servers_data(
                 token = server.get("key", "")
             elif auth_type == "session":
                 token = session_token
-            server_entries.append((idx, server, full_url, token))
+            client = get_tool_server_client(server.get("url"), full_url)
+            if auth_type == "session" and not fetch_session_auth:
+                cached_entries.append((idx, server, client))
+            else:
+                server_entries.append((idx, server, client, token))
+
+    remove_tool_server_clients(
+        {server.get("url") for _, server, _, _ in server_entries}
+        | {server.get("url") for _, server, _ in cached_entries}
+    )
 
     # Create async tasks to fetch data
-    tasks = [get_tool_server_data(token, url) for (_, _, url, token) in server_entries]
+    tasks = [client.fetch_spec(token) for (_, _, client, token) in server_entries]
 
     # Execute tasks concurrently
     responses = await asyncio.gather(*tasks, return_exceptions=True)
+    responses += [client.data for _, _, client in cached_entries]
+    server_entries += [
+        (idx, server, client, None) for idx, server, client in cached_entries
+    ]
 
     # Build final results with index and server metadata
     results = []
-    for (idx, server, url, _), response in zip(server_entries, responses):
-        if isinstance(response, Exception):
-            print(f"Failed to connect to {url} OpenAPI tool server")
+    for (idx, server, client, _), response in zip(server_entries, responses):
+        if response is None:
+            # Not fetched yet and not fetched now
             continue
+        if isinstance(response, Exception):
+            if client.data is None:
+                log.error(
+                    f"Failed to connect to {client.spec_url} OpenAPI tool server: {response}"
+                )
+                continue
+
+            # Keep serving the last known spec through transient failures
+            log.warning(
+                f"Failed to refresh {client.spec_url} OpenAPI tool server: {response}"
+            )
+            response = client.data
 
         results.append(
             {
@@ -503,95 +776,107 @@ async def get_tool_servers_data(
             }
         )
 
-    return results
+    return sorted(results, key=lambda result: result["idx"])
+
+
+async def periodic_tool_server_refresh(app):
+    """
+    Re-fetch tool server specs in the background so changes on the servers
+    are picked up without a restart. Unchanged specs cost a conditional GET.
+    """
+    if TOOL_SERVER_SPEC_REFRESH_INTERVAL <= 0:
+        return
+
+    while True:
+        await asyncio.sleep(TOOL_SERVER_SPEC_REFRESH_INTERVAL)
+        try:
+            if app.state.config.TOOL_SERVER_CONNECTIONS:
+                # Servers using the user's session can't be fetched without one
+                app.state.TOOL_SERVERS = await get_tool_servers_data(
+                    app.state.config.TOOL_SERVER_CONNECTIONS,
+                    fetch_session_auth=False,
+                )
+        except Exception as e:
+            log.exception(f"Failed to refresh tool servers: {e}")
 
 
 async def execute_tool_server(
     token: str, url: str, name: str, params: Dict[str, Any], server_data: Dict[str, Any]
 ) -> Any:
-    error = None
-    try:
-        openapi = server_data.get("openapi", {})
-        paths = openapi.get("paths", {})
-
-        matching_route = None
-        for route_path, methods in paths.items():
-            for http_method, operation in methods.items():
-                if isinstance(operation, dict) and operation.get("operationId") == name:
-                    matching_route = (route_path, methods)
-                    break
-            if matching_route:
-                break
-
-        if not matching_route:
-            raise Exception(f"No matching route found for operationId: {name}")
-
-        route_path, methods = matching_route
-
-        method_entry = None
-        for http_method, operation in methods.items():
-            if operation.get("operationId") == name:
-                method_entry = (http_method.lower(), operation)
-                break
-
-        if not method_entry:
-            raise Exception(f"No matching method found for operationId: {name}")
-
-        http_method, operation = method_entry
-
-        path_params = {}
-        query_params = {}
-        body_params = {}
-
-        for param in operation.get("parameters", []):
-            param_name = param["name"]
-            param_in = param["in"]
-            if param_name in params:
-                if param_in == "path":
-                    path_params[param_name] = params[param_name]
-                elif param_in == "query":
-                    query_params[param_name] = params[param_name]
-
-        final_url = f"{url}{route_path}"
-        for key, value in path_params.items():
-            final_url = final_url.replace(f"{{{key}}}", str(value))
-
-        if query_params:
-            query_string = "&".join(f"{k}={v}" for k, v in query_params.items())
-            final_url = f"{final_url}?{query_string}"
-
-        if operation.get("requestBody", {}).get("content"):
-            if params:
-                body_params = params
-            else:
-                raise Exception(
-                    f"Request body expected for operation '{name}' but none found."
-                )
+    client = TOOL_SERVER_CLIENTS.get(url)
+    if client is None:
+        client = get_tool_server_client(url, url)
+    return await client.execute(token, name, params, server_data=server_data)
 
-        headers = {"Content-Type": "application/json"}
 
-        if token:
-            headers["Authorization"] = f"Bearer {token}"
+# One semaphore per chat, shared by every response generated for it (e.g.
+# several models answering at once). Entries disappear with their last user.
+CHAT_TOOL_SEMAPHORES: "weakref.WeakValueDictionary[str, asyncio.Semaphore]" = (
+    weakref.WeakValueDictionary()
+)
 
-        async with aiohttp.ClientSession() as session:
-            request_method = getattr(session, http_method.lower())
-
-            if http_method in ["post", "put", "patch"]:
-                async with request_method(
-                    final_url, json=body_params, headers=headers
-                ) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
-            else:
-                async with request_method(final_url, headers=headers) as response:
-                    if response.status >= 400:
-                        text = await response.text()
-                        raise Exception(f"HTTP error {response.status}: {text}")
-                    return await response.json()
 
-    except Exception as err:
-        error = str(err)
-        print("API Request Error:", error)
-        return {"error": error}
+def get_chat_tool_semaphore(chat_id: Optional[str]) -> asyncio.Semaphore:
+    if not chat_id:
+        return asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+
+    semaphore = CHAT_TOOL_SEMAPHORES.get(chat_id)
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(TOOL_CALL_CONCURRENCY)
+        CHAT_TOOL_SEMAPHORES[chat_id] = semaphore
+    return semaphore
+
+
+async def execute_tool_calls(
+    tool_calls: list,
+    execute: Callable[[Any], Awaitable[Any]],
+    chat_id: Optional[str] = None,
+    get_name: Callable[[Any], str] = lambda tool_call: "",
+    event_emitter: Optional[Callable[[dict], Awaitable[None]]] = None,
+    timeout: Optional[int] = TOOL_CALL_TIMEOUT,
+) -> list:
+    """
+    Run `execute` for every tool call concurrently, at most
+    TOOL_CALL_CONCURRENCY at a time per chat, and return the results in the
+    order of `tool_calls` regardless of completion order.
+
+    A call exceeding `timeout` yields an error string as its result. Cancelling
+    the caller (e.g. stopping the chat task) cancels all pending calls.
+    """
+    semaphore = get_chat_tool_semaphore(chat_id)
+    total = len(tool_calls)
+    completed = 0
+
+    async def emit_status(description: str, done: bool):
+        if event_emitter and total > 1:
+            await event_emitter(
+                {
+                    "type": "status",
+                    "data": {
+                        "action": "tool_calls",
+                        "description": description,
+                        "done": done,
+                    },
+                }
+            )
+
+    async def run(tool_call):
+        nonlocal completed
+        name = get_name(tool_call)
+
+        async with semaphore:
+            try:
+                result = await asyncio.wait_for(execute(tool_call), timeout=timeout)
+            except asyncio.TimeoutError:
+                log.warning(f"Tool call {name} timed out after {timeout}s")
+                result = f"Tool `{name}` timed out after {timeout} seconds"
+
+        completed += 1
+        await emit_status(
+            f"Running tools ({completed}/{total}): {name} finished",
+            completed == total,
+        )
+        return result
+
+    await emit_status(f"Running tools (0/{total})", False)
+    return await asyncio.gather(*(run(tool_call) for tool_call in tool_calls))
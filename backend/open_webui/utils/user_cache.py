@@ -0,0 +1,162 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+
+from open_webui.env import (
+    REDIS_URL,
+    REDIS_SENTINEL_HOSTS,
+    REDIS_SENTINEL_PORT,
+    SRC_LOG_LEVELS,
+    USER_CACHE_MAX_SIZE,
+    USER_CACHE_TTL,
+)
+from open_webui.utils.redis import get_redis_connection, get_sentinels_from_env
+
+log = logging.getLogger(__name__)
+log.setLevel(SRC_LOG_LEVELS["MODELS"])
+
+
+USER_CACHE_INVALIDATION_CHANNEL = "open-webui:user-cache:invalidate"
+
+
+class UserCache:
+    """
+    Short-lived, size-bounded in-memory cache of authenticated users.
+
+    Entries are keyed by user id, with a secondary index from API key to user
+    id. Writes to a user go through `invalidate`, which drops the local entry
+    and, when Redis is configured, publishes the id so every other node drops
+    its copy as well.
+    """
+
+    def __init__(self, ttl: int, max_size: int, redis_url="", redis_sentinels=[]):
+        self.ttl = ttl
+        self.max_size = max_size
+        self.users = OrderedDict()
+        self.api_keys = {}
+        self.lock = threading.Lock()
+
+        self.redis = None
+        self.pubsub_thread = None
+        if redis_url:
+            try:
+                self.redis = get_redis_connection(
+                    redis_url, redis_sentinels, decode_responses=True
+                )
+            except Exception as e:
+                log.warning(f"User cache invalidation via Redis disabled: {e}")
+
+    def get(self, user_id: str):
+        if self.ttl <= 0:
+            return None
+
+        with self.lock:
+            entry = self.users.get(user_id)
+            if entry is None:
+                return None
+
+            expires_at, user = entry
+            if expires_at < time.monotonic():
+                self._evict(user_id)
+                return None
+
+            self.users.move_to_end(user_id)
+            return user
+
+    def get_by_api_key(self, api_key: str):
+        with self.lock:
+            user_id = self.api_keys.get(api_key)
+        if user_id is None:
+            return None
+        return self.get(user_id)
+
+    def set(self, user):
+        if self.ttl <= 0 or user is None:
+            return
+
+        with self.lock:
+            self._evict(user.id)
+            self.users[user.id] = (time.monotonic() + self.ttl, user)
+            if user.api_key:
+                self.api_keys[user.api_key] = user.id
+
+            while len(self.users) > self.max_size:
+                oldest_id = next(iter(self.users))
+                self._evict(oldest_id)
+
+    def get_or_load(self, user_id: str, loader: Callable[[str], Optional[object]]):
+        user = self.get(user_id)
+        if user is None:
+            user = loader(user_id)
+            self.set(user)
+        return user
+
+    def invalidate(self, user_id: str, publish: bool = True):
+        with self.lock:
+            self._evict(user_id)
+
+        if publish and self.redis is not None:
+            try:
+                self.redis.publish(USER_CACHE_INVALIDATION_CHANNEL, user_id)
+            except Exception as e:
+                log.warning(f"Failed to publish user cache invalidation: {e}")
+
+    def clear(self):
+        with self.lock:
+            self.users.clear()
+            self.api_keys.clear()
+
+    def _evict(self, user_id: str):
+        entry = self.users.pop(user_id, None)
+        if entry is not None and entry[1].api_key:
+            self.api_keys.pop(entry[1].api_key, None)
+
+    def start_listener(self):
+        """
+        Subscribe to invalidations published by other nodes. Runs the Redis
+        pub/sub loop in a daemon thread so it is independent of the event loop.
+        """
+        if self.redis is None or self.pubsub_thread is not None:
+            return
+
+        def handle_message(message):
+            self.invalidate(message["data"], publish=False)
+
+        try:
+            pubsub = self.redis.pubsub(ignore_subscribe_messages=True)
+            pubsub.subscribe(**{USER_CACHE_INVALIDATION_CHANNEL: handle_message})
+            self.pubsub_thread = pubsub.run_in_thread(sleep_time=1, daemon=True)
+        except Exception as e:
+            log.warning(f"Failed to subscribe to user cache invalidations: {e}")
+
+
+class LastActiveTracker:
+    """
+    Coalesces `last_active_at` updates in memory so that each user costs at
+    most one write per flush interval, no matter how many requests they make.
+    """
+
+    def __init__(self):
+        self.pending = {}
+        self.lock = threading.Lock()
+
+    def touch(self, user_id: str):
+        with self.lock:
+            self.pending[user_id] = int(time.time())
+
+    def drain(self) -> dict[str, int]:
+        with self.lock:
+            pending, self.pending = self.pending, {}
+        return pending
+
+
+USER_CACHE = UserCache(
+    USER_CACHE_TTL,
+    USER_CACHE_MAX_SIZE,
+    redis_url=REDIS_URL,
+    redis_sentinels=get_sentinels_from_env(REDIS_SENTINEL_HOSTS, REDIS_SENTINEL_PORT),
+)
+
+LAST_ACTIVE_TRACKER = LastActiveTracker()
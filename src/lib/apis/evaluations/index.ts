@@ -62,6 +62,94 @@ export const updateConfig = async (token: string, config: object) => {
 	return res;
 };
 
+export const getLeaderboard = async (
+	token: string = '',
+	query: string = '',
+	page: number = 1,
+	limit: number = 1000
+) => {
+	let error = null;
+
+	const searchParams = new URLSearchParams();
+	if (query) searchParams.append('query', query);
+	searchParams.append('page', `${page}`);
+	searchParams.append('limit', `${limit}`);
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/evaluations/leaderboard?${searchParams}`, {
+		method: 'GET',
+		headers: {
+			Accept: 'application/json',
+			'Content-Type': 'application/json',
+			authorization: `Bearer ${token}`
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.then((json) => {
+			return json;
+		})
+		.catch((err) => {
+			error = err.detail;
+			console.log(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
+	return res;
+};
+
+export const getFeedbacksList = async (
+	token: string = '',
+	type: string = 'user_feedback',
+	query: string = '',
+	orderBy: string = 'created_at',
+	direction: string = 'desc',
+	page: number = 1,
+	limit: number = 20
+) => {
+	let error = null;
+
+	const searchParams = new URLSearchParams();
+	searchParams.append('type', type);
+	if (query) searchParams.append('query', query);
+	searchParams.append('order_by', orderBy);
+	searchParams.append('direction', direction);
+	searchParams.append('page', `${page}`);
+	searchParams.append('limit', `${limit}`);
+
+	const res = await fetch(`${WEBUI_API_BASE_URL}/evaluations/feedbacks/list?${searchParams}`, {
+		method: 'GET',
+		headers: {
+			Accept: 'application/json',
+			'Content-Type': 'application/json',
+			authorization: `Bearer ${token}`
+		}
+	})
+		.then(async (res) => {
+			if (!res.ok) throw await res.json();
+			return res.json();
+		})
+		.then((json) => {
+			return json;
+		})
+		.catch((err) => {
+			error = err.detail;
+			console.log(err);
+			return null;
+		});
+
+	if (error) {
+		throw error;
+	}
+
+	return res;
+};
+
 export const getAllFeedbacks = async (token: string = '') => {
 	let error = null;
 
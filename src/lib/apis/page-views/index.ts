@@ -44,7 +44,7 @@ export interface AnalyticsSummary {
 export const recordPageView = async (
   token: string,
   data: PageViewCreateForm
-): Promise<{ message: string; id: number }> => {
+): Promise<{ message: string }> => {
   const response = await fetch(`${WEBUI_API_BASE_URL}/page-views/record`, {
     method: 'POST',
     headers: {